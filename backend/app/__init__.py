@@ -14,6 +14,10 @@ import secrets
 from flask import Flask
 from flask_cors import CORS
 
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.ontology_artifact import load_or_build_artifact
+from app.services.policy_cache import load_policy_cache
+from app.models.diagnosis_session import flush_request_sessions, start_session_sweeper
 from app.services.verification import (
     OntologyBuilder,
     VerificationLayer,
@@ -96,9 +100,18 @@ def create_app():
     # --- Store shared resources on app config ---
     flask_app.config["QUESTION_BANK_EN"] = QUESTION_BANK_EN
     flask_app.config["QUESTION_BANK_TL"] = QUESTION_BANK_TL
+    # Ontology profiles, keyword automaton and compiled question banks come
+    # from the persisted artifact (rebuilt only when its inputs change)
+    ontology_artifact = load_or_build_artifact(
+        QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS
+    )
+    # The follow-up hot path uses these indexed views
+    flask_app.config["QUESTION_BANKS"] = ontology_artifact.question_banks
+    # Precompiled next-question selections (POLICY_CACHE_PATH), if built
+    load_policy_cache(ontology_artifact.content_hash)
 
     # Neuro-Symbolic Verification Layer
-    ontology_builder = OntologyBuilder(QUESTION_BANK_EN, QUESTION_BANK_TL)
+    ontology_builder = OntologyBuilder.from_profiles(ontology_artifact.profiles)
     verification_layer = VerificationLayer(ontology_builder)
     flask_app.config["VERIFICATION_LAYER"] = verification_layer
 
@@ -117,6 +130,13 @@ def create_app():
     flask_app.register_blueprint(outbreak_bp, url_prefix="/api/surveillance/outbreaks")
     flask_app.register_blueprint(user_bp)
 
+    # Session-store writes made while handling a request are persisted before
+    # its response is sent (SESSION_CACHE_MODE="versioned")
+    flask_app.teardown_request(flush_request_sessions)
+    # Expired diagnosis sessions are deleted in the background
+    # (SESSION_SWEEP_INTERVAL=0 leaves it to POST /diagnosis/sessions/sweep)
+    start_session_sweeper()
+
     return flask_app
 
 
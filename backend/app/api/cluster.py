@@ -10,6 +10,7 @@ from app.services.cluster_service import (
     run_kmeans,
     get_cluster_statistics,
 )
+from app.services.compute_pool import ComputePoolFull, run_compute
 from app.services.illness_cluster_service import (
     fetch_diagnosis_data,
     run_illness_kmeans,
@@ -45,6 +46,36 @@ def _parse_bool_with_validation(value, default, field_name):
     )
 
 
+def _silhouette_sweep(data, k_min, k_max, n_samples):
+    """Fit KMeans for every valid k in [k_min, k_max] and score it (CPU-heavy)."""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+    from collections import Counter
+
+    results = []
+    for k in range(k_min, k_max + 1):
+        # Valid k range for silhouette: 2 <= k < n_samples
+        if k < 2 or k >= n_samples:
+            continue
+        try:
+            model = KMeans(n_clusters=k, random_state=42, n_init=10)
+            labels = model.fit_predict(data)
+            score = float(silhouette_score(data, labels))
+            counts = Counter(labels.tolist())
+            results.append(
+                {
+                    "k": k,
+                    "silhouette": round(score, 4),
+                    "inertia": float(model.inertia_),
+                    "cluster_sizes": dict(counts),
+                }
+            )
+        except Exception as e:
+            # Skip problematic k
+            results.append({"k": k, "error": str(e)})
+    return results
+
+
 @cluster_bp.route("/api/patient-clusters", methods=["GET"])
 def patient_clusters():
     try:
@@ -72,7 +103,7 @@ def patient_clusters():
         n_clusters = min(n_clusters, len(data))
 
         # Run K-means clustering
-        clusters, centers = run_kmeans(data, n_clusters=n_clusters)
+        clusters, centers = run_compute(run_kmeans, data, n_clusters=n_clusters)
 
         # Get cluster statistics
         cluster_stats = get_cluster_statistics(patient_info, clusters, n_clusters)
@@ -98,6 +129,8 @@ def patient_clusters():
                 "centers": centers.tolist(),
             }
         )
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"ERROR in patient_clusters: {str(e)}")
@@ -155,31 +188,7 @@ def patient_clusters_silhouette():
                 400,
             )
 
-        from sklearn.cluster import KMeans
-        from sklearn.metrics import silhouette_score
-        from collections import Counter
-
-        results = []
-        for k in range(k_min, k_max + 1):
-            # Valid k range for silhouette: 2 <= k < n_samples
-            if k < 2 or k >= n_samples:
-                continue
-            try:
-                model = KMeans(n_clusters=k, random_state=42, n_init=10)
-                labels = model.fit_predict(data)
-                score = float(silhouette_score(data, labels))
-                counts = Counter(labels.tolist())
-                results.append(
-                    {
-                        "k": k,
-                        "silhouette": round(score, 4),
-                        "inertia": float(model.inertia_),
-                        "cluster_sizes": dict(counts),
-                    }
-                )
-            except Exception as e:
-                # Skip problematic k
-                results.append({"k": k, "error": str(e)})
+        results = run_compute(_silhouette_sweep, data, k_min, k_max, n_samples)
 
         # Sort by silhouette desc, filter only entries with silhouette
         scored = [r for r in results if "silhouette" in r]
@@ -195,6 +204,8 @@ def patient_clusters_silhouette():
                 "results": results,
             }
         )
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except Exception as e:
         error_details = traceback.format_exc()
         payload = {"error": str(e)}
@@ -275,7 +286,7 @@ def illness_clusters():
         n_clusters = dynamic_k
 
         # Run K-means clustering
-        clusters, centers = run_illness_kmeans(data, n_clusters=n_clusters)
+        clusters, centers = run_compute(run_illness_kmeans, data, n_clusters=n_clusters)
 
         # Get cluster statistics
         cluster_stats = get_illness_cluster_statistics(
@@ -305,6 +316,8 @@ def illness_clusters():
         )
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"ERROR in illness_clusters: {str(e)}")
@@ -399,31 +412,7 @@ def illness_clusters_silhouette():
                 400,
             )
 
-        from sklearn.cluster import KMeans
-        from sklearn.metrics import silhouette_score
-        from collections import Counter
-
-        results = []
-        for k in range(k_min, k_max + 1):
-            # Valid k range for silhouette: 2 <= k < n_samples
-            if k < 2 or k >= n_samples:
-                continue
-            try:
-                model = KMeans(n_clusters=k, random_state=42, n_init=10)
-                labels = model.fit_predict(data)
-                score = float(silhouette_score(data, labels))
-                counts = Counter(labels.tolist())
-                results.append(
-                    {
-                        "k": k,
-                        "silhouette": round(score, 4),
-                        "inertia": float(model.inertia_),
-                        "cluster_sizes": dict(counts),
-                    }
-                )
-            except Exception as e:
-                # Skip problematic k
-                results.append({"k": k, "error": str(e)})
+        results = run_compute(_silhouette_sweep, data, k_min, k_max, n_samples)
 
         # Sort by silhouette desc, filter only entries with silhouette
         scored = [r for r in results if "silhouette" in r]
@@ -441,6 +430,8 @@ def illness_clusters_silhouette():
         )
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except Exception as e:
         error_details = traceback.format_exc()
         payload = {"error": str(e)}
@@ -8,19 +8,37 @@ Redesigned with:
   4. First-Class Neuro-Symbolic Verification – inline clamping of impossible diseases
 """
 
+import hmac
 import time
 import traceback
+from contextlib import nullcontext
 import numpy as np
 from typing import Any, cast
-from flask import Blueprint, request, jsonify, session, current_app
+from flask import Blueprint, after_this_request, current_app, g, jsonify, request, session
 
 import app.config as config
-from app.services.ml_service import classifier, explainer, CORRECT_ID2LABEL
-from app.services.verification import pre_screen_unrelated
-from app.utils import _count_words, _build_cdss_payload, detect_language_heuristic
+from app.services.ml_service import (
+    classifier,
+    classifier_model_name,
+    explainer,
+    explainer_model_name,
+    get_last_inference_metadata,
+    CORRECT_ID2LABEL,
+)
+from app.services.text_analysis import analyze_text
+from app.utils import _build_cdss_payload
 from app.utils.scoring import bayesian_evidence_update, lookup_question_metadata
 from app.evidence_keywords import EVIDENCE_KEYWORDS
-from app.models.diagnosis_session import create_session, get_session, update_session
+from app.models.diagnosis_session import (
+    create_session,
+    delete_session,
+    flush_sessions,
+    get_session,
+    sweep_expired_sessions,
+    update_session,
+)
+from app.services.admission import AdmissionRejected, admission_controller
+from app.services.compute_pool import ComputePoolFull, run_compute
 from app.services.information_gain import select_best_question_across_diseases
 from app.question_groups import (
     expand_asked_questions,
@@ -85,6 +103,8 @@ def _stop_response(
     question_answers=None,
 ):
     """Build a standard 'should_stop' response dict."""
+    # The questionnaire ends here; the session's final state is written through
+    g.diagnosis_stopped = True
     data = {
         "should_stop": True,
         "reason": reason,
@@ -118,6 +138,17 @@ def _stop_response(
     return jsonify({"data": data}), 200
 
 
+def _admission(model_name, priority_class):
+    """
+    Hold an admission slot of `model_name` while the request waits for its
+    inference, so queueing happens here rather than in the compute pool.
+    No-op when the model is unknown (the ML call rejects the text itself).
+    """
+    if model_name is None:
+        return nullcontext()
+    return admission_controller.admit(model_name, priority_class)
+
+
 def _normalize_mean_probs(mean_probs):
     """Flatten nested probability lists to a simple float list."""
     flat = []
@@ -188,15 +219,6 @@ def _clamp_impossible_diseases(
     return probs
 
 
-def _has_evidence(q, symptoms_lower: str) -> bool:
-    """Check if the question's symptoms are already mentioned in the input."""
-    qid = q.get("id", "")
-    keywords = EVIDENCE_KEYWORDS.get(qid, [])
-    if not keywords:
-        return False
-    return any(kw in symptoms_lower for kw in keywords)
-
-
 # ── /diagnosis/new ────────────────────────────────────────────────────────────
 
 
@@ -221,11 +243,12 @@ def new_case():
         if not symptoms:
             return jsonify({"error": "Symptoms cannot be empty"}), 400
 
+        # Language, keywords and concepts of the text are computed once and
+        # shared by every stage below (and by classifier()/verify())
+        analysis = analyze_text(symptoms)
+
         # Quick pre-filter for obviously non-symptom inputs
-        if (
-            _count_words(symptoms) < config.SYMPTOM_MIN_WORDS
-            and len(symptoms) < config.SYMPTOM_MIN_CHARS
-        ):
+        if analysis.is_too_short:
             return (
                 jsonify(
                     {
@@ -243,8 +266,8 @@ def new_case():
         # ── TIER 3 PRE-SCREENING: Check for unrelated medical categories ──
         # Must occur BEFORE ML classification to avoid wasting inference on
         # symptoms outside our infectious disease scope.
-        lang_for_prescreening = detect_language_heuristic(symptoms)
-        unrelated_result = pre_screen_unrelated(symptoms, lang=lang_for_prescreening)
+        lang_for_prescreening = analysis.language
+        unrelated_result = analysis.unrelated_screen(lang_for_prescreening)
 
         if unrelated_result["is_unrelated"]:
             print(
@@ -268,9 +291,15 @@ def new_case():
                 200,
             )
 
-        pred, confidence, uncertainty, probs, model_used, top_diseases, mean_probs = (
-            classifier(symptoms)
-        )
+        # The contradiction check below needs MC mutual information; with
+        # tiered inference a decisive deterministic pass would report MI = 0
+        # (MCD_TIERED_REQUIRE_MI escalates every request here)
+        with _admission(classifier_model_name(symptoms), "diagnose"):
+            pred, confidence, uncertainty, probs, model_used, top_diseases, mean_probs = (
+                run_compute(classifier, symptoms, require_mi=config.MCD_TIERED_REQUIRE_MI)
+            )
+        # Token count / chunking / sample count of the MC inference above
+        inference_meta = get_last_inference_metadata()
 
         # EPISTEMIC UNCERTAINTY CONTRADICTION CHECK
         # High MI/Variance indicates the model is receiving conflicting signals (e.g. "severe pain" vs "I feel great")
@@ -332,6 +361,7 @@ def new_case():
                             "disease": pred,
                             "top_diseases": top_diseases,
                             "mean_probs": mean_probs,
+                            "inference": inference_meta,
                             "cdss": cdss,
                             "skip_followup": True,
                             "skip_reason": "OUT_OF_SCOPE",
@@ -419,6 +449,7 @@ def new_case():
                             "disease": pred,
                             "top_diseases": top_diseases,
                             "mean_probs": mean_probs,
+                            "inference": inference_meta,
                             "cdss": cdss,
                             "skip_followup": True,
                             "skip_reason": "HIGH_CONFIDENCE_INITIAL",
@@ -455,6 +486,7 @@ def new_case():
                                 "disease": pred,
                                 "top_diseases": top_diseases,
                                 "mean_probs": mean_probs,
+                                "inference": inference_meta,
                                 "cdss": cdss,
                                 "session_id": session_id,
                                 "advisory": {
@@ -468,7 +500,7 @@ def new_case():
                 )
 
             # Detailed symptom narratives should continue
-            detailed_enough = _count_words(symptoms) >= 12 or len(symptoms) >= 120
+            detailed_enough = analysis.word_count >= 12 or len(symptoms) >= 120
             if detailed_enough:
                 cdss = _build_cdss_payload(
                     symptoms,
@@ -490,6 +522,7 @@ def new_case():
                                 "disease": pred,
                                 "top_diseases": top_diseases,
                                 "mean_probs": mean_probs,
+                                "inference": inference_meta,
                                 "cdss": cdss,
                                 "session_id": session_id,
                                 "advisory": {
@@ -539,6 +572,7 @@ def new_case():
                         "disease": pred,
                         "top_diseases": top_diseases,
                         "mean_probs": mean_probs,
+                        "inference": inference_meta,
                         "cdss": cdss,
                         "session_valid": True,
                         "session_id": session_id,
@@ -548,6 +582,8 @@ def new_case():
             201,
         )
 
+    except (AdmissionRejected, ComputePoolFull):
+        raise  # 429 / 503 + Retry-After (app error handlers)
     except Exception as e:
         error_msg = str(e)
         print(f"Exception caught in new_case: {error_msg}")
@@ -618,6 +654,12 @@ def follow_up_question():
                 sess = cast(dict[str, Any], loaded_session)
                 print(f"[FOLLOW-UP] Using DB session: {session_id}")
 
+                @after_this_request
+                def _persist_final_state(response):
+                    if g.get("diagnosis_stopped"):
+                        flush_sessions([session_id])
+                    return response
+
         # Fallback: legacy Flask cookie session or request body
         if not sess:
             legacy_session = session.get("diagnosis")
@@ -683,10 +725,13 @@ def follow_up_question():
                 )
 
         # Check session age
-        if time.time() - sess.get("created_at", 0) > 3600:
+        if time.time() - sess.get("created_at", 0) > config.SESSION_TTL_SECONDS:
             if session_id:
-                # Could delete the DB row here
-                pass
+                try:
+                    delete_session(session_id)
+                except Exception as e:
+                    # The expiry sweep removes it later
+                    print(f"[FOLLOW-UP] Could not delete expired session {session_id}: {e}")
             session.clear()
             return (
                 jsonify(
@@ -725,8 +770,9 @@ def follow_up_question():
         symptoms_text = data.get("symptoms", "").strip() or initial_symptoms
 
         # ── 2. BAYESIAN EVIDENCE UPDATE ───────────────────────────────────
-        QUESTION_BANK_EN = current_app.config["QUESTION_BANK_EN"]
-        QUESTION_BANK_TL = current_app.config["QUESTION_BANK_TL"]
+        QUESTION_BANKS = current_app.config["QUESTION_BANKS"]
+        QUESTION_BANK_EN = QUESTION_BANKS.en
+        QUESTION_BANK_TL = QUESTION_BANKS.tl
 
         pred = str(sess.get("disease", "") or "")
         confidence = float(sess.get("confidence", 0))
@@ -805,17 +851,7 @@ def follow_up_question():
             # ── 3. BUILD EVIDENCE TEXT FOR UNIFIED INFERENCE ──────────────
             if last_question_text:
                 if str(last_answer).lower() == "yes":
-                    # Find positive_symptom text from question bank
-                    pos_text = None
-                    for disease_qs in list(QUESTION_BANK_EN.values()) + list(
-                        QUESTION_BANK_TL.values()
-                    ):
-                        for q in disease_qs:
-                            if q.get("id") == last_question_id:
-                                pos_text = q.get("positive_symptom", "")
-                                break
-                        if pos_text:
-                            break
+                    pos_text = QUESTION_BANKS.symptom_text(last_question_id, positive=True)
                     if pos_text:
                         evidence_texts.append(f"Patient confirms: {pos_text}")
                     else:
@@ -823,16 +859,9 @@ def follow_up_question():
                             f"Patient confirms symptom from: {last_question_text}"
                         )
                 else:
-                    neg_text = None
-                    for disease_qs in list(QUESTION_BANK_EN.values()) + list(
-                        QUESTION_BANK_TL.values()
-                    ):
-                        for q in disease_qs:
-                            if q.get("id") == last_question_id:
-                                neg_text = q.get("negative_symptom", "")
-                                break
-                        if neg_text:
-                            break
+                    neg_text = QUESTION_BANKS.symptom_text(
+                        last_question_id, positive=False
+                    )
                     if neg_text:
                         evidence_texts.append(f"Patient denies: {neg_text}")
                     else:
@@ -1075,7 +1104,7 @@ def follow_up_question():
         # Detect language for question bank
         session_lang = sess.get("lang", "en")
         if symptoms_text.strip():
-            lang = detect_language_heuristic(symptoms_text)
+            lang = analyze_text(symptoms_text).language
         else:
             lang = session_lang if session_lang else "en"
 
@@ -1083,11 +1112,7 @@ def follow_up_question():
 
         # Identify which questions to skip (already evidenced in initial symptoms)
         symptoms_lower = (symptoms_text or "").lower()
-        skip_ids = set()
-        for disease_name, questions in QUESTION_BANK.items():
-            for q in questions:
-                if _has_evidence(q, symptoms_lower):
-                    skip_ids.add(q["id"])
+        skip_ids = QUESTION_BANK.evidenced_ids(symptoms_lower)
 
         if skip_ids:
             print(f"[FOLLOW-UP] Skipping {len(skip_ids)} already-evidenced questions")
@@ -1200,14 +1225,10 @@ def follow_up_question():
         # Evidence-based early stop (from coverage)
         current_disease = pred
         if current_disease in QUESTION_BANK:
-            primary_questions = QUESTION_BANK[current_disease]
-            primary_only = [
-                q
-                for q in primary_questions
-                if (q.get("category") or "").lower() == "primary"
-            ]
             coverage_primary = sum(
-                1 for q in primary_only if _has_evidence(q, symptoms_lower)
+                1
+                for q in QUESTION_BANK.primary_questions(current_disease)
+                if q.get("id", "") in skip_ids
             )
             if (
                 coverage_primary >= config.EVIDENCE_STOP_PRIMARY_COVERAGE
@@ -1301,6 +1322,45 @@ def follow_up_question():
         return jsonify(payload), 500
 
 
+# ── /diagnosis/sessions/sweep ─────────────────────────────────────────────────
+
+
+@diagnosis_bp.route("/diagnosis/sessions/sweep", methods=["POST"])
+def sweep_sessions():
+    """
+    Delete expired follow-up sessions (for cron callers; the background
+    sweeper does the same every SESSION_SWEEP_INTERVAL seconds).
+
+    Requires the X-Cron-Secret header to equal SESSION_SWEEP_CRON_SECRET
+    (disabled while that is unset). Optional JSON body:
+    {"batch_size": 500, "max_batches": 20}, capped at SESSION_SWEEP_BATCH_SIZE
+    and SESSION_SWEEP_MAX_BATCHES. Returns the run's metrics; "complete" is
+    false when expired rows were left for the next call.
+    """
+    secret = config.SESSION_SWEEP_CRON_SECRET
+    provided = request.headers.get("X-Cron-Secret", "")
+    if not secret or not hmac.compare_digest(provided.encode(), secret.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        batch_size = int(data.get("batch_size") or config.SESSION_SWEEP_BATCH_SIZE)
+        max_batches = int(data.get("max_batches") or config.SESSION_SWEEP_MAX_BATCHES)
+    except (TypeError, ValueError):
+        return jsonify({"error": "batch_size and max_batches must be integers"}), 400
+    if batch_size <= 0 or max_batches <= 0:
+        return jsonify({"error": "batch_size and max_batches must be positive"}), 400
+    # Callers may ask for smaller runs, never larger ones
+    batch_size = min(batch_size, config.SESSION_SWEEP_BATCH_SIZE)
+    max_batches = min(max_batches, config.SESSION_SWEEP_MAX_BATCHES)
+
+    try:
+        return jsonify(sweep_expired_sessions(batch_size, max_batches))
+    except Exception as e:
+        print(f"ERROR in sweep_sessions: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 # ── /diagnosis/explain ────────────────────────────────────────────────────────
 
 
@@ -1331,7 +1391,8 @@ def explain_diagnosis():
                     f"[EXPLAIN] Flattened mean_probs from nested to {len(mean_probs)} classes"
                 )
 
-        result = explainer(text, mean_probs)
+        with _admission(explainer_model_name(text), "explain"):
+            result = run_compute(explainer, text, mean_probs)
 
         return (
             jsonify(
@@ -1340,6 +1401,8 @@ def explain_diagnosis():
             200,
         )
 
+    except (AdmissionRejected, ComputePoolFull):
+        raise  # 429 / 503 + Retry-After (app error handlers)
     except Exception as e:
         error_msg = str(e)
         error_details = traceback.format_exc()
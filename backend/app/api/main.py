@@ -4,6 +4,9 @@ Main blueprint: health-check endpoint and global error handlers.
 
 from flask import Blueprint, jsonify
 
+from app.services.admission import AdmissionRejected
+from app.services.compute_pool import ComputePoolFull
+
 main_bp = Blueprint("main", __name__)
 
 
@@ -15,6 +18,22 @@ def index():
     return jsonify({"message": "Hello, world!"})
 
 
+@main_bp.route("/diagnosis/stats", methods=["GET"])
+def inference_stats():
+    """MC dropout batching, result-cache, session-store and compute-pool counters for this worker."""
+    from app.models.diagnosis_session import get_session_store_stats
+    from app.services.compute_pool import get_compute_pool_stats
+    from app.services.ml_service import get_inference_stats
+
+    return jsonify(
+        {
+            **get_inference_stats(),
+            "sessions": get_session_store_stats(),
+            "compute_pool": get_compute_pool_stats(),
+        }
+    )
+
+
 # ── Error Handlers ────────────────────────────────────────────────────────────
 
 @main_bp.app_errorhandler(404)
@@ -43,3 +62,25 @@ def unsupported_media_type(error):
 @main_bp.app_errorhandler(405)
 def method_not_allowed(error):
     return jsonify({"error": "Method not allowed"}), 405
+
+
+@main_bp.app_errorhandler(ComputePoolFull)
+def server_busy(error):
+    response = jsonify({
+        "error": "SERVER_BUSY",
+        "message": "The server is busy. Please try again shortly.",
+        "retry_after": error.retry_after,
+    })
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+
+@main_bp.app_errorhandler(AdmissionRejected)
+def model_overloaded(error):
+    response = jsonify({
+        "error": "TOO_MANY_REQUESTS",
+        "message": "The diagnosis service is handling too many requests. Please try again shortly.",
+        "retry_after": error.retry_after,
+    })
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 429
@@ -1,6 +1,7 @@
 # outbreak.py
 import traceback
 from flask import Blueprint, jsonify, request, current_app
+from app.services.compute_pool import ComputePoolFull, run_compute
 from app.services.outbreak_service import detect_outbreaks
 
 outbreak_bp = Blueprint("outbreak", __name__)
@@ -12,10 +13,12 @@ def detect():
     Endpoint to trigger outbreak detection based on recent diagnosis data.
     """
     try:
-        outbreaks = detect_outbreaks()
+        outbreaks = run_compute(detect_outbreaks)
         return jsonify(
             {"success": True, "outbreaks": outbreaks, "count": len(outbreaks)}
         )
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"ERROR in detect: {str(e)}")
@@ -5,6 +5,7 @@ Surveillance blueprint: Isolation Forest outbreak detection endpoint.
 import traceback
 from flask import Blueprint, request, jsonify, current_app
 
+from app.services.compute_pool import ComputePoolFull, run_compute
 from app.services.surveillance_service import analyze_surveillance
 from app.services.outbreak_service import detect_outbreaks
 
@@ -103,7 +104,8 @@ def surveillance_outbreaks():
         force_refresh = request.args.get("force_refresh", "0") in ("1", "true", "yes")
 
         # --- run analysis ---
-        result = analyze_surveillance(
+        result = run_compute(
+            analyze_surveillance,
             start_date=start_date,
             end_date=end_date,
             disease=disease,
@@ -131,6 +133,8 @@ def surveillance_outbreaks():
 
         return jsonify(response)
 
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except ValueError as e:
         error_msg = str(e)
         if "DATABASE_URL" in error_msg:
@@ -182,7 +186,8 @@ def surveillance_cron():
         if not (0.0 < contamination < 0.5):
             contamination = 0.05
 
-        result = analyze_surveillance(
+        result = run_compute(
+            analyze_surveillance,
             start_date=None,
             end_date=None,
             disease=None,
@@ -196,6 +201,8 @@ def surveillance_cron():
             f"[CRON] Anomaly detection: {result['summary']['total_records']} records, "
             f"{result['summary']['anomaly_count']} anomalies"
         )
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"ERROR in surveillance_cron (anomaly): {str(e)}")
@@ -204,8 +211,10 @@ def surveillance_cron():
 
     # --- Outbreak Detection ---
     try:
-        outbreaks = detect_outbreaks()
+        outbreaks = run_compute(detect_outbreaks)
         print(f"[CRON] Outbreak detection: {len(outbreaks)} outbreaks found")
+    except ComputePoolFull:
+        raise  # 503 + Retry-After (app error handler)
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"ERROR in surveillance_cron (outbreak): {str(e)}")
@@ -0,0 +1,157 @@
+"""
+ASGI serving mode for the Flask app.
+
+`create_asgi_app()` wraps the app from `create_app()` in an ASGI application
+(served by uvicorn, see asgi.py and SERVING_MODE in the Dockerfile):
+
+  * the event loop accepts connections, reads request bodies and writes
+    responses, so slow clients and idle keep-alive connections hold no thread
+  * each request's Flask handler (routing, Supabase auth calls, database
+    I/O) runs on a pool of SERVING_REQUEST_THREADS handler threads
+  * CPU-heavy work inside the handlers goes to the bounded compute pool
+    (app/services/compute_pool.py), so I/O-bound requests never wait behind
+    inference and inference never runs more than COMPUTE_POOL_WORKERS wide
+
+Blueprints, error handlers and request hooks are the Flask ones, unchanged;
+the endpoints behave exactly as under gunicorn. Responses are buffered
+before sending (every endpoint returns a complete JSON or CSV body).
+"""
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import app.config as config
+
+
+def _build_environ(scope: dict, body: bytes) -> dict:
+    """WSGI environ for an ASGI HTTP scope (PEP 3333 string conventions)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1] if server[1] is not None else 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+        if name == "CONTENT_LENGTH":
+            continue  # the body has been read; its real length is set above
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(wsgi_app, environ: dict) -> tuple[int, list, bytes]:
+    """Run one request through the WSGI app; returns (status, headers, body)."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+        ]
+
+    result = wsgi_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return started["status"], started["headers"], body
+
+
+class AsgiApp:
+    """ASGI application running a WSGI app's handlers on a bounded thread pool."""
+
+    def __init__(self, wsgi_app, request_threads: int = 32):
+        self.wsgi_app = wsgi_app
+        self.request_threads = max(1, int(request_threads))
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.request_threads, thread_name_prefix="request"
+            )
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1000})
+
+    async def _http(self, scope, receive, send):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+
+        environ = _build_environ(scope, b"".join(chunks))
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(
+            self._get_executor(), _call_wsgi, self.wsgi_app, environ
+        )
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def shutdown(self) -> None:
+        """Finish in-flight requests and persist pending session writes."""
+        # Import here to avoid circular imports
+        from app.models.diagnosis_session import flush_sessions
+        from app.services.compute_pool import compute_pool
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        compute_pool.shutdown(wait=True)
+        flush_sessions()
+
+
+def create_asgi_app(flask_app=None) -> AsgiApp:
+    """ASGI application for `flask_app` (default: a new `create_app()`)."""
+    if flask_app is None:
+        # Import here to avoid circular imports
+        from app import create_app
+
+        flask_app = create_app()
+    return AsgiApp(flask_app, config.SERVING_REQUEST_THREADS)
@@ -16,6 +16,142 @@ FIL_MODEL_REVISION = os.getenv("FIL_MODEL_REVISION", "").strip() or None
 MCD_DETERMINISTIC = os.getenv("MCD_DETERMINISTIC", "true").lower() == "true"
 MCD_BASE_SEED = int(os.getenv("MCD_BASE_SEED", "20260322"))
 MCD_SEED_SALT = os.getenv("MCD_SEED_SALT", "aill-be-sick")
+# Dropout mask generator for deterministic mode:
+#   "pcg64"  - NumPy PCG64 stream per input, copied into torch (original behaviour)
+#   "philox" - counter-based NumPy Philox4x64-10 (app/services/philox.py), keyed
+#              by seed, dropout layer and MC iteration, returned as bool masks
+#              (no per-input stream state; masks are independent of batching
+#              and adaptive chunking)
+# Switching generators changes the (still reproducible) MC outputs.
+MCD_MASK_GENERATOR = os.getenv("MCD_MASK_GENERATOR", "pcg64").strip().lower()
+
+# --- MC Dropout Micro-Batching ---
+# Concurrent requests for the same model that arrive within the batching window
+# are padded together and run as one [batch * n_iterations, seq_len] forward pass.
+# Each request still draws its dropout masks from its own deterministic seed.
+MCD_BATCHING_ENABLED = os.getenv("MCD_BATCHING_ENABLED", "true").lower() == "true"
+MCD_BATCH_WINDOW_MS = float(os.getenv("MCD_BATCH_WINDOW_MS", "10"))
+MCD_BATCH_MAX_SIZE = int(os.getenv("MCD_BATCH_MAX_SIZE", "4"))
+
+# --- Classifier Token Budget ---
+# Inputs are capped at MCD_MAX_TOKENS tokens (and the model's own context) before
+# being replicated n_iterations times. Over-budget texts are either truncated or
+# split into overlapping chunks whose MC distributions are merged ("chunk").
+# Batched calls are padded per MCD_LENGTH_BUCKET_SIZE-token length band.
+MCD_MAX_TOKENS = int(os.getenv("MCD_MAX_TOKENS", "512"))
+MCD_LONG_TEXT_MODE = os.getenv("MCD_LONG_TEXT_MODE", "chunk").strip().lower()
+MCD_CHUNK_OVERLAP = int(os.getenv("MCD_CHUNK_OVERLAP", "32"))
+MCD_MAX_CHUNKS = int(os.getenv("MCD_MAX_CHUNKS", "4"))
+MCD_LENGTH_BUCKET_SIZE = int(os.getenv("MCD_LENGTH_BUCKET_SIZE", "32"))
+
+# --- Adaptive MC Dropout Sampling ---
+# Draw MC samples in chunks and stop once another chunk no longer moves the
+# running mean probabilities / mutual information by more than the tolerances.
+# The classifier's n_iterations is the maximum budget.
+MCD_ADAPTIVE_ENABLED = os.getenv("MCD_ADAPTIVE_ENABLED", "false").lower() == "true"
+MCD_ADAPTIVE_MIN_SAMPLES = int(os.getenv("MCD_ADAPTIVE_MIN_SAMPLES", "20"))
+MCD_ADAPTIVE_CHUNK_SIZE = int(os.getenv("MCD_ADAPTIVE_CHUNK_SIZE", "10"))
+MCD_ADAPTIVE_PROB_TOL = float(os.getenv("MCD_ADAPTIVE_PROB_TOL", "0.01"))
+MCD_ADAPTIVE_MI_TOL = float(os.getenv("MCD_ADAPTIVE_MI_TOL", "0.005"))
+
+# --- Model Loading ---
+# Lazy loading defers each classifier's weights to its first request. On CPU the
+# fp32 weights are memory-mapped from the safetensors snapshot (shared page
+# cache across workers). Models listed in MODEL_IDLE_UNLOAD_MODELS are unloaded
+# after MODEL_IDLE_UNLOAD_SECONDS without requests (0 disables unloading).
+MODEL_LAZY_LOADING = os.getenv("MODEL_LAZY_LOADING", "true").lower() == "true"
+MODEL_MMAP_WEIGHTS = os.getenv("MODEL_MMAP_WEIGHTS", "true").lower() == "true"
+MODEL_IDLE_UNLOAD_SECONDS = float(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", "900"))
+MODEL_IDLE_UNLOAD_MODELS = [
+    name.strip()
+    for name in os.getenv("MODEL_IDLE_UNLOAD_MODELS", "fil").split(",")
+    if name.strip()
+]
+
+# --- Tiered Inference ---
+# Run one dropout-free forward pass first and only escalate to the MC ensemble
+# when the prediction is not decisive: top-1/top-2 margin below MIN_MARGIN or
+# normalized predictive entropy (0..1) above MAX_ENTROPY. /diagnosis/new needs
+# MC mutual information for its contradiction and uncertainty gates
+# (CONTRADICTION_MAX_UNCERTAINTY), so with REQUIRE_MI it always escalates; a
+# deterministic pass has no MI (it would report 0 and pass every gate).
+# Turning REQUIRE_MI off trades those gates for the cheap tier on that path.
+MCD_TIERED_ENABLED = os.getenv("MCD_TIERED_ENABLED", "false").lower() == "true"
+MCD_TIERED_MIN_MARGIN = float(os.getenv("MCD_TIERED_MIN_MARGIN", "0.5"))
+MCD_TIERED_MAX_ENTROPY = float(os.getenv("MCD_TIERED_MAX_ENTROPY", "0.35"))
+MCD_TIERED_REQUIRE_MI = os.getenv("MCD_TIERED_REQUIRE_MI", "true").lower() == "true"
+
+# --- Partial (Top-Layers-Only) MC Dropout ---
+# Number of lower encoder layers that run once per input with dropout off; only
+# the remaining top layers and the classifier head are sampled per MC iteration.
+# 0 keeps full MC dropout. ModernBERT-base has 22 layers, RoBERTa-base has 12.
+ENG_MCD_PARTIAL_LAYERS = int(os.getenv("ENG_MCD_PARTIAL_LAYERS", "0"))
+FIL_MCD_PARTIAL_LAYERS = int(os.getenv("FIL_MCD_PARTIAL_LAYERS", "0"))
+
+# --- Inference Backend ---
+# "torch" runs eager PyTorch (int8 dynamic quantization on CPU).
+# "onnx" exports each classifier once per model snapshot to ONNX_EXPORT_DIR, with
+# dropout masks as explicit graph inputs, and runs it with ONNX Runtime on CPU.
+# onnx / onnxruntime are optional (requirements-onnx.txt); without them the
+# classifiers fall back to PyTorch.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").strip().lower()
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", "/tmp/aill-be-sick-onnx")
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+
+# --- MC Dropout Result Cache ---
+# Only used when MCD_DETERMINISTIC is on (predictions are then a pure function of
+# the normalized text, model path/revision and seed salt).
+# The SQLite file is shared by all workers on the host so the cache survives
+# gunicorn --max-requests recycling; set MCD_CACHE_DB_PATH="" to keep it in-memory only.
+MCD_CACHE_ENABLED = os.getenv("MCD_CACHE_ENABLED", "true").lower() == "true"
+MCD_CACHE_MAX_ENTRIES = int(os.getenv("MCD_CACHE_MAX_ENTRIES", "2048"))
+MCD_CACHE_TTL_SECONDS = float(os.getenv("MCD_CACHE_TTL_SECONDS", "3600"))
+MCD_CACHE_DISK_TTL_SECONDS = float(
+    os.getenv("MCD_CACHE_DISK_TTL_SECONDS", str(7 * 24 * 3600))
+)
+MCD_CACHE_DB_PATH = os.getenv(
+    "MCD_CACHE_DB_PATH", "/tmp/aill-be-sick-mc-cache.sqlite3"
+).strip()
+
+# --- Token Attribution (/diagnosis/explain) ---
+# EXPLAIN_METHOD: "gradient_shap" (EXPLAIN_SHAP_SAMPLES gradient passes),
+# "integrated_gradients" (EXPLAIN_IG_STEPS passes) or "input_x_gradient" (one
+# pass). Compare them with scripts/compare_explanation_methods.py.
+# Gradient passes run in sub-batches of EXPLAIN_MAX_BATCH_SIZE rows, or
+# (0) as many rows as fit in EXPLAIN_MEMORY_FRACTION of the free memory.
+EXPLAIN_METHOD = os.getenv("EXPLAIN_METHOD", "gradient_shap").strip().lower()
+EXPLAIN_SHAP_SAMPLES = int(os.getenv("EXPLAIN_SHAP_SAMPLES", "25"))
+EXPLAIN_SHAP_BASELINES = int(os.getenv("EXPLAIN_SHAP_BASELINES", "5"))
+EXPLAIN_SHAP_STDEV = float(os.getenv("EXPLAIN_SHAP_STDEV", "0.01"))
+EXPLAIN_IG_STEPS = int(os.getenv("EXPLAIN_IG_STEPS", "8"))
+EXPLAIN_MAX_BATCH_SIZE = int(os.getenv("EXPLAIN_MAX_BATCH_SIZE", "0"))
+EXPLAIN_MEMORY_FRACTION = float(os.getenv("EXPLAIN_MEMORY_FRACTION", "0.25"))
+EXPLAIN_CACHE_ENABLED = os.getenv("EXPLAIN_CACHE_ENABLED", "true").lower() == "true"
+EXPLAIN_CACHE_MAX_ENTRIES = int(os.getenv("EXPLAIN_CACHE_MAX_ENTRIES", "512"))
+EXPLAIN_CACHE_TTL_SECONDS = float(os.getenv("EXPLAIN_CACHE_TTL_SECONDS", "3600"))
+
+# --- Text Analysis Cache ---
+# Language, keyword hits, clinical concepts and symptom groups of a symptom text
+# are computed once and shared by every stage of a request (and by follow-ups
+# that re-verify the same evidence text). LRU keyed by the exact text.
+TEXT_ANALYSIS_CACHE_SIZE = int(os.getenv("TEXT_ANALYSIS_CACHE_SIZE", "256"))
+
+# --- Precompiled Ontology Artifact ---
+# Ontology profiles, keyword automaton and compiled question banks are pickled
+# here and reused at boot while the content hash of the question banks and
+# dictionaries is unchanged (rebuilt and rewritten automatically otherwise).
+# Prebuild with scripts/build_ontology_artifact.py; set "" to always build in memory.
+# The file is unpickled, so it lives in the app directory (not a shared /tmp)
+# and is only loaded when owned by the service's own user.
+ONTOLOGY_ARTIFACT_PATH = os.getenv(
+    "ONTOLOGY_ARTIFACT_PATH",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "artifacts",
+        "ontology.pkl",
+    ),
+)
 
 # --- Symptom Validation Thresholds ---
 # Configurable gating thresholds for validating symptom narratives
@@ -112,6 +248,78 @@ MODE_RULE_OUT_SECOND_MIN = float(os.getenv("MODE_RULE_OUT_SECOND_MIN", "0.20"))
 # Novelty penalty: soft-penalize questions similar to already-asked ones
 NOVELTY_PENALTY_WEIGHT = float(os.getenv("NOVELTY_PENALTY_WEIGHT", "0.12"))
 
+# --- Questioning Policy Cache ---
+# Memoizes next-question selection by (language, posterior quantized to
+# POLICY_CACHE_QUANTUM, diagnosis mode, top-K diseases, candidate/asked bitmaps).
+# The default POLICY_CACHE_QUANTUM=0 keys on the exact posterior; a non-zero
+# quantum trades exactness for hits. POLICY_CACHE_PATH is loaded at startup when set (build it
+# offline with scripts/build_policy_cache.py).
+POLICY_CACHE_ENABLED = os.getenv("POLICY_CACHE_ENABLED", "true").lower() == "true"
+POLICY_CACHE_QUANTUM = float(os.getenv("POLICY_CACHE_QUANTUM", "0"))
+POLICY_CACHE_MAX_ENTRIES = int(os.getenv("POLICY_CACHE_MAX_ENTRIES", "100000"))
+POLICY_CACHE_PATH = os.getenv("POLICY_CACHE_PATH", "")
+
+# --- Diagnosis Session Store ---
+# Follow-up sessions expire SESSION_TTL_SECONDS after creation. Hot sessions are
+# cached in-process (LRU of SESSION_CACHE_MAX_ENTRIES) and their updates are
+# written back in coalesced batches every SESSION_WRITE_BEHIND_INTERVAL seconds.
+# SESSION_CACHE_MODE:
+#   "versioned" - a cached read first checks the row's version (one light query)
+#                 and pending writes are flushed before each response, so any
+#                 gunicorn worker can serve the next turn
+#   "sticky"    - each session is served by one worker (single worker or
+#                 session-affine routing); cached reads skip the database
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "true").lower() == "true"
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "2048"))
+SESSION_CACHE_MODE = os.getenv("SESSION_CACHE_MODE", "versioned").lower()
+SESSION_WRITE_BEHIND_INTERVAL = float(os.getenv("SESSION_WRITE_BEHIND_INTERVAL", "0.5"))
+# Compact state: probabilities and question history go to BYTEA columns
+# (migrations/add_compact_session_state.sql) instead of JSON text. Existing JSON
+# rows stay readable either way. SESSION_PROBS_DTYPE="float32" halves the
+# probability bytes but rounds the stored posteriors to ~7 significant digits.
+SESSION_COMPACT_STATE = os.getenv("SESSION_COMPACT_STATE", "true").lower() == "true"
+SESSION_PROBS_DTYPE = os.getenv("SESSION_PROBS_DTYPE", "float64").lower()
+# Expired rows are deleted every SESSION_SWEEP_INTERVAL seconds (0 = only via
+# POST /diagnosis/sessions/sweep, e.g. from a cron job), SESSION_SWEEP_BATCH_SIZE
+# rows per transaction and at most SESSION_SWEEP_MAX_BATCHES batches per run
+# (also the upper bounds for the endpoint). The endpoint requires an
+# X-Cron-Secret header equal to SESSION_SWEEP_CRON_SECRET; unset disables it.
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+SESSION_SWEEP_BATCH_SIZE = int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "500"))
+SESSION_SWEEP_MAX_BATCHES = int(os.getenv("SESSION_SWEEP_MAX_BATCHES", "20"))
+SESSION_SWEEP_CRON_SECRET = os.getenv("SESSION_SWEEP_CRON_SECRET", "")
+
+# --- Serving ---
+# CPU-heavy work (classification, explanations, surveillance, clustering) runs
+# on a bounded pool of COMPUTE_POOL_WORKERS threads with at most
+# COMPUTE_POOL_MAX_QUEUE calls waiting; further calls get 503 + Retry-After
+# (COMPUTE_POOL_RETRY_AFTER seconds). SERVING_REQUEST_THREADS sizes the
+# handler thread pool of the ASGI mode (asgi.py, SERVING_MODE=asgi).
+COMPUTE_POOL_ENABLED = os.getenv("COMPUTE_POOL_ENABLED", "true").lower() == "true"
+COMPUTE_POOL_WORKERS = int(os.getenv("COMPUTE_POOL_WORKERS", "8"))
+COMPUTE_POOL_MAX_QUEUE = int(os.getenv("COMPUTE_POOL_MAX_QUEUE", "16"))
+COMPUTE_POOL_RETRY_AFTER = int(os.getenv("COMPUTE_POOL_RETRY_AFTER", "5"))
+SERVING_REQUEST_THREADS = int(os.getenv("SERVING_REQUEST_THREADS", "32"))
+
+# --- Inference Admission Control ---
+# Per-model concurrency slots for classification and explanations, with up to
+# ADMISSION_MAX_QUEUE requests waiting per model (diagnoses ahead of
+# explanations) for at most ADMISSION_MAX_WAIT_SECONDS. Requests that can't be
+# admitted get 429 + Retry-After (ADMISSION_RETRY_AFTER seconds until the
+# model's service time is known). Keep COMPUTE_POOL_WORKERS at or above the sum
+# of the slots so admitted requests never queue a second time in the compute pool.
+# Diagnoses share one MC batch per model at a time, so the slots default to
+# MCD_BATCH_MAX_SIZE (fewer would cap the batch size); explanations run one
+# gradient pass each and hold at most ADMISSION_EXPLAIN_SLOTS slots per model.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_SLOTS_ENG = int(os.getenv("ADMISSION_SLOTS_ENG", str(MCD_BATCH_MAX_SIZE)))
+ADMISSION_SLOTS_FIL = int(os.getenv("ADMISSION_SLOTS_FIL", str(MCD_BATCH_MAX_SIZE)))
+ADMISSION_EXPLAIN_SLOTS = int(os.getenv("ADMISSION_EXPLAIN_SLOTS", "1"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "8"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "20"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+
 # --- Triage Thresholds (3-Tier System) ---
 # Thesis-backed thresholds for clinical risk stratification
 # Based on: ECE calibration (0.084), sensitivity analysis, ROC/PR optimization
@@ -4,20 +4,484 @@ DiagnosisSession model - Server-side session state for the follow-up questionnai
 Instead of bouncing full probability arrays and question lists between
 the frontend and backend via cookies, this model stores all diagnosis state
 in the database. The frontend only holds a lightweight `session_id`.
+
+Session store:
+  Every follow-up turn reads its session and writes it back. `SessionStore`
+  keeps hot sessions decoded in memory (LRU, same TTL as the rows) and
+  coalesces updates into one UPDATE per session, written by a background
+  thread every SESSION_WRITE_BEHIND_INTERVAL seconds (or at once with
+  `sync=True` / `flush_sessions`). Each row carries a `version` that every
+  write-back increments; a write-back only applies on top of the version it
+  was based on. If another worker wrote the row first, the pending fields are
+  re-applied on top of its version (the later write wins per field) and the
+  cached copy is reloaded, so no update is dropped. Across gunicorn workers
+  (SESSION_CACHE_MODE="versioned") a cached read is validated against the
+  row's version and the request's pending writes are flushed before its
+  response goes out, so the next turn may land on any worker. With SESSION_CACHE_MODE="sticky" the session's worker is its owner
+  and cached reads skip the database.
 """
 
+import atexit
+import copy
+import threading
 import uuid
 import json
 import time as _time
+from collections import OrderedDict
 
+from flask import g, has_request_context
 from sqlalchemy import text
+
+import app.config as config
+from app.models import session_codec
 from app.utils.database import get_db_engine
 
+# Conflicting write-backs re-applied per flush before leaving them for the next one
+_MAX_REBASES = 3
+
+JSON_FIELDS = (
+    "base_probs",
+    "current_probs",
+    "top_diseases",
+    "asked_questions",
+    "evidence_texts",
+    "question_answers",
+)
+
+# Field -> (BYTEA column, encoder, decoder) of the compact state
+COMPACT_FIELDS = {
+    "base_probs": ("base_probs_bin", None, session_codec.decode_probs),
+    "current_probs": ("current_probs_bin", None, session_codec.decode_probs),
+    "asked_questions": (
+        "asked_questions_bin",
+        session_codec.encode_question_ids,
+        session_codec.decode_question_ids,
+    ),
+    "question_answers": (
+        "question_answers_bin",
+        session_codec.encode_answers,
+        session_codec.decode_answers,
+    ),
+}
+
 
 def _now():
     return _time.time()
 
 
+def _column_params(fields: dict) -> dict:
+    """Column -> bound value for writing `fields` to a row."""
+    compact = config.SESSION_COMPACT_STATE
+    params = {}
+    for key, val in fields.items():
+        if key in COMPACT_FIELDS:
+            column, encode, _ = COMPACT_FIELDS[key]
+            if compact:
+                if encode is None:
+                    params[column] = session_codec.encode_probs(
+                        val, config.SESSION_PROBS_DTYPE
+                    )
+                else:
+                    params[column] = encode(val)
+                params[key] = "{}" if key == "question_answers" else "[]"
+            else:
+                # Clear the blob so it can't shadow the JSON written now
+                params[column] = None
+                params[key] = json.dumps(val)
+        elif (
+            key == "top_diseases"
+            and compact
+            and "current_probs" in fields
+            and val == session_codec.derive_top_diseases(fields["current_probs"])
+        ):
+            params[key] = "[]"  # rebuilt from current_probs on read
+        elif key in JSON_FIELDS:
+            params[key] = json.dumps(val)
+        else:
+            params[key] = val
+    return params
+
+
+def _decode_row(row) -> dict:
+    data = dict(row)
+    # Deserialize JSON fields
+    for field in JSON_FIELDS:
+        val = data.get(field)
+        if isinstance(val, str):
+            data[field] = json.loads(val)
+        elif val is None:
+            # Handle missing field for backwards compatibility
+            data[field] = {} if field == "question_answers" else []
+    # Compact columns take precedence over their JSON placeholders
+    for field, (column, _, decode) in COMPACT_FIELDS.items():
+        blob = data.pop(column, None)
+        if blob is not None:
+            data[field] = decode(blob)
+    if not data["top_diseases"] and data["current_probs"]:
+        data["top_diseases"] = session_codec.derive_top_diseases(data["current_probs"])
+    data["version"] = data.get("version") or 0
+    return data
+
+
+def _is_expired(data: dict) -> bool:
+    return _now() - data.get("created_at", 0) > config.SESSION_TTL_SECONDS
+
+
+def _insert_row(row: dict) -> None:
+    params = _column_params(row)
+    engine = get_db_engine()
+    with engine.connect() as conn:
+        conn.execute(
+            text(
+                f"INSERT INTO diagnosis_sessions ({', '.join(params)}) "
+                f"VALUES ({', '.join(':' + col for col in params)})"
+            ),
+            params,
+        )
+        conn.commit()
+
+
+def _select_row(session_id: str) -> dict | None:
+    engine = get_db_engine()
+    with engine.connect() as conn:
+        row = (
+            conn.execute(
+                text("SELECT * FROM diagnosis_sessions WHERE session_id = :sid"),
+                {"sid": session_id},
+            )
+            .mappings()
+            .first()
+        )
+    if not row:
+        return None
+    try:
+        return _decode_row(row)
+    except ValueError as e:
+        # Written against another question bank; can't be resumed
+        print(f"[SESSION-STORE] Unreadable state for {session_id}, treating as expired: {e}")
+        return None
+
+
+def _select_version(session_id: str) -> int | None:
+    engine = get_db_engine()
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT version FROM diagnosis_sessions WHERE session_id = :sid"),
+            {"sid": session_id},
+        ).first()
+    return None if row is None else (row[0] or 0)
+
+
+def _update_versioned(conn, session_id: str, params: dict, base_version: int) -> bool:
+    """UPDATE the row from `base_version` to the next version; False on a conflict."""
+    set_clauses = [f"{col} = :{col}" for col in params]
+    set_clauses.append("version = :next_version")
+    result = conn.execute(
+        text(
+            f"UPDATE diagnosis_sessions SET {', '.join(set_clauses)} "
+            "WHERE session_id = :sid AND version = :base_version"
+        ),
+        dict(params, sid=session_id, base_version=base_version, next_version=base_version + 1),
+    )
+    return result.rowcount > 0
+
+
+class _Entry:
+    __slots__ = ("data", "db_version", "pending")
+
+    def __init__(self, data: dict, db_version: int):
+        self.data = data
+        self.db_version = db_version  # version of the row as last read/written
+        self.pending = {}  # fields changed since then
+
+
+class SessionStore:
+    """
+    In-process LRU of decoded sessions with coalesced write-behind.
+
+    Reads return a copy of the cached session (after a version check in
+    "versioned" mode); writes update the cached copy and mark the fields
+    pending. `flush()` writes every pending session in one transaction.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        mode: str = "versioned",
+        write_interval: float = 0.5,
+    ):
+        self.max_entries = int(max_entries)
+        self.mode = mode
+        self.write_interval = float(write_interval)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._writer = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale_reloads": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "updates_coalesced": 0,
+            "conflicts": 0,
+            "rebased": 0,
+            "write_errors": 0,
+        }
+
+    # ── Reads ─────────────────────────────────────────────────────────────
+
+    def get(self, session_id: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+                cached_version = entry.db_version
+                has_pending = bool(entry.pending)
+
+        if entry is not None and self.mode != "sticky" and not has_pending:
+            # Another worker may have advanced the row since we cached it
+            db_version = _select_version(session_id)
+            if db_version != cached_version:
+                with self._lock:
+                    self._stats["stale_reloads"] += 1
+                    if self._entries.get(session_id) is entry:
+                        del self._entries[session_id]
+                entry = None
+                if db_version is None:
+                    return None
+
+        if entry is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+                data = copy.deepcopy(entry.data)
+        else:
+            with self._lock:
+                self._stats["misses"] += 1
+            data = _select_row(session_id)
+            if data is None:
+                return None
+            self._put(session_id, _Entry(copy.deepcopy(data), data["version"]))
+
+        if _is_expired(data):
+            self.discard(session_id)
+            return None
+        return data
+
+    # ── Writes ────────────────────────────────────────────────────────────
+
+    def create(self, row: dict) -> None:
+        """Insert a new session synchronously (it must exist for every worker)."""
+        _insert_row(row)
+        self._put(row["session_id"], _Entry(copy.deepcopy(row), row["version"]))
+
+    def update(self, session_id: str, fields: dict, sync: bool = False) -> bool:
+        """Apply `fields` to the session; written back now if `sync`."""
+        fields = dict(copy.deepcopy(fields), updated_at=_now())
+        with self._lock:
+            entry = self._entries.get(session_id)
+        if entry is None:
+            data = _select_row(session_id)
+            if data is None:
+                return False
+            entry = _Entry(data, data["version"])
+
+        with self._lock:
+            if entry.pending:
+                self._stats["updates_coalesced"] += 1
+            entry.data.update(fields)
+            entry.pending.update(fields)
+            self._put_locked(session_id, entry)
+
+        if sync:
+            self.flush([session_id])
+        else:
+            self._ensure_writer()
+        return True
+
+    def flush(self, session_ids=None) -> int:
+        """Write back pending changes (all, or only `session_ids`); returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                ids = list(self._entries) if session_ids is None else list(session_ids)
+                batch = []
+                for sid in ids:
+                    entry = self._entries.get(sid)
+                    if entry is not None and entry.pending:
+                        batch.append((sid, entry, entry.pending, entry.db_version))
+                        entry.pending = {}
+            if not batch:
+                return 0
+
+            written, retry, gone = [], [], []
+            conflicts = 0
+            try:
+                engine = get_db_engine()
+                with engine.connect() as conn:
+                    for sid, entry, fields, base_version in batch:
+                        params = _column_params(fields)
+                        version = base_version
+                        for _ in range(_MAX_REBASES + 1):
+                            if _update_versioned(conn, sid, params, version):
+                                written.append((sid, entry, version + 1, version != base_version))
+                                break
+                            # Another worker wrote this session first: re-apply
+                            # our fields on top of its version
+                            conflicts += 1
+                            row = conn.execute(
+                                text(
+                                    "SELECT version FROM diagnosis_sessions "
+                                    "WHERE session_id = :sid"
+                                ),
+                                {"sid": sid},
+                            ).first()
+                            if row is None:
+                                gone.append((sid, entry, fields))
+                                break
+                            version = row[0] or 0
+                        else:
+                            retry.append((sid, entry, fields))
+                    conn.commit()
+            except Exception as e:
+                print(f"[SESSION-STORE] Write-back failed, will retry: {e}")
+                with self._lock:
+                    self._stats["write_errors"] += 1
+                    for sid, entry, fields, _ in batch:
+                        # Newer changes made meanwhile win over the failed ones
+                        entry.pending = {**fields, **entry.pending}
+                self._ensure_writer()
+                return 0
+
+            rebased = [(sid, entry) for sid, entry, _, was_rebased in written if was_rebased]
+            # The other worker's fields aren't in our cached copy yet
+            reloaded = {sid: _select_row(sid) for sid, _ in rebased}
+
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += len(written)
+                self._stats["conflicts"] += conflicts
+                self._stats["rebased"] += len(rebased)
+                for sid, entry, version, _ in written:
+                    entry.db_version = version
+                for sid, entry in rebased:
+                    data = reloaded[sid]
+                    if data is None:
+                        if self._entries.get(sid) is entry:
+                            del self._entries[sid]
+                        continue
+                    data.update(copy.deepcopy(entry.pending))
+                    entry.data, entry.db_version = data, data["version"]
+                for sid, entry, fields in retry:
+                    entry.pending = {**fields, **entry.pending}
+                for sid, entry, _ in gone:
+                    if self._entries.get(sid) is entry:
+                        del self._entries[sid]
+            for sid, _ in rebased:
+                print(f"[SESSION-STORE] Version conflict on {sid}; re-applied on the newer row")
+            for sid, _, fields in gone:
+                print(f"[SESSION-STORE] {sid} no longer exists; dropped update of {sorted(fields)}")
+            if retry:
+                print(f"[SESSION-STORE] {len(retry)} session(s) kept conflicting; will retry")
+                self._ensure_writer()
+            return len(written)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def discard_expired(self) -> int:
+        """Drop cached sessions past their TTL; returns how many."""
+        with self._lock:
+            expired = [sid for sid, e in self._entries.items() if _is_expired(e.data)]
+            for sid in expired:
+                del self._entries[sid]
+        return len(expired)
+
+    def clear(self) -> None:
+        """Drop every cached session (pending writes included)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "mode": self.mode,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "pending": sum(1 for e in self._entries.values() if e.pending),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                **self._stats,
+            }
+
+    # ── Internals ─────────────────────────────────────────────────────────
+
+    def _put(self, session_id: str, entry: _Entry) -> None:
+        with self._lock:
+            self._put_locked(session_id, entry)
+
+    def _put_locked(self, session_id: str, entry: _Entry) -> None:
+        """Insert or refresh `entry` and enforce max_entries (caller holds _lock)."""
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        if len(self._entries) <= self.max_entries:
+            return
+        # Evict least recently used sessions that have nothing to write
+        for sid in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                break
+            if not self._entries[sid].pending and sid != session_id:
+                del self._entries[sid]
+
+    def _write_through(self, session_id: str, fields: dict) -> bool:
+        params = _column_params(fields)
+        set_clauses = [f"{col} = :{col}" for col in params]
+        params["sid"] = session_id
+        set_clauses.append("version = version + 1")
+        engine = get_db_engine()
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    f"UPDATE diagnosis_sessions SET {', '.join(set_clauses)} "
+                    "WHERE session_id = :sid"
+                ),
+                params,
+            )
+            conn.commit()
+            return result.rowcount > 0
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(
+                target=self._write_loop, name="session-write-behind", daemon=True
+            )
+            self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            _time.sleep(self.write_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[SESSION-STORE] Write-behind error: {e}")
+
+
+session_store = SessionStore(
+    config.SESSION_CACHE_MAX_ENTRIES,
+    config.SESSION_CACHE_MODE,
+    config.SESSION_WRITE_BEHIND_INTERVAL,
+)
+# Don't lose pending writes on a graceful worker shutdown
+atexit.register(lambda: session_store.flush())
+
+
 def create_session(
     *,
     chat_id: str,
@@ -35,121 +499,220 @@ def create_session(
     Create a new DiagnosisSession row and return its UUID.
     """
     session_id = str(uuid.uuid4())
-    engine = get_db_engine()
-
-    with engine.connect() as conn:
-        conn.execute(
-            text("""
-                INSERT INTO diagnosis_sessions
-                    (session_id, chat_id, initial_symptoms, base_probs,
-                     current_probs, disease, confidence, uncertainty,
-                     top_diseases, model_used, lang, asked_questions,
-                     evidence_texts, question_answers, created_at, updated_at)
-                VALUES
-                    (:session_id, :chat_id, :initial_symptoms, :base_probs,
-                     :current_probs, :disease, :confidence, :uncertainty,
-                     :top_diseases, :model_used, :lang, :asked_questions,
-                     :evidence_texts, :question_answers, :created_at, :updated_at)
-            """),
-            {
-                "session_id": session_id,
-                "chat_id": chat_id,
-                "initial_symptoms": initial_symptoms,
-                "base_probs": json.dumps(base_probs),
-                "current_probs": json.dumps(current_probs),
-                "disease": disease,
-                "confidence": confidence,
-                "uncertainty": uncertainty,
-                "top_diseases": json.dumps(top_diseases),
-                "model_used": model_used,
-                "lang": lang,
-                "asked_questions": json.dumps([]),
-                "evidence_texts": json.dumps([]),
-                "question_answers": json.dumps({}),
-                "created_at": _now(),
-                "updated_at": _now(),
-            },
-        )
-        conn.commit()
-
+    row = {
+        "session_id": session_id,
+        "chat_id": chat_id,
+        "initial_symptoms": initial_symptoms,
+        "base_probs": base_probs,
+        "current_probs": current_probs,
+        "disease": disease,
+        "confidence": confidence,
+        "uncertainty": uncertainty,
+        "top_diseases": top_diseases,
+        "model_used": model_used,
+        "lang": lang,
+        "asked_questions": [],
+        "evidence_texts": [],
+        "question_answers": {},
+        "created_at": _now(),
+        "updated_at": _now(),
+        "version": 0,
+    }
+    if config.SESSION_CACHE_ENABLED:
+        session_store.create(row)
+    else:
+        _insert_row(row)
     return session_id
 
 
 def get_session(session_id: str) -> dict | None:
     """
     Retrieve a DiagnosisSession by its UUID.
-    Returns None if not found or expired (> 1 hour old).
+    Returns None if not found or expired (> SESSION_TTL_SECONDS old).
     """
-    engine = get_db_engine()
-
-    with engine.connect() as conn:
-        row = (
-            conn.execute(
-                text("SELECT * FROM diagnosis_sessions WHERE session_id = :sid"),
-                {"sid": session_id},
-            )
-            .mappings()
-            .first()
-        )
+    if config.SESSION_CACHE_ENABLED:
+        return session_store.get(session_id)
 
-    if not row:
+    data = _select_row(session_id)
+    if data is None or _is_expired(data):
         return None
+    return data
 
-    data = dict(row)
 
-    # Check expiry (1 hour)
-    if _now() - data.get("created_at", 0) > 3600:
-        return None
+def update_session(session_id: str, sync: bool = False, **kwargs) -> bool:
+    """
+    Update specific fields of a DiagnosisSession.
+    JSON-serializable fields are automatically serialized (compactly, with
+    SESSION_COMPACT_STATE).
 
-    # Deserialize JSON fields
-    for field in (
-        "base_probs",
-        "current_probs",
-        "top_diseases",
-        "asked_questions",
-        "evidence_texts",
-        "question_answers",
-    ):
-        val = data.get(field)
-        if isinstance(val, str):
-            data[field] = json.loads(val)
-        elif val is None:
-            # Handle missing field for backwards compatibility
-            data[field] = {} if field == "question_answers" else []
+    With the session store enabled the change is written back in the next
+    batch; pass `sync=True` to write it before returning.
+    """
+    if config.SESSION_CACHE_ENABLED:
+        if has_request_context():
+            # Only the sessions this request touched are flushed at its teardown
+            g.setdefault("touched_session_ids", set()).add(session_id)
+        return session_store.update(session_id, kwargs, sync=sync)
+    return session_store._write_through(session_id, dict(kwargs, updated_at=_now()))
 
-    return data
 
+def flush_sessions(session_ids=None) -> int:
+    """Write back pending session changes now (all, or only `session_ids`)."""
+    return session_store.flush(session_ids)
 
-def update_session(session_id: str, **kwargs) -> bool:
+
+def flush_request_sessions(exc=None) -> None:
     """
-    Update specific fields of a DiagnosisSession.
-    JSON-serializable fields are automatically serialized.
+    Request teardown hook: in "versioned" mode, persist the sessions this
+    request updated before the response (other sessions' pending writes are
+    left to the write-behind thread).
     """
-    json_fields = {
-        "base_probs",
-        "current_probs",
-        "top_diseases",
-        "asked_questions",
-        "evidence_texts",
-        "question_answers",
-    }
-    params = {"sid": session_id, "updated_at": _now()}
-    set_clauses = ["updated_at = :updated_at"]
+    session_ids = g.pop("touched_session_ids", None)
+    if session_ids and config.SESSION_CACHE_ENABLED and session_store.mode != "sticky":
+        session_store.flush(session_ids)
 
-    for key, val in kwargs.items():
-        if key in json_fields:
-            params[key] = json.dumps(val)
-        else:
-            params[key] = val
-        set_clauses.append(f"{key} = :{key}")
 
+def delete_session(session_id: str) -> bool:
+    """Delete a DiagnosisSession row (and its cached copy)."""
+    session_store.discard(session_id)
     engine = get_db_engine()
     with engine.connect() as conn:
         result = conn.execute(
-            text(
-                f"UPDATE diagnosis_sessions SET {', '.join(set_clauses)} WHERE session_id = :sid"
-            ),
-            params,
+            text("DELETE FROM diagnosis_sessions WHERE session_id = :sid"),
+            {"sid": session_id},
         )
         conn.commit()
         return result.rowcount > 0
+
+
+# ── Expiry sweep ──────────────────────────────────────────────────────────────
+
+_sweep_lock = threading.Lock()
+_sweeper = None
+_sweep_stats = {
+    "runs": 0,
+    "rows_swept": 0,
+    "errors": 0,
+    "last_run_at": None,
+    "last_rows_swept": 0,
+    "last_batches": 0,
+    "last_duration_ms": 0.0,
+    "table_rows": None,
+    "table_bytes": None,
+}
+
+
+def _table_size(conn) -> tuple[int, int | None]:
+    """(row count, on-disk bytes) of diagnosis_sessions; estimates on PostgreSQL."""
+    if conn.dialect.name == "postgresql":
+        # Planner statistics: no full scan of the table being kept small
+        row = conn.execute(
+            text(
+                "SELECT GREATEST(reltuples, 0)::bigint, "
+                "pg_total_relation_size('diagnosis_sessions') "
+                "FROM pg_class WHERE relname = 'diagnosis_sessions'"
+            )
+        ).first()
+        if row is not None:
+            return int(row[0]), int(row[1])
+    count = conn.execute(text("SELECT COUNT(*) FROM diagnosis_sessions")).scalar()
+    return int(count or 0), None
+
+
+def sweep_expired_sessions(batch_size: int | None = None, max_batches: int | None = None) -> dict:
+    """
+    Delete sessions older than SESSION_TTL_SECONDS, `batch_size` rows per
+    transaction and at most `max_batches` batches per call (the rest is left
+    for the next run). Returns this run's metrics.
+    """
+    batch_size = int(batch_size or config.SESSION_SWEEP_BATCH_SIZE)
+    max_batches = int(max_batches or config.SESSION_SWEEP_MAX_BATCHES)
+    cutoff = _now() - config.SESSION_TTL_SECONDS
+    start = _time.perf_counter()
+
+    with _sweep_lock:
+        swept, batches, complete = 0, 0, False
+        try:
+            engine = get_db_engine()
+            with engine.connect() as conn:
+                while batches < max_batches:
+                    # Each batch walks the existing created_at index
+                    # (idx_diagnosis_sessions_created_at, see schema.prisma)
+                    result = conn.execute(
+                        text("""
+                            DELETE FROM diagnosis_sessions
+                            WHERE session_id IN (
+                                SELECT session_id FROM diagnosis_sessions
+                                WHERE created_at < :cutoff
+                                ORDER BY created_at
+                                LIMIT :batch_size
+                            )
+                        """),
+                        {"cutoff": cutoff, "batch_size": batch_size},
+                    )
+                    conn.commit()
+                    batches += 1
+                    swept += max(result.rowcount, 0)
+                    if result.rowcount < batch_size:
+                        complete = True  # nothing expired is left
+                        break
+                table_rows, table_bytes = _table_size(conn)
+        except Exception as e:
+            _sweep_stats["errors"] += 1
+            _sweep_stats["rows_swept"] += swept
+            print(f"[SESSION-SWEEP] Sweep failed after {swept} rows: {e}")
+            raise
+
+        cached = session_store.discard_expired()
+        run = {
+            "rows_swept": swept,
+            "batches": batches,
+            "complete": complete,
+            "duration_ms": (_time.perf_counter() - start) * 1000,
+            "table_rows": table_rows,
+            "table_bytes": table_bytes,
+            "cache_evicted": cached,
+        }
+        _sweep_stats.update(
+            runs=_sweep_stats["runs"] + 1,
+            rows_swept=_sweep_stats["rows_swept"] + swept,
+            last_run_at=_now(),
+            last_rows_swept=swept,
+            last_batches=batches,
+            last_duration_ms=run["duration_ms"],
+            table_rows=table_rows,
+            table_bytes=table_bytes,
+        )
+    print(
+        f"[SESSION-SWEEP] Deleted {swept} expired sessions in {batches} batch(es), "
+        f"{run['duration_ms']:.0f}ms; table now ~{table_rows} rows"
+    )
+    return run
+
+
+def _sweep_loop(interval: float) -> None:
+    while True:
+        _time.sleep(interval)
+        try:
+            sweep_expired_sessions()
+        except Exception:
+            pass  # logged by sweep_expired_sessions; retried next interval
+
+
+def start_session_sweeper(interval: float | None = None) -> bool:
+    """Start the background expiry sweep (once per process); False if disabled."""
+    global _sweeper
+    interval = config.SESSION_SWEEP_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return False
+    with _sweep_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = threading.Thread(
+                target=_sweep_loop, args=(interval,), name="session-sweeper", daemon=True
+            )
+            _sweeper.start()
+    return True
+
+
+def get_session_store_stats() -> dict:
+    return {**session_store.get_stats(), "sweep": dict(_sweep_stats)}
@@ -0,0 +1,188 @@
+"""
+Compact binary encoding of the follow-up session state.
+
+The probability arrays and the asked-question / answer history used to be
+stored as JSON text and re-serialized on every write-back, with
+`top_diseases` repeating every probability next to its disease name. With
+SESSION_COMPACT_STATE they go to BYTEA columns instead
+(migrations/add_compact_session_state.sql):
+
+  base_probs_bin / current_probs_bin
+      [format][dtype] + the packed little-endian float64 (or float32) array
+  asked_questions_bin
+      [format][table fingerprint:4][count:u16] + one u16 code per question
+  question_answers_bin
+      same header + (question code, answer code:u8) per answer, in order
+
+Question IDs are interned as their index in the question-bank ID table
+(English bank order, then Tagalog-only IDs). IDs outside the table and
+answers other than yes/no are spelled out after an escape code, so any
+state round-trips. The table fingerprint guards against decoding with a
+changed bank; such a blob raises `ValueError`.
+
+`top_diseases` is stored as "[]" when it equals `derive_top_diseases` of the
+current probabilities and rebuilt on read.
+"""
+
+import hashlib
+import struct
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+_DTYPE_CODES = {"float64": 1, "float32": 2}
+_DTYPES = {1: np.dtype("<f8"), 2: np.dtype("<f4")}
+
+_LITERAL_ID = 0xFFFF
+_ANSWERS = ("no", "yes")
+_LITERAL_ANSWER = 0xFF
+
+_u16 = struct.Struct("<H")
+_id_header = struct.Struct("<B4sH")
+
+_question_table = None
+
+
+def question_id_table() -> tuple[list, dict, bytes]:
+    """(ids, id -> code, fingerprint) of the interned question-ID table."""
+    global _question_table
+    if _question_table is None:
+        # Import here to avoid circular imports
+        from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+
+        ids, codes = [], {}
+        for bank in (QUESTION_BANK_EN, QUESTION_BANK_TL):
+            for questions in bank.values():
+                for q in questions:
+                    qid = q.get("id", "")
+                    if qid and qid not in codes and len(ids) < _LITERAL_ID:
+                        codes[qid] = len(ids)
+                        ids.append(qid)
+        fingerprint = hashlib.sha256("\n".join(ids).encode("utf-8")).digest()[:4]
+        _question_table = (ids, codes, fingerprint)
+    return _question_table
+
+
+def _disease_labels() -> dict:
+    # Import here to avoid circular imports
+    from app.services.ml_service import CORRECT_ID2LABEL
+
+    return CORRECT_ID2LABEL
+
+
+# ── Probabilities ─────────────────────────────────────────────────────────
+
+
+def encode_probs(probs, dtype: str = "float64") -> bytes:
+    code = _DTYPE_CODES[dtype]
+    return bytes((FORMAT_VERSION, code)) + np.asarray(probs, dtype=_DTYPES[code]).tobytes()
+
+
+def decode_probs(blob) -> list:
+    blob = bytes(blob)
+    if blob[0] != FORMAT_VERSION or blob[1] not in _DTYPES:
+        raise ValueError(f"unknown probability format {blob[:2].hex()}")
+    return np.frombuffer(blob, dtype=_DTYPES[blob[1]], offset=2).tolist()
+
+
+# ── Question IDs and answers ──────────────────────────────────────────────
+
+
+def _pack_text(parts: list, value: str) -> None:
+    raw = value.encode("utf-8")
+    parts.append(_u16.pack(len(raw)))
+    parts.append(raw)
+
+
+def _unpack_text(blob: bytes, pos: int) -> tuple[str, int]:
+    (length,) = _u16.unpack_from(blob, pos)
+    pos += 2
+    return blob[pos : pos + length].decode("utf-8"), pos + length
+
+
+def _pack_id(parts: list, codes: dict, qid: str) -> None:
+    code = codes.get(qid)
+    if code is None:
+        parts.append(_u16.pack(_LITERAL_ID))
+        _pack_text(parts, qid)
+    else:
+        parts.append(_u16.pack(code))
+
+
+def _unpack_id(blob: bytes, pos: int, ids: list) -> tuple[str, int]:
+    (code,) = _u16.unpack_from(blob, pos)
+    pos += 2
+    if code == _LITERAL_ID:
+        return _unpack_text(blob, pos)
+    return ids[code], pos
+
+
+def _open_ids(blob) -> tuple[bytes, int, int, list]:
+    blob = bytes(blob)
+    version, fingerprint, count = _id_header.unpack_from(blob)
+    ids, _, current = question_id_table()
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unknown question-state format {version}")
+    if fingerprint != current:
+        raise ValueError("question bank changed since the state was written")
+    return blob, _id_header.size, count, ids
+
+
+def encode_question_ids(question_ids) -> bytes:
+    _, codes, fingerprint = question_id_table()
+    question_ids = list(question_ids)
+    parts = [_id_header.pack(FORMAT_VERSION, fingerprint, len(question_ids))]
+    for qid in question_ids:
+        _pack_id(parts, codes, str(qid))
+    return b"".join(parts)
+
+
+def decode_question_ids(blob) -> list:
+    blob, pos, count, ids = _open_ids(blob)
+    out = []
+    for _ in range(count):
+        qid, pos = _unpack_id(blob, pos, ids)
+        out.append(qid)
+    return out
+
+
+def encode_answers(answers: dict) -> bytes:
+    _, codes, fingerprint = question_id_table()
+    parts = [_id_header.pack(FORMAT_VERSION, fingerprint, len(answers))]
+    for qid, answer in answers.items():
+        _pack_id(parts, codes, str(qid))
+        if answer in _ANSWERS:
+            parts.append(bytes((_ANSWERS.index(answer),)))
+        else:
+            parts.append(bytes((_LITERAL_ANSWER,)))
+            _pack_text(parts, str(answer))
+    return b"".join(parts)
+
+
+def decode_answers(blob) -> dict:
+    blob, pos, count, ids = _open_ids(blob)
+    out = {}
+    for _ in range(count):
+        qid, pos = _unpack_id(blob, pos, ids)
+        code = blob[pos]
+        pos += 1
+        if code == _LITERAL_ANSWER:
+            out[qid], pos = _unpack_text(blob, pos)
+        else:
+            out[qid] = _ANSWERS[code]
+    return out
+
+
+# ── Derived fields ────────────────────────────────────────────────────────
+
+
+def derive_top_diseases(probs) -> list:
+    """`top_diseases` as the diagnosis flow builds it: every class, most likely first."""
+    labels = _disease_labels()
+    top = [
+        {"disease": labels.get(i, f"D{i}"), "probability": float(p)}
+        for i, p in enumerate(probs)
+    ]
+    top.sort(key=lambda x: x["probability"], reverse=True)
+    return top
@@ -0,0 +1,130 @@
+"""
+Precomputed lookup tables over the semantic question groups.
+
+`question_groups` answers "which groups is this question in?", "which
+questions are related?" and "how similar are two questions?" on every
+follow-up, once per candidate x asked pair for the novelty penalty. Scanning
+QUESTION_GROUPS for each of those grows with the size of the banks, so
+`QuestionGroupIndex` builds everything once at import:
+
+  * an inverted question -> groups map (groups in QUESTION_GROUPS order)
+  * the related-question set for every grouped question
+  * a dense Jaccard similarity matrix over all grouped question IDs
+  * per-group skip sets (group members plus "without X" differentiators)
+
+Values are the same floats the scanning functions produce, so scores that
+depend on them do not change.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class QuestionGroupIndex:
+    """Inverted index and similarity matrix for a {group: [question_id]} map."""
+
+    def __init__(
+        self,
+        question_groups: dict[str, list[str]],
+        negative_questions: dict[str, list[str]] | None = None,
+    ):
+        groups_by_question: dict[str, list[str]] = {}
+        for group_name, question_ids in question_groups.items():
+            for qid in question_ids:
+                groups = groups_by_question.setdefault(qid, [])
+                if group_name not in groups:
+                    groups.append(group_name)
+        self.groups_by_question = {
+            qid: tuple(groups) for qid, groups in groups_by_question.items()
+        }
+
+        self.related = {
+            qid: frozenset(
+                related_id
+                for group_name in groups
+                for related_id in question_groups[group_name]
+            )
+            for qid, groups in self.groups_by_question.items()
+        }
+
+        negative_questions = negative_questions or {}
+        self.skip_by_group = {
+            group_name: frozenset(question_groups.get(group_name, ()))
+            | frozenset(negative_questions.get(group_name, ()))
+            for group_name in set(question_groups) | set(negative_questions)
+        }
+
+        self.question_ids = list(self.groups_by_question)
+        self.position = {qid: pos for pos, qid in enumerate(self.question_ids)}
+        self.similarity = self._jaccard_matrix()
+
+    def _jaccard_matrix(self) -> np.ndarray:
+        group_names = sorted({g for gs in self.groups_by_question.values() for g in gs})
+        group_pos = {name: pos for pos, name in enumerate(group_names)}
+        membership = np.zeros((len(self.question_ids), len(group_names)), dtype=np.int64)
+        for row, qid in enumerate(self.question_ids):
+            for group_name in self.groups_by_question[qid]:
+                membership[row, group_pos[group_name]] = 1
+
+        intersection = membership @ membership.T
+        sizes = membership.sum(axis=1)
+        union = sizes[:, None] + sizes[None, :] - intersection
+        # Every indexed question is in at least one group, so union >= 1
+        similarity = intersection / union
+        np.fill_diagonal(similarity, 1.0)
+        return similarity
+
+    def groups_for(self, question_id: str) -> list[str]:
+        return list(self.groups_by_question.get(question_id, ()))
+
+    def related_questions(self, question_id: str) -> set[str]:
+        return set(self.related.get(question_id, ()))
+
+    def expand(self, question_ids) -> set[str]:
+        expanded = set(question_ids)
+        for qid in question_ids:
+            expanded |= self.related.get(qid, frozenset())
+        return expanded
+
+    def skip_for_groups(self, group_names) -> set[str]:
+        skip = set()
+        for group_name in group_names:
+            skip |= self.skip_by_group.get(group_name, frozenset())
+        return skip
+
+    def question_similarity(self, question_id1: str, question_id2: str) -> float:
+        if question_id1 == question_id2:
+            return 1.0
+        pos1 = self.position.get(question_id1)
+        pos2 = self.position.get(question_id2)
+        if pos1 is None or pos2 is None:
+            return 0.0
+        return float(self.similarity[pos1, pos2])
+
+    def max_similarity(self, candidate_ids: list[str], asked_ids) -> np.ndarray:
+        """Highest similarity of each candidate to any asked question."""
+        asked_ids = list(asked_ids)
+        result = np.zeros(len(candidate_ids), dtype=np.float64)
+        if not asked_ids or not candidate_ids:
+            return result
+
+        asked_cols = np.array(
+            sorted({self.position[qid] for qid in asked_ids if qid in self.position}),
+            dtype=np.intp,
+        )
+        rows = np.array(
+            [self.position.get(qid, -1) for qid in candidate_ids], dtype=np.intp
+        )
+        indexed = rows >= 0
+        if len(asked_cols) and indexed.any():
+            result[indexed] = self.similarity[np.ix_(rows[indexed], asked_cols)].max(
+                axis=1
+            )
+
+        # Ungrouped questions are only similar to themselves
+        asked_set = set(asked_ids)
+        for i in np.flatnonzero(~indexed):
+            if candidate_ids[i] in asked_set:
+                result[i] = 1.0
+        return result
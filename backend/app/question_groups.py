@@ -11,6 +11,11 @@ disease contexts but essentially queries the same patient experience.
 
 from __future__ import annotations
 
+import numpy as np
+
+from app.question_group_index import QuestionGroupIndex
+from app.services.keyword_engine import match_symptom_groups
+
 # Semantic groups: question IDs that ask about the same symptom concept
 # When one question in a group is asked, the others become redundant
 QUESTION_GROUPS: dict[str, list[str]] = {
@@ -495,11 +500,7 @@ def get_groups_for_question(question_id: str) -> list[str]:
     Returns:
         List of group names that contain this question
     """
-    groups = []
-    for group_name, question_ids in QUESTION_GROUPS.items():
-        if question_id in question_ids:
-            groups.append(group_name)
-    return groups
+    return _GROUP_INDEX.groups_for(question_id)
 
 
 def get_related_questions(question_id: str) -> set[str]:
@@ -512,10 +513,7 @@ def get_related_questions(question_id: str) -> set[str]:
     Returns:
         Set of all related question IDs (including the input question itself)
     """
-    related = set()
-    for group_name in get_groups_for_question(question_id):
-        related.update(QUESTION_GROUPS[group_name])
-    return related
+    return _GROUP_INDEX.related_questions(question_id)
 
 
 def expand_asked_questions(asked_question_ids: set[str]) -> set[str]:
@@ -532,10 +530,7 @@ def expand_asked_questions(asked_question_ids: set[str]) -> set[str]:
     Returns:
         Expanded set including all semantically related questions
     """
-    expanded = set(asked_question_ids)
-    for qid in asked_question_ids:
-        expanded.update(get_related_questions(qid))
-    return expanded
+    return _GROUP_INDEX.expand(asked_question_ids)
 
 
 # Keywords that indicate a symptom has been mentioned in free text
@@ -749,16 +744,7 @@ def detect_symptom_groups_in_text(text: str) -> set[str]:
     Returns:
         Set of group names that have keywords present in the text
     """
-    text_lower = text.lower()
-    detected_groups = set()
-
-    for group_name, keywords in SYMPTOM_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                detected_groups.add(group_name)
-                break  # Found one keyword, move to next group
-
-    return detected_groups
+    return match_symptom_groups(text.lower())
 
 
 def get_questions_to_skip_from_text(text: str) -> set[str]:
@@ -776,20 +762,9 @@ def get_questions_to_skip_from_text(text: str) -> set[str]:
     Returns:
         Set of question IDs that are redundant given the mentioned symptoms
     """
-    detected_groups = detect_symptom_groups_in_text(text)
-    questions_to_skip = set()
-
-    for group_name in detected_groups:
-        # Skip positive questions about this symptom
-        if group_name in QUESTION_GROUPS:
-            questions_to_skip.update(QUESTION_GROUPS[group_name])
-
-        # Also skip negative/differentiator questions
-        # (questions asking "do you NOT have X" when user clearly has X)
-        if group_name in POSITIVE_TO_NEGATIVE_QUESTIONS:
-            questions_to_skip.update(POSITIVE_TO_NEGATIVE_QUESTIONS[group_name])
-
-    return questions_to_skip
+    # Each group's skip set holds its positive questions plus the negative/
+    # differentiator questions ("do you NOT have X" when user clearly has X)
+    return _GROUP_INDEX.skip_for_groups(detect_symptom_groups_in_text(text))
 
 
 # ==================== NOVELTY PENALTY FUNCTIONS ====================
@@ -809,31 +784,9 @@ def compute_question_similarity(question_id1: str, question_id2: str) -> float:
     Returns:
         Similarity score from 0.0 to 1.0
     """
-    if question_id1 == question_id2:
-        return 1.0
-
-    # Find all groups each question belongs to
-    groups1 = set()
-    groups2 = set()
-
-    for group_name, question_ids in QUESTION_GROUPS.items():
-        if question_id1 in question_ids:
-            groups1.add(group_name)
-        if question_id2 in question_ids:
-            groups2.add(group_name)
-
-    # If neither question is in any group, they're not similar
-    if not groups1 and not groups2:
-        return 0.0
-
-    # Jaccard similarity: intersection / union
-    if not groups1 or not groups2:
-        return 0.0
-
-    intersection = len(groups1 & groups2)
-    union = len(groups1 | groups2)
-
-    return intersection / union if union > 0 else 0.0
+    # Jaccard similarity of the questions' group sets (precomputed);
+    # questions outside every group are only similar to themselves
+    return _GROUP_INDEX.question_similarity(question_id1, question_id2)
 
 
 def get_novelty_penalty(
@@ -863,15 +816,31 @@ def get_novelty_penalty(
         return 0.0
 
     # Find max similarity to any already-asked question
-    max_similarity = 0.0
-    for asked_id in asked_question_ids:
-        similarity = compute_question_similarity(candidate_question_id, asked_id)
-        max_similarity = max(max_similarity, similarity)
+    max_similarity = float(
+        _GROUP_INDEX.max_similarity([candidate_question_id], asked_question_ids)[0]
+    )
 
     # Penalty scales with similarity: 0 similarity = 0 penalty, 1 similarity = full penalty
     return max_similarity * penalty_weight
 
 
+def get_novelty_penalties(
+    candidate_question_ids: list[str],
+    asked_question_ids: list[str],
+    penalty_weight: float = 0.12,
+) -> np.ndarray:
+    """
+    get_novelty_penalty for many candidates at once.
+
+    Returns:
+        Array of penalties aligned with `candidate_question_ids`.
+    """
+    return (
+        _GROUP_INDEX.max_similarity(candidate_question_ids, asked_question_ids)
+        * penalty_weight
+    )
+
+
 def get_all_groups_for_question(question_id: str) -> list[str]:
     """
     Get all semantic group names that a question belongs to.
@@ -882,8 +851,8 @@ def get_all_groups_for_question(question_id: str) -> list[str]:
     Returns:
         List of group names the question belongs to
     """
-    groups = []
-    for group_name, question_ids in QUESTION_GROUPS.items():
-        if question_id in question_ids:
-            groups.append(group_name)
-    return groups
+    return _GROUP_INDEX.groups_for(question_id)
+
+
+# Built once at import; the lookups above read from it
+_GROUP_INDEX = QuestionGroupIndex(QUESTION_GROUPS, POSITIVE_TO_NEGATIVE_QUESTIONS)
@@ -0,0 +1,232 @@
+"""
+Admission control for the classifier and explainer models.
+
+Nothing used to bound how many `predict_with_uncertainty` /
+`explain_with_gradient_shap` calls ran at once, so a burst oversubscribed the
+torch thread pool and every request slowed down together until gunicorn's
+timeout. Each model ("eng", "fil") now has a gate:
+
+  * ADMISSION_SLOTS_<MODEL> calls run on the model at once. Diagnoses are
+    run by MCInferenceScheduler as shared MC batches, one at a time per model,
+    so the slots default to MCD_BATCH_MAX_SIZE to let a full batch form;
+    explanations (one gradient pass each) may hold at most
+    ADMISSION_EXPLAIN_SLOTS of them
+  * up to ADMISSION_MAX_QUEUE more wait, ordered by priority class
+    ("diagnose" before "explain") and then arrival; a new diagnosis arriving
+    at a full queue takes the place of the newest waiting explanation
+  * a call that can't be queued, waits longer than ADMISSION_MAX_WAIT_SECONDS
+    or is displaced raises `AdmissionRejected`, answered with 429 and a
+    Retry-After derived from the model's recent service time
+
+Routes admit on the request thread before handing the work to the compute
+pool, so waiting never occupies a compute worker; `admit()` is re-entrant per
+context, so the gates inside `classifier()` / `explainer()` then pass through.
+
+Models are loaded lazily by the model registry. The first burst after startup
+(or after MODEL_IDLE_UNLOAD_SECONDS unloaded an idle model) pays the load time
+inside a slot, so callers queued behind it can time out with 429s.
+"""
+
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import app.config as config
+
+PRIORITY_CLASSES = {"diagnose": 0, "explain": 1}
+
+_WAITING, _GRANTED, _REJECTED = "waiting", "granted", "rejected"
+
+# Models this context already holds a slot for
+_held_models = contextvars.ContextVar("admission_held_models", default=frozenset())
+
+
+class AdmissionRejected(RuntimeError):
+    """The model is saturated; retry after `retry_after` seconds."""
+
+    def __init__(self, model: str, reason: str, retry_after: int):
+        super().__init__(f"{model} model overloaded ({reason}); retry in {retry_after}s")
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Gate:
+    def __init__(self, slots: int):
+        self.slots = max(1, int(slots))
+        self.in_use = 0
+        self.held = {name: 0 for name in PRIORITY_CLASSES}
+        self.waiters = []  # heap of [priority, seq, state, priority_class]
+        self.service_ms = None  # EWMA of slot hold time
+        self.admitted = {name: 0 for name in PRIORITY_CLASSES}
+        self.rejected = {}
+        self.waits = {name: deque(maxlen=512) for name in PRIORITY_CLASSES}
+        self.max_wait_ms = {name: 0.0 for name in PRIORITY_CLASSES}
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        slots: dict,
+        max_queue: int = 8,
+        max_wait_seconds: float = 20.0,
+        default_retry_after: int = 5,
+        class_slots: dict | None = None,
+    ):
+        self.max_queue = max(0, int(max_queue))
+        # Most slots of a model one priority class may hold at once
+        self.class_slots = dict(class_slots or {})
+        self.max_wait_seconds = float(max_wait_seconds)
+        self.default_retry_after = int(default_retry_after)
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._gates = {name: _Gate(n) for name, n in slots.items()}
+
+    def _gate(self, model: str) -> _Gate:
+        gate = self._gates.get(model)
+        if gate is None:
+            gate = self._gates[model] = _Gate(1)
+        return gate
+
+    def _retry_after(self, gate: _Gate) -> int:
+        if gate.service_ms is None:
+            return self.default_retry_after
+        # Time for the queue ahead to drain through the slots, plus one service
+        rounds = len(gate.waiters) / gate.slots + 1
+        return int(min(max(math.ceil(gate.service_ms * rounds / 1000), 1), 60))
+
+    def _reject(self, gate: _Gate, model: str, reason: str) -> AdmissionRejected:
+        gate.rejected[reason] = gate.rejected.get(reason, 0) + 1
+        print(f"[ADMISSION] Rejected {model} request: {reason}")
+        return AdmissionRejected(model, reason, self._retry_after(gate))
+
+    def _can_take(self, gate: _Gate, priority_class: str) -> bool:
+        limit = self.class_slots.get(priority_class, gate.slots)
+        return gate.in_use < gate.slots and gate.held[priority_class] < limit
+
+    def _take(self, gate: _Gate, priority_class: str) -> None:
+        gate.in_use += 1
+        gate.held[priority_class] += 1
+
+    def _grant_waiters(self, gate: _Gate) -> None:
+        granted = False
+        # In queue order, skipping waiters whose class is at its limit
+        for entry in sorted(gate.waiters):
+            if gate.in_use >= gate.slots:
+                break
+            if self._can_take(gate, entry[3]):
+                entry[2] = _GRANTED
+                self._take(gate, entry[3])
+                granted = True
+        if granted:
+            gate.waiters = [entry for entry in gate.waiters if entry[2] == _WAITING]
+            heapq.heapify(gate.waiters)
+        self._cond.notify_all()
+
+    def _acquire(self, model: str, priority_class: str) -> float:
+        """Take a slot of `model`, waiting if needed; returns the wait in ms."""
+        priority = PRIORITY_CLASSES[priority_class]
+        start = time.perf_counter()
+        with self._cond:
+            gate = self._gate(model)
+            # Nobody of equal or higher priority is waiting ahead of us
+            if self._can_take(gate, priority_class) and (
+                not gate.waiters or gate.waiters[0][0] > priority
+            ):
+                self._take(gate, priority_class)
+            else:
+                if len(gate.waiters) >= self.max_queue:
+                    worst = max(gate.waiters, default=None)
+                    if worst is None or worst[0] <= priority:
+                        raise self._reject(gate, model, "queue_full")
+                    # Lower-priority work yields its place in the queue
+                    gate.waiters.remove(worst)
+                    heapq.heapify(gate.waiters)
+                    worst[2] = _REJECTED
+                    self._cond.notify_all()
+                entry = [priority, next(self._seq), _WAITING, priority_class]
+                heapq.heappush(gate.waiters, entry)
+                deadline = time.monotonic() + self.max_wait_seconds
+                while entry[2] == _WAITING:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        gate.waiters.remove(entry)
+                        heapq.heapify(gate.waiters)
+                        raise self._reject(gate, model, "timeout")
+                    self._cond.wait(remaining)
+                if entry[2] == _REJECTED:
+                    raise self._reject(gate, model, "preempted")
+
+            wait_ms = (time.perf_counter() - start) * 1000
+            gate.admitted[priority_class] += 1
+            gate.waits[priority_class].append(wait_ms)
+            gate.max_wait_ms[priority_class] = max(gate.max_wait_ms[priority_class], wait_ms)
+            return wait_ms
+
+    def _release(self, model: str, priority_class: str, held_ms: float) -> None:
+        with self._cond:
+            gate = self._gates[model]
+            gate.in_use -= 1
+            gate.held[priority_class] -= 1
+            gate.service_ms = (
+                held_ms if gate.service_ms is None else 0.8 * gate.service_ms + 0.2 * held_ms
+            )
+            self._grant_waiters(gate)
+
+    @contextmanager
+    def admit(self, model: str, priority_class: str = "diagnose"):
+        """Hold one slot of `model` for the block (re-entrant within a context)."""
+        held = _held_models.get()
+        if not config.ADMISSION_ENABLED or model in held:
+            yield
+            return
+        self._acquire(model, priority_class)
+        token = _held_models.set(held | {model})
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _held_models.reset(token)
+            self._release(model, priority_class, (time.perf_counter() - start) * 1000)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            stats = {}
+            for name, gate in self._gates.items():
+                queue_ms = {}
+                for cls, waits in gate.waits.items():
+                    ordered = sorted(waits)
+                    queue_ms[cls] = {
+                        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+                        "p95": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+                        "max": gate.max_wait_ms[cls],
+                    }
+                stats[name] = {
+                    "slots": gate.slots,
+                    "in_use": gate.in_use,
+                    "held": dict(gate.held),
+                    "queued": len(gate.waiters),
+                    "admitted": dict(gate.admitted),
+                    "rejected": dict(gate.rejected),
+                    "queue_ms": queue_ms,
+                    "service_ms": gate.service_ms,
+                }
+            return {"enabled": config.ADMISSION_ENABLED, "models": stats}
+
+
+admission_controller = AdmissionController(
+    {"eng": config.ADMISSION_SLOTS_ENG, "fil": config.ADMISSION_SLOTS_FIL},
+    max_queue=config.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=config.ADMISSION_MAX_WAIT_SECONDS,
+    default_retry_after=config.ADMISSION_RETRY_AFTER,
+    class_slots={"explain": config.ADMISSION_EXPLAIN_SLOTS},
+)
+
+
+def get_admission_stats() -> dict:
+    return admission_controller.get_stats()
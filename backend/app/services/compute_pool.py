@@ -0,0 +1,184 @@
+"""
+Bounded executor for the CPU-heavy work behind the API.
+
+Classification, GradientSHAP explanations, surveillance analysis and
+clustering used to run on whichever request thread received the call, so a
+few slow requests occupied every thread, including the ones only waiting on
+Supabase or the database. Routes now hand that work to `compute_pool.run()`:
+
+  * at most COMPUTE_POOL_WORKERS calls execute at once (threads: the models
+    live in this process and torch releases the GIL while computing)
+  * at most COMPUTE_POOL_MAX_QUEUE more wait for a worker; beyond that
+    `ComputePoolFull` is raised and the app answers 503 with Retry-After
+  * the caller blocks until the result is ready, and context variables set
+    by the work (e.g. `get_last_inference_metadata()`) are visible to it
+    afterwards, so an offloaded call behaves exactly like an inline one
+
+Request threads (gunicorn --threads, or SERVING_REQUEST_THREADS in the ASGI
+mode, app/asgi.py) can then be sized for I/O concurrency without
+oversubscribing the CPU.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app.config as config
+
+_MISSING = object()
+
+
+class ComputePoolFull(RuntimeError):
+    """Every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Compute pool saturated; retry later")
+        self.retry_after = retry_after
+
+
+class ComputePool:
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, retry_after: int = 5):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after = int(retry_after)
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            "submitted": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "max_in_flight": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers,
+                    thread_name_prefix="compute",
+                    initializer=self._mark_worker,
+                )
+            return self._executor
+
+    def _mark_worker(self) -> None:
+        self._local.is_worker = True
+
+    def _admit(self):
+        """Reserve a running/queued slot, or raise ComputePoolFull."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise ComputePoolFull(self.retry_after)
+        with self._lock:
+            self._in_flight += 1
+            self._stats["submitted"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+
+    def _release(self, ok: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._stats["completed" if ok else "failed"] += 1
+        self._slots.release()
+
+    def _execute(self, ctx, queued_at, fn, args, kwargs):
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        with self._lock:
+            self._stats["started"] += 1
+            self._stats["queue_wait_ms_total"] += wait_ms
+            self._stats["queue_wait_ms_max"] = max(self._stats["queue_wait_ms_max"], wait_ms)
+        return ctx.run(fn, *args, **kwargs)
+
+    def _submit(self, fn, args, kwargs):
+        self._admit()
+        ctx = contextvars.copy_context()
+        try:
+            future = self._get_executor().submit(
+                self._execute, ctx, time.perf_counter(), fn, args, kwargs
+            )
+        except Exception:
+            self._release(False)
+            raise
+        return ctx, future
+
+    @staticmethod
+    def _adopt_context(ctx) -> None:
+        # Make the work's context-variable writes visible to the caller
+        for var, value in ctx.items():
+            if var.get(_MISSING) is not value:
+                var.set(value)
+
+    def run(self, fn, *args, **kwargs):
+        """Call `fn(*args, **kwargs)` on the pool and wait for its result."""
+        if not config.COMPUTE_POOL_ENABLED or getattr(self._local, "is_worker", False):
+            # Nested offloads run inline (a worker waiting on the pool could deadlock it)
+            return fn(*args, **kwargs)
+        ctx, future = self._submit(fn, args, kwargs)
+        ok = False
+        try:
+            result = future.result()
+            ok = True
+        finally:
+            self._release(ok)
+        self._adopt_context(ctx)
+        return result
+
+    async def run_async(self, fn, *args, **kwargs):
+        """`run()` for event-loop callers: awaits the result without blocking the loop."""
+        if not config.COMPUTE_POOL_ENABLED:
+            return fn(*args, **kwargs)
+        ctx, future = self._submit(fn, args, kwargs)
+        ok = False
+        try:
+            result = await asyncio.wrap_future(future)
+            ok = True
+        finally:
+            self._release(ok)
+        self._adopt_context(ctx)
+        return result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            started = self._stats["started"]
+            running = min(self._in_flight, self.max_workers)
+            return {
+                "enabled": config.COMPUTE_POOL_ENABLED,
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": running,
+                "queued": self._in_flight - running,
+                "queue_wait_ms_mean": (
+                    self._stats["queue_wait_ms_total"] / started if started else 0.0
+                ),
+                **self._stats,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+compute_pool = ComputePool(
+    config.COMPUTE_POOL_WORKERS,
+    config.COMPUTE_POOL_MAX_QUEUE,
+    config.COMPUTE_POOL_RETRY_AFTER,
+)
+
+
+def run_compute(fn, *args, **kwargs):
+    """Run CPU-heavy work on the shared bounded pool (see module docstring)."""
+    return compute_pool.run(fn, *args, **kwargs)
+
+
+def get_compute_pool_stats() -> dict:
+    return compute_pool.get_stats()
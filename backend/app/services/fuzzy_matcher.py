@@ -0,0 +1,154 @@
+"""
+Indexed fuzzy concept matching for the Tier 2/3 ontologies.
+
+`verification._fuzzy_match_term` slides a window of the term's word count
+over the text and scores each window with `fuzz.ratio`. Done per dictionary
+term, the text is re-split and re-windowed hundreds of times per request.
+`FuzzyConceptMatcher` indexes a dictionary's terms by word count once. Per
+text it builds each window size once, strips punctuation with a shared
+translation table, and scores all windows against all same-size terms in one
+`process.cdist` call. Only the (term, window) pairs that clear the term's
+threshold go through the critical-conflict penalty, which is applied exactly
+as `_fuzzy_match_term` applies it.
+"""
+
+from __future__ import annotations
+
+import string
+import threading
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+import app.config as config
+
+# Morphologically similar but semantically opposite words (e.g. "puting
+# pantal" vs "pulang pantal" differ by 2 letters but mean white vs red)
+CRITICAL_CONFLICTS = [
+    ("puti", "pula"),
+    ("puting", "pulang"),
+    ("pula", "puti"),
+    ("pulang", "puting"),
+    ("wala", "may"),
+    ("walang", "meron"),
+    ("may", "wala"),
+    ("meron", "walang"),
+    ("hindi", "oo"),
+    ("bata", "matanda"),
+    ("matanda", "bata"),
+    ("mataas", "mababa"),
+    ("mabilis", "mabagal"),
+]
+CONFLICT_PENALTY = 20
+
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+
+def fuzzy_threshold(length):
+    """Similarity threshold for a term of `length` characters (array-friendly)."""
+    return np.where(
+        np.asarray(length) <= 5,
+        config.FUZZY_THRESHOLD_SHORT,
+        np.where(
+            np.asarray(length) <= 9,
+            config.FUZZY_THRESHOLD_MEDIUM,
+            config.FUZZY_THRESHOLD_LONG,
+        ),
+    )
+
+
+def conflict_words(term: str) -> list[str]:
+    """Window words that penalize `term` (one entry per conflicting pair)."""
+    term_words = set(term.split())
+    return [w_word for t_word, w_word in CRITICAL_CONFLICTS if t_word in term_words]
+
+
+def penalized_score(score: float, conflicts: list[str], window: str) -> float:
+    """`score` after the critical-conflict penalty for this window."""
+    if conflicts:
+        window_words = set(window.split())
+        for w_word in conflicts:
+            if w_word in window_words:
+                score -= CONFLICT_PENALTY
+    return score
+
+
+def text_windows(words: list[str], n: int) -> list[str]:
+    """Punctuation-stripped n-word windows, as _fuzzy_match_term builds them."""
+    return [
+        " ".join(words[i : i + n]).translate(PUNCTUATION_TABLE)
+        for i in range(len(words) - n + 1)
+    ]
+
+
+class FuzzyConceptMatcher:
+    """Fuzzy term matcher for one {term: concept} dictionary."""
+
+    def __init__(self, terms):
+        self.terms = list(terms)
+        self.lengths = np.array([len(t) for t in self.terms], dtype=np.int64)
+        self.conflicts = [conflict_words(t) for t in self.terms]
+        self.by_word_count: dict[int, np.ndarray] = {}
+        word_counts = [len(t.split()) for t in self.terms]
+        for n in sorted(set(word_counts)):
+            self.by_word_count[n] = np.array(
+                [i for i, wc in enumerate(word_counts) if wc == n], dtype=np.intp
+            )
+
+    def match(self, text: str, candidates=None) -> set[str]:
+        """
+        Terms that fuzzy-match somewhere in `text`.
+
+        Args:
+            text: Lower-cased text.
+            candidates: Optional collection of terms to consider (default all).
+        """
+        eligible = self.lengths >= config.FUZZY_MIN_TERM_LENGTH
+        if candidates is not None:
+            candidates = set(candidates)
+            eligible &= np.array([t in candidates for t in self.terms], dtype=bool)
+        thresholds = fuzzy_threshold(self.lengths)
+
+        words = text.split()
+        matched = set()
+        for n, indices in self.by_word_count.items():
+            if len(words) < n:
+                break
+            indices = indices[eligible[indices]]
+            if len(indices) == 0:
+                continue
+            windows = text_windows(words, n)
+            term_thresholds = thresholds[indices]
+            scores = process.cdist(
+                [self.terms[i] for i in indices],
+                windows,
+                scorer=fuzz.ratio,
+                dtype=np.float64,
+                score_cutoff=float(term_thresholds.min()),
+            )
+            hits = scores >= term_thresholds[:, None]
+            for row in np.flatnonzero(hits.any(axis=1)):
+                term_idx = indices[row]
+                threshold = term_thresholds[row]
+                for col in np.flatnonzero(hits[row]):
+                    score = penalized_score(
+                        scores[row, col], self.conflicts[term_idx], windows[col]
+                    )
+                    if score >= threshold:
+                        matched.add(self.terms[term_idx])
+                        break
+        return matched
+
+
+_MATCHERS: dict[int, tuple[object, FuzzyConceptMatcher]] = {}
+_MATCHERS_LOCK = threading.Lock()
+
+
+def get_fuzzy_matcher(dictionary) -> FuzzyConceptMatcher:
+    """Matcher for `dictionary`, built once per dictionary object."""
+    entry = _MATCHERS.get(id(dictionary))
+    if entry is None or entry[0] is not dictionary:
+        with _MATCHERS_LOCK:
+            entry = (dictionary, FuzzyConceptMatcher(dictionary))
+            _MATCHERS[id(dictionary)] = entry
+    return entry[1]
@@ -42,8 +42,10 @@ from app.question_groups import (
     expand_asked_questions,
     get_questions_to_skip_from_text,
     get_questions_blocked_by_prerequisites,
-    get_novelty_penalty,
+    get_novelty_penalties,
 )
+from app.services.policy_cache import NO_QUESTION, get_policy_cache
+from app.services.question_bank import QuestionBank
 
 if TYPE_CHECKING:
     pass
@@ -464,6 +466,234 @@ def compute_mode_adjusted_score(
         return base_score
 
 
+# ==================== VECTORIZED SCORING ====================
+# Matrix forms of compute_eig / compute_differential_eig /
+# compute_mode_adjusted_score / compute_burden_penalty. One row per candidate
+# question; every element goes through the same floating-point operations as
+# the scalar functions, so the scores are identical, not just close.
+
+
+def _likelihood_factors(weights: np.ndarray) -> tuple:
+    """(yes_boost, yes_penalty, no_penalty, no_boost) per question weight."""
+    yes_boost = 1.0 + weights
+    yes_penalty = np.maximum(1.0 - weights * 0.35, 0.1)
+    no_penalty = np.maximum(1.0 - weights * 0.35, 0.05)
+    no_boost = 1.0 + weights * 0.1
+    return yes_boost, yes_penalty, no_penalty, no_boost
+
+
+def _row_entropies(matrix: np.ndarray) -> np.ndarray:
+    """Row-wise _shannon_entropy."""
+    return entropy(np.clip(matrix, 1e-12, 1.0), axis=1)
+
+
+def _factor_matrix(
+    target_cols: np.ndarray, target: np.ndarray, other: np.ndarray, n_cols: int
+) -> np.ndarray:
+    factors = np.repeat(other[:, None], n_cols, axis=1)
+    factors[np.arange(len(target_cols)), target_cols] = target
+    return factors
+
+
+def compute_eig_batch(
+    current_probs: np.ndarray,
+    weights: np.ndarray,
+    target_idx: np.ndarray,
+    is_negative: np.ndarray,
+) -> np.ndarray:
+    """compute_eig for many questions at once (p_yes from the current probs)."""
+    probs = np.clip(np.array(current_probs, dtype=np.float64), 1e-12, 1.0)
+    probs = probs / probs.sum()
+    weights = np.asarray(weights, dtype=np.float64)
+    target_idx = np.asarray(target_idx, dtype=np.intp)
+    is_negative = np.asarray(is_negative, dtype=bool)
+    if len(weights) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    yes_boost, yes_penalty, no_penalty, no_boost = _likelihood_factors(weights)
+    # Negative questions swap the effective answer (see _simulate_posterior)
+    n_classes = len(probs)
+    likelihood_yes = _factor_matrix(
+        target_idx,
+        np.where(is_negative, no_penalty, yes_boost),
+        np.where(is_negative, no_boost, yes_penalty),
+        n_classes,
+    )
+    likelihood_no = _factor_matrix(
+        target_idx,
+        np.where(is_negative, yes_boost, no_penalty),
+        np.where(is_negative, yes_penalty, no_boost),
+        n_classes,
+    )
+
+    h_current = _shannon_entropy(probs)
+    entropies = []
+    for likelihood in (likelihood_yes, likelihood_no):
+        posterior = likelihood * probs
+        posterior /= posterior.sum(axis=1, keepdims=True)
+        entropies.append(_row_entropies(posterior))
+    h_yes, h_no = entropies
+
+    target_probs = probs[target_idx]
+    p_yes = np.where(is_negative, 1.0 - target_probs, target_probs)
+    p_no = 1.0 - p_yes
+    eig = h_current - (p_yes * h_yes + p_no * h_no)
+    return np.maximum(eig, 0.0)
+
+
+def compute_differential_eig_batch(
+    current_probs: np.ndarray,
+    weights: np.ndarray,
+    target_idx: np.ndarray,
+    top_k_indices: list[int],
+    is_negative: np.ndarray,
+) -> np.ndarray:
+    """compute_differential_eig for many questions at once."""
+    probs = np.clip(np.array(current_probs, dtype=np.float64), 1e-12, 1.0)
+    probs = probs / probs.sum()
+    weights = np.asarray(weights, dtype=np.float64)
+    target_idx = np.asarray(target_idx, dtype=np.intp)
+    is_negative = np.asarray(is_negative, dtype=bool)
+    if len(weights) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    top_k_probs = np.array([probs[i] for i in top_k_indices])
+    top_k_probs = top_k_probs / top_k_probs.sum()
+
+    local_of = np.full(len(probs), -1, dtype=np.intp)
+    local_of[np.asarray(top_k_indices, dtype=np.intp)] = np.arange(len(top_k_indices))
+    local_target = local_of[target_idx]
+    in_top_k = local_target >= 0
+    local_target = np.where(in_top_k, local_target, 0)
+
+    h_current = _shannon_entropy(top_k_probs)
+
+    target_probs = top_k_probs[local_target]
+    p_yes = np.where(is_negative, 1.0 - target_probs, target_probs)
+    p_no = 1.0 - p_yes
+
+    boost, penalty, no_penalty, no_boost = _likelihood_factors(weights)
+    n_top = len(top_k_indices)
+    posterior_yes = top_k_probs * _factor_matrix(
+        local_target,
+        np.where(is_negative, penalty, boost),
+        np.where(is_negative, boost, penalty),
+        n_top,
+    )
+    posterior_no = top_k_probs * _factor_matrix(
+        local_target,
+        np.where(is_negative, boost, no_penalty),
+        np.where(is_negative, penalty, no_boost),
+        n_top,
+    )
+    posterior_yes = posterior_yes / posterior_yes.sum(axis=1, keepdims=True)
+    posterior_no = posterior_no / posterior_no.sum(axis=1, keepdims=True)
+
+    diff_eig = h_current - (
+        p_yes * _row_entropies(posterior_yes) + p_no * _row_entropies(posterior_no)
+    )
+    # Questions that don't target a top-k disease have no differential value
+    return np.where(in_top_k, np.maximum(diff_eig, 0.0), 0.0)
+
+
+def compute_mode_adjusted_scores(
+    eig_raw: np.ndarray,
+    diff_eig: np.ndarray,
+    is_top_disease_question: np.ndarray,
+    is_top_k_disease_question: np.ndarray,
+    mode: DiagnosisMode,
+) -> np.ndarray:
+    """compute_mode_adjusted_score for many questions at once."""
+    if mode == DiagnosisMode.CONFIRMATION:
+        base_score = np.where(is_top_disease_question, eig_raw * 1.5, eig_raw)
+        return base_score * (1 - DIFFERENTIAL_EIG_WEIGHT * 0.3) + diff_eig * (
+            DIFFERENTIAL_EIG_WEIGHT * 0.3
+        )
+
+    elif mode == DiagnosisMode.RULE_OUT:
+        base_score = (
+            eig_raw * (1 - DIFFERENTIAL_EIG_WEIGHT) + diff_eig * DIFFERENTIAL_EIG_WEIGHT
+        )
+        return np.where(is_top_k_disease_question, base_score * 1.1, base_score)
+
+    else:  # EXPLORATION
+        base_score = eig_raw * (1 - DIFFERENTIAL_EIG_WEIGHT * 0.5) + diff_eig * (
+            DIFFERENTIAL_EIG_WEIGHT * 0.5
+        )
+        return np.where(is_top_disease_question, base_score * 1.2, base_score)
+
+
+def compute_novelty_penalties(question_ids: list[str], asked_list: list[str]) -> np.ndarray:
+    """get_novelty_penalty for every candidate question."""
+    return get_novelty_penalties(question_ids, asked_list, NOVELTY_PENALTY_WEIGHT)
+
+
+def score_questions(
+    current_probs: list | np.ndarray,
+    target_idx: np.ndarray,
+    weights: np.ndarray,
+    burden: np.ndarray,
+    is_negative: np.ndarray,
+    question_ids: list[str],
+    disease_labels: dict[int, str],
+    asked_question_ids: list[str] | None = None,
+) -> dict:
+    """
+    Score every candidate question in one pass.
+
+    Returns the per-question arrays ("eig", "diff_eig", "burden_penalty",
+    "novelty_penalty", "adjusted_score", "is_top_disease_q",
+    "is_top_k_disease_q") plus the shared "mode", "top_disease" and
+    "second_disease" that select_best_question uses.
+    """
+    probs = np.array(current_probs, dtype=np.float64).flatten()
+    probs = probs / probs.sum()
+    target_idx = np.asarray(target_idx, dtype=np.intp)
+
+    sorted_indices = list(np.argsort(probs)[::-1])  # Descending order
+    top_k_indices = sorted_indices[: min(TOP_K_DISEASES, len(sorted_indices))]
+    top_disease = disease_labels.get(int(sorted_indices[0]), "Unknown")
+    second_disease = (
+        disease_labels.get(int(sorted_indices[1]), None)
+        if len(sorted_indices) > 1
+        else None
+    )
+    mode = determine_diagnosis_mode(probs)
+
+    eig_raw = compute_eig_batch(probs, weights, target_idx, is_negative)
+    diff_eig = compute_differential_eig_batch(
+        probs, weights, target_idx, top_k_indices, is_negative
+    )
+
+    target_names = np.array(
+        [disease_labels.get(int(i)) for i in target_idx], dtype=object
+    )
+    is_top_disease_q = target_names == top_disease
+    is_top_k_disease_q = np.isin(target_idx, np.asarray(top_k_indices, dtype=np.intp))
+
+    base_score = compute_mode_adjusted_scores(
+        eig_raw, diff_eig, is_top_disease_q, is_top_k_disease_q, mode
+    )
+    burden_penalty = (np.asarray(burden, dtype=np.float64) - 1) / 4.0 * BURDEN_PENALTY_FACTOR
+    novelty_penalty = compute_novelty_penalties(
+        question_ids, list(asked_question_ids) if asked_question_ids else []
+    )
+    adjusted_score = (base_score - burden_penalty) - novelty_penalty
+
+    return {
+        "eig": eig_raw,
+        "diff_eig": diff_eig,
+        "burden_penalty": burden_penalty,
+        "novelty_penalty": novelty_penalty,
+        "adjusted_score": adjusted_score,
+        "is_top_disease_q": is_top_disease_q,
+        "is_top_k_disease_q": is_top_k_disease_q,
+        "mode": mode,
+        "top_disease": top_disease,
+        "second_disease": second_disease,
+    }
+
+
 # ==================== MAIN SELECTION FUNCTIONS ====================
 
 
@@ -494,97 +724,78 @@ def select_best_question(
     if not available_questions:
         return None
 
-    probs = np.array(current_probs, dtype=np.float64).flatten()
-    probs = probs / probs.sum()
-
     # Build reverse mapping from disease name to index
     label2idx: dict[str, int] = {}
     for idx, name in disease_labels.items():
         if name is not None:
             label2idx[name] = idx
 
-    # Identify top diseases for mode determination and differential EIG
-    sorted_indices = list(np.argsort(probs)[::-1])  # Descending order
-    top_k_indices = sorted_indices[: min(TOP_K_DISEASES, len(sorted_indices))]
+    candidates = [
+        q
+        for q in available_questions
+        if q.get("_disease") is not None and q["_disease"] in label2idx
+    ]
+    if not candidates:
+        return None
 
-    top_disease_idx = sorted_indices[0]
-    top_disease = disease_labels.get(int(top_disease_idx), "Unknown")
-    second_disease = (
-        disease_labels.get(int(sorted_indices[1]), None)
-        if len(sorted_indices) > 1
-        else None
+    return _select_from_candidates(
+        current_probs,
+        candidates,
+        [q["_disease"] for q in candidates],
+        np.array([label2idx[q["_disease"]] for q in candidates], dtype=np.intp),
+        np.array([q.get("weight", 0.85) for q in candidates], dtype=np.float64),
+        # Default to average burden if not specified
+        np.array([q.get("burden", 3) for q in candidates], dtype=np.float64),
+        np.array([bool(q.get("is_negative", False)) for q in candidates], dtype=bool),
+        disease_labels,
+        asked_question_ids,
     )
 
-    # Determine operating mode
-    mode = determine_diagnosis_mode(probs)
-
-    # Convert asked_question_ids to list for novelty calculation
-    asked_list = list(asked_question_ids) if asked_question_ids else []
-
-    best_question = None
-    best_adjusted_score = -1.0
-
-    for q in available_questions:
-        disease_name: str | None = q.get("_disease")
-        if disease_name is None:
-            continue
-        target_idx = label2idx.get(disease_name)
-        if target_idx is None:
-            continue
-
-        question_id = q.get("id", "")
-        weight = q.get("weight", 0.85)
-        burden = q.get("burden", 3)  # Default to average burden if not specified
-        is_negative = q.get("is_negative", False)  # Handle negative questions
-
-        # Compute raw EIG (with is_negative handling)
-        eig_raw = compute_eig(probs, weight, target_idx, is_negative=is_negative)
 
-        # Compute differential EIG for top-k separation (with is_negative handling)
-        diff_eig = compute_differential_eig(
-            probs, weight, target_idx, top_k_indices, is_negative=is_negative
-        )
-
-        # Determine question classification
-        is_top_disease_q = disease_name == top_disease
-        is_top_k_disease_q = target_idx in top_k_indices
-
-        # Compute mode-adjusted base score
-        base_score = compute_mode_adjusted_score(
-            eig_raw, diff_eig, is_top_disease_q, is_top_k_disease_q, mode
-        )
-
-        # Apply burden penalty
-        burden_penalty = compute_burden_penalty(burden)
-        score_after_burden = base_score - burden_penalty
+def _select_from_candidates(
+    current_probs: list | np.ndarray,
+    questions: list[dict],
+    diseases: list[str],
+    target_idx: np.ndarray,
+    weights: np.ndarray,
+    burden: np.ndarray,
+    is_negative: np.ndarray,
+    disease_labels: dict[int, str],
+    asked_question_ids: list[str] | None,
+) -> dict | None:
+    scores = score_questions(
+        current_probs,
+        target_idx,
+        weights,
+        burden,
+        is_negative,
+        [q.get("id", "") for q in questions],
+        disease_labels,
+        asked_question_ids,
+    )
 
-        # Apply novelty penalty
-        novelty_penalty = get_novelty_penalty(
-            question_id, asked_list, NOVELTY_PENALTY_WEIGHT
-        )
-        adjusted_score = score_after_burden - novelty_penalty
-
-        if adjusted_score > best_adjusted_score:
-            best_adjusted_score = adjusted_score
-            best_question = q.copy()
-            best_question["_eig"] = eig_raw
-            best_question["_diff_eig"] = diff_eig
-            best_question["_adjusted_score"] = adjusted_score
-            best_question["_burden_penalty"] = burden_penalty
-            best_question["_novelty_penalty"] = novelty_penalty
-            best_question["_is_top_disease_q"] = is_top_disease_q
-            best_question["_is_top_k_disease_q"] = is_top_k_disease_q
-            best_question["_mode"] = mode.value
-
-    if best_question:
-        best_question["_reasoning"] = _generate_question_reasoning(
-            question_disease=best_question.get("_disease", "Unknown"),
-            top_disease=top_disease,
-            second_disease=second_disease,
-            mode=mode,
-            is_top_disease_question=best_question.get("_is_top_disease_q", False),
-        )
+    adjusted = scores["adjusted_score"]
+    best = int(np.argmax(adjusted))  # first maximum, like a strict ">" scan
+    if not adjusted[best] > -1.0:
+        return None
 
+    mode = scores["mode"]
+    best_question = {**questions[best], "_disease": diseases[best]}
+    best_question["_eig"] = float(scores["eig"][best])
+    best_question["_diff_eig"] = float(scores["diff_eig"][best])
+    best_question["_adjusted_score"] = float(adjusted[best])
+    best_question["_burden_penalty"] = float(scores["burden_penalty"][best])
+    best_question["_novelty_penalty"] = float(scores["novelty_penalty"][best])
+    best_question["_is_top_disease_q"] = bool(scores["is_top_disease_q"][best])
+    best_question["_is_top_k_disease_q"] = bool(scores["is_top_k_disease_q"][best])
+    best_question["_mode"] = mode.value
+    best_question["_reasoning"] = _generate_question_reasoning(
+        question_disease=best_question.get("_disease", "Unknown"),
+        top_disease=scores["top_disease"],
+        second_disease=scores["second_disease"],
+        mode=mode,
+        is_top_disease_question=best_question["_is_top_disease_q"],
+    )
     return best_question
 
 
@@ -637,23 +848,66 @@ def select_best_question_across_diseases(
         )
         combined_skip = combined_skip | prerequisite_blocked
 
-    all_candidates = []
-
-    for disease, questions in question_bank.items():
-        for q in questions:
-            qid = q.get("id", "")
-            if qid in combined_skip:
-                continue
-            candidate = {**q, "_disease": disease}
-            all_candidates.append(candidate)
-
-    # Select best question with full scoring
-    best_question = select_best_question(
-        current_probs,
-        all_candidates,
-        disease_labels,
-        asked_question_ids=list(asked_question_ids),
-    )
+    if isinstance(question_bank, QuestionBank):
+        # Compiled bank: slice its precomputed vectors instead of re-reading dicts
+        label2idx = {name: idx for idx, name in disease_labels.items() if name is not None}
+        positions = np.array(
+            [
+                pos
+                for pos, qid in enumerate(question_bank.ids)
+                if qid not in combined_skip
+                and question_bank.question_diseases[pos] in label2idx
+            ],
+            dtype=np.intp,
+        )
+        # Same candidates, asked set, posterior and language -> same choice
+        cache = get_policy_cache()
+        cached = None
+        if cache is not None:
+            candidate_mask = np.zeros(len(question_bank.ids), dtype=bool)
+            candidate_mask[positions] = True
+            cache_key = cache.key(
+                question_bank, current_probs, candidate_mask, asked_question_ids
+            )
+            cached = cache.get(cache_key)
+
+        if cached is not None:
+            best_question = None if cached == NO_QUESTION else cached
+        elif len(positions) == 0:
+            best_question = None
+        else:
+            diseases = [question_bank.question_diseases[pos] for pos in positions]
+            best_question = _select_from_candidates(
+                current_probs,
+                [question_bank.questions[pos] for pos in positions],
+                diseases,
+                np.array([label2idx[d] for d in diseases], dtype=np.intp),
+                question_bank.weights[positions],
+                question_bank.burden[positions],
+                question_bank.is_negative[positions],
+                disease_labels,
+                list(asked_question_ids),
+            )
+        if cache is not None and cached is None:
+            cache.put(cache_key, best_question)
+    else:
+        all_candidates = []
+
+        for disease, questions in question_bank.items():
+            for q in questions:
+                qid = q.get("id", "")
+                if qid in combined_skip:
+                    continue
+                candidate = {**q, "_disease": disease}
+                all_candidates.append(candidate)
+
+        # Select best question with full scoring
+        best_question = select_best_question(
+            current_probs,
+            all_candidates,
+            disease_labels,
+            asked_question_ids=list(asked_question_ids),
+        )
 
     # Check for early stopping
     if best_question is None:
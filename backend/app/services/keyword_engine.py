@@ -0,0 +1,301 @@
+"""
+Shared multi-pattern keyword engine (Aho–Corasick).
+
+The request path checks the same symptom text against several keyword
+dictionaries: medical keywords (language heuristic, symptom gate), evidence
+keywords (text boosts, skip lists), symptom-group keywords, and the Tier 2/3
+concept ontologies (`\\b`-anchored). Testing one pattern at a time costs a
+substring search, or a regex compile and search, per term per call.
+
+`KeywordEngine` compiles every pattern from those dictionaries into one
+automaton when first used. A single pass over the lower-cased text finds
+every occurrence of every pattern. Each dictionary then reads its matches
+from that scan:
+
+  * substring dictionaries: a pattern matches if it occurs anywhere
+    (same as `kw in text_lower`)
+  * word-bounded dictionaries: a pattern matches only where `\\b` holds at
+    both ends (same as `re.search(rf"\\b{re.escape(term)}\\b", text_lower)`)
+
+Patterns are matched exactly as the dictionaries spell them (the callers
+lower-case the text, not the terms), except where a caller lower-cased the
+keywords itself (evidence keywords).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Iterable
+
+# Dictionaries whose matches require word boundaries at both ends
+WORD_BOUNDED = {"clinical_concepts", "unrelated_concepts"}
+
+
+def _is_word_char(ch: str) -> bool:
+    # Matches the `re` definition of \w for str patterns
+    return ch.isalnum() or ch == "_"
+
+
+class AhoCorasick:
+    """Aho–Corasick automaton reporting every (start, pattern) occurrence."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(dict.fromkeys(p for p in patterns if p))
+        self.pattern_id = {p: i for i, p in enumerate(self.patterns)}
+        self._lengths = [len(p) for p in self.patterns]
+
+        goto: list[dict] = [{}]
+        out: list[list[int]] = [[]]
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(pid)
+
+        fail = [0] * len(goto)
+        # Depth-1 states fail to the root; BFS fills in the deeper ones
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                # Inherit the outputs of the longest proper suffix state
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(o) for o in out]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def iter_matches(self, text: str):
+        """Yield (start, pattern_id) for every occurrence, overlaps included."""
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                yield end - lengths[pid], pid
+
+    def scan(self, text: str) -> tuple[frozenset, frozenset]:
+        """(pattern ids occurring anywhere, pattern ids occurring as \\b words)."""
+        found = set()
+        bounded = set()
+        n = len(text)
+        for start, pid in self.iter_matches(text):
+            found.add(pid)
+            if pid in bounded:
+                continue
+            end = start + self._lengths[pid]
+            before = start > 0 and _is_word_char(text[start - 1])
+            after = end < n and _is_word_char(text[end])
+            if before != _is_word_char(text[start]) and _is_word_char(text[end - 1]) != after:
+                bounded.add(pid)
+        return frozenset(found), frozenset(bounded)
+
+
+class KeywordDictionary:
+    """One {key: [patterns]} dictionary's view onto an automaton."""
+
+    def __init__(self, entries: dict, automaton: AhoCorasick, word_bounded: bool):
+        self.word_bounded = word_bounded
+        self._keys_by_pattern: dict[int, list] = {}
+        for key, patterns in entries.items():
+            for pattern in patterns:
+                pid = automaton.pattern_id.get(pattern)
+                if pid is not None:
+                    keys = self._keys_by_pattern.setdefault(pid, [])
+                    if key not in keys:
+                        keys.append(key)
+
+    def keys(self, found: frozenset, bounded: frozenset) -> set:
+        matched = bounded if self.word_bounded else found
+        keys = set()
+        for pid in matched & self._keys_by_pattern.keys():
+            keys.update(self._keys_by_pattern[pid])
+        return keys
+
+
+def _term_entries(terms) -> dict:
+    """{term: [term]} for a keyword set or a {term: concept} map."""
+    return {term: [term] for term in terms}
+
+
+def _evidence_entries(evidence_keywords: dict) -> dict:
+    return {qid: [kw.lower() for kw in kws] for qid, kws in evidence_keywords.items()}
+
+
+class KeywordEngine:
+    """All keyword dictionaries compiled into one automaton."""
+
+    def __init__(self, sources: dict[str, tuple[object, dict]]):
+        """
+        Args:
+            sources: {name: (source_object, {key: [patterns]})}. The source
+                object is kept so callers can check they are asking about
+                the dictionary that was compiled.
+        """
+        self.sources = {name: source for name, (source, _) in sources.items()}
+        self.automaton = AhoCorasick(
+            pattern
+            for _, entries in sources.values()
+            for patterns in entries.values()
+            for pattern in patterns
+        )
+        self.dictionaries = {
+            name: KeywordDictionary(entries, self.automaton, name in WORD_BOUNDED)
+            for name, (_, entries) in sources.items()
+        }
+        # The same text is looked up by several dictionaries per request; the
+        # cache makes that a single automaton pass.
+        self.scan = lru_cache(maxsize=256)(self.automaton.scan)
+
+    def keys(self, name: str, text_lower: str) -> set:
+        found, bounded = self.scan(text_lower)
+        return self.dictionaries[name].keys(found, bounded)
+
+    # The engine is persisted in the ontology artifact. The scan cache is
+    # rebuilt on load, and the source objects are re-bound by set_keyword_engine
+    # (identity with the live dictionaries cannot survive pickling).
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["scan"]
+        state["sources"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.scan = lru_cache(maxsize=256)(self.automaton.scan)
+
+
+_ENGINE: KeywordEngine | None = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def _default_source_objects() -> dict:
+    """{name: live dictionary object} for every dictionary the engine compiles."""
+    # Import here to avoid circular imports
+    import app.config as config
+    from app.evidence_keywords import EVIDENCE_KEYWORDS
+    from app.question_groups import SYMPTOM_KEYWORDS
+
+    return {
+        "medical_en": config.MEDICAL_KEYWORDS_EN,
+        "medical_tl": config.MEDICAL_KEYWORDS_TL,
+        "evidence": EVIDENCE_KEYWORDS,
+        "symptom_groups": SYMPTOM_KEYWORDS,
+        "clinical_concepts": config.CLINICAL_CONCEPTS,
+        "unrelated_concepts": config.UNRELATED_CATEGORY_CONCEPTS,
+    }
+
+
+_ENTRIES_FN = {
+    "medical_en": _term_entries,
+    "medical_tl": _term_entries,
+    "evidence": _evidence_entries,
+    "symptom_groups": dict,
+    "clinical_concepts": _term_entries,
+    "unrelated_concepts": _term_entries,
+}
+
+
+def build_keyword_engine() -> KeywordEngine:
+    """Compile the engine over the live dictionaries."""
+    return KeywordEngine(
+        {
+            name: (source, _ENTRIES_FN[name](source))
+            for name, source in _default_source_objects().items()
+        }
+    )
+
+
+def get_keyword_engine() -> KeywordEngine:
+    """The shared engine, compiled on first use."""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = build_keyword_engine()
+    return _ENGINE
+
+
+def set_keyword_engine(engine: KeywordEngine) -> None:
+    """
+    Install a precompiled engine (from the ontology artifact) as the shared one.
+
+    The caller guarantees it was compiled from dictionaries equal to the live
+    ones; they are re-bound here so lookups keep using the compiled automaton.
+    """
+    global _ENGINE
+    engine.sources = _default_source_objects()
+    with _ENGINE_LOCK:
+        _ENGINE = engine
+
+
+def _match(name: str, text_lower: str, source, entries_fn) -> set:
+    engine = get_keyword_engine()
+    if engine.sources[name] is source:
+        return engine.keys(name, text_lower)
+    # A dictionary other than the compiled one (e.g. patched in tests)
+    one_off = KeywordEngine({name: (source, entries_fn(source))})
+    return one_off.keys(name, text_lower)
+
+
+# ── Dictionary lookups used by the request path ──────────────────────────────
+
+
+def match_medical_keywords(text_lower: str, lang: str) -> set:
+    """Medical keywords of `lang` ("en"/"tl") occurring in the text."""
+    import app.config as config
+
+    if lang == "tl":
+        return _match("medical_tl", text_lower, config.MEDICAL_KEYWORDS_TL, _term_entries)
+    return _match("medical_en", text_lower, config.MEDICAL_KEYWORDS_EN, _term_entries)
+
+
+def match_evidence_qids(text_lower: str, evidence_keywords: dict) -> set:
+    """Question IDs with an evidence keyword (lower-cased) in the text."""
+    return _match("evidence", text_lower, evidence_keywords, _evidence_entries)
+
+
+def match_symptom_groups(text_lower: str) -> set:
+    """SYMPTOM_KEYWORDS groups with a keyword in the text."""
+    from app.question_groups import SYMPTOM_KEYWORDS
+
+    return _match("symptom_groups", text_lower, SYMPTOM_KEYWORDS, dict)
+
+
+def match_clinical_terms(text_lower: str) -> set:
+    """CLINICAL_CONCEPTS terms occurring as whole words in the text."""
+    import app.config as config
+
+    return _match(
+        "clinical_concepts", text_lower, config.CLINICAL_CONCEPTS, _term_entries
+    )
+
+
+def match_unrelated_terms(text_lower: str) -> set:
+    """UNRELATED_CATEGORY_CONCEPTS terms occurring as whole words in the text."""
+    import app.config as config
+
+    return _match(
+        "unrelated_concepts",
+        text_lower,
+        config.UNRELATED_CATEGORY_CONCEPTS,
+        _term_entries,
+    )
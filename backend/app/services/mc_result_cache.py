@@ -0,0 +1,221 @@
+"""
+Result cache for MC dropout predictions.
+
+With MCD_DETERMINISTIC enabled, `predict_with_uncertainty` is a pure function
+of the normalized text and the model/sampling settings, so repeated inputs can
+reuse an earlier prediction instead of re-running every MC forward pass.
+
+Two tiers are used:
+  * an in-process LRU with a TTL (fast, lost when the worker recycles)
+  * an optional SQLite file shared by all workers on the host, which keeps
+    the cache warm across gunicorn `--max-requests` restarts
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Array fields of the prediction dict returned by predict_with_uncertainty
+_ARRAY_FIELDS = (
+    "predicted_class",
+    "mean_probabilities",
+    "std_probabilities",
+    "confidence",
+    "predictive_entropy",
+    "mutual_information",
+)
+
+
+def normalize_cache_text(text: str) -> str:
+    """Same normalization used for the deterministic MC dropout seed."""
+    return " ".join((text or "").strip().lower().split())
+
+
+def build_cache_key(text: str, signature, normalize: bool = True) -> str:
+    """
+    Hash the text together with the model/sampling signature.
+
+    The text is normalized (case, whitespace) unless `normalize=False`, for
+    values tied to the exact string (e.g. token offsets).
+    """
+    if normalize:
+        text = normalize_cache_text(text)
+    payload = f"{signature!r}\x1f{text}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _encode_result(result: dict) -> bytes:
+    buffer = io.BytesIO()
+    arrays = {name: np.asarray(result[name]) for name in _ARRAY_FIELDS}
+    arrays["predicted_label"] = np.asarray(result["predicted_label"], dtype=str)
+    if result.get("deterministic_seed") is not None:
+        arrays["deterministic_seed"] = np.asarray(
+            int(result["deterministic_seed"]), dtype=np.int64
+        )
+    for name, value in result.items():
+        # Any extra numeric metadata (e.g. sample counts) is stored as-is
+        if name not in arrays and isinstance(value, (int, float, np.number)):
+            arrays[name] = np.asarray(value)
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _decode_result(blob: bytes) -> dict:
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        result = {name: data[name] for name in data.files}
+    result["predicted_label"] = result["predicted_label"].tolist()
+    seed = result.pop("deterministic_seed", None)
+    result["deterministic_seed"] = int(seed) if seed is not None else None
+    for name, value in list(result.items()):
+        if name not in _ARRAY_FIELDS and isinstance(value, np.ndarray) and value.ndim == 0:
+            result[name] = value.item()
+    return result
+
+
+def _copy_result(result: dict) -> dict:
+    """Shallow copy with fresh arrays so callers cannot mutate cached entries."""
+    return {
+        name: value.copy() if isinstance(value, np.ndarray) else value
+        for name, value in result.items()
+    }
+
+
+class MCResultCache:
+    """Thread-safe LRU + TTL cache with an optional SQLite disk tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 3600,
+        db_path: Optional[str] = None,
+        disk_ttl_seconds: float = 7 * 24 * 3600,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db_ready = False
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    # ── Disk tier ─────────────────────────────────────────────────────────
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        if not self._db_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS mc_results ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, payload BLOB NOT NULL)"
+            )
+            self._db_ready = True
+        return conn
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        if not self.db_path:
+            return None
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        "SELECT created_at, payload FROM mc_results WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"[MC_CACHE] Disk lookup failed: {e}")
+            return None
+        if row is None or time.time() - row[0] >= self.disk_ttl_seconds:
+            return None
+        return _decode_result(row[1])
+
+    def _disk_set(self, key: str, result: dict):
+        if not self.db_path:
+            return
+        try:
+            payload = _encode_result(result)
+            with self._db_lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO mc_results (key, created_at, payload) "
+                            "VALUES (?, ?, ?)",
+                            (key, time.time(), payload),
+                        )
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"[MC_CACHE] Disk write failed: {e}")
+
+    # ── Public API ────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a cached prediction, checking memory first and then disk."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if now - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return _copy_result(result)
+                del self._entries[key]
+
+        result = self._disk_get(key)
+        with self._lock:
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, result, now)
+        return _copy_result(result)
+
+    def set(self, key: str, result: dict):
+        """Store a prediction in both tiers."""
+        result = _copy_result(result)
+        with self._lock:
+            self._remember(key, result, time.time())
+            self.stats["stores"] += 1
+        self._disk_set(key, result)
+
+    def _remember(self, key: str, result: dict, stored_at: float):
+        self._entries[key] = (stored_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self, include_disk: bool = False):
+        """Drop cached entries. Used by tests and manual invalidation."""
+        with self._lock:
+            self._entries.clear()
+        if include_disk and self.db_path and os.path.exists(self.db_path):
+            with self._db_lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM mc_results")
+                finally:
+                    conn.close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        )
+        return stats
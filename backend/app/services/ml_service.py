@@ -1,10 +1,13 @@
 import hashlib
 import json
 import os
+import shutil
 from pathlib import Path
 import torch
+import transformers
 import torch.nn.functional as F
 from transformers import (
+    AutoConfig,
     AutoModelForSequenceClassification,
     AutoTokenizer,
     PreTrainedTokenizerFast,
@@ -13,18 +16,32 @@ from huggingface_hub import snapshot_download
 from scipy.stats import entropy
 import numpy as np
 import gc
-from captum.attr import GradientShap
 import contextvars
+import queue
+from collections import OrderedDict
+import threading
+import time
 import traceback
+from concurrent.futures import Future
 from typing import Dict, List, Tuple, Optional
 
 import app.config as config
+from app.services.admission import admission_controller, get_admission_stats
+from app.services.mc_result_cache import MCResultCache, build_cache_key
+from app.services.model_registry import ModelRegistry, assign_mmap_weights
+from app.services.onnx_backend import (
+    EXPORT_FORMAT_VERSION,
+    OnnxMCEngine,
+    export_onnx_model,
+    has_onnx_export,
+    onnx_mask_inputs_ctx,
+)
+from app.services.keyword_engine import match_medical_keywords
+from app.services.philox import PhiloxMaskRNG
+from app.services.text_analysis import analyze_text
 from app.utils import (
-    detect_language_heuristic,
     aggregate_subword_attributions,
     clean_token,
-    _count_words,
-    _has_medical_keywords,
 )
 
 # Correctly aligned Medical Ontology Labels.
@@ -45,6 +62,115 @@ mcd_rate_ctx = contextvars.ContextVar("mcd_rate", default=0.1)
 # torch.Generator produces different random sequences on CPU vs GPU due to floating-point
 # implementation differences. numpy.random.Generator with PCG64 is portable across all platforms.
 mcd_rng_ctx = contextvars.ContextVar("mcd_rng", default=None)
+# Active PartialMCState for top-layers-only MC dropout (None = run every layer)
+mcd_partial_ctx = contextvars.ContextVar("mcd_partial", default=None)
+
+
+class PartialMCState:
+    """
+    Per-call state for partial ("top layers only") MC dropout.
+
+    phase "lower": embeddings and encoder layers [0, split) run once with dropout
+    off; the output of layer split-1 is captured and later layers are skipped.
+    phase "upper": the embeddings return the captured (replicated) hidden states,
+    layers [0, split) are skipped and only the top layers and head run with MC
+    dropout active.
+    """
+
+    def __init__(self, split: int):
+        self.split = int(split)
+        self.phase = "lower"
+        self.hidden_states = None
+        self.tuple_outputs = False
+
+    def select(self, rows):
+        """Copy of this state restricted to the given batch rows."""
+        subset = PartialMCState(self.split)
+        subset.phase = self.phase
+        subset.tuple_outputs = self.tuple_outputs
+        subset.hidden_states = self.hidden_states[rows]
+        return subset
+
+    def skip_output(self, hidden_states):
+        return (hidden_states,) if self.tuple_outputs else hidden_states
+
+
+class BatchedMaskRNG:
+    """
+    Per-request dropout mask source for a micro-batched MC forward pass.
+
+    The batched input is laid out as one contiguous block of `n_iterations` rows
+    per request, right-padded to `padded_len` tokens. Each block draws its mask
+    from its own PCG64 generator using the shape the request would have had if
+    it ran alone (sequence dims trimmed to its own length), then pads the mask
+    with "keep" for the padding positions. The masks over real tokens are
+    therefore identical to a solo `predict_with_uncertainty` call.
+    """
+
+    def __init__(self, rngs, seq_lens, n_iterations, padded_len):
+        self.rngs = list(rngs)
+        self.seq_lens = [int(n) for n in seq_lens]
+        self.n_iterations = int(n_iterations)
+        self.padded_len = int(padded_len)
+
+    def random_mask(self, shape, keep_prob: float) -> np.ndarray:
+        """Return a boolean keep-mask of `shape` built block by block."""
+        mask = np.ones(shape, dtype=bool)
+        for i, (rng, seq_len) in enumerate(zip(self.rngs, self.seq_lens)):
+            block_shape = [self.n_iterations] + [
+                seq_len if (dim == self.padded_len and seq_len < dim) else dim
+                for dim in shape[1:]
+            ]
+            block = rng.random(block_shape, dtype=np.float32) < keep_prob
+            rows = slice(i * self.n_iterations, (i + 1) * self.n_iterations)
+            region = (rows,) + tuple(slice(0, dim) for dim in block_shape[1:])
+            mask[region] = block
+        return mask
+
+
+def _encoder_layers(model):
+    """Return (embeddings, encoder layer list) for ModernBERT/RoBERTa style models."""
+    base = model.base_model
+    layers = getattr(base, "layers", None)
+    if layers is None:
+        layers = base.encoder.layer
+    return base.embeddings, layers
+
+
+def _install_partial_mc_hooks(model):
+    """
+    Wrap the embeddings and encoder layers of `model` so they honour
+    `mcd_partial_ctx`. With no active state they behave exactly as before.
+    """
+    embeddings, layers = _encoder_layers(model)
+    embeddings_forward = embeddings.forward
+
+    def partial_embeddings_forward(*args, **kwargs):
+        state = mcd_partial_ctx.get()
+        if state is not None and state.phase == "upper":
+            return state.hidden_states
+        return embeddings_forward(*args, **kwargs)
+
+    embeddings.forward = partial_embeddings_forward
+
+    for idx, layer in enumerate(layers):
+
+        def partial_layer_forward(
+            hidden_states, *args, _idx=idx, _forward=layer.forward, **kwargs
+        ):
+            state = mcd_partial_ctx.get()
+            if state is None:
+                return _forward(hidden_states, *args, **kwargs)
+            if (state.phase == "lower") != (_idx < state.split):
+                return state.skip_output(hidden_states)
+
+            output = _forward(hidden_states, *args, **kwargs)
+            if state.phase == "lower" and _idx == state.split - 1:
+                state.tuple_outputs = isinstance(output, tuple)
+                state.hidden_states = output[0] if state.tuple_outputs else output
+            return output
+
+        layer.forward = partial_layer_forward
 
 
 class ThreadSafeDropout(torch.nn.Module):
@@ -59,8 +185,15 @@ class ThreadSafeDropout(torch.nn.Module):
     def __init__(self, p=0.5):
         super().__init__()
         self.p_default = p
+        # Stable position among the model's dropout layers (keys Philox masks)
+        self.layer_index = 0
 
     def forward(self, x):
+        # While tracing for ONNX export, dropout becomes an explicit mask input
+        export_masks = onnx_mask_inputs_ctx.get()
+        if export_masks is not None:
+            return export_masks.apply(x, self.layer_index)
+
         # Check if MCD is enabled for THIS specific request/thread
         if mcd_enabled_ctx.get():
             dropout_rate = float(mcd_rate_ctx.get())
@@ -76,7 +209,16 @@ class ThreadSafeDropout(torch.nn.Module):
             if rng is not None:
                 # Generate mask using numpy (portable across CPU/GPU/platforms)
                 # then convert to torch tensor on the correct device
-                mask_np = rng.random(x.shape, dtype=np.float32) < keep_prob
+                if isinstance(rng, PhiloxMaskRNG):
+                    # Counter-based bool mask: no float32 mask copy, 4x smaller
+                    # host-to-device transfer on GPU
+                    keep = rng.mask(tuple(x.shape), keep_prob, self.layer_index)
+                    keep = keep.to(device=x.device, non_blocking=True)
+                    return (x * keep).mul_(1.0 / keep_prob)
+                if isinstance(rng, BatchedMaskRNG):
+                    mask_np = rng.random_mask(tuple(x.shape), keep_prob)
+                else:
+                    mask_np = rng.random(x.shape, dtype=np.float32) < keep_prob
                 mask = torch.from_numpy(mask_np).to(device=x.device, dtype=x.dtype)
                 return x * mask / keep_prob
 
@@ -87,6 +229,12 @@ class ThreadSafeDropout(torch.nn.Module):
 
 
 class MCDClassifierWithSHAP:
+    # Attributes that only exist while the model is loaded; touching any of
+    # them on an unloaded classifier loads it (see __getattr__).
+    _LAZY_ATTRS = frozenset(
+        {"model", "explanation_model", "tokenizer", "onnx_engine", "partial_mc_layers"}
+    )
+
     def __init__(
         self,
         model_path,
@@ -94,9 +242,14 @@ class MCDClassifierWithSHAP:
         inference_dropout_rate=0.05,
         device=None,
         model_revision=None,
+        partial_mc_layers=0,
+        lazy=False,
     ):
+        self.model_path = model_path
+        self.model_revision = model_revision
         self.n_iterations = n_iterations
         self.inference_dropout_rate = inference_dropout_rate
+        self.requested_partial_mc_layers = partial_mc_layers
         # Allow forcing CPU mode via environment variable (useful for low-VRAM GPUs)
         force_cpu = os.getenv("ML_FORCE_CPU", "false").lower() in ("1", "true", "yes")
         if force_cpu:
@@ -107,36 +260,86 @@ class MCDClassifierWithSHAP:
                 device if device else ("cuda" if torch.cuda.is_available() else "cpu")
             )
 
+        self._load_lock = threading.RLock()
+        self._load_stats = {
+            "load_count": 0,
+            "last_load_seconds": None,
+            "mmap_bytes": 0,
+            "parameter_bytes": 0,
+        }
+        if not lazy:
+            self.load()
+
+    def __getattr__(self, name):
+        # Only called for attributes missing from the instance, i.e. model
+        # attributes of an unloaded classifier.
+        if name in MCDClassifierWithSHAP._LAZY_ATTRS and "_load_lock" in self.__dict__:
+            self.load()
+            return self.__dict__[name]
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        return "model" in self.__dict__
+
+    def load(self):
+        """Load the model, tokenizer and inference backend (no-op if loaded)."""
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            start = time.perf_counter()
+            try:
+                self._load_model()
+            except BaseException:
+                for name in MCDClassifierWithSHAP._LAZY_ATTRS - {"tokenizer"}:
+                    self.__dict__.pop(name, None)
+                raise
+            elapsed = time.perf_counter() - start
+            self._load_stats["load_count"] += 1
+            self._load_stats["last_load_seconds"] = round(elapsed, 3)
+            models = {id(m): m for m in (self.model, self.explanation_model)}
+            self._load_stats["parameter_bytes"] = sum(
+                t.numel() * t.element_size()
+                for m in models.values()
+                for t in m.state_dict().values()
+                if isinstance(t, torch.Tensor)
+            )
+            print(f"[ML] Loaded {self.model_path} in {elapsed:.1f}s")
+
+    def unload(self):
+        """Drop the model weights and inference backend; the tokenizer stays."""
+        with self._load_lock:
+            for name in MCDClassifierWithSHAP._LAZY_ATTRS - {"tokenizer"}:
+                self.__dict__.pop(name, None)
+        gc.collect()
+        torch.cuda.empty_cache() if torch.cuda.is_available() else None
+
+    def load_stats(self) -> dict:
+        return dict(self._load_stats, model_path=self.model_path, device=str(self.device))
+
+    def _load_model(self):
         model_kwargs = {}
         tokenizer_kwargs = {}
-        if model_revision:
-            model_kwargs["revision"] = model_revision
-            tokenizer_kwargs["revision"] = model_revision
+        if self.model_revision:
+            model_kwargs["revision"] = self.model_revision
+            tokenizer_kwargs["revision"] = self.model_revision
+        model_path = self.model_path
+        model_revision = self.model_revision
+        partial_mc_layers = self.requested_partial_mc_layers
 
-        # The published model repos contain a malformed config.json. Load a local
-        # snapshot and repair the label maps before instantiating the model.
         model_source = snapshot_download(model_path, revision=model_revision)
-        config_path = Path(model_source) / "config.json"
-        if config_path.exists():
-            config_data = json.loads(config_path.read_text(encoding="utf-8"))
-            config_data["id2label"] = {
-                str(idx): label for idx, label in CORRECT_ID2LABEL.items()
-            }
-            config_data["label2id"] = {
-                label: idx for idx, label in CORRECT_ID2LABEL.items()
-            }
-            config_path.write_text(json.dumps(config_data, indent=2), encoding="utf-8")
-
-        self.model = AutoModelForSequenceClassification.from_pretrained(
-            model_source, **model_kwargs
-        )
+        self.model = self._load_pretrained(model_source, model_kwargs)
         # AutoTokenizer may fail if tokenizer_config.json has a broken
         # tokenizer_class (e.g. "TokenizersBackend" instead of a real class).
         # Fall back to PreTrainedTokenizerFast which loads tokenizer.json directly.
+        # The tokenizer survives idle unloads, so it is only loaded once.
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                model_path, **tokenizer_kwargs
-            )
+            if "tokenizer" not in self.__dict__:
+                self.tokenizer = AutoTokenizer.from_pretrained(
+                    model_path, **tokenizer_kwargs
+                )
         except ValueError as tok_err:
             if "TokenizersBackend" in str(tok_err):
                 print(
@@ -180,9 +383,7 @@ class MCDClassifierWithSHAP:
                 print(f"[WARNING] CUDA OOM detected: {e}. Falling back to CPU...")
                 self.device = "cpu"
                 # Re-load model in CPU mode for quantization
-                self.model = AutoModelForSequenceClassification.from_pretrained(
-                    model_source, **model_kwargs
-                )
+                self.model = self._load_pretrained(model_source, model_kwargs)
                 self.model.config.id2label = CORRECT_ID2LABEL
                 self.model.config.label2id = {v: k for k, v in CORRECT_ID2LABEL.items()}
                 self.explanation_model = self.model
@@ -197,9 +398,21 @@ class MCDClassifierWithSHAP:
             else:
                 raise
 
+        # Optional ONNX Runtime engine for the CPU path (INFERENCE_BACKEND=onnx).
+        # When it loads, the eager int8 model below is not needed.
+        self.onnx_engine = None
+        if config.INFERENCE_BACKEND == "onnx":
+            if str(self.device).startswith("cpu"):
+                self.onnx_engine = self._load_onnx_engine(model_source)
+            else:
+                print(
+                    f"[ML] INFERENCE_BACKEND=onnx only applies to CPU inference; "
+                    f"using PyTorch on {self.device}"
+                )
+
         # Apply dynamic quantization to Linear layers for faster CPU inference and reduced memory usage
         # (Already on CPU after fallback, so quantization applies automatically)
-        if str(self.device).startswith("cpu"):
+        if str(self.device).startswith("cpu") and self.onnx_engine is None:
             # quantize_dynamic creates a new model instance
             self.model = torch.quantization.quantize_dynamic(
                 self.model, {torch.nn.Linear}, dtype=torch.qint8
@@ -207,6 +420,110 @@ class MCDClassifierWithSHAP:
             # Re-apply dropout layers after quantization
             self._replace_dropout_layers(self.model)
 
+        # Partial MC: the lower `partial_mc_layers` encoder layers run once per
+        # text and only the top layers are sampled (0 = full MC dropout).
+        _, layers = _encoder_layers(self.model)
+        self.partial_mc_layers = min(max(int(partial_mc_layers), 0), len(layers))
+        if self.onnx_engine is not None and self.partial_mc_layers:
+            print("[ML] Partial MC is not supported by the ONNX backend; using full MC")
+            self.partial_mc_layers = 0
+        _install_partial_mc_hooks(self.model)
+
+    def _load_pretrained(self, model_source, model_kwargs):
+        """
+        Instantiate the classifier from a local snapshot.
+
+        The published model repos contain a malformed config.json, so the label
+        maps are repaired in memory (the snapshot is left untouched). On CPU the
+        fp32 weights are then swapped for a copy-on-write mapping of the
+        safetensors file (MODEL_MMAP_WEIGHTS).
+        """
+        config_path = Path(model_source) / "config.json"
+        if config_path.exists():
+            config_data = json.loads(config_path.read_text(encoding="utf-8"))
+            config_data["id2label"] = {
+                str(idx): label for idx, label in CORRECT_ID2LABEL.items()
+            }
+            config_data["label2id"] = {
+                label: idx for idx, label in CORRECT_ID2LABEL.items()
+            }
+            model_kwargs = dict(
+                model_kwargs,
+                config=AutoConfig.for_model(config_data.pop("model_type"), **config_data),
+            )
+
+        model = AutoModelForSequenceClassification.from_pretrained(
+            model_source, **model_kwargs
+        )
+        self._load_stats["mmap_bytes"] = 0
+        if config.MODEL_MMAP_WEIGHTS and str(self.device).startswith("cpu"):
+            try:
+                self._load_stats["mmap_bytes"] = assign_mmap_weights(model, model_source)
+            except Exception as e:
+                print(f"[ML] Memory-mapped weights unavailable for {self.model_path}: {e}")
+        return model
+
+    def _load_onnx_engine(self, model_source):
+        """Export (once per model snapshot) and load the ONNX Runtime engine."""
+        export_key = hashlib.sha256(
+            ":".join(
+                [
+                    str(Path(model_source).resolve()),
+                    str(self.model_revision),
+                    str(config.ONNX_QUANTIZE),
+                    str(EXPORT_FORMAT_VERSION),
+                    torch.__version__,
+                    transformers.__version__,
+                ]
+            ).encode("utf-8")
+        ).hexdigest()[:16]
+        export_dir = Path(config.ONNX_EXPORT_DIR) / export_key
+
+        try:
+            if not has_onnx_export(export_dir):
+                print(f"[ML] Exporting {self.model_path} to ONNX ({export_dir})...")
+                # Export into a private directory first so concurrent workers
+                # never load a half-written graph.
+                staging_dir = export_dir.with_name(f"{export_key}.tmp{os.getpid()}")
+                export_onnx_model(
+                    self.explanation_model, staging_dir, quantize=config.ONNX_QUANTIZE
+                )
+                try:
+                    staging_dir.rename(export_dir)
+                except OSError:
+                    # Another worker finished first
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+
+            engine = OnnxMCEngine(
+                export_dir, intra_op_threads=config.ONNX_INTRA_OP_THREADS
+            )
+            print(f"[ML] ONNX Runtime backend ready for {self.model_path} ({engine.model_file})")
+            return engine
+        except Exception as e:
+            print(
+                f"[WARNING] ONNX Runtime backend unavailable for {self.model_path}: {e}. "
+                f"Falling back to PyTorch."
+            )
+            return None
+
+    def _onnx_dropout_mask(self, shape, layer_index, rng, dropout_rate=None):
+        """Scaled float32 keep-mask for one dropout call of the ONNX graph."""
+        if dropout_rate is None:
+            dropout_rate = self.inference_dropout_rate
+        dropout_rate = float(dropout_rate)
+        if dropout_rate <= 0.0:
+            return np.ones(shape, dtype=np.float32)
+        keep_prob = 1.0 - dropout_rate
+        if keep_prob <= 0.0:
+            return np.zeros(shape, dtype=np.float32)
+        if isinstance(rng, PhiloxMaskRNG):
+            keep = rng.mask(shape, keep_prob, layer_index).numpy()
+        elif rng is not None:
+            keep = rng.random_mask(shape, keep_prob)
+        else:
+            keep = np.random.default_rng().random(shape, dtype=np.float32) < keep_prob
+        return keep.astype(np.float32) / np.float32(keep_prob)
+
     def _replace_dropout_layers(self, model):
         """
         Recursively replace all torch.nn.Dropout layers with ThreadSafeDropout.
@@ -219,6 +536,10 @@ class MCDClassifierWithSHAP:
                     new_dropout = ThreadSafeDropout(p=child.p)
                     setattr(module, child_name, new_dropout)
 
+        dropout_layers = (m for m in model.modules() if isinstance(m, ThreadSafeDropout))
+        for index, dropout in enumerate(dropout_layers):
+            dropout.layer_index = index
+
     @staticmethod
     def _build_deterministic_seed(text: str) -> int:
         """Generate a stable per-input seed to reproduce MC dropout outputs."""
@@ -228,86 +549,462 @@ class MCDClassifierWithSHAP:
         seed = int.from_bytes(digest[:8], "big") ^ int(config.MCD_BASE_SEED)
         return seed % (2**63 - 1)
 
+    def cache_signature(self):
+        """Everything besides the input text that determines an MC prediction."""
+        temperature = (
+            getattr(config, "TEMPERATURE", 1.5)
+            if getattr(config, "USE_TEMPERATURE_SCALING", False)
+            else None
+        )
+        return (
+            self.model_path,
+            self.model_revision,
+            str(self.device),
+            self.onnx_engine.model_file if self.onnx_engine is not None else "torch",
+            self.n_iterations,
+            self.inference_dropout_rate,
+            self.partial_mc_layers,
+            temperature,
+            config.MCD_BASE_SEED,
+            config.MCD_SEED_SALT,
+            config.MCD_MASK_GENERATOR,
+            (
+                self.max_tokens,
+                config.MCD_LONG_TEXT_MODE,
+                config.MCD_CHUNK_OVERLAP,
+                config.MCD_MAX_CHUNKS,
+            ),
+            (
+                config.MCD_ADAPTIVE_MIN_SAMPLES,
+                config.MCD_ADAPTIVE_CHUNK_SIZE,
+                config.MCD_ADAPTIVE_PROB_TOL,
+                config.MCD_ADAPTIVE_MI_TOL,
+            )
+            if config.MCD_ADAPTIVE_ENABLED
+            else None,
+        )
+
     def predict_with_uncertainty(self, text):
-        # Ensure inputs are on the correct device (CPU/GPU)
+        return self.predict_batch_with_uncertainty([text])[0]
+
+    def predict_batch_with_uncertainty(self, texts, adaptive=None, deterministic=False):
+        """
+        Run MC dropout for several texts in a single forward pass.
+
+        Each text is tokenized against the token budget (see `_encode_texts`),
+        replicated `n_iterations` times and run as one padded
+        [n_inputs * n_iterations, seq_len] batch per length bucket. Results are
+        split back per text and have the same shape as `predict_with_uncertainty`,
+        plus token-count metadata.
+
+        With `adaptive` (defaults to config.MCD_ADAPTIVE_ENABLED) samples are drawn
+        in chunks instead and each text stops as soon as its estimates converge;
+        see `_sample_adaptive`.
+
+        With `deterministic` a single dropout-free pass is run instead (the first
+        tier of tiered inference); its mutual information is therefore 0.
+        """
+        texts = list(texts)
+        if adaptive is None:
+            adaptive = config.MCD_ADAPTIVE_ENABLED
+
+        units, token_info = self._encode_texts(texts)
+
+        deterministic_seeds = [None] * len(texts)
+        unit_rngs = [None] * len(units)
+        if config.MCD_DETERMINISTIC and not deterministic:
+            deterministic_seeds = [self._build_deterministic_seed(t) for t in texts]
+            for u, (text_index, chunk_index, _) in enumerate(units):
+                # Chunk 0 keeps the text's own seed so in-budget texts are unchanged
+                seed = (
+                    deterministic_seeds[text_index] + chunk_index * 0x9E3779B97F4A7C15
+                ) % (2**63 - 1)
+                if config.MCD_MASK_GENERATOR == "philox":
+                    # Counter-based masks only need the seed itself
+                    unit_rngs[u] = seed
+                else:
+                    # Use numpy PCG64 for cross-platform determinism (CPU/GPU/Railway/local all identical)
+                    # PCG64 is a high-quality PRNG that produces identical sequences regardless of hardware
+                    unit_rngs[u] = np.random.Generator(np.random.PCG64(seed))
+
+        unit_predictions = [None] * len(units)
         try:
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-            ).to(self.device)
-            inputs["input_ids"] = inputs["input_ids"].to(torch.long)
-            inputs["attention_mask"] = inputs["attention_mask"].to(torch.long)
+            for bucket in self._length_buckets(units):
+                # Ensure inputs are on the correct device (CPU/GPU)
+                try:
+                    inputs = self.tokenizer.pad(
+                        {"input_ids": [units[u][2] for u in bucket]},
+                        padding=True,
+                        return_tensors="pt",
+                    ).to(self.device)
+                    input_ids = inputs["input_ids"].to(torch.long)
+                    attention_mask = inputs["attention_mask"].to(torch.long)
+                except RuntimeError as e:
+                    if "CUDA" in str(e):
+                        print(
+                            f"[ERROR] CUDA error during input preparation: {e}. Ensure ML_FORCE_CPU=true for low-VRAM systems."
+                        )
+                    raise
+
+                rngs = (
+                    [unit_rngs[u] for u in bucket]
+                    if config.MCD_DETERMINISTIC
+                    else None
+                )
+                lower_hidden = None
+                if self.partial_mc_layers > 0 and not deterministic:
+                    lower_hidden = self._encode_lower_layers(input_ids, attention_mask)
+
+                if deterministic:
+                    predictions = list(
+                        self._run_mc_samples(
+                            input_ids, attention_mask, None, 1, dropout_rate=0.0
+                        )
+                    )
+                elif adaptive:
+                    predictions = self._sample_adaptive(
+                        input_ids, attention_mask, rngs, lower_hidden
+                    )
+                else:
+                    predictions = list(
+                        self._run_mc_samples(
+                            input_ids,
+                            attention_mask,
+                            rngs,
+                            self.n_iterations,
+                            lower_hidden,
+                        )
+                    )
+                for u, unit_prediction in zip(bucket, predictions):
+                    unit_predictions[u] = unit_prediction
+                del inputs, input_ids, attention_mask, lower_hidden
+
         except RuntimeError as e:
-            if "CUDA" in str(e):
+            # Catch CUDA errors during inference and provide helpful error message
+            if "CUDA" in str(e) or "device-side assert" in str(e):
+                error_msg = str(e)
+                print(f"[ERROR] CUDA error during inference: {error_msg}")
+                print("[ERROR] This indicates a GPU memory or compatibility issue.")
                 print(
-                    f"[ERROR] CUDA error during input preparation: {e}. Ensure ML_FORCE_CPU=true for low-VRAM systems."
+                    "[ERROR] Set ML_FORCE_CPU=true in your environment to use CPU-only mode."
                 )
-                raise
+            raise
+        finally:
+            # Clean up VRAM
+            torch.cuda.empty_cache() if torch.cuda.is_available() else None
+            gc.collect()
 
-        deterministic_seed = None
+        results = []
+        for text_index, seed in enumerate(deterministic_seeds):
+            chunks = [
+                (len(ids), unit_predictions[u])
+                for u, (owner, _, ids) in enumerate(units)
+                if owner == text_index
+            ]
+            result = self._summarize_mc_predictions(
+                self._merge_chunk_predictions(chunks), seed
+            )
+            result.update(token_info[text_index])
+            results.append(result)
+        return results
+
+    @property
+    def max_tokens(self) -> int:
+        """Effective per-input token budget (config cap and model context)."""
+        model_max = getattr(self.tokenizer, "model_max_length", None) or 512
+        if model_max > 100_000:
+            # Tokenizers without a configured limit report a huge sentinel
+            model_max = 512
+        return max(min(int(config.MCD_MAX_TOKENS), int(model_max)), 8)
+
+    def _encode_texts(self, texts):
+        """
+        Tokenize `texts` against the token budget.
+
+        Texts within budget become a single input, exactly as the tokenizer would
+        encode them. Longer texts are either truncated or, with
+        MCD_LONG_TEXT_MODE="chunk", split into overlapping windows of at most
+        `max_tokens` tokens (capped at MCD_MAX_CHUNKS) whose MC distributions are
+        merged afterwards.
+
+        Returns:
+            units: list of (text_index, chunk_index, input_ids)
+            token_info: per text {"token_count", "token_budget", "n_chunks", "truncated"}
+        """
+        budget = self.max_tokens
+        prefix, suffix = self._special_token_affixes()
+        n_special = len(prefix) + len(suffix)
+        window = max(budget - n_special, 1)
+        stride = max(window - max(int(config.MCD_CHUNK_OVERLAP), 0), 1)
+        max_chunks = max(int(config.MCD_MAX_CHUNKS), 1)
+
+        encoded = self.tokenizer(
+            texts, add_special_tokens=False, truncation=False, verbose=False
+        )["input_ids"]
+
+        units, token_info = [], []
+        for text_index, ids in enumerate(encoded):
+            truncated = False
+            if len(ids) <= window:
+                starts = [0]
+            elif config.MCD_LONG_TEXT_MODE == "chunk":
+                starts = list(range(0, len(ids) - window, stride)) + [len(ids) - window]
+                if len(starts) > max_chunks:
+                    # Keep the leading windows; the tail beyond them is dropped
+                    starts = starts[:max_chunks]
+                    truncated = True
+            else:
+                starts = [0]
+                truncated = True
+            chunks = [ids[start : start + window] for start in starts]
+
+            token_info.append(
+                {
+                    "token_count": len(ids) + n_special,
+                    "token_budget": budget,
+                    "n_chunks": len(chunks),
+                    "truncated": truncated,
+                }
+            )
+            for chunk_index, chunk in enumerate(chunks):
+                units.append((text_index, chunk_index, prefix + chunk + suffix))
+        return units, token_info
+
+    def _special_token_affixes(self):
+        """
+        Special-token ids the tokenizer puts before/after a single sequence.
+
+        Fast tokenizers no longer expose build_inputs_with_special_tokens, so the
+        affixes are read off a probe encoding with and without special tokens.
+        """
+        if getattr(self, "_affixes", None) is None:
+            probe = "fever"
+            bare = self.tokenizer(probe, add_special_tokens=False)["input_ids"]
+            full = self.tokenizer(probe)["input_ids"]
+            start = next(
+                i
+                for i in range(len(full) - len(bare) + 1)
+                if full[i : i + len(bare)] == bare
+            )
+            self._affixes = (full[:start], full[start + len(bare) :])
+        return self._affixes
+
+    @staticmethod
+    def _length_buckets(units):
+        """
+        Group unit indices so each padded batch only mixes similar lengths.
+
+        Units are sorted by length and a new bucket starts whenever the length
+        crosses into the next MCD_LENGTH_BUCKET_SIZE-token band, so one long text
+        no longer pads every short one in a micro-batch to its length.
+        """
+        bucket_size = max(int(config.MCD_LENGTH_BUCKET_SIZE), 1)
+        order = sorted(range(len(units)), key=lambda u: len(units[u][2]))
+        buckets, current, current_band = [], [], None
+        for u in order:
+            band = (len(units[u][2]) - 1) // bucket_size
+            if current and band != current_band:
+                buckets.append(current)
+                current = []
+            current.append(u)
+            current_band = band
+        if current:
+            buckets.append(current)
+        return buckets
+
+    @staticmethod
+    def _merge_chunk_predictions(chunks):
+        """
+        Merge per-chunk MC samples [n_samples, n_classes] into one distribution.
+
+        Sample i of the merged text is the token-count-weighted average of sample
+        i of every chunk, truncated to the smallest chunk sample count.
+        """
+        if len(chunks) == 1:
+            return chunks[0][1]
+        n_samples = min(predictions.shape[0] for _, predictions in chunks)
+        weights = np.array([n_tokens for n_tokens, _ in chunks], dtype=np.float64)
+        weights /= weights.sum()
+        merged = sum(
+            weight * predictions[:n_samples]
+            for weight, (_, predictions) in zip(weights, chunks)
+        )
+        return merged.astype(chunks[0][1].dtype)
+
+    def _encode_lower_layers(self, input_ids, attention_mask):
+        """
+        Run the embeddings and the lower `partial_mc_layers` encoder layers once,
+        with dropout off. Returns the PartialMCState holding their output hidden
+        states [n_texts, seq_len, hidden].
+        """
+        state = PartialMCState(self.partial_mc_layers)
+        token_partial = mcd_partial_ctx.set(state)
+        try:
+            with torch.no_grad():
+                self.model(input_ids=input_ids, attention_mask=attention_mask)
+        finally:
+            mcd_partial_ctx.reset(token_partial)
+        return state
+
+    def _run_mc_samples(
+        self,
+        input_ids,
+        attention_mask,
+        rngs,
+        n_samples,
+        lower_hidden=None,
+        iteration_offset=0,
+        dropout_rate=None,
+    ):
+        """
+        Draw `n_samples` MC dropout samples for every row of `input_ids`.
+
+        Returns an array of shape [n_texts, n_samples, n_classes]. When `rngs` is
+        given (one generator per text) masks are drawn from them, so calling this
+        repeatedly with the same generators continues each text's mask stream.
+        With the Philox generator `rngs` holds the seeds instead and the samples
+        are numbered from `iteration_offset`.
+        `lower_hidden` (from `_encode_lower_layers`) switches to partial MC: its
+        hidden states are replicated and only the top layers are sampled.
+        `dropout_rate` overrides the inference dropout rate (0.0 = plain forward).
+        """
+        if dropout_rate is None:
+            dropout_rate = self.inference_dropout_rate
         rng = None
-        if config.MCD_DETERMINISTIC:
-            deterministic_seed = self._build_deterministic_seed(text)
-            # Use numpy PCG64 for cross-platform determinism (CPU/GPU/Railway/local all identical)
-            # PCG64 is a high-quality PRNG that produces identical sequences regardless of hardware
-            rng = np.random.Generator(np.random.PCG64(deterministic_seed))
+        if rngs is not None and config.MCD_MASK_GENERATOR == "philox":
+            rng = PhiloxMaskRNG(
+                rngs,
+                seq_lens=attention_mask.sum(dim=1).tolist(),
+                n_iterations=n_samples,
+                padded_len=input_ids.shape[1],
+                iteration_offset=iteration_offset,
+            )
+        elif rngs is not None:
+            rng = BatchedMaskRNG(
+                rngs,
+                seq_lens=attention_mask.sum(dim=1).tolist(),
+                n_iterations=n_samples,
+                padded_len=input_ids.shape[1],
+            )
+
+        partial_state = None
+        if lower_hidden is not None:
+            partial_state = PartialMCState(lower_hidden.split)
+            partial_state.phase = "upper"
+            partial_state.tuple_outputs = lower_hidden.tuple_outputs
+            partial_state.hidden_states = lower_hidden.hidden_states.repeat_interleave(
+                n_samples, dim=0
+            )
 
         # Set thread-local context for this specific inference call
         token_enabled = mcd_enabled_ctx.set(True)
-        token_rate = mcd_rate_ctx.set(self.inference_dropout_rate)
+        token_rate = mcd_rate_ctx.set(dropout_rate)
         token_rng = mcd_rng_ctx.set(rng)
+        token_partial = mcd_partial_ctx.set(partial_state)
 
         try:
             with torch.no_grad():
                 # BATCHED INFERENCE OPTIMIZATION:
                 # Instead of loop, expand inputs to process all MC samples in parallel
-                # Shape: [batch_size, seq_len] -> [batch_size * n_iterations, seq_len]
-                # Default batch size = 1 (single query), so we process n_iterations rows
-
-                # Replicate input tensors
-                input_ids = inputs["input_ids"].repeat(self.n_iterations, 1)
-                attention_mask = inputs["attention_mask"].repeat(self.n_iterations, 1)
-
-                # Single forward pass with thread-safe dropout active
-                outputs = self.model(input_ids=input_ids, attention_mask=attention_mask)
-
-                # Reshape logits: [n_iterations, num_classes]
-                logits = outputs.logits
+                # Shape: [n_texts, seq_len] -> [n_texts * n_samples, seq_len]
+                # Rows of the same text stay contiguous so they can be split back.
+                mc_input_ids = input_ids.repeat_interleave(n_samples, dim=0)
+                mc_attention_mask = attention_mask.repeat_interleave(n_samples, dim=0)
+
+                if self.onnx_engine is not None:
+                    logits = torch.from_numpy(
+                        self.onnx_engine.run(
+                            mc_input_ids.cpu().numpy(),
+                            mc_attention_mask.cpu().numpy(),
+                            lambda shape, layer: self._onnx_dropout_mask(
+                                shape, layer, rng, dropout_rate
+                            ),
+                        )
+                    )
+                else:
+                    outputs = self.model(
+                        input_ids=mc_input_ids, attention_mask=mc_attention_mask
+                    )
+                    logits = outputs.logits
                 if getattr(config, "USE_TEMPERATURE_SCALING", False):
                     temperature = getattr(config, "TEMPERATURE", 1.5)
                     logits = logits / temperature
                 probabilities = torch.softmax(
                     logits, dim=-1
-                )  # [n_iterations, n_classes]
+                )  # [n_texts * n_samples, n_classes]
 
-                # Convert to numpy for stats calculation
-                all_predictions = probabilities.cpu().numpy()
-
-                # all_predictions shape is already [n_iterations, n_classes], no stack needed
-
-        except RuntimeError as e:
-            # Catch CUDA errors during inference and provide helpful error message
-            if "CUDA" in str(e) or "device-side assert" in str(e):
-                error_msg = str(e)
-                print(f"[ERROR] CUDA error during inference: {error_msg}")
-                print("[ERROR] This indicates a GPU memory or compatibility issue.")
-                print(
-                    "[ERROR] Set ML_FORCE_CPU=true in your environment to use CPU-only mode."
+                # Convert to numpy and split per text: [n_texts, n_samples, n_classes]
+                return (
+                    probabilities.cpu()
+                    .numpy()
+                    .reshape(input_ids.shape[0], n_samples, -1)
                 )
-            raise
         finally:
             # RESET context to prevent leakage to other threads/requests
             mcd_enabled_ctx.reset(token_enabled)
             mcd_rate_ctx.reset(token_rate)
             mcd_rng_ctx.reset(token_rng)
+            mcd_partial_ctx.reset(token_partial)
 
-            # Clean up VRAM
-            del inputs, input_ids, attention_mask, outputs, logits, probabilities
-            torch.cuda.empty_cache() if torch.cuda.is_available() else None
-            gc.collect()
+    def _sample_adaptive(self, input_ids, attention_mask, rngs, lower_hidden=None):
+        """
+        Sequential MC sampling with a convergence-based early exit.
+
+        Samples are drawn in chunks of config.MCD_ADAPTIVE_CHUNK_SIZE. Once a text
+        has at least config.MCD_ADAPTIVE_MIN_SAMPLES, it stops when one more chunk
+        moves its running mean probabilities by less than MCD_ADAPTIVE_PROB_TOL and
+        its mutual information by less than MCD_ADAPTIVE_MI_TOL. `n_iterations` is
+        the maximum budget. Each text keeps consuming its own seeded generator, so
+        the number of samples and the result are reproducible per input.
+        """
+        max_samples = self.n_iterations
+        min_samples = min(max(int(config.MCD_ADAPTIVE_MIN_SAMPLES), 1), max_samples)
+        chunk_size = max(int(config.MCD_ADAPTIVE_CHUNK_SIZE), 1)
+
+        n_texts = input_ids.shape[0]
+        samples = [np.empty((0, 0), dtype=np.float32) for _ in range(n_texts)]
+        previous = [None] * n_texts
+        active = list(range(n_texts))
+
+        while active:
+            drawn = samples[active[0]].shape[0]
+            n_new = min(chunk_size, max_samples - drawn)
+            rows = torch.tensor(active, device=input_ids.device)
+            chunk = self._run_mc_samples(
+                input_ids[rows],
+                attention_mask[rows],
+                [rngs[i] for i in active] if rngs is not None else None,
+                n_new,
+                lower_hidden.select(rows) if lower_hidden is not None else None,
+                iteration_offset=drawn,
+            )
 
+            still_active = []
+            for j, i in enumerate(active):
+                samples[i] = (
+                    chunk[j] if drawn == 0 else np.concatenate([samples[i], chunk[j]])
+                )
+                n_drawn = samples[i].shape[0]
+                mean_probs = samples[i].mean(axis=0)
+                mi = float(self.compute_mutual_information(samples[i]))
+
+                converged = (
+                    previous[i] is not None
+                    and n_drawn >= min_samples
+                    and np.abs(mean_probs - previous[i][0]).max()
+                    < config.MCD_ADAPTIVE_PROB_TOL
+                    and abs(mi - previous[i][1]) < config.MCD_ADAPTIVE_MI_TOL
+                )
+                if converged or n_drawn >= max_samples:
+                    continue
+                previous[i] = (mean_probs, mi)
+                still_active.append(i)
+            active = still_active
+
+        return samples
+
+    def _summarize_mc_predictions(self, all_predictions, deterministic_seed=None):
+        """Reduce [n_iterations, n_classes] MC samples to the prediction dict."""
         mean_probs = all_predictions.mean(axis=0)
         std_probs = all_predictions.std(axis=0)
         predicted_class = mean_probs.argmax(axis=-1)
@@ -345,6 +1042,7 @@ class MCDClassifierWithSHAP:
             "predictive_entropy": predictive_entropy,
             "mutual_information": mutual_information,
             "deterministic_seed": deterministic_seed,
+            "n_samples": int(all_predictions.shape[0]),
         }
 
     def compute_mutual_information(self, predictions):
@@ -359,10 +1057,92 @@ class MCDClassifierWithSHAP:
         return entropy_of_expected - expected_entropy
 
     def explain_with_gradient_shap(
-        self, text, mean_probs=None, target_class=None, n_baselines=5
+        self, text, mean_probs=None, target_class=None, n_baselines=None, method=None
     ):
         """
-        Compute token-level attributions using Captum's GradientSHAP on embeddings.
+        Compute token-level attributions on the input embeddings.
+
+        `method` (default config.EXPLAIN_METHOD) is one of EXPLANATION_METHODS:
+        GradientSHAP, integrated gradients with a few Gauss-Legendre steps, or
+        input x gradient. All run through the fp32 explanation model in
+        memory-sized sub-batches, with noise/baselines drawn from the text's
+        deterministic seed, and results are cached per exact text, model
+        revision, target class and method.
+        """
+        method = method or config.EXPLAIN_METHOD
+        if method not in EXPLANATION_METHODS:
+            raise ValueError(f"Unknown explanation method: {method}")
+        if n_baselines is None:
+            n_baselines = config.EXPLAIN_SHAP_BASELINES
+
+        mean_probs = np.asarray(mean_probs, dtype=np.float64)
+        predicted_class = (
+            int(mean_probs.ravel().argmax()) if target_class is None else int(target_class)
+        )
+
+        cache_key = build_cache_key(
+            text,
+            (
+                "explain",
+                self.model_path,
+                str(self.model_revision),
+                predicted_class,
+                method,
+                self._explanation_params(method, n_baselines),
+            ),
+            # Tokens and offsets belong to the exact string (cased tokenizers)
+            normalize=False,
+        )
+        cached = explanation_cache.get(cache_key) if explanation_cache else None
+        if cached is None:
+            tokens, offsets, token_attributions = self._compute_token_attributions(
+                text, predicted_class, method, n_baselines
+            )
+            cached = {
+                "tokens": tokens,
+                "offsets": offsets,
+                "attributions": token_attributions,
+            }
+            if explanation_cache:
+                explanation_cache.set(cache_key, cached)
+        else:
+            print(f"[EXPLAIN] Cache hit ({method})")
+
+        tokens = list(cached["tokens"])
+        attributions = list(cached["attributions"])
+        explanation = list(zip(tokens, attributions))
+
+        # Derive confidence from provided mean_probs (if available) instead
+        # of relying on an external mc_result variable which isn't in scope.
+        confidence_val = float(np.max(mean_probs)) if mean_probs.size else 0.0
+
+        # We cannot compute mutual information without the full MC samples here,
+        # so return None to indicate it's unavailable when only mean_probs supplied.
+        mi_val = None
+
+        return {
+            "tokens": tokens,
+            "offsets": list(cached["offsets"]),
+            "attributions": attributions,
+            "predicted_label": self.model.config.id2label[predicted_class],
+            "confidence": confidence_val,
+            "mutual_information": mi_val,
+            "explanation": explanation,
+            "method": method,
+        }
+
+    @staticmethod
+    def _explanation_params(method, n_baselines):
+        if method == "gradient_shap":
+            return (config.EXPLAIN_SHAP_SAMPLES, int(n_baselines), config.EXPLAIN_SHAP_STDEV)
+        if method == "integrated_gradients":
+            return (config.EXPLAIN_IG_STEPS,)
+        return ()
+
+    def _compute_token_attributions(self, text, predicted_class, method, n_baselines):
+        """
+        Return (tokens, offsets, attributions) with attributions summed over the
+        embedding dimension and normalized to [0, 1].
         """
         # Use explanation_model (fp32) for gradients, as quantized models don't support backprop well
         self.explanation_model.zero_grad()
@@ -373,53 +1153,52 @@ class MCDClassifierWithSHAP:
             return_tensors="pt",
             truncation=True,
             padding=True,
-        ).to(self.device)
-
-        mean_probs = torch.tensor(mean_probs, device=self.device)
-        predicted_class = (
-            mean_probs.argmax(dim=-1).item() if target_class is None else target_class
+            return_offsets_mapping=True,
         )
+        offsets = [tuple(span) for span in inputs.pop("offset_mapping")[0].tolist()]
+        inputs = inputs.to(self.device)
+        attention_mask = inputs["attention_mask"]
 
         # 1️⃣ Get embeddings from the model
-        embeddings = self.explanation_model.get_input_embeddings()(inputs["input_ids"])
-
-        # 2️⃣ Define a forward function that takes embeddings
-        def forward_func(embeds):
-            # Dynamically expand attention_mask to match embeds batch size.
-            # GradientSHAP passes embeddings with varying batch sizes (n_samples * baselines),
-            # but inputs["attention_mask"] has shape [1, seq_len]. ModernBERT's sliding window
-            # attention expects the mask batch dim to match the input batch dim.
-            batch_size = embeds.shape[0]
-            attention_mask = inputs["attention_mask"].expand(batch_size, -1)
-
-            outputs = self.explanation_model(
-                inputs_embeds=embeds, attention_mask=attention_mask
+        with torch.no_grad():
+            embeddings = self.explanation_model.get_input_embeddings()(
+                inputs["input_ids"]
             )
-            probs = F.softmax(outputs.logits, dim=-1)
-            return probs[:, predicted_class]
-
-        # 3️⃣ Create random baselines around zero embeddings
-        baseline_embeds = torch.zeros_like(embeddings).repeat(n_baselines, 1, 1)
-
-        # 4️⃣ Initialize GradientSHAP
-        gradient_shap = GradientShap(forward_func)
-
-        # 5️⃣ Compute attributions on embeddings
-        attributions, delta = gradient_shap.attribute(
-            embeddings,
-            baselines=baseline_embeds,
-            n_samples=25,
-            stdevs=0.01,
-            return_convergence_delta=True,
-        )
 
-        # 6️⃣ Aggregate across embedding dimensions (token-level importance)
-        # Use squeeze(0) to only remove batch dim, preserving sequence dimension
-        token_attributions = attributions.sum(dim=-1).squeeze(0).detach().cpu()
+        # Noise, baselines and interpolation points are drawn on the CPU from the
+        # text's seed so explanations are reproducible (and safe to cache).
+        generator = torch.Generator().manual_seed(self._build_deterministic_seed(text))
+        _, seq_len, hidden = embeddings.shape
+
+        if method == "gradient_shap":
+            # GradientSHAP (as Captum's GradientShap): every sample pairs a
+            # randomly chosen baseline with a noisy copy of the input and
+            # evaluates the gradient at a random point on the line between them.
+            n_samples = int(config.EXPLAIN_SHAP_SAMPLES)
+            baselines = torch.zeros((max(int(n_baselines), 1), seq_len, hidden))
+            chosen = baselines[
+                torch.randint(baselines.shape[0], (n_samples,), generator=generator)
+            ].to(self.device)
+            noise = torch.randn((n_samples, seq_len, hidden), generator=generator)
+            noisy = embeddings + noise.to(self.device) * config.EXPLAIN_SHAP_STDEV
+            alphas = torch.rand(n_samples, generator=generator).to(self.device)
+            points = chosen + alphas.view(-1, 1, 1) * (noisy - chosen)
+            grads = self._target_gradients(points, attention_mask, predicted_class)
+            attributions = (grads * (noisy - chosen)).mean(dim=0)
+        elif method == "integrated_gradients":
+            # Gauss-Legendre quadrature of the path integral from a zero baseline
+            nodes, weights = np.polynomial.legendre.leggauss(int(config.EXPLAIN_IG_STEPS))
+            alphas = torch.tensor((nodes + 1) / 2, dtype=embeddings.dtype).to(self.device)
+            weights = torch.tensor(weights / 2, dtype=embeddings.dtype).to(self.device)
+            points = alphas.view(-1, 1, 1) * embeddings
+            grads = self._target_gradients(points, attention_mask, predicted_class)
+            attributions = embeddings[0] * (grads * weights.view(-1, 1, 1)).sum(dim=0)
+        else:
+            grads = self._target_gradients(embeddings, attention_mask, predicted_class)
+            attributions = (embeddings * grads)[0]
 
-        # Handle edge case: if token_attributions is 0-D (single token), unsqueeze to 1-D
-        if token_attributions.dim() == 0:
-            token_attributions = token_attributions.unsqueeze(0)
+        # 6️⃣ Aggregate across embedding dimensions (token-level importance)
+        token_attributions = attributions.sum(dim=-1).detach().cpu()
 
         # 7️⃣ Decode tokens
         tokens = self.tokenizer.convert_ids_to_tokens(
@@ -435,33 +1214,201 @@ class MCDClassifierWithSHAP:
         else:
             token_attributions = torch.zeros_like(token_attributions)
 
-        explanation = list(zip(tokens, token_attributions.numpy().tolist()))
+        return tokens, offsets, token_attributions.numpy().tolist()
 
-        # Derive confidence from provided mean_probs (if available) instead
-        # of relying on an external mc_result variable which isn't in scope.
-        try:
-            # mean_probs may be a torch tensor here
-            mp = (
-                mean_probs.detach().cpu().numpy()
-                if hasattr(mean_probs, "detach")
-                else np.array(mean_probs)
+    def _target_gradients(self, points, attention_mask, target_class):
+        """
+        d p(target_class) / d embeddings for every row of `points` [n, seq, hidden],
+        run in sub-batches of `_explanation_batch_size` rows.
+        """
+        grads = torch.empty_like(points)
+        n_rows, seq_len, _ = points.shape
+        batch_size = self._explanation_batch_size(seq_len, n_rows)
+        for start in range(0, n_rows, batch_size):
+            chunk = points[start : start + batch_size].detach().requires_grad_(True)
+            # ModernBERT's sliding window attention expects the mask batch dim
+            # to match the input batch dim.
+            outputs = self.explanation_model(
+                inputs_embeds=chunk,
+                attention_mask=attention_mask.expand(chunk.shape[0], -1),
             )
-            confidence_val = float(np.max(mp, axis=-1).tolist()) if mp.size else 0.0
-        except Exception:
-            confidence_val = 0.0
+            target_probs = F.softmax(outputs.logits, dim=-1)[:, target_class]
+            (chunk_grads,) = torch.autograd.grad(target_probs.sum(), chunk)
+            grads[start : start + chunk.shape[0]] = chunk_grads
+            del outputs, target_probs, chunk
+        return grads
+
+    def _explanation_batch_size(self, seq_len, n_rows):
+        """Rows per gradient pass: EXPLAIN_MAX_BATCH_SIZE or sized to free memory."""
+        if config.EXPLAIN_MAX_BATCH_SIZE > 0:
+            return max(min(int(config.EXPLAIN_MAX_BATCH_SIZE), n_rows), 1)
+        model_config = self.explanation_model.config
+        hidden = model_config.hidden_size
+        intermediate = getattr(model_config, "intermediate_size", 4 * hidden)
+        heads = getattr(model_config, "num_attention_heads", 12)
+        layers = model_config.num_hidden_layers
+        # fp32 activations kept for the backward pass, per row (rough upper bound)
+        per_row = 4 * layers * seq_len * (8 * hidden + 2 * intermediate + 2 * heads * seq_len)
+        budget = _available_memory_bytes(self.device) * config.EXPLAIN_MEMORY_FRACTION
+        return int(max(min(budget // max(per_row, 1), n_rows), 1))
+
+
+def _available_memory_bytes(device) -> int:
+    """Free memory on `device` (CUDA) or MemAvailable of the host, in bytes."""
+    if str(device).startswith("cuda") and torch.cuda.is_available():
+        free, _ = torch.cuda.mem_get_info()
+        return int(free)
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 1 << 30
+
+
+EXPLANATION_METHODS = ("gradient_shap", "integrated_gradients", "input_x_gradient")
+
+
+class ExplanationCache:
+    """Thread-safe in-memory LRU + TTL cache for token attributions."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600):
+        self.max_entries = max(int(max_entries), 1)
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries))
 
-        # We cannot compute mutual information without the full MC samples here,
-        # so return None to indicate it's unavailable when only mean_probs supplied.
-        mi_val = None
 
-        return {
-            "tokens": tokens,
-            "attributions": token_attributions.numpy().tolist(),
-            "predicted_label": self.model.config.id2label[predicted_class],
-            "confidence": confidence_val,
-            "mutual_information": mi_val,
-            "explanation": explanation,
-        }
+# =============================================================================
+# CROSS-REQUEST MICRO-BATCHING
+# =============================================================================
+
+
+class MCInferenceScheduler:
+    """
+    Gathers concurrent `predict_with_uncertainty` calls for one classifier.
+
+    Callers block in `submit()` while a single background worker collects every
+    request that arrives within `window_ms` of the first one (up to
+    `max_batch_size`), runs them through `predict_batch_with_uncertainty` as one
+    padded forward pass, and hands each caller its own result. This keeps the
+    gunicorn threads from competing for the torch intra-op pool with separate
+    small forward passes.
+
+    Note: on the int8 CPU path, dynamic quantization picks activation ranges per
+    forward pass, so a batched result can differ from a solo run in the low
+    decimals. Dropout masks are still drawn from each request's own seed.
+
+    When a `cache` is given (deterministic mode only), repeated inputs are
+    answered from it without queueing.
+    """
+
+    def __init__(
+        self, classifier, window_ms=10.0, max_batch_size=4, name="mcd", cache=None
+    ):
+        self.classifier = classifier
+        self.cache = cache
+        self.window = max(float(window_ms), 0.0) / 1000.0
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.name = name
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "max_batch_seen": 0}
+
+    def submit(self, text):
+        """Queue `text` for the next batch and wait for its prediction dict."""
+        cache_key = None
+        if self.cache is not None and config.MCD_DETERMINISTIC:
+            cache_key = build_cache_key(text, self.classifier.cache_signature())
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"[ML] {self.name}: MC result cache hit")
+                return cached
+
+        if self.max_batch_size <= 1:
+            result = self.classifier.predict_with_uncertainty(text)
+        else:
+            future: Future = Future()
+            self._ensure_worker()
+            self._queue.put((text, future))
+            result = future.result()
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result
+
+    def _ensure_worker(self):
+        # Started lazily so the thread lives in the serving process, not in a
+        # parent that forks gunicorn workers.
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f"{self.name}-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for text, _ in batch]
+            try:
+                results = self.classifier.predict_batch_with_uncertainty(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["max_batch_seen"] = max(
+                self.stats["max_batch_seen"], len(batch)
+            )
+            if len(batch) > 1:
+                print(f"[ML] {self.name}: batched {len(batch)} requests")
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
 
 
 # =============================================================================
@@ -846,45 +1793,218 @@ def compute_uncertainty_separation(
 
 
 # Initialize Classifiers
-# Note: we initialize them here so they are ready when imported.
-# In a larger app we might want to lazy-load them.
+# With MODEL_LAZY_LOADING the weights are only loaded on first use (see
+# MCDClassifierWithSHAP.load) and idle models can be unloaded by the registry.
 print("[ML] Initializing Classifiers...")
 eng_classifier = MCDClassifierWithSHAP(
     config.ENG_MODEL_PATH,
     n_iterations=50,
     inference_dropout_rate=0.2,
     model_revision=config.ENG_MODEL_REVISION,
+    partial_mc_layers=config.ENG_MCD_PARTIAL_LAYERS,
+    lazy=config.MODEL_LAZY_LOADING,
 )
 fil_classifier = MCDClassifierWithSHAP(
     config.FIL_MODEL_PATH,
     n_iterations=50,
     inference_dropout_rate=0.2,
     model_revision=config.FIL_MODEL_REVISION,
+    partial_mc_layers=config.FIL_MCD_PARTIAL_LAYERS,
+    lazy=config.MODEL_LAZY_LOADING,
 )
 print("[ML] Classifiers Initialized")
 
+model_registry = ModelRegistry(
+    check_interval_seconds=min(max(config.MODEL_IDLE_UNLOAD_SECONDS / 4, 1), 30)
+)
+for _name, _clf in (("eng", eng_classifier), ("fil", fil_classifier)):
+    model_registry.register(
+        _name,
+        _clf,
+        idle_unload_seconds=(
+            config.MODEL_IDLE_UNLOAD_SECONDS
+            if _name in config.MODEL_IDLE_UNLOAD_MODELS
+            else 0
+        ),
+    )
+
+mc_result_cache = (
+    MCResultCache(
+        max_entries=config.MCD_CACHE_MAX_ENTRIES,
+        ttl_seconds=config.MCD_CACHE_TTL_SECONDS,
+        db_path=config.MCD_CACHE_DB_PATH or None,
+        disk_ttl_seconds=config.MCD_CACHE_DISK_TTL_SECONDS,
+    )
+    if config.MCD_CACHE_ENABLED
+    else None
+)
+
+explanation_cache = (
+    ExplanationCache(
+        max_entries=config.EXPLAIN_CACHE_MAX_ENTRIES,
+        ttl_seconds=config.EXPLAIN_CACHE_TTL_SECONDS,
+    )
+    if config.EXPLAIN_CACHE_ENABLED
+    else None
+)
+
+_batch_size = config.MCD_BATCH_MAX_SIZE if config.MCD_BATCHING_ENABLED else 1
+eng_scheduler = MCInferenceScheduler(
+    eng_classifier,
+    window_ms=config.MCD_BATCH_WINDOW_MS,
+    max_batch_size=_batch_size,
+    name="eng",
+    cache=mc_result_cache,
+)
+fil_scheduler = MCInferenceScheduler(
+    fil_classifier,
+    window_ms=config.MCD_BATCH_WINDOW_MS,
+    max_batch_size=_batch_size,
+    name="fil",
+    cache=mc_result_cache,
+)
+
 
-def classifier(text):
+_tier_lock = threading.Lock()
+_tier_stats = {"deterministic": 0, "mc": 0, "escalations": {}}
+
+
+def tier_escalation_reason(mean_probs, require_mi=False):
+    """
+    Why a deterministic-pass prediction must be escalated to MC dropout, or None.
+
+    `mean_probs` is the class distribution of the dropout-free pass.
+    """
+    if require_mi:
+        return "mi_required"
+    probs = np.sort(np.asarray(mean_probs, dtype=np.float64).ravel())[::-1]
+    margin = probs[0] - probs[1] if probs.size > 1 else probs[0]
+    if margin < config.MCD_TIERED_MIN_MARGIN:
+        return "margin"
+    normalized_entropy = float(entropy(probs)) / np.log(max(probs.size, 2))
+    if normalized_entropy > config.MCD_TIERED_MAX_ENTROPY:
+        return "entropy"
+    return None
+
+
+def _predict_tiered(clf, scheduler, text, require_mi=False):
+    """
+    Tiered inference: a single deterministic pass, MC dropout only if needed.
+
+    Returns the prediction dict with "inference_tier" ("deterministic" or "mc")
+    and "escalation_reason" set.
+    """
+    if not config.MCD_TIERED_ENABLED:
+        result = scheduler.submit(text)
+        result["inference_tier"], result["escalation_reason"] = "mc", None
+        return result
+
+    reason = "mi_required" if require_mi else None
+    if reason is None:
+        result = clf.predict_batch_with_uncertainty([text], deterministic=True)[0]
+        reason = tier_escalation_reason(result["mean_probabilities"][0])
+    if reason is None:
+        result["inference_tier"], result["escalation_reason"] = "deterministic", None
+    else:
+        result = scheduler.submit(text)
+        result["inference_tier"], result["escalation_reason"] = "mc", reason
+
+    with _tier_lock:
+        _tier_stats[result["inference_tier"]] += 1
+        if reason is not None:
+            escalations = _tier_stats["escalations"]
+            escalations[reason] = escalations.get(reason, 0) + 1
+    print(
+        f"[ML] Inference tier: {result['inference_tier']}"
+        + (f" (escalated: {reason})" if reason else "")
+    )
+    return result
+
+
+def get_inference_stats() -> dict:
+    """Counters for the MC batching schedulers, result cache, tiers and models."""
+    with _tier_lock:
+        tiers = dict(_tier_stats, escalations=dict(_tier_stats["escalations"]))
+    return {
+        "batching": {
+            "eng": dict(eng_scheduler.stats),
+            "fil": dict(fil_scheduler.stats),
+        },
+        "result_cache": mc_result_cache.get_stats() if mc_result_cache else None,
+        "tiers": tiers,
+        "models": model_registry.get_stats(),
+        "explanation_cache": explanation_cache.get_stats() if explanation_cache else None,
+        "admission": get_admission_stats(),
+    }
+
+
+# Token/sampling metadata of the last classifier() call in this context
+last_inference_ctx = contextvars.ContextVar("last_inference", default=None)
+
+
+def _inference_metadata(result: dict) -> dict:
+    return {
+        "token_count": result.get("token_count"),
+        "token_budget": result.get("token_budget"),
+        "n_chunks": result.get("n_chunks"),
+        "truncated": bool(result.get("truncated", False)),
+        "n_samples": result.get("n_samples"),
+        "inference_tier": result.get("inference_tier"),
+        "escalation_reason": result.get("escalation_reason"),
+    }
+
+
+def get_last_inference_metadata():
+    """Metadata (tokens, chunks, samples, tier) of the last classifier() call, or None."""
+    return last_inference_ctx.get()
+
+
+def classifier_model_name(text):
+    """Registry name of the model `classifier(text)` would use, or None."""
+    lang = analyze_text(text).language
+    if lang == "en":
+        return "eng"
+    if lang in ["tl", "fil"]:
+        return "fil"
+    return None
+
+
+def explainer_model_name(text):
+    """Registry name of the model `explainer(text, ...)` uses."""
+    # Language hint: prefer Tagalog if Tagalog keywords appear
+    has_tl = bool(match_medical_keywords((text or "").lower(), "tl"))
+    return "fil" if has_tl else "eng"
+
+
+def classifier(text, require_mi=False):
+    """
+    Classify `text` with the model for its language.
+
+    With tiered inference enabled, `require_mi=True` forces the MC ensemble so
+    the returned uncertainty is a real mutual-information estimate.
+    """
+    last_inference_ctx.set(None)
     try:
         # Pre-validate: reject very short/random text before language detection
         # This prevents langdetect from misclassifying gibberish as random languages
-        if (
-            _count_words(text) < config.SYMPTOM_MIN_WORDS
-            and len(text) < config.SYMPTOM_MIN_CHARS
-        ):
+        analysis = analyze_text(text)
+        if analysis.is_too_short:
             raise ValueError("INSUFFICIENT_SYMPTOM_EVIDENCE:Text too short")
 
         # Use tokenizer-based language detection (deterministic and robust)
-        lang = detect_language_heuristic(text)
+        lang = analysis.language
         print(f"[LANG] Detected: {lang}")
 
         # Check for medical keywords to ensure the text is health-related
-        if not _has_medical_keywords(text, lang):
+        if not analysis.has_medical_keywords:
             raise ValueError("INSUFFICIENT_SYMPTOM_EVIDENCE:No medical keywords found")
 
         if lang == "en":
             print("[CLASSIFIER] Using English BioClinical ModernBERT model")
-            result = eng_classifier.predict_with_uncertainty(text)
+            with admission_controller.admit("eng", "diagnose"), model_registry.use("eng"):
+                result = _predict_tiered(
+                    eng_classifier, eng_scheduler, text, require_mi
+                )
             pred = result["predicted_label"][0]
             confidence = float(result["confidence"][0])
             uncertainty = float(result["mutual_information"][0])
@@ -901,7 +2021,9 @@ def classifier(text):
             all_probs = result["mean_probabilities"][0]
             top_diseases = []
 
-            for idx, label in eng_classifier.model.config.id2label.items():
+            # Same labels the model config is given at load; reading them off
+            # the model here could reload it after an idle unload
+            for idx, label in CORRECT_ID2LABEL.items():
                 prob = float(all_probs[idx])
                 top_diseases.append({"disease": label, "probability": prob})
 
@@ -915,6 +2037,11 @@ def classifier(text):
 
             seed_used = result.get("deterministic_seed")
             seed_info = f", seed: {seed_used}" if seed_used is not None else ""
+            seed_info += f", samples: {result.get('n_samples')}"
+            seed_info += f", tokens: {result.get('token_count')}"
+            if result.get("n_chunks", 1) > 1 or result.get("truncated"):
+                seed_info += f" ({result.get('n_chunks')} chunks, truncated: {result.get('truncated')})"
+            last_inference_ctx.set(_inference_metadata(result))
 
             print(
                 f"[RESULT] {pred} (conf: {confidence:.3f}, MI: {uncertainty:.4f}{seed_info})"
@@ -933,7 +2060,10 @@ def classifier(text):
 
         elif lang in ["tl", "fil"]:
             print("[CLASSIFIER] Using Tagalog RoBERTa model")
-            result = fil_classifier.predict_with_uncertainty(text)
+            with admission_controller.admit("fil", "diagnose"), model_registry.use("fil"):
+                result = _predict_tiered(
+                    fil_classifier, fil_scheduler, text, require_mi
+                )
 
             pred = result["predicted_label"][0]
             confidence = float(result["confidence"][0])
@@ -943,7 +2073,9 @@ def classifier(text):
             all_probs = result["mean_probabilities"][0]
             top_diseases = []
 
-            for idx, label in fil_classifier.model.config.id2label.items():
+            # Same labels the model config is given at load; reading them off
+            # the model here could reload it after an idle unload
+            for idx, label in CORRECT_ID2LABEL.items():
                 prob = float(all_probs[idx])
                 top_diseases.append({"disease": label, "probability": prob})
 
@@ -954,6 +2086,11 @@ def classifier(text):
 
             seed_used = result.get("deterministic_seed")
             seed_info = f", seed: {seed_used}" if seed_used is not None else ""
+            seed_info += f", samples: {result.get('n_samples')}"
+            seed_info += f", tokens: {result.get('token_count')}"
+            if result.get("n_chunks", 1) > 1 or result.get("truncated"):
+                seed_info += f" ({result.get('n_chunks')} chunks, truncated: {result.get('truncated')})"
+            last_inference_ctx.set(_inference_metadata(result))
 
             print(
                 f"[RESULT] {pred} (conf: {confidence:.3f}, MI: {uncertainty:.4f}{seed_info})"
@@ -987,10 +2124,7 @@ def classifier(text):
 
 def explainer(text: str, mean_probs=None):
     try:
-        # Language hint: prefer Tagalog if Tagalog keywords appear
-        text_lower = (text or "").lower()
-        has_tl = any(k in text_lower for k in config.MEDICAL_KEYWORDS_TL)
-        lang = "tl" if has_tl else "en"
+        model_name = explainer_model_name(text)
 
         # Normalize mean_probs to a numpy array/list for downstream use
         if mean_probs is None:
@@ -1008,19 +2142,23 @@ def explainer(text: str, mean_probs=None):
         # Convert to numpy for operations inside explain_with_gradient_shap
         mean_probs_arr = np.array(mean_probs_list)
 
-        # Choose the right model for language
-        model = eng_classifier if lang == "en" else fil_classifier
-
-        # explain_with_gradient_shap expects mean_probs as a tensor or array
-        explanation_result = model.explain_with_gradient_shap(
-            text, mean_probs=mean_probs_arr
-        )
+        # explain_with_gradient_shap expects mean_probs as a tensor or array;
+        # explanations queue behind diagnoses for the model's slots
+        with admission_controller.admit(model_name, "explain"):
+            with model_registry.use(model_name) as model:
+                explanation_result = model.explain_with_gradient_shap(
+                    text, mean_probs=mean_probs_arr
+                )
 
         tokens = explanation_result["tokens"]
         attrs = explanation_result["attributions"]
 
         words, word_attrs = aggregate_subword_attributions(
-            tokens, attrs, tokenizer=model.tokenizer
+            tokens,
+            attrs,
+            tokenizer=model.tokenizer,
+            offsets=explanation_result.get("offsets"),
+            text=text,
         )
         words = [clean_token(w) for w in words]
 
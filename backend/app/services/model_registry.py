@@ -0,0 +1,217 @@
+"""
+Lazy model registry for the language classifiers.
+
+Classifiers are registered unloaded and load on first use. A registry-owned
+reaper thread unloads models that have been idle for longer than their
+configured period (0 = keep resident), unless a request is currently using
+them. `use(name)` marks a model as busy for the duration of a request.
+
+`load_mmap_state_dict` maps safetensors checkpoints copy-on-write instead of
+reading them into private memory, so the fp32 weights live in the shared page
+cache: gunicorn workers (and recycled workers, see --max-requests) reuse the
+same physical pages and a reload after an idle unload is a page-cache hit.
+"""
+
+import gc
+import json
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import torch
+
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def _mmap_safetensors_file(path: Path) -> dict:
+    with open(path, "rb") as f:
+        # ACCESS_COPY: pages stay shared with the page cache until written
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_len = int.from_bytes(buffer[:8], "little")
+    header = json.loads(buffer[8 : 8 + header_len])
+    data_start = 8 + header_len
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        begin, _ = info["data_offsets"]
+        numel = 1
+        for dim in info["shape"]:
+            numel *= dim
+        if numel == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensors[name] = torch.frombuffer(
+            buffer, dtype=dtype, count=numel, offset=data_start + begin
+        ).view(info["shape"])
+    return tensors
+
+
+def load_mmap_state_dict(model_dir) -> dict:
+    """
+    Zero-copy state dict for a (possibly sharded) safetensors checkpoint.
+
+    Returns {} when the snapshot has no safetensors weights.
+    """
+    model_dir = Path(model_dir)
+    index_path = model_dir / "model.safetensors.index.json"
+    if index_path.exists():
+        shards = sorted(set(json.loads(index_path.read_text())["weight_map"].values()))
+    elif (model_dir / "model.safetensors").exists():
+        shards = ["model.safetensors"]
+    else:
+        return {}
+
+    state_dict = {}
+    for shard in shards:
+        state_dict.update(_mmap_safetensors_file(model_dir / shard))
+    return state_dict
+
+
+def assign_mmap_weights(model, model_dir) -> int:
+    """
+    Swap `model`'s parameters/buffers for memory-mapped checkpoint tensors.
+
+    Only tensors whose name, shape and dtype match the checkpoint exactly are
+    replaced; the privately allocated copies are released. Returns the number
+    of bytes now backed by the mapping.
+    """
+    mapped = load_mmap_state_dict(model_dir)
+    if not mapped:
+        return 0
+    current = model.state_dict()
+    assignable = {
+        name: tensor
+        for name, tensor in mapped.items()
+        if name in current
+        and current[name].shape == tensor.shape
+        and current[name].dtype == tensor.dtype
+        and current[name].device.type == "cpu"
+    }
+    if not assignable:
+        return 0
+    model.load_state_dict(assignable, strict=False, assign=True)
+    return sum(t.numel() * t.element_size() for t in assignable.values())
+
+
+def _resident_memory_bytes():
+    """Current RSS of this process (Linux), or None when unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """Tracks lazily loaded classifiers, their usage and idle unloading."""
+
+    def __init__(self, check_interval_seconds: float = 30.0):
+        self.check_interval = float(check_interval_seconds)
+        self._models = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def register(self, name: str, model, idle_unload_seconds: float = 0):
+        """Register an object with load()/unload()/is_loaded under `name`."""
+        with self._lock:
+            self._models[name] = {
+                "model": model,
+                "idle_unload_seconds": float(idle_unload_seconds or 0),
+                "in_use": 0,
+                "last_used": time.monotonic(),
+                "unload_count": 0,
+            }
+        return model
+
+    def get(self, name: str):
+        return self._models[name]["model"]
+
+    @contextmanager
+    def use(self, name: str):
+        """Mark `name` as busy (never unloaded) while the block runs."""
+        entry = self._models[name]
+        if entry["idle_unload_seconds"] and self._reaper is None:
+            self._ensure_reaper()
+        with self._lock:
+            entry["in_use"] += 1
+            entry["last_used"] = time.monotonic()
+        try:
+            yield entry["model"]
+        finally:
+            with self._lock:
+                entry["in_use"] -= 1
+                entry["last_used"] = time.monotonic()
+
+    def unload_idle(self, now=None) -> list:
+        """Unload every idle model past its idle period; returns their names."""
+        now = time.monotonic() if now is None else now
+        unloaded = []
+        for name, entry in list(self._models.items()):
+            limit = entry["idle_unload_seconds"]
+            with self._lock:
+                idle = now - entry["last_used"]
+                if not limit or entry["in_use"] or idle < limit:
+                    continue
+                if not entry["model"].is_loaded:
+                    continue
+                # Hold the registry lock so no request can start using it
+                entry["model"].unload()
+                entry["unload_count"] += 1
+            print(f"[ML] Unloaded idle model '{name}' after {idle:.0f}s")
+            unloaded.append(name)
+        if unloaded:
+            gc.collect()
+        return unloaded
+
+    def _ensure_reaper(self):
+        # Started lazily, like the batching workers, so it lives in the serving
+        # process rather than in a parent that forks workers.
+        with self._lock:
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(
+                    target=self._reap, name="model-idle-reaper", daemon=True
+                )
+                self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.unload_idle()
+            except Exception as e:
+                print(f"[ML] Idle model unload failed: {e}")
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        models = {}
+        for name, entry in self._models.items():
+            model = entry["model"]
+            stats = model.load_stats() if hasattr(model, "load_stats") else {}
+            stats.update(
+                {
+                    "loaded": bool(model.is_loaded),
+                    "in_use": entry["in_use"],
+                    "idle_seconds": round(now - entry["last_used"], 1),
+                    "idle_unload_seconds": entry["idle_unload_seconds"],
+                    "unload_count": entry["unload_count"],
+                }
+            )
+            models[name] = stats
+        return {"models": models, "process_rss_bytes": _resident_memory_bytes()}
@@ -0,0 +1,188 @@
+"""
+ONNX Runtime inference engine for the MC dropout classifiers (CPU path).
+
+The fp32 HF model is exported once per model snapshot with every dropout layer
+turned into a multiplication by an explicit mask input. MC dropout therefore
+stays under our control: the service draws the masks from the same seeded
+generators as the PyTorch path and feeds them to the graph, which is optionally
+int8-quantized with onnxruntime's dynamic quantization.
+
+onnx / onnxruntime are imported lazily so the default PyTorch backend does not
+require them.
+"""
+
+import contextvars
+import json
+from pathlib import Path
+
+import numpy as np
+import torch
+
+# Active DropoutMaskInputs while tracing the model for export (None otherwise)
+onnx_mask_inputs_ctx = contextvars.ContextVar("onnx_mask_inputs", default=None)
+
+# Trace-time batch/sequence sizes. They only need to be distinct from every
+# fixed model dimension so mask dims can be mapped back to "batch"/"seq".
+_TRACE_BATCH = 3
+_TRACE_SEQ = 13
+
+_METADATA_FILE = "dropout_masks.json"
+# Bump when the exported graph or metadata layout changes
+EXPORT_FORMAT_VERSION = 2
+
+
+class DropoutMaskInputs:
+    """
+    Stand-in for dropout while tracing: records the shape and layer index of
+    every dropout call and, when `masks` are given, multiplies by the matching
+    mask input.
+    """
+
+    def __init__(self, masks=None):
+        self.masks = masks
+        self.shapes = []
+        self.layers = []
+
+    def apply(self, x, layer_index=0):
+        index = len(self.shapes)
+        self.shapes.append(tuple(x.shape))
+        self.layers.append(int(layer_index))
+        if self.masks is None:
+            return x
+        return x * self.masks[index]
+
+
+class _MaskedDropoutExportModel(torch.nn.Module):
+    """Wraps an HF classifier as (input_ids, attention_mask, *masks) -> logits."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, *masks):
+        token = onnx_mask_inputs_ctx.set(DropoutMaskInputs(list(masks)))
+        try:
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        finally:
+            onnx_mask_inputs_ctx.reset(token)
+
+
+def _symbolic_shape(shape):
+    return [
+        "batch" if dim == _TRACE_BATCH else "seq" if dim == _TRACE_SEQ else int(dim)
+        for dim in shape
+    ]
+
+
+def export_onnx_model(model, export_dir, quantize=True, opset_version=17) -> Path:
+    """
+    Export `model` (fp32, with ThreadSafeDropout layers) to `export_dir`.
+
+    Writes model.onnx, optionally model.int8.onnx, and a metadata file listing
+    the dropout mask inputs in call order with their symbolic shapes and the
+    index of the dropout layer each one belongs to.
+    """
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    input_ids = torch.ones((_TRACE_BATCH, _TRACE_SEQ), dtype=torch.long)
+    attention_mask = torch.ones_like(input_ids)
+    # Trace with real padding so the attention-mask path is kept in the graph
+    attention_mask[-1, _TRACE_SEQ // 2 :] = 0
+
+    # Probe pass: discover the order and shapes of the dropout calls
+    probe = DropoutMaskInputs()
+    token = onnx_mask_inputs_ctx.set(probe)
+    try:
+        with torch.no_grad():
+            model(input_ids=input_ids, attention_mask=attention_mask)
+    finally:
+        onnx_mask_inputs_ctx.reset(token)
+
+    mask_shapes = [_symbolic_shape(shape) for shape in probe.shapes]
+    mask_names = [f"dropout_mask_{i}" for i in range(len(mask_shapes))]
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "seq"},
+        "attention_mask": {0: "batch", 1: "seq"},
+        "logits": {0: "batch"},
+    }
+    for name, shape in zip(mask_names, mask_shapes):
+        dynamic_axes[name] = {i: dim for i, dim in enumerate(shape) if isinstance(dim, str)}
+
+    fp32_path = export_dir / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            _MaskedDropoutExportModel(model).eval(),
+            (input_ids, attention_mask, *[torch.ones(s) for s in probe.shapes]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask", *mask_names],
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset_version,
+            dynamo=False,
+        )
+
+    model_file = fp32_path
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        model_file = export_dir / "model.int8.onnx"
+        quantize_dynamic(str(fp32_path), str(model_file), weight_type=QuantType.QInt8)
+
+    metadata = {
+        "format_version": EXPORT_FORMAT_VERSION,
+        "model_file": model_file.name,
+        "mask_shapes": mask_shapes,
+        "mask_layers": probe.layers,
+    }
+    (export_dir / _METADATA_FILE).write_text(json.dumps(metadata, indent=2))
+    return export_dir
+
+
+def has_onnx_export(export_dir) -> bool:
+    return (Path(export_dir) / _METADATA_FILE).exists()
+
+
+class OnnxMCEngine:
+    """Runs an exported classifier graph; the caller supplies the dropout masks."""
+
+    def __init__(self, export_dir, intra_op_threads=0):
+        import onnxruntime as ort
+
+        export_dir = Path(export_dir)
+        metadata = json.loads((export_dir / _METADATA_FILE).read_text())
+        self.mask_shapes = metadata["mask_shapes"]
+        self.mask_layers = metadata["mask_layers"]
+        self.model_file = metadata["model_file"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = int(intra_op_threads)
+        self.session = ort.InferenceSession(
+            str(export_dir / self.model_file),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+
+    def run(self, input_ids, attention_mask, mask_fn) -> np.ndarray:
+        """
+        Return logits [batch, n_classes].
+
+        `mask_fn(shape, layer_index)` is called once per dropout call, in forward
+        order, and must return the already-scaled float32 mask (keep / keep_prob).
+        """
+        batch, seq = input_ids.shape
+        feeds = {
+            "input_ids": np.ascontiguousarray(input_ids, dtype=np.int64),
+            "attention_mask": np.ascontiguousarray(attention_mask, dtype=np.int64),
+        }
+        for i, (template, layer_index) in enumerate(
+            zip(self.mask_shapes, self.mask_layers)
+        ):
+            shape = tuple(
+                batch if dim == "batch" else seq if dim == "seq" else dim
+                for dim in template
+            )
+            feeds[f"dropout_mask_{i}"] = mask_fn(shape, layer_index)
+        return self.session.run(["logits"], feeds)[0]
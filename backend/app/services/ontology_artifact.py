@@ -0,0 +1,207 @@
+"""
+Versioned, persisted ontology artifact.
+
+`create_app` used to rebuild three things at every process start and worker
+recycle: the per-disease concept profiles (`OntologyBuilder` runs the full
+exact-plus-fuzzy `extract_clinical_concepts` over every question text), the
+shared keyword automaton, and the compiled question banks. They depend only on
+the question banks and the keyword/concept dictionaries, so they are compiled
+once into a single pickled artifact.
+
+The artifact records ARTIFACT_FORMAT_VERSION and a SHA-256 content hash of
+every input, including the source of the modules that compile it (a logic
+change invalidates the artifact without bumping the version). `load_or_build_artifact` uses it when both match and otherwise
+rebuilds it and rewrites the file atomically. `scripts/build_ontology_artifact.py`
+prebuilds it during the Docker build.
+
+The artifact is a pickle: only point ONTOLOGY_ARTIFACT_PATH at a location
+writable by the service itself. `load_artifact` refuses files owned by another
+user or writable by group/others, and rebuilds instead.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import stat
+import time
+from pathlib import Path
+
+import app.config as config
+
+# Bump when the artifact layout or any compiled class changes shape
+ARTIFACT_FORMAT_VERSION = 2
+
+# Modules whose code builds the artifact's contents (hashed with its inputs)
+COMPILER_MODULES = (
+    "app.services.ontology_artifact",
+    "app.services.verification",
+    "app.services.fuzzy_matcher",
+    "app.services.keyword_engine",
+    "app.services.question_bank",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_source_digest(modules=COMPILER_MODULES) -> str:
+    """SHA-256 over the source files of `modules`."""
+    digest = hashlib.sha256()
+    for name in modules:
+        digest.update(name.encode("utf-8"))
+        digest.update(Path(importlib.util.find_spec(name).origin).read_bytes())
+    return digest.hexdigest()
+
+
+def _json_default(obj):
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Unhashable artifact input: {type(obj).__name__}")
+
+
+def ontology_content_hash(qb_en: dict, qb_tl: dict, evidence_keywords: dict) -> str:
+    """SHA-256 over everything the artifact is compiled from."""
+    # Import here to avoid circular imports
+    from app.question_groups import SYMPTOM_KEYWORDS
+    from app.services.ml_service import CORRECT_ID2LABEL
+
+    inputs = {
+        "format": ARTIFACT_FORMAT_VERSION,
+        "code": compiler_source_digest(),
+        "question_bank_en": qb_en,
+        "question_bank_tl": qb_tl,
+        "evidence_keywords": evidence_keywords,
+        "symptom_keywords": SYMPTOM_KEYWORDS,
+        "labels": {str(k): v for k, v in CORRECT_ID2LABEL.items()},
+        "clinical_concepts": config.CLINICAL_CONCEPTS,
+        "unrelated_concepts": config.UNRELATED_CATEGORY_CONCEPTS,
+        "medical_keywords_en": config.MEDICAL_KEYWORDS_EN,
+        "medical_keywords_tl": config.MEDICAL_KEYWORDS_TL,
+        "fuzzy": [
+            config.FUZZY_THRESHOLD_SHORT,
+            config.FUZZY_THRESHOLD_MEDIUM,
+            config.FUZZY_THRESHOLD_LONG,
+            config.FUZZY_MIN_TERM_LENGTH,
+        ],
+    }
+    payload = json.dumps(
+        inputs, sort_keys=True, ensure_ascii=False, default=_json_default
+    ).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class OntologyArtifact:
+    """Everything create_app derives from the question banks and dictionaries."""
+
+    def __init__(self, content_hash: str, profiles: dict, keyword_engine, question_banks):
+        self.format_version = ARTIFACT_FORMAT_VERSION
+        self.content_hash = content_hash
+        self.profiles = profiles
+        self.keyword_engine = keyword_engine
+        self.question_banks = question_banks
+
+
+def compile_artifact(
+    qb_en: dict, qb_tl: dict, evidence_keywords: dict, content_hash: str | None = None
+) -> OntologyArtifact:
+    """Build the artifact from scratch."""
+    # Import here to avoid circular imports
+    from app.services.keyword_engine import get_keyword_engine
+    from app.services.question_bank import build_question_banks
+    from app.services.verification import OntologyBuilder
+
+    if content_hash is None:
+        content_hash = ontology_content_hash(qb_en, qb_tl, evidence_keywords)
+    return OntologyArtifact(
+        content_hash,
+        OntologyBuilder(qb_en, qb_tl).profiles,
+        get_keyword_engine(),
+        build_question_banks(qb_en, qb_tl, evidence_keywords),
+    )
+
+
+def save_artifact(artifact: OntologyArtifact, path) -> None:
+    """Write the artifact atomically (concurrent workers never see a partial file)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(staging, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.chmod(staging, 0o644)  # load_artifact rejects group/other-writable files
+    os.replace(staging, path)
+
+
+def _is_trusted(st) -> bool:
+    """Owned by the process's user and not writable by anyone else."""
+    geteuid = getattr(os, "geteuid", None)
+    if geteuid is None:  # no POSIX ownership (Windows)
+        return True
+    return st.st_uid == geteuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def load_artifact(path, content_hash: str) -> OntologyArtifact | None:
+    """The artifact at `path` if it matches the format and hash, else None."""
+    try:
+        with open(path, "rb") as f:
+            if not _is_trusted(os.fstat(f.fileno())):
+                print(f"[ONTOLOGY] Refusing artifact {path}: not owned by this user")
+                return None
+            artifact = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[ONTOLOGY] Ignoring unreadable artifact {path}: {e}")
+        return None
+    if (
+        not isinstance(artifact, OntologyArtifact)
+        or artifact.format_version != ARTIFACT_FORMAT_VERSION
+        or artifact.content_hash != content_hash
+    ):
+        print(f"[ONTOLOGY] Artifact {path} is stale; rebuilding")
+        return None
+    return artifact
+
+
+def load_or_build_artifact(
+    qb_en: dict, qb_tl: dict, evidence_keywords: dict, path=None
+) -> OntologyArtifact:
+    """
+    Load the persisted artifact, or compile (and persist) a fresh one.
+
+    The artifact's keyword engine is installed as the shared engine either way.
+    """
+    from app.services import ml_service  # noqa: F401 (imported for the content hash)
+    from app.services.keyword_engine import set_keyword_engine
+
+    # Time the artifact itself, not the first ml_service import (model setup)
+    path = config.ONTOLOGY_ARTIFACT_PATH if path is None else path
+    start = time.perf_counter()
+    content_hash = ontology_content_hash(qb_en, qb_tl, evidence_keywords)
+
+    artifact = load_artifact(path, content_hash) if path else None
+    if artifact is not None:
+        set_keyword_engine(artifact.keyword_engine)
+        # Re-bind the banks' evidence keywords to the live dict too, so
+        # evidenced_ids() uses the shared automaton instead of a one-off copy
+        for bank in (artifact.question_banks.en, artifact.question_banks.tl):
+            bank.evidence_keywords = evidence_keywords
+        print(
+            f"[ONTOLOGY] Loaded artifact {content_hash[:12]} from {path} "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return artifact
+
+    artifact = compile_artifact(qb_en, qb_tl, evidence_keywords, content_hash)
+    if path:
+        try:
+            save_artifact(artifact, path)
+        except OSError as e:
+            print(f"[ONTOLOGY] Could not persist artifact to {path}: {e}")
+    print(
+        f"[ONTOLOGY] Compiled artifact {content_hash[:12]} "
+        f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+    return artifact
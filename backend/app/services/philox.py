@@ -0,0 +1,119 @@
+"""
+Counter-based (Philox) dropout masks for deterministic MC dropout.
+
+Unlike one stateful PCG64 stream per input, every mask element is a pure
+function of (seed, dropout layer, call number, MC iteration, element index):
+
+  * key     = (seed, layer_index << 32 | call_index)
+  * counter = positioned at `iteration * blocks_per_iteration`
+
+Masks are therefore independent of micro-batching, adaptive chunking and of
+which layers actually run (partial MC), and are bit-identical on every
+platform (NumPy guarantees the raw Philox bit stream).
+
+Raw 64-bit Philox4x64-10 output is split into 16-bit uniforms, so one counter
+block yields 16 mask elements. Together with returning a bool tensor (no
+float32 mask copy), this roughly halves the per-layer dropout overhead of the
+PCG64 float32 path on CPU. A pure-torch Philox (int64 tensor ops) was ~30x
+slower than this on our CPU-only hosts, so the raw bits come from NumPy.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+import torch
+
+_UNIFORM_BITS = 16
+_UNIFORMS_PER_BLOCK = 4 * 64 // _UNIFORM_BITS  # Philox4x64 -> 16 uint16 per block
+
+
+def philox_keep_mask(
+    seed: int,
+    layer_index: int,
+    call_index: int,
+    first_iteration: int,
+    n_iterations: int,
+    sample_shape,
+    keep_prob: float,
+) -> np.ndarray:
+    """
+    Boolean keep-mask of shape [n_iterations, *sample_shape].
+
+    Row i is MC iteration `first_iteration + i`; an element is kept when its
+    16-bit uniform is below round(keep_prob * 2**16).
+    """
+    numel = 1
+    for dim in sample_shape:
+        numel *= int(dim)
+    blocks_per_iteration = -(-numel // _UNIFORMS_PER_BLOCK)
+
+    bit_generator = np.random.Philox(
+        key=np.array(
+            [seed & 0xFFFFFFFFFFFFFFFF, (layer_index << 32) | call_index],
+            dtype=np.uint64,
+        ),
+        counter=np.array(
+            [first_iteration * blocks_per_iteration, 0, 0, 0], dtype=np.uint64
+        ),
+    )
+    raw = bit_generator.random_raw(n_iterations * blocks_per_iteration * 4)
+    # Explicit little-endian view keeps the bits identical on big-endian hosts
+    uniforms = raw.astype("<u8", copy=False).view("<u2")
+    uniforms = uniforms.reshape(n_iterations, blocks_per_iteration * _UNIFORMS_PER_BLOCK)
+
+    threshold = int(round(keep_prob * (1 << _UNIFORM_BITS)))
+    keep = uniforms[:, :numel] < threshold
+    return keep.reshape(n_iterations, *[int(d) for d in sample_shape])
+
+
+class PhiloxMaskRNG:
+    """
+    Counter-based alternative to BatchedMaskRNG.
+
+    Uses the same batched layout (one block of `n_iterations` rows per request,
+    sequence dims trimmed to each request's own length). `iteration_offset`
+    numbers the rows when samples are drawn in several chunks.
+    """
+
+    def __init__(self, seeds, seq_lens, n_iterations, padded_len, iteration_offset=0):
+        self.seeds = [int(s) for s in seeds]
+        self.seq_lens = [int(n) for n in seq_lens]
+        self.n_iterations = int(n_iterations)
+        self.padded_len = int(padded_len)
+        self.iteration_offset = int(iteration_offset)
+        self._calls = defaultdict(int)
+
+    def mask(self, shape, keep_prob: float, layer_index: int) -> torch.Tensor:
+        """Boolean CPU keep-mask of `shape` for one call of dropout layer `layer_index`."""
+        call_index = self._calls[layer_index]
+        self._calls[layer_index] += 1
+
+        blocks = []
+        for seed, seq_len in zip(self.seeds, self.seq_lens):
+            sample_shape = [
+                seq_len if (dim == self.padded_len and seq_len < dim) else dim
+                for dim in shape[1:]
+            ]
+            blocks.append(
+                (
+                    sample_shape,
+                    philox_keep_mask(
+                        seed,
+                        layer_index,
+                        call_index,
+                        self.iteration_offset,
+                        self.n_iterations,
+                        sample_shape,
+                        keep_prob,
+                    ),
+                )
+            )
+
+        if len(blocks) == 1 and list(blocks[0][0]) == list(shape[1:]):
+            return torch.from_numpy(blocks[0][1])
+
+        mask = np.ones(shape, dtype=bool)
+        for i, (sample_shape, block) in enumerate(blocks):
+            rows = slice(i * self.n_iterations, (i + 1) * self.n_iterations)
+            mask[(rows,) + tuple(slice(0, dim) for dim in sample_shape)] = block
+        return torch.from_numpy(mask)
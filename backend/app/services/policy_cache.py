@@ -0,0 +1,205 @@
+"""
+Questioning policy cache.
+
+Each follow-up turn scores every remaining question of the bank to pick the
+next one. The choice depends only on the (posterior, candidate set, asked set,
+language) state. `PolicyCache` memoizes the output of the selection step of
+`select_best_question_across_diseases` under a key made of:
+
+  * the language of the compiled bank
+  * the posterior quantized to POLICY_CACHE_QUANTUM (0 = exact floats)
+  * the diagnosis mode and the ordered top-K diseases of the exact posterior
+  * a bitmap of the candidate questions (after asked/text/prerequisite skips)
+  * a bitmap of the asked questions (they drive the novelty penalty), plus any
+    asked IDs that are not in the bank
+
+Misses fall through to live scoring and are stored. The offline builder
+(scripts/build_policy_cache.py) pre-populates the cache by walking the likely
+question paths from session start states and saves it to POLICY_CACHE_PATH.
+A saved cache is only loaded while its fingerprint (ontology content hash,
+EIG configuration, quantum) matches the running service.
+
+The default quantum is 0, so a hit returns exactly what live scoring would.
+With a non-zero quantum, posteriors in the same bucket (and with the same mode
+and top-K) share one cached choice. That choice and its `_eig`, which feeds
+should_stop_early, were scored for a nearby posterior and may differ from
+live scoring.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+import app.config as config
+from app.services.ontology_artifact import _is_trusted
+
+# Bump when the key or entry layout changes
+POLICY_FORMAT_VERSION = 2
+
+# Stored for selections with no acceptable question (None is "not cached")
+NO_QUESTION = "__no_question__"
+
+
+def policy_fingerprint(ontology_hash: str, quantum: float) -> str:
+    """Identity of everything a cached choice depends on besides its key."""
+    inputs = {
+        "format": POLICY_FORMAT_VERSION,
+        "ontology": ontology_hash,
+        "quantum": quantum,
+        "eig": [
+            config.BURDEN_PENALTY_FACTOR,
+            config.TOP_K_DISEASES,
+            config.DIFFERENTIAL_EIG_WEIGHT,
+            config.MODE_EXPLORATION_MAX_CONF,
+            config.MODE_CONFIRMATION_MIN_CONF,
+            config.MODE_RULE_OUT_SECOND_MIN,
+            config.NOVELTY_PENALTY_WEIGHT,
+        ],
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PolicyCache:
+    """Thread-safe LRU of selected questions keyed by the questioning state."""
+
+    def __init__(self, max_entries: int = 100_000, quantum: float = 0.0):
+        self.max_entries = int(max_entries)
+        self.quantum = float(quantum)
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, question_bank, current_probs, candidate_mask, asked_question_ids) -> tuple:
+        """Cache key for one selection over a compiled QuestionBank."""
+        # Import here to avoid circular imports
+        from app.services.information_gain import determine_diagnosis_mode
+
+        probs = np.asarray(current_probs, dtype=np.float64).reshape(-1)
+        # Mode thresholds and the top-K set are hard cuts inside a bucket
+        normalized = probs / probs.sum()
+        mode = determine_diagnosis_mode(normalized).value
+        top_k = tuple(int(i) for i in np.argsort(normalized)[::-1][: config.TOP_K_DISEASES])
+        if self.quantum > 0:
+            posterior_key = np.rint(probs / self.quantum).astype(np.int32).tobytes()
+        else:
+            posterior_key = probs.tobytes()
+        asked_mask = np.fromiter(
+            (qid in asked_question_ids for qid in question_bank.ids),
+            dtype=bool,
+            count=len(question_bank.ids),
+        )
+        return (
+            question_bank.lang,
+            posterior_key,
+            mode,
+            top_k,
+            np.packbits(candidate_mask).tobytes(),
+            np.packbits(asked_mask).tobytes(),
+            frozenset(set(asked_question_ids) - question_bank._id_set),
+        )
+
+    def get(self, key: tuple):
+        """The cached selection (NO_QUESTION if none was found), or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return entry if entry is NO_QUESTION else dict(entry)
+
+    def put(self, key: tuple, best_question: dict | None) -> None:
+        if self.max_entries <= 0:
+            return
+        entry = NO_QUESTION if best_question is None else dict(best_question)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "quantum": self.quantum,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
+
+    # ── Persistence ───────────────────────────────────────────────────────
+
+    def save(self, path, fingerprint: str) -> None:
+        """Write all entries atomically, tagged with `fingerprint`."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entries = list(self._entries.items())
+        staging = path.with_name(f"{path.name}.tmp{os.getpid()}")
+        with open(staging, "wb") as f:
+            pickle.dump(
+                {"fingerprint": fingerprint, "quantum": self.quantum, "entries": entries},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.chmod(staging, 0o644)
+        os.replace(staging, path)
+
+    def load(self, path, fingerprint: str) -> int:
+        """Merge a saved cache if its fingerprint matches; returns entries loaded."""
+        try:
+            with open(path, "rb") as f:
+                if not _is_trusted(os.fstat(f.fileno())):
+                    print(f"[POLICY-CACHE] Refusing cache {path}: not owned by this user")
+                    return 0
+                saved = pickle.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            print(f"[POLICY-CACHE] Ignoring unreadable cache {path}: {e}")
+            return 0
+        if saved.get("fingerprint") != fingerprint or saved.get("quantum") != self.quantum:
+            print(f"[POLICY-CACHE] Cache {path} was built for another configuration")
+            return 0
+        for key, entry in saved["entries"]:
+            self.put(key, None if entry == NO_QUESTION else entry)
+        return len(saved["entries"])
+
+
+policy_cache = PolicyCache(config.POLICY_CACHE_MAX_ENTRIES, config.POLICY_CACHE_QUANTUM)
+
+
+def get_policy_cache() -> PolicyCache | None:
+    """The shared cache, or None when disabled."""
+    return policy_cache if config.POLICY_CACHE_ENABLED else None
+
+
+def load_policy_cache(ontology_hash: str, path=None) -> int:
+    """Load POLICY_CACHE_PATH into the shared cache (called from create_app)."""
+    path = config.POLICY_CACHE_PATH if path is None else path
+    if not path or not config.POLICY_CACHE_ENABLED:
+        return 0
+    loaded = policy_cache.load(path, policy_fingerprint(ontology_hash, policy_cache.quantum))
+    if loaded:
+        print(f"[POLICY-CACHE] Loaded {loaded} precompiled selections from {path}")
+    return loaded
@@ -0,0 +1,194 @@
+"""
+Compiled question banks for the follow-up hot path.
+
+The raw banks are `{disease: [question, ...]}` dicts loaded from JSON. Every
+follow-up used to re-scan them (metadata lookup, symptom texts, evidence
+checks). `QuestionBank` compiles one language's bank once, in `create_app`:
+
+  * O(1) question-id -> position / metadata lookup
+  * per-disease position arrays and the disease index of every question
+  * weight / is_negative / burden vectors aligned with `ids`
+  * attached evidence keywords (lower-cased) and positive/negative symptom texts
+
+It is also a read-only Mapping over the original bank, so code that iterates
+`question_bank.items()` keeps working when handed a compiled bank.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+from app.services.keyword_engine import match_evidence_qids
+
+DEFAULT_WEIGHT = 0.85
+DEFAULT_BURDEN = 3
+
+
+class QuestionBank(Mapping):
+    """Compiled, read-only view of one language's question bank."""
+
+    def __init__(self, bank: dict, label2idx: dict, evidence_keywords=None, lang="en"):
+        self.lang = lang
+        self._bank = bank
+        self.diseases = list(bank.keys())
+        self.num_classes = len(label2idx)
+
+        self.questions = []
+        self.question_diseases = []
+        disease_idx = []
+        for disease, questions in bank.items():
+            for q in questions:
+                self.questions.append(q)
+                self.question_diseases.append(disease)
+                disease_idx.append(label2idx.get(disease, -1))
+
+        self.ids = [q.get("id", "") for q in self.questions]
+        # First occurrence wins, like the linear scans this replaces
+        self.position = {}
+        for pos, qid in enumerate(self.ids):
+            self.position.setdefault(qid, pos)
+
+        self.disease_idx = np.array(disease_idx, dtype=np.int64)
+        self.weights = np.array(
+            [q.get("weight", DEFAULT_WEIGHT) for q in self.questions], dtype=np.float64
+        )
+        self.is_negative = np.array(
+            [bool(q.get("is_negative", False)) for q in self.questions], dtype=bool
+        )
+        self.burden = np.array(
+            [q.get("burden", DEFAULT_BURDEN) for q in self.questions], dtype=np.int64
+        )
+        self.categories = [q.get("category", "secondary") for q in self.questions]
+
+        self.disease_positions = {}
+        offset = 0
+        for disease, questions in bank.items():
+            self.disease_positions[disease] = np.arange(offset, offset + len(questions))
+            offset += len(questions)
+
+        self.evidence_keywords = evidence_keywords or {}
+        self.keywords = [
+            [kw.lower() for kw in self.evidence_keywords.get(qid, [])] for qid in self.ids
+        ]
+        self._id_set = frozenset(self.ids)
+
+        self._metadata = {}
+        for pos, qid in enumerate(self.ids):
+            if qid in self._metadata:
+                continue
+            if self.disease_idx[pos] < 0:
+                self._metadata[qid] = None
+                continue
+            q = self.questions[pos]
+            self._metadata[qid] = {
+                "weight": q.get("weight", DEFAULT_WEIGHT),
+                "disease": self.question_diseases[pos],
+                "disease_idx": int(self.disease_idx[pos]),
+                "category": q.get("category", "secondary"),
+                "is_negative": q.get("is_negative", False),
+            }
+
+    # ── Mapping interface (the raw bank) ──────────────────────────────────
+
+    def __getitem__(self, disease):
+        return self._bank[disease]
+
+    def __iter__(self):
+        return iter(self._bank)
+
+    def __len__(self):
+        return len(self._bank)
+
+    # ── Lookups ───────────────────────────────────────────────────────────
+
+    def get_question(self, question_id: str):
+        pos = self.position.get(question_id)
+        return None if pos is None else self.questions[pos]
+
+    def metadata(self, question_id: str):
+        """Same result as scoring.lookup_question_metadata, in O(1)."""
+        meta = self._metadata.get(question_id)
+        return dict(meta) if meta is not None else None
+
+    def symptom_text(self, question_id: str, positive: bool = True) -> str:
+        q = self.get_question(question_id)
+        if q is None:
+            return ""
+        return q.get("positive_symptom" if positive else "negative_symptom", "")
+
+    def evidenced_ids(self, symptoms_lower: str) -> set:
+        """IDs of questions with an evidence keyword in the (lower-cased) text."""
+        return match_evidence_qids(symptoms_lower, self.evidence_keywords) & self._id_set
+
+    def likelihood_tables(self) -> tuple[np.ndarray, np.ndarray]:
+        """[N, num_classes] "yes"/"no" likelihood rows of every question (cached)."""
+        tables = getattr(self, "_likelihood_tables", None)
+        if tables is None:
+            # Import here to avoid circular imports
+            from app.utils.scoring import likelihood_vectors
+
+            tables = likelihood_vectors(self.weights, self.disease_idx, self.num_classes)
+            self._likelihood_tables = tables
+        return tables
+
+    def answer_likelihoods(self, answers) -> np.ndarray:
+        """
+        Stacked [E, num_classes] likelihoods for (question_id, answer) pairs.
+
+        Questions that are not in the bank (or whose disease is unknown) are
+        skipped, as the follow-up endpoint skips them.
+        """
+        # Import here to avoid circular imports
+        from app.utils.scoring import evidence_likelihoods
+
+        positions, replies = [], []
+        for qid, answer in answers:
+            pos = self.position.get(qid)
+            if pos is not None and self.disease_idx[pos] >= 0:
+                positions.append(pos)
+                replies.append(str(answer).lower())
+        yes_rows, no_rows = self.likelihood_tables()
+        return evidence_likelihoods(
+            yes_rows[positions], no_rows[positions], self.is_negative[positions], replies
+        )
+
+    def primary_questions(self, disease: str) -> list:
+        positions = self.disease_positions.get(disease)
+        if positions is None:
+            return []
+        return [
+            self.questions[pos]
+            for pos in positions
+            if (self.categories[pos] or "").lower() == "primary"
+        ]
+
+
+class QuestionBanks:
+    """The compiled English and Tagalog banks, as stored on the Flask app."""
+
+    def __init__(self, en: QuestionBank, tl: QuestionBank):
+        self.en = en
+        self.tl = tl
+
+    def for_lang(self, lang) -> QuestionBank:
+        return self.tl if lang in ["tl", "fil"] else self.en
+
+    def symptom_text(self, question_id: str, positive: bool = True) -> str:
+        """First non-empty symptom text for `question_id`, English bank first."""
+        for bank in (self.en, self.tl):
+            text = bank.symptom_text(question_id, positive)
+            if text:
+                return text
+        return ""
+
+
+def build_question_banks(qb_en: dict, qb_tl: dict, evidence_keywords=None) -> QuestionBanks:
+    """Compile both language banks (called once from create_app)."""
+    # Import here to avoid circular imports
+    from app.services.ml_service import CORRECT_ID2LABEL
+
+    label2idx = {label: idx for idx, label in CORRECT_ID2LABEL.items()}
+    return QuestionBanks(
+        QuestionBank(qb_en, label2idx, evidence_keywords, lang="en"),
+        QuestionBank(qb_tl, label2idx, evidence_keywords, lang="tl"),
+    )
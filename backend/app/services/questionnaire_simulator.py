@@ -0,0 +1,562 @@
+"""
+Vectorized whole-questionnaire simulator.
+
+Runs a cohort of synthetic patients through the follow-up questioning loop
+in lock-step: every step scores all remaining questions for every still-
+active patient as [patients, questions, diseases] arrays, picks each
+patient's next question, draws the patient's answer and applies the
+Bayesian update. It is used to tune the EIG settings (MIN_EIG_THRESHOLD,
+DIFFERENTIAL_EIG_WEIGHT, NOVELTY_PENALTY_WEIGHT, MODE_*, ...) and as a
+regression benchmark, without going through the follow-up endpoint one
+patient at a time.
+
+Each step follows the follow-up endpoint:
+
+  1. stop on high confidence, on MAX_QUESTIONS_THRESHOLD without a valid
+     prediction, or on EXHAUSTED_QUESTIONS_THRESHOLD
+  2. select the next question like `select_best_question_across_diseases`
+     (semantic-group and text skips, prerequisites, mode-aware EIG,
+     differential EIG, burden and novelty penalties) and apply
+     `should_stop_early`
+  3. stop on "no question left" or on sufficient primary evidence
+  4. otherwise ask, answer and update like `bayesian_evidence_update`
+
+For the same settings, the question chosen for a patient is the one
+`select_best_question_across_diseases` returns for that state. What is not
+simulated: the classifier (patients start from a uniform or synthetic prior
+plus the text evidence boosts, and uncertainty is the normalized entropy of
+the posterior) and the verification-layer clamping.
+
+Patients come from the symptom2disease dataset (data/symptom2disease_dataset
+- English.csv / - Tagalog.csv): the text gives the evidence boosts and skips,
+the label is the ground truth. The answer model says a question's symptom is
+present with probability `sensitivity` when the question targets the
+patient's disease and `false_positive` otherwise (inverted for negative
+questions). Answers are drawn once per cohort, so a parameter sweep compares
+settings on the same patients and answers.
+"""
+
+import csv
+import itertools
+import os
+import time
+
+import numpy as np
+from scipy.stats import entropy
+
+import app.config as config
+from app.question_groups import (
+    COUGH_EXISTENCE_QUESTIONS,
+    NO_COUGH_NO_RUNNY_NOSE_QUESTIONS,
+    _GROUP_INDEX,
+    get_questions_blocked_by_prerequisites,
+    get_questions_to_skip_from_text,
+)
+from app.services.information_gain import _factor_matrix, _likelihood_factors
+from app.utils.scoring import apply_text_evidence_boosts, normalize_prior
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATASET_DIR = os.path.join(_BACKEND_DIR, "data")
+DATASET_FILES = {
+    "en": "symptom2disease_dataset - English.csv",
+    "tl": "symptom2disease_dataset - Tagalog.csv",
+}
+
+# Tunable settings; simulate_questionnaire() defaults each to its config value
+PARAM_NAMES = (
+    "MIN_EIG_THRESHOLD",
+    "EIG_DECAY_FACTOR",
+    "BURDEN_PENALTY_FACTOR",
+    "TOP_K_DISEASES",
+    "DIFFERENTIAL_EIG_WEIGHT",
+    "MODE_EXPLORATION_MAX_CONF",
+    "MODE_CONFIRMATION_MIN_CONF",
+    "MODE_RULE_OUT_SECOND_MIN",
+    "NOVELTY_PENALTY_WEIGHT",
+    "HIGH_CONFIDENCE_THRESHOLD",
+    "LOW_UNCERTAINTY_THRESHOLD",
+    "VALID_MIN_CONF",
+    "VALID_MAX_UNCERTAINTY",
+    "MAX_QUESTIONS_THRESHOLD",
+    "EXHAUSTED_QUESTIONS_THRESHOLD",
+    "EVIDENCE_STOP_PRIMARY_COVERAGE",
+    "EVIDENCE_STOP_CONF_THRESHOLD",
+    "EVIDENCE_STOP_MAX_UNCERTAINTY",
+)
+
+# Stop reasons, as reported by the follow-up endpoint
+STOP_REASONS = (
+    "HIGH_CONFIDENCE_FINAL",
+    "OUT_OF_SCOPE",
+    "EIG_DIMINISHING_RETURNS",
+    "EIG_LOW_CONFIDENCE",
+    "LOW_CONFIDENCE_FINAL",
+    "High confidence reached",
+)
+_HIGH_CONF, _OUT_OF_SCOPE, _EIG_DONE, _EIG_LOW, _LOW_CONF, _EVIDENCE = range(len(STOP_REASONS))
+
+_EXPLORATION, _CONFIRMATION, _RULE_OUT = range(3)
+
+# The answers check_cough_prerequisite reads
+_PREREQUISITE_QUESTIONS = COUGH_EXISTENCE_QUESTIONS | NO_COUGH_NO_RUNNY_NOSE_QUESTIONS
+
+
+def default_params() -> dict:
+    """The current config value of every tunable setting."""
+    return {name: getattr(config, name) for name in PARAM_NAMES}
+
+
+def load_dataset(lang: str = "en", limit_per_disease: int | None = None) -> tuple:
+    """(texts, disease labels) from the symptom2disease CSV for `lang`."""
+    path = os.path.join(DATASET_DIR, DATASET_FILES[lang])
+    texts, labels, counts = [], [], {}
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            label = row["label"]
+            if limit_per_disease is not None and counts.get(label, 0) >= limit_per_disease:
+                continue
+            counts[label] = counts.get(label, 0) + 1
+            texts.append(row["text"])
+            labels.append(label)
+    return texts, labels
+
+
+class BankTables:
+    """Patient-independent arrays of one compiled QuestionBank."""
+
+    def __init__(self, question_bank, disease_labels: dict):
+        label2idx = {name: idx for idx, name in disease_labels.items() if name is not None}
+        ids = question_bank.ids
+        n = len(ids)
+        self.bank = question_bank
+        self.ids = ids
+        self.num_classes = len(disease_labels)
+        self.target = np.array(
+            [label2idx.get(d, -1) for d in question_bank.question_diseases], dtype=np.intp
+        )
+        self.askable = self.target >= 0
+        # Gather-safe target index (unaskable questions never become candidates)
+        self.target_col = np.where(self.askable, self.target, 0)
+        self.weights = question_bank.weights.astype(np.float64)
+        self.is_negative = question_bank.is_negative.astype(bool)
+        self.burden = question_bank.burden.astype(np.float64)
+
+        # compute_eig_batch likelihood matrices
+        yes_boost, yes_penalty, no_penalty, no_boost = _likelihood_factors(self.weights)
+        neg = self.is_negative
+        self.eig_yes = _factor_matrix(
+            self.target_col,
+            np.where(neg, no_penalty, yes_boost),
+            np.where(neg, no_boost, yes_penalty),
+            self.num_classes,
+        )
+        self.eig_no = _factor_matrix(
+            self.target_col,
+            np.where(neg, yes_boost, no_penalty),
+            np.where(neg, yes_penalty, no_boost),
+            self.num_classes,
+        )
+        # compute_differential_eig_batch factors (target, other) per answer
+        self.diff_yes = (np.where(neg, yes_penalty, yes_boost), np.where(neg, yes_boost, yes_penalty))
+        self.diff_no = (np.where(neg, yes_boost, no_penalty), np.where(neg, yes_penalty, no_boost))
+
+        # bayesian_evidence_update rows
+        self.update_yes, self.update_no = question_bank.likelihood_tables()
+
+        # Novelty: similarity[i, j] = question_similarity(candidate i, asked j),
+        # as QuestionGroupIndex.max_similarity counts it
+        rows = np.array([_GROUP_INDEX.position.get(qid, -1) for qid in ids], dtype=np.intp)
+        grouped = rows >= 0
+        same_id = np.array([[a == b for b in ids] for a in ids], dtype=bool)
+        self.similarity = np.where(same_id, 1.0, 0.0)
+        both = np.ix_(np.flatnonzero(grouped), np.flatnonzero(grouped))
+        self.similarity[both] = _GROUP_INDEX.similarity[np.ix_(rows[grouped], rows[grouped])]
+
+        # Asking question i skips every question in expand_asked_questions({i})
+        self.expands = np.zeros((n, n), dtype=bool)
+        for i, qid in enumerate(ids):
+            expanded = _GROUP_INDEX.expand([qid])
+            self.expands[i] = [other in expanded for other in ids]
+
+        self.prerequisite = np.array([qid in _PREREQUISITE_QUESTIONS for qid in ids], dtype=bool)
+
+        self.primary = np.zeros((self.num_classes, n), dtype=bool)
+        for pos in range(n):
+            if self.askable[pos] and (question_bank.categories[pos] or "").lower() == "primary":
+                self.primary[self.target[pos], pos] = True
+
+    def blocked_mask(self, ordered_answers: tuple) -> np.ndarray:
+        """get_questions_blocked_by_prerequisites as a bank mask."""
+        blocked = get_questions_blocked_by_prerequisites(dict(ordered_answers))
+        return np.array([qid in blocked for qid in self.ids], dtype=bool)
+
+
+class SyntheticCohort:
+    """Start states and drawn answers of a batch of synthetic patients."""
+
+    def __init__(self, tables: BankTables, labels, priors, skip, coverage, answers_yes):
+        self.tables = tables
+        self.labels = labels  # [P] true disease index
+        self.priors = priors  # [P, C] after text evidence boosts
+        self.skip = skip  # [P, N] evidenced + text-mentioned questions
+        self.coverage = coverage  # [P, C] evidenced primary questions per disease
+        self.answers_yes = answers_yes  # [P, N] the patient's answer to each question
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def build_cohort(
+    question_bank,
+    texts: list[str],
+    labels: list[str],
+    disease_labels: dict,
+    evidence_keywords: dict,
+    sensitivity: float = 0.85,
+    false_positive: float = 0.15,
+    prior_strength: float = 0.0,
+    seed: int = 0,
+    tables: BankTables | None = None,
+) -> SyntheticCohort:
+    """
+    Build the start states and answers of one patient per (text, label).
+
+    Args:
+        question_bank: Compiled QuestionBank the questions are asked from.
+        texts: Initial symptom descriptions.
+        labels: True disease name of each patient.
+        disease_labels: CORRECT_ID2LABEL mapping.
+        evidence_keywords: EVIDENCE_KEYWORDS mapping.
+        sensitivity: P(symptom present) for questions about the patient's disease.
+        false_positive: P(symptom present) for questions about other diseases.
+        prior_strength: 0 = uniform prior; > 0 draws a classifier-like prior
+            from Dirichlet(1 + prior_strength * onehot(true disease)).
+        seed: Seed for priors and answers.
+        tables: Reuse the BankTables of an earlier cohort on the same bank.
+    """
+    tables = tables or BankTables(question_bank, disease_labels)
+    label2idx = {name: idx for idx, name in disease_labels.items()}
+    num_classes = tables.num_classes
+    rng = np.random.default_rng(seed)
+
+    true_idx = np.array([label2idx[label] for label in labels], dtype=np.intp)
+    if prior_strength > 0:
+        base = rng.dirichlet(np.ones(num_classes), size=len(labels))
+        for p, t in enumerate(true_idx):
+            alpha = np.ones(num_classes)
+            alpha[t] += prior_strength
+            base[p] = rng.dirichlet(alpha)
+    else:
+        base = np.full((len(labels), num_classes), 1.0 / num_classes)
+
+    priors = np.empty_like(base)
+    skip = np.zeros((len(labels), len(tables.ids)), dtype=bool)
+    coverage = np.zeros((len(labels), num_classes), dtype=np.int64)
+    for p, text in enumerate(texts):
+        boosted = apply_text_evidence_boosts(
+            base[p], text, question_bank, disease_labels, evidence_keywords
+        )
+        priors[p] = boosted["probs"] if boosted["boost_count"] > 0 else base[p]
+        skipped = question_bank.evidenced_ids(text.lower())
+        evidenced = np.array([qid in skipped for qid in tables.ids], dtype=bool)
+        coverage[p] = (tables.primary & evidenced).sum(axis=1)
+        skipped = skipped | get_questions_to_skip_from_text(text)
+        skip[p] = [qid in skipped for qid in tables.ids]
+
+    targets_true = tables.target[None, :] == true_idx[:, None]
+    present = rng.random((len(labels), len(tables.ids))) < np.where(
+        targets_true, sensitivity, false_positive
+    )
+    # Negative questions ask about a symptom whose absence supports the target
+    answers_yes = present ^ tables.is_negative[None, :]
+    return SyntheticCohort(tables, true_idx, priors, skip, coverage, answers_yes)
+
+
+def _entropy(matrix: np.ndarray, axis: int) -> np.ndarray:
+    """_shannon_entropy along `axis`."""
+    return entropy(np.clip(matrix, 1e-12, 1.0), axis=axis)
+
+
+def _score_step(tables, probs, max_similarity, candidates, p):
+    """
+    Vectorized select_best_question_across_diseases scoring for [B] patients.
+
+    The [B, N, C] what-if posteriors are laid out disease-first ([C, B, N]) so
+    the per-row sums and entropies add whole slabs in disease order, the same
+    additions as the per-question rows of the live scorer.
+    """
+    top_k = min(int(p["TOP_K_DISEASES"]), tables.num_classes)
+    dw = p["DIFFERENTIAL_EIG_WEIGHT"]
+
+    # score_questions normalizes; the EIG functions then clip and renormalize
+    probs = probs / probs.sum(axis=1, keepdims=True)
+    clipped = np.clip(probs, 1e-12, 1.0)
+    clipped = clipped / clipped.sum(axis=1, keepdims=True)
+    rows = np.arange(len(probs))
+
+    order = np.argsort(probs, axis=1)[:, ::-1]
+    top_prob = probs[rows, order[:, 0]]
+    second_prob = probs[rows, order[:, 1]] if tables.num_classes > 1 else np.zeros(len(probs))
+    mode = np.full(len(probs), _EXPLORATION)
+    mode[(top_prob >= p["MODE_EXPLORATION_MAX_CONF"]) & (second_prob >= p["MODE_RULE_OUT_SECOND_MIN"])] = _RULE_OUT
+    mode[top_prob >= p["MODE_CONFIRMATION_MIN_CONF"]] = _CONFIRMATION
+
+    # Raw EIG (compute_eig_batch)
+    target_probs = clipped[:, tables.target_col]
+    p_yes = np.where(tables.is_negative, 1.0 - target_probs, target_probs)
+    p_no = 1.0 - p_yes
+    h_answer = []
+    for likelihood in (tables.eig_yes, tables.eig_no):
+        posterior = likelihood.T[:, None, :] * clipped.T[:, :, None]
+        posterior /= posterior.sum(axis=0)
+        h_answer.append(_entropy(posterior, axis=0))
+    eig = _entropy(clipped, axis=1)[:, None] - (p_yes * h_answer[0] + p_no * h_answer[1])
+    eig = np.maximum(eig, 0.0)
+
+    # Differential EIG over each patient's top-k (compute_differential_eig_batch)
+    top_idx = order[:, :top_k]
+    top_probs = clipped[rows[:, None], top_idx]
+    top_probs = top_probs / top_probs.sum(axis=1, keepdims=True)
+    local_of = np.full((len(probs), tables.num_classes), -1, dtype=np.intp)
+    local_of[rows[:, None], top_idx] = np.arange(top_k)
+    local_target = local_of[:, tables.target_col]
+    in_top_k = (local_target >= 0) & tables.askable
+    local_target = np.where(in_top_k, local_target, 0)
+    target_top = np.take_along_axis(top_probs, local_target, axis=1)
+    p_yes = np.where(tables.is_negative, 1.0 - target_top, target_top)
+    p_no = 1.0 - p_yes
+    is_target_col = local_target[None, :, :] == np.arange(top_k)[:, None, None]
+    h_answer = []
+    for target_factor, other_factor in (tables.diff_yes, tables.diff_no):
+        posterior = top_probs.T[:, :, None] * np.where(is_target_col, target_factor, other_factor)
+        posterior = posterior / posterior.sum(axis=0)
+        h_answer.append(_entropy(posterior, axis=0))
+    diff_eig = _entropy(top_probs, axis=1)[:, None] - (p_yes * h_answer[0] + p_no * h_answer[1])
+    diff_eig = np.where(in_top_k, np.maximum(diff_eig, 0.0), 0.0)
+
+    # compute_mode_adjusted_scores, per patient mode
+    is_top = tables.target[None, :] == order[:, :1]
+    confirmation = np.where(is_top, eig * 1.5, eig)
+    confirmation = confirmation * (1 - dw * 0.3) + diff_eig * (dw * 0.3)
+    rule_out = eig * (1 - dw) + diff_eig * dw
+    rule_out = np.where(in_top_k, rule_out * 1.1, rule_out)
+    exploration = eig * (1 - dw * 0.5) + diff_eig * (dw * 0.5)
+    exploration = np.where(is_top, exploration * 1.2, exploration)
+    base_score = np.where(
+        (mode == _CONFIRMATION)[:, None],
+        confirmation,
+        np.where((mode == _RULE_OUT)[:, None], rule_out, exploration),
+    )
+
+    burden_penalty = (tables.burden - 1) / 4.0 * p["BURDEN_PENALTY_FACTOR"]
+    novelty_penalty = max_similarity * p["NOVELTY_PENALTY_WEIGHT"]
+    adjusted = (base_score - burden_penalty[None, :]) - novelty_penalty
+    adjusted = np.where(candidates, adjusted, -np.inf)
+
+    best = np.argmax(adjusted, axis=1)
+    best_score = adjusted[rows, best]
+    has_question = best_score > -1.0
+    return best, has_question, eig[rows, best]
+
+
+def simulate_questionnaire(cohort: SyntheticCohort, params: dict | None = None) -> dict:
+    """
+    Run every patient of `cohort` to a stop.
+
+    Args:
+        cohort: Patients from build_cohort().
+        params: Overrides for any of PARAM_NAMES (others use config).
+
+    Returns:
+        dict with per-patient arrays "questions_asked", "stop_reason" (index
+        into STOP_REASONS), "predicted", "correct", "is_valid", "final_probs",
+        "asked_positions" ([P, steps] bank positions in asked order, -1 pad),
+        the per-step "step_seconds" / "step_active", and a "summary" dict
+        (see summarize()).
+    """
+    p = default_params()
+    for name, value in (params or {}).items():
+        if name not in p:
+            raise ValueError(f"Unknown simulator parameter: {name}")
+        p[name] = value
+
+    tables = cohort.tables
+    num_patients = len(cohort)
+    num_classes = tables.num_classes
+    max_entropy = float(np.log(num_classes))
+
+    probs = cohort.priors.copy()
+    skip = cohort.skip | ~tables.askable[None, :]
+    max_similarity = np.zeros((num_patients, len(tables.ids)))
+    asked_count = np.zeros(num_patients, dtype=np.int64)
+    asked_positions = []
+    initial_eig = np.full(num_patients, np.nan)
+    stop_reason = np.full(num_patients, -1, dtype=np.int64)
+    is_valid = np.zeros(num_patients, dtype=bool)
+
+    # Prerequisite state: each patient's ordered prerequisite answers, interned
+    histories = [()]
+    history_ids = {(): 0}
+    transitions = {}
+    blocked_by_history = [tables.blocked_mask(())]
+    history = np.zeros(num_patients, dtype=np.intp)
+
+    step_seconds, step_active = [], []
+    active = np.arange(num_patients)
+    while len(active):
+        start = time.perf_counter()
+        current = probs[active]
+        confidence = current.max(axis=1)
+        uncertainty = entropy(current, axis=1) / max_entropy
+        valid = (confidence >= p["VALID_MIN_CONF"]) & (uncertainty <= p["VALID_MAX_UNCERTAINTY"])
+        count = asked_count[active]
+
+        reason = np.full(len(active), -1, dtype=np.int64)
+        high = (confidence >= p["HIGH_CONFIDENCE_THRESHOLD"]) & (
+            uncertainty <= p["LOW_UNCERTAINTY_THRESHOLD"]
+        )
+        reason[high] = _HIGH_CONF
+        reason[(reason < 0) & (count >= p["MAX_QUESTIONS_THRESHOLD"]) & ~valid] = _OUT_OF_SCOPE
+        exhausted = (reason < 0) & (count >= p["EXHAUSTED_QUESTIONS_THRESHOLD"])
+        reason[exhausted] = np.where(valid[exhausted], _HIGH_CONF, _OUT_OF_SCOPE)
+        valid[high] = True
+
+        selecting = np.flatnonzero(reason < 0)
+        if len(selecting):
+            patients = active[selecting]
+            candidates = ~(skip[patients] | np.stack(blocked_by_history)[history[patients]])
+            best, has_question, best_eig = _score_step(
+                tables, probs[patients], max_similarity[patients], candidates, p
+            )
+
+            # should_stop_early, then record the first question's EIG
+            first_eig = initial_eig[patients]
+            decayed = (
+                ~np.isnan(first_eig)
+                & (np.nan_to_num(first_eig) > 0)
+                & (count[selecting] >= 2)
+                & (best_eig < np.nan_to_num(first_eig) * p["EIG_DECAY_FACTOR"])
+            )
+            eig_stop = has_question & ((best_eig < p["MIN_EIG_THRESHOLD"]) | decayed)
+            initial_eig[patients] = np.where(
+                has_question & np.isnan(first_eig), best_eig, first_eig
+            )
+
+            sel_valid = valid[selecting]
+            sel_reason = np.full(len(selecting), -1, dtype=np.int64)
+            sel_reason[eig_stop] = np.where(sel_valid[eig_stop], _EIG_DONE, _EIG_LOW)
+            none_left = ~has_question
+            sel_reason[none_left] = np.where(sel_valid[none_left], _HIGH_CONF, _LOW_CONF)
+
+            pred = probs[patients].argmax(axis=1)
+            evidence_stop = (
+                (sel_reason < 0)
+                & (cohort.coverage[patients, pred] >= p["EVIDENCE_STOP_PRIMARY_COVERAGE"])
+                & (confidence[selecting] >= p["EVIDENCE_STOP_CONF_THRESHOLD"])
+                & (uncertainty[selecting] <= p["EVIDENCE_STOP_MAX_UNCERTAINTY"])
+            )
+            sel_reason[evidence_stop] = _EVIDENCE
+            valid[selecting[evidence_stop]] = True
+            reason[selecting] = sel_reason
+
+            # Ask, answer and update the rest
+            asking = sel_reason < 0
+            patients, question = patients[asking], best[asking]
+            answer_yes = cohort.answers_yes[patients, question]
+            effective_yes = answer_yes ^ tables.is_negative[question]
+            likelihood = np.where(
+                effective_yes[:, None], tables.update_yes[question], tables.update_no[question]
+            )
+            posterior = likelihood * normalize_prior(probs[patients])
+            probs[patients] = posterior / posterior.sum(axis=-1, keepdims=True)
+
+            asked_column = np.full(num_patients, -1, dtype=np.intp)
+            asked_column[patients] = question
+            asked_positions.append(asked_column)
+            asked_count[patients] += 1
+            skip[patients] |= tables.expands[question]
+            max_similarity[patients] = np.maximum(
+                max_similarity[patients], tables.similarity[:, question].T
+            )
+            for patient, q, yes in zip(
+                patients[tables.prerequisite[question]],
+                question[tables.prerequisite[question]],
+                answer_yes[tables.prerequisite[question]],
+            ):
+                key = (history[patient], q, bool(yes))
+                next_id = transitions.get(key)
+                if next_id is None:
+                    ordered = histories[history[patient]] + ((tables.ids[q], "yes" if yes else "no"),)
+                    next_id = history_ids.setdefault(ordered, len(histories))
+                    if next_id == len(histories):
+                        histories.append(ordered)
+                        blocked_by_history.append(tables.blocked_mask(ordered))
+                    transitions[key] = next_id
+                history[patient] = next_id
+
+        stopped = reason >= 0
+        stop_reason[active[stopped]] = reason[stopped]
+        is_valid[active[stopped]] = valid[stopped]
+        step_seconds.append(time.perf_counter() - start)
+        step_active.append(len(active))
+        active = active[~stopped]
+
+    predicted = probs.argmax(axis=1)
+    result = {
+        "questions_asked": asked_count,
+        "asked_positions": (
+            np.stack(asked_positions, axis=1)
+            if asked_positions
+            else np.zeros((num_patients, 0), dtype=np.intp)
+        ),
+        "stop_reason": stop_reason,
+        "predicted": predicted,
+        "correct": predicted == cohort.labels,
+        "is_valid": is_valid,
+        "final_probs": probs,
+        "step_seconds": np.array(step_seconds),
+        "step_active": np.array(step_active),
+        "params": p,
+    }
+    result["summary"] = summarize(result)
+    return result
+
+
+def summarize(result: dict) -> dict:
+    """Questions-to-diagnosis, accuracy and latency of one simulation."""
+    asked = result["questions_asked"]
+    correct = result["correct"]
+    valid = result["is_valid"]
+    step_seconds = result["step_seconds"]
+    patient_steps = int(result["step_active"].sum())
+    reasons, counts = np.unique(result["stop_reason"], return_counts=True)
+    return {
+        "patients": len(asked),
+        "accuracy": float(correct.mean()) if len(asked) else 0.0,
+        "valid_rate": float(valid.mean()) if len(asked) else 0.0,
+        "valid_accuracy": float(correct[valid].mean()) if valid.any() else 0.0,
+        "mean_questions": float(asked.mean()) if len(asked) else 0.0,
+        "median_questions": float(np.median(asked)) if len(asked) else 0.0,
+        "p90_questions": float(np.percentile(asked, 90)) if len(asked) else 0.0,
+        "stop_reasons": {STOP_REASONS[r]: int(c) for r, c in zip(reasons, counts)},
+        "steps": len(step_seconds),
+        "total_seconds": float(step_seconds.sum()),
+        "mean_step_ms": float(step_seconds.mean() * 1000) if len(step_seconds) else 0.0,
+        "per_patient_step_us": (
+            float(step_seconds.sum() / patient_steps * 1e6) if patient_steps else 0.0
+        ),
+    }
+
+
+def sweep(cohort: SyntheticCohort, grid: dict) -> list[dict]:
+    """
+    Simulate every combination of `grid` ({param: [values]}).
+
+    Returns one {"params": {...}, **summary} row per combination.
+    """
+    names = list(grid)
+    rows = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        overrides = dict(zip(names, values))
+        rows.append({"params": overrides, **simulate_questionnaire(cohort, overrides)["summary"]})
+    return rows
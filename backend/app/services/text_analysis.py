@@ -0,0 +1,164 @@
+"""
+Memoized analysis of a symptom text.
+
+One /diagnosis/new request looks at the same symptom string many times:
+the word count gate, the language heuristic (twice), the Tier 3 pre-screen,
+the medical-keyword gate in `classifier()`, the Tier 2 verification and the
+CDSS symptom groups. A follow-up then re-verifies the same evidence text once
+per disease while clamping, and again at the end.
+
+`TextAnalysis` computes each of those lazily, at most once per text.
+`analyze_text` hands out the shared instance for a text from a small LRU, so
+every stage of a request (and later requests with the same text) reuses the
+work. Results come from the same functions the call sites used before.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+import app.config as config
+
+
+class TextAnalysis:
+    """Lazily computed, memoized views of one symptom text."""
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self._lock = threading.Lock()
+        self._unrelated = {}
+        self._evidence = {}
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def word_count(self) -> int:
+        from app.utils import _count_words
+
+        return _count_words(self.text)
+
+    @property
+    def is_too_short(self) -> bool:
+        """The word/character gate used before any inference."""
+        return (
+            self.word_count < config.SYMPTOM_MIN_WORDS
+            and len(self.text) < config.SYMPTOM_MIN_CHARS
+        )
+
+    @cached_property
+    def medical_keywords(self) -> dict:
+        """{"en": set, "tl": set} of medical keywords found in the text."""
+        from app.services.keyword_engine import match_medical_keywords
+
+        return {
+            "en": frozenset(match_medical_keywords(self.lower, "en")),
+            "tl": frozenset(match_medical_keywords(self.lower, "tl")),
+        }
+
+    @cached_property
+    def language(self) -> str:
+        """detect_language_heuristic(text)."""
+        from app.utils import detect_language_heuristic
+
+        return detect_language_heuristic(self.text)
+
+    @property
+    def has_medical_keywords(self) -> bool:
+        """_has_medical_keywords(text): either language's keywords count."""
+        return bool(self.medical_keywords["en"] or self.medical_keywords["tl"])
+
+    @cached_property
+    def clinical_concepts(self) -> frozenset:
+        """extract_clinical_concepts(text)."""
+        from app.services.verification import extract_clinical_concepts
+
+        return frozenset(extract_clinical_concepts(self.text))
+
+    @cached_property
+    def symptom_groups(self) -> frozenset:
+        """detect_symptom_groups_in_text(text)."""
+        from app.question_groups import detect_symptom_groups_in_text
+
+        return frozenset(detect_symptom_groups_in_text(self.text))
+
+    def unrelated_screen(self, lang: str = "en") -> dict:
+        """pre_screen_unrelated(text, lang), computed once per language."""
+        with self._lock:
+            result = self._unrelated.get(lang)
+        if result is None:
+            from app.services.verification import pre_screen_unrelated
+
+            result = pre_screen_unrelated(self.text, lang=lang)
+            with self._lock:
+                result = self._unrelated.setdefault(lang, result)
+        return {**result, "detected_concepts": list(result["detected_concepts"])}
+
+    def evidence_qids(self, evidence_keywords: dict | None = None) -> frozenset:
+        """Question IDs whose evidence keywords occur in the text."""
+        from app.evidence_keywords import EVIDENCE_KEYWORDS
+        from app.services.keyword_engine import match_evidence_qids
+
+        evidence_keywords = EVIDENCE_KEYWORDS if evidence_keywords is None else evidence_keywords
+        key = id(evidence_keywords)
+        with self._lock:
+            cached = self._evidence.get(key)
+        if cached is not None and cached[0] is evidence_keywords:
+            return cached[1]
+        qids = frozenset(match_evidence_qids(self.lower, evidence_keywords))
+        with self._lock:
+            self._evidence[key] = (evidence_keywords, qids)
+        return qids
+
+
+class TextAnalysisCache:
+    """Thread-safe LRU of TextAnalysis objects keyed by the exact text."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = int(max_entries)
+        self._entries: OrderedDict[str, TextAnalysis] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, text: str) -> TextAnalysis:
+        text = text or ""
+        with self._lock:
+            analysis = self._entries.get(text)
+            if analysis is not None:
+                self._entries.move_to_end(text)
+                self._hits += 1
+                return analysis
+            self._misses += 1
+            analysis = TextAnalysis(text)
+            if self.max_entries > 0:
+                self._entries[text] = analysis
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return analysis
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
+
+
+text_analysis_cache = TextAnalysisCache(config.TEXT_ANALYSIS_CACHE_SIZE)
+
+
+def analyze_text(text: str) -> TextAnalysis:
+    """Shared TextAnalysis for `text`."""
+    return text_analysis_cache.get(text)
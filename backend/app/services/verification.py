@@ -1,18 +1,20 @@
-import re
 import app.config as config
 from typing import Dict, Set, List, Optional
 from rapidfuzz import fuzz
 
+from app.services.fuzzy_matcher import (
+    conflict_words,
+    fuzzy_threshold,
+    get_fuzzy_matcher,
+    penalized_score,
+    text_windows,
+)
+from app.services.keyword_engine import match_clinical_terms, match_unrelated_terms
+
 
 def _get_fuzzy_threshold(term: str) -> int:
     """Return the similarity threshold based on term length."""
-    length = len(term)
-    if length <= 5:
-        return config.FUZZY_THRESHOLD_SHORT
-    elif length <= 9:
-        return config.FUZZY_THRESHOLD_MEDIUM
-    else:
-        return config.FUZZY_THRESHOLD_LONG
+    return int(fuzzy_threshold(len(term)))
 
 
 def _fuzzy_match_term(term: str, text: str) -> bool:
@@ -20,6 +22,8 @@ def _fuzzy_match_term(term: str, text: str) -> bool:
     Check if a dictionary term fuzzy-matches anywhere in the text using a
     sliding window of n-grams. The window size equals the term length (in words)
     so we compare apples-to-apples.
+
+    Single-term form of FuzzyConceptMatcher.match (same scores and penalties).
     """
     if len(term) < config.FUZZY_MIN_TERM_LENGTH:
         return False
@@ -32,47 +36,42 @@ def _fuzzy_match_term(term: str, text: str) -> bool:
     if len(words) < term_word_count:
         return False
 
-    import string
-
-    for i in range(len(words) - term_word_count + 1):
-        window = " ".join(words[i : i + term_word_count])
-        # Strip punctuation from window string, except spaces
-        window = window.translate(str.maketrans("", "", string.punctuation))
-
+    conflicts = conflict_words(term)
+    for window in text_windows(words, term_word_count):
         score = fuzz.ratio(term, window)
 
         # --- ML ENGINEER FIX: Critical Semantic Conflict Penalty ---
         # Prevent false positives between morphologically similar but semantically opposite words
-        # (e.g., "puting pantal" vs "pulang pantal" which differ by 2 letters but mean white vs red)
-        if score >= threshold:
-            critical_conflicts = [
-                ("puti", "pula"),
-                ("puting", "pulang"),
-                ("pula", "puti"),
-                ("pulang", "puting"),
-                ("wala", "may"),
-                ("walang", "meron"),
-                ("may", "wala"),
-                ("meron", "walang"),
-                ("hindi", "oo"),
-                ("bata", "matanda"),
-                ("matanda", "bata"),
-                ("mataas", "mababa"),
-                ("mabilis", "mabagal"),
-            ]
-            term_words = set(term.split())
-            window_words = set(window.split())
-
-            for t_word, w_word in critical_conflicts:
-                if t_word in term_words and w_word in window_words:
-                    score -= 20  # Severe penalty for opposite meaning
-
-            if score >= threshold:
-                return True
+        if score >= threshold and penalized_score(score, conflicts, window) >= threshold:
+            return True
 
     return False
 
 
+def _fuzzy_phase(
+    dictionary: dict, text_lower: str, found_concepts: set, matched_terms: set, tag: str
+) -> None:
+    """
+    Phase 2 of concept extraction: fuzzy matching for terms that did not match
+    exactly and whose concept has not been found yet, in dictionary order.
+    """
+    candidates = [
+        term
+        for term, concept_id in dictionary.items()
+        if term not in matched_terms and concept_id not in found_concepts
+    ]
+    if not candidates:
+        return
+    fuzzy_terms = get_fuzzy_matcher(dictionary).match(text_lower, candidates)
+    for term in candidates:
+        concept_id = dictionary[term]
+        if concept_id in found_concepts:
+            continue  # Concept already found via another term
+        if term in fuzzy_terms:
+            found_concepts.add(concept_id)
+            print(f"[{tag}] '{term}' -> {concept_id} (threshold={_get_fuzzy_threshold(term)}%)")
+
+
 def extract_clinical_concepts(text: str) -> Set[str]:
     """
     Extract clinical concepts from text using the CLINICAL_CONCEPTS dictionary.
@@ -90,27 +89,15 @@ def extract_clinical_concepts(text: str) -> Set[str]:
     found_concepts = set()
     matched_terms = set()  # Track which terms already matched exactly
 
-    # --- Phase 1: Exact regex matching (unchanged from original) ---
-    for term, concept_id in config.CLINICAL_CONCEPTS.items():
-        escaped_term = re.escape(term)
-        pattern = rf"\b{escaped_term}\b"
-
-        if re.search(pattern, text_lower):
-            found_concepts.add(concept_id)
-            matched_terms.add(term)
-
-    # --- Phase 2: Fuzzy matching for unmatched terms ---
-    for term, concept_id in config.CLINICAL_CONCEPTS.items():
-        if term in matched_terms:
-            continue  # Already matched exactly
-        if concept_id in found_concepts:
-            continue  # Concept already found via another term
+    # --- Phase 1: Exact word-boundary matching (one automaton pass) ---
+    for term in match_clinical_terms(text_lower):
+        found_concepts.add(config.CLINICAL_CONCEPTS[term])
+        matched_terms.add(term)
 
-        if _fuzzy_match_term(term, text_lower):
-            found_concepts.add(concept_id)
-            print(
-                f"[FUZZY-MATCH] '{term}' -> {concept_id} (threshold={_get_fuzzy_threshold(term)}%)"
-            )
+    # --- Phase 2: Fuzzy matching for unmatched terms (indexed, bulk-scored) ---
+    _fuzzy_phase(
+        config.CLINICAL_CONCEPTS, text_lower, found_concepts, matched_terms, "FUZZY-MATCH"
+    )
 
     return found_concepts
 
@@ -146,27 +133,19 @@ def pre_screen_unrelated(text: str, lang: str = "en") -> dict:
     found_concepts = set()
     matched_terms = set()  # Track which terms already matched exactly
 
-    # --- Phase 1: Exact regex matching ---
-    for term, concept_id in config.UNRELATED_CATEGORY_CONCEPTS.items():
-        escaped_term = re.escape(term)
-        pattern = rf"\b{escaped_term}\b"
-
-        if re.search(pattern, text_lower):
-            found_concepts.add(concept_id)
-            matched_terms.add(term)
-
-    # --- Phase 2: Fuzzy matching for unmatched terms ---
-    for term, concept_id in config.UNRELATED_CATEGORY_CONCEPTS.items():
-        if term in matched_terms:
-            continue  # Already matched exactly
-        if concept_id in found_concepts:
-            continue  # Concept already found via another term
-
-        if _fuzzy_match_term(term, text_lower):
-            found_concepts.add(concept_id)
-            print(
-                f"[TIER3-FUZZY] '{term}' -> {concept_id} (threshold={_get_fuzzy_threshold(term)}%)"
-            )
+    # --- Phase 1: Exact word-boundary matching (one automaton pass) ---
+    for term in match_unrelated_terms(text_lower):
+        found_concepts.add(config.UNRELATED_CATEGORY_CONCEPTS[term])
+        matched_terms.add(term)
+
+    # --- Phase 2: Fuzzy matching for unmatched terms (indexed, bulk-scored) ---
+    _fuzzy_phase(
+        config.UNRELATED_CATEGORY_CONCEPTS,
+        text_lower,
+        found_concepts,
+        matched_terms,
+        "TIER3-FUZZY",
+    )
 
     # Early return if no Tier 3 concepts detected
     if not found_concepts:
@@ -240,6 +219,16 @@ class OntologyBuilder:
             f"[ONTOLOGY] Built profiles for {len(self.profiles)} diseases (EN + TL merged)"
         )
 
+    @classmethod
+    def from_profiles(cls, profiles: Dict[str, Set[str]]) -> "OntologyBuilder":
+        """Ontology with precompiled profiles (see services.ontology_artifact)."""
+        builder = cls.__new__(cls)
+        builder.profiles = {disease: set(ids) for disease, ids in profiles.items()}
+        print(
+            f"[ONTOLOGY] Loaded profiles for {len(builder.profiles)} diseases (precompiled)"
+        )
+        return builder
+
     def _build_profiles(self, question_bank: dict, label: str = ""):
         """Extract concepts from each disease's questions to build its symptom profile."""
         for disease, questions in question_bank.items():
@@ -283,8 +272,11 @@ class VerificationLayer:
                 "reason": str (if invalid)
             }
         """
-        # Extract high-value concepts from input
-        extracted = extract_clinical_concepts(text)
+        # Extract high-value concepts from input (shared per text, so clamping
+        # every disease and the final check extract only once)
+        from app.services.text_analysis import analyze_text
+
+        extracted = analyze_text(text).clinical_concepts
         high_value_extracted = extracted & config.HIGH_VALUE_CONCEPTS
 
         if not high_value_extracted:
@@ -5,6 +5,8 @@ import numpy as np
 import app.config as config
 from flask import jsonify
 
+from app.services.keyword_engine import match_evidence_qids, match_medical_keywords
+
 __all__ = [
     "_count_words",
     "clean_token",
@@ -28,12 +30,42 @@ def clean_token(t):
     return t.strip()
 
 
-def aggregate_subword_attributions(tokens, attributions, tokenizer=None):
+def _aggregate_by_offsets(attributions, offsets, text):
+    spans = [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]
+    if not spans:
+        return [], []
+    word_starts, word_ends = np.array(spans).T
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    attributions = np.asarray(attributions, dtype=np.float64)
+
+    real = offsets[:, 1] > offsets[:, 0]
+    # First word ending after the token start (tokens never straddle whitespace)
+    word_ids = np.searchsorted(word_ends, offsets[real, 0], side="right")
+    in_text = word_ids < len(spans)
+    word_ids = word_ids[in_text]
+    sums = np.bincount(word_ids, weights=attributions[real][in_text], minlength=len(spans))
+
+    covered = np.unique(word_ids)
+    words = [text[word_starts[i] : word_ends[i]] for i in covered]
+    return words, sums[covered].tolist()
+
+
+def aggregate_subword_attributions(
+    tokens, attributions, tokenizer=None, offsets=None, text=None
+):
     """
     Merge subword tokens (e.g., Ġirrit + ating -> 'irritating')
     and sum their attributions to produce word-level importance.
     Works for both BPE (Ġ) and WordPiece (##) style tokenizers.
+
+    When the tokenizer's character `offsets` and the original `text` are given,
+    words are the whitespace-separated spans of `text` and each token is
+    assigned to its span in one vectorized pass (special tokens have empty
+    offsets and are skipped).
     """
+    if offsets is not None and text is not None:
+        return _aggregate_by_offsets(attributions, offsets, text)
+
     words = []
     word_attrs = []
 
@@ -134,12 +166,8 @@ def _has_medical_keywords(text: str, lang: str = "en") -> bool:
     text_lower = text.lower()
 
     # Check both language sets to handle langdetect misidentifications
-    has_en_keyword = any(
-        keyword in text_lower for keyword in config.MEDICAL_KEYWORDS_EN
-    )
-    has_tl_keyword = any(
-        keyword in text_lower for keyword in config.MEDICAL_KEYWORDS_TL
-    )
+    has_en_keyword = bool(match_medical_keywords(text_lower, "en"))
+    has_tl_keyword = bool(match_medical_keywords(text_lower, "tl"))
 
     return has_en_keyword or has_tl_keyword
 
@@ -155,9 +183,7 @@ def extract_all_symptom_qids(
     symptoms_lower = symptoms_text.lower()
 
     # 1. Add matches from initial text keywords
-    for qid, keywords in evidence_keywords.items():
-        if any(kw.lower() in symptoms_lower for kw in keywords):
-            matched.add(qid)
+    matched.update(match_evidence_qids(symptoms_lower, evidence_keywords))
 
     # 2. Add explicitly answered "yes" questions
     for qid, ans in question_answers.items():
@@ -178,14 +204,15 @@ def _build_cdss_payload(
     question_answers: dict | None = None,
 ) -> dict:
     from app.question_groups import (
-        detect_symptom_groups_in_text,
         get_warning_sign_groups,
         get_groups_for_question,
     )
     import app.config as config
 
     # 1. Gather all detected symptom groups (from text and questions)
-    detected_groups = detect_symptom_groups_in_text(symptoms)
+    from app.services.text_analysis import analyze_text
+
+    detected_groups = set(analyze_text(symptoms).symptom_groups)
     if question_answers:
         for qid, ans in question_answers.items():
             if str(ans).lower() == "yes":
@@ -509,8 +536,8 @@ def detect_language_heuristic(text, debug=False):
     # Keyword-based detection (Count based instead of boolean fallback)
     text_lower = text.lower()
 
-    tl_matches = sum(1 for k in config.MEDICAL_KEYWORDS_TL if k in text_lower)
-    en_matches = sum(1 for k in config.MEDICAL_KEYWORDS_EN if k in text_lower)
+    tl_matches = len(match_medical_keywords(text_lower, "tl"))
+    en_matches = len(match_medical_keywords(text_lower, "en"))
 
     if tl_matches > 0 and tl_matches >= en_matches:
         if debug:
@@ -12,11 +12,221 @@ Theory:
   Where:
   - P(disease) = prior from the initial NLP classification
   - P(evidence | disease) = likelihood derived from question weights
+
+Evidence kernel:
+  Every answered (or text-evidenced) question contributes one likelihood row
+  over the diseases. `likelihood_vectors` precomputes the "yes" (boost target)
+  and "no" (penalize target) rows of any set of questions, and
+  `evidence_likelihoods` stacks the rows for a list of answers into an
+  [E, num_diseases] matrix. The matrix is then applied either:
+  - `sequential_evidence_update`: one multiply + renormalize per row, exactly
+    the arithmetic of applying the updates one at a time (request path, replays)
+  - `log_space_evidence_update`: one summed log-likelihood update for a whole
+    batch of sessions (bulk what-if scoring). Equal to the sequential result
+    up to floating-point rounding.
 """
 
 import numpy as np
 from scipy.stats import entropy
 
+from app.services.keyword_engine import match_evidence_qids
+
+# Likelihood shape of one answer (see bayesian_evidence_update)
+PENALTY_STRENGTH = 0.35
+NO_ANSWER_BOOST_STRENGTH = 0.1
+YES_PENALTY_FLOOR = 0.1
+NO_PENALTY_FLOOR = 0.05
+
+
+def normalize_prior(current_probs) -> np.ndarray:
+    """Clip away zeros and renormalize (last axis), as every update does first."""
+    probs = np.array(current_probs, dtype=np.float64)
+    if probs.ndim <= 1:
+        probs = probs.flatten()
+    probs = np.clip(probs, 1e-10, 1.0)
+    return probs / probs.sum(axis=-1, keepdims=True)
+
+
+def likelihood_vectors(
+    weights, target_idx, num_classes: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-question likelihood rows for an effective "yes" and an effective "no".
+
+    Args:
+        weights: Question weights, shape [N].
+        target_idx: Target disease index of each question, shape [N]
+            (negative = not a known disease; both rows are all ones).
+        num_classes: Number of diseases.
+
+    Returns:
+        (yes_rows, no_rows), each [N, num_classes]:
+        - yes: target x (1 + w), others x max(1 - 0.35w, 0.1)
+        - no: target x max(1 - 0.35w, 0.05), others x (1 + 0.1w)
+    """
+    weights = np.asarray(weights, dtype=np.float64).reshape(-1)
+    target_idx = np.asarray(target_idx, dtype=np.int64).reshape(-1)
+    penalty = 1.0 - (weights * PENALTY_STRENGTH)
+
+    yes_rows = np.empty((len(weights), num_classes), dtype=np.float64)
+    no_rows = np.empty((len(weights), num_classes), dtype=np.float64)
+    yes_rows[:] = np.maximum(penalty, YES_PENALTY_FLOOR)[:, None]
+    no_rows[:] = (1.0 + (weights * NO_ANSWER_BOOST_STRENGTH))[:, None]
+
+    rows = np.arange(len(weights))
+    yes_rows[rows, target_idx] = 1.0 + weights
+    no_rows[rows, target_idx] = np.maximum(penalty, NO_PENALTY_FLOOR)
+
+    unknown = target_idx < 0
+    if unknown.any():
+        yes_rows[unknown] = 1.0
+        no_rows[unknown] = 1.0
+    return yes_rows, no_rows
+
+
+def evidence_likelihoods(yes_rows, no_rows, is_negative, answers) -> np.ndarray:
+    """
+    Stack the likelihood rows for a list of answers into an [E, C] matrix.
+
+    Row e is the "yes" or "no" row of question e for its effective answer:
+    negative questions invert the answer, and any other answer to a standard
+    question is uninformative (all ones), as in bayesian_evidence_update.
+    """
+    yes_rows = np.asarray(yes_rows, dtype=np.float64)
+    no_rows = np.asarray(no_rows, dtype=np.float64)
+    likelihoods = np.ones_like(yes_rows)
+    for e, (negative, answer) in enumerate(zip(is_negative, answers)):
+        effective_answer = answer
+        if negative:
+            effective_answer = "no" if answer == "yes" else "yes"
+        if effective_answer == "yes":
+            likelihoods[e] = yes_rows[e]
+        elif effective_answer == "no":
+            likelihoods[e] = no_rows[e]
+    return likelihoods
+
+
+def sequential_evidence_update(prior, likelihoods, clip_each_step=False) -> np.ndarray:
+    """
+    Apply likelihood rows in order, renormalizing after each one.
+
+    Args:
+        prior: Normalized prior, [C] or a batch [B, C].
+        likelihoods: [E, C] (shared by the batch) or [B, E, C].
+        clip_each_step: Clip and renormalize before every row, as separate
+            bayesian_evidence_update calls do.
+
+    Returns:
+        Posterior with the prior's shape. Bit-for-bit the result of applying
+        the updates one at a time.
+    """
+    posterior = np.array(prior, dtype=np.float64)
+    likelihoods = np.asarray(likelihoods, dtype=np.float64)
+    for e in range(likelihoods.shape[-2]):
+        if clip_each_step:
+            posterior = normalize_prior(posterior)
+        posterior = likelihoods[..., e, :] * posterior
+        posterior = posterior / posterior.sum(axis=-1, keepdims=True)
+    return posterior
+
+
+def log_space_evidence_update(prior, likelihoods, mask=None) -> np.ndarray:
+    """
+    Apply all likelihood rows in one summed log-space update.
+
+    Args:
+        prior: Normalized prior, [C] or a batch [B, C].
+        likelihoods: [E, C] (shared by the batch) or [B, E, C].
+        mask: Optional [E] or [B, E] 0/1 weights selecting which rows apply
+            to which session (what-if scoring over a shared evidence matrix).
+
+    Returns:
+        Posterior with the prior's shape.
+    """
+    log_likelihoods = np.log(np.asarray(likelihoods, dtype=np.float64))
+    if mask is None:
+        total = log_likelihoods.sum(axis=-2)
+    elif log_likelihoods.ndim == 2:
+        total = np.asarray(mask, dtype=np.float64) @ log_likelihoods
+    else:
+        total = np.einsum("be,bec->bc", np.asarray(mask, dtype=np.float64), log_likelihoods)
+
+    log_posterior = np.log(np.asarray(prior, dtype=np.float64)) + total
+    log_posterior -= log_posterior.max(axis=-1, keepdims=True)
+    posterior = np.exp(log_posterior)
+    return posterior / posterior.sum(axis=-1, keepdims=True)
+
+
+def replay_answers(current_probs, question_bank, answers) -> np.ndarray:
+    """
+    Posterior after a session's (question_id, answer) pairs, in order.
+
+    Same result as calling bayesian_evidence_update once per answer, from the
+    compiled bank's precomputed likelihood rows.
+    """
+    likelihoods = question_bank.answer_likelihoods(answers)
+    if len(likelihoods) == 0:
+        return normalize_prior(current_probs)
+    return sequential_evidence_update(current_probs, likelihoods, clip_each_step=True)
+
+
+def batch_replay_answers(priors, question_bank, answer_sets) -> np.ndarray:
+    """
+    Posteriors of many sessions (or what-if variants of one) in one update.
+
+    Args:
+        priors: [B, C] priors, or one [C] prior shared by every answer set.
+        question_bank: Compiled QuestionBank.
+        answer_sets: B lists of (question_id, answer) pairs.
+
+    Returns:
+        [B, C] posteriors. Equal, up to rounding, to applying each session's
+        rows sequentially (replay_answers additionally re-clips at 1e-10
+        between answers, which only moves probabilities below that floor).
+    """
+    priors = normalize_prior(priors)
+    rows = [question_bank.answer_likelihoods(answers) for answers in answer_sets]
+    if priors.ndim == 1:
+        priors = np.broadcast_to(priors, (len(rows), len(priors)))
+    num_rows = max((len(r) for r in rows), default=0)
+    # Pad with uninformative rows (log 1 = 0) to one [B, E, C] matrix
+    likelihoods = np.ones((len(rows), num_rows, priors.shape[-1]), dtype=np.float64)
+    for b, r in enumerate(rows):
+        likelihoods[b, : len(r)] = r
+    return log_space_evidence_update(priors, likelihoods)
+
+
+def _posterior_summary(posterior: np.ndarray, disease_labels: dict) -> dict:
+    """Prediction, confidence, normalized-entropy uncertainty and ranking."""
+    num_classes = len(posterior)
+    predicted_class = int(np.argmax(posterior))
+    confidence = float(np.max(posterior))
+
+    # Entropy-based uncertainty (normalized by log(num_classes) so it's in [0, 1])
+    raw_entropy = float(entropy(posterior))
+    max_entropy = float(np.log(num_classes))
+    uncertainty = raw_entropy / max_entropy if max_entropy > 0 else 0.0
+
+    top_diseases = [
+        {
+            "disease": disease_labels.get(idx, f"Disease_{idx}"),
+            "probability": float(posterior[idx]),
+        }
+        for idx in range(num_classes)
+    ]
+    top_diseases.sort(key=lambda x: x["probability"], reverse=True)
+
+    return {
+        "probs": posterior.tolist(),
+        "confidence": confidence,
+        "uncertainty": uncertainty,
+        "predicted_class": predicted_class,
+        "predicted_label": disease_labels.get(
+            predicted_class, f"Disease_{predicted_class}"
+        ),
+        "top_diseases": top_diseases,
+    }
+
 
 def bayesian_evidence_update(
     current_probs: list | np.ndarray,
@@ -52,92 +262,34 @@ def bayesian_evidence_update(
             - "predicted_label": Name of most likely disease
             - "top_diseases": Sorted list of {disease, probability}
     """
-    probs = np.array(current_probs, dtype=np.float64).flatten()
-    num_classes = len(probs)
-
-    # Clamp to avoid log(0) issues
-    probs = np.clip(probs, 1e-10, 1.0)
-    probs = probs / probs.sum()  # Renormalize
-
-    # Compute likelihood ratios based on answer
-    likelihood = np.ones(num_classes, dtype=np.float64)
-
-    # For negative questions, invert the effective answer
+    # Clamp to avoid log(0) issues, then renormalize
+    probs = normalize_prior(current_probs)
+
+    # Likelihood ratios for the answer:
+    # - effective "yes": BOOST the target by 1 + weight (e.g., 0.95 -> 1.95x)
+    #   and PENALIZE competitors by 1 - 0.35 * weight (floored at 0.1)
+    # - effective "no": PENALIZE the target moderately (floored at 0.05) and
+    #   slightly boost all others (evidence against the target)
+    # For negative questions the effective answer is inverted:
     # "Do you have a cough?" is_negative=True for Dengue
     # - User says "yes" (has cough) -> treat as "no" for Dengue support
     # - User says "no" (no cough) -> treat as "yes" for Dengue support
-    effective_answer = answer
-    if is_negative:
-        effective_answer = "no" if answer == "yes" else "yes"
-
-    if effective_answer == "yes":
-        # "Yes" to a disease-specific question:
-        # - BOOST the target disease by the question's weight
-        # - PENALIZE competing diseases proportionally
-        #
-        # The boost factor is 1 + weight (e.g., weight=0.95 -> 1.95x)
-        # The penalty factor scales with the weight gap between target and others
-        boost_factor = 1.0 + question_weight
-        penalty_factor = 1.0 - (question_weight * 0.35)  # 0.35 = penalty strength
-
-        likelihood[target_disease_idx] = boost_factor
-        for i in range(num_classes):
-            if i != target_disease_idx:
-                likelihood[i] = max(penalty_factor, 0.1)  # Floor at 0.1
-
-    elif effective_answer == "no":
-        # "No" to a disease-specific question:
-        # - PENALIZE the target disease (moderately)
-        # - Slightly boost all others (evidence against target)
-        penalty_factor = 1.0 - (question_weight * 0.35)
-        boost_factor = 1.0 + (question_weight * 0.1)
-
-        likelihood[target_disease_idx] = max(penalty_factor, 0.05)
-        for i in range(num_classes):
-            if i != target_disease_idx:
-                likelihood[i] = boost_factor
+    yes_rows, no_rows = likelihood_vectors(
+        [question_weight], [target_disease_idx], len(probs)
+    )
+    likelihood = evidence_likelihoods(yes_rows, no_rows, [is_negative], [answer])
 
     # Apply Bayes rule: posterior ∝ likelihood * prior
-    posterior = likelihood * probs
-    posterior = posterior / posterior.sum()  # Renormalize
-
-    # Compute updated metrics
-    predicted_class = int(np.argmax(posterior))
-    confidence = float(np.max(posterior))
+    posterior = sequential_evidence_update(probs, likelihood)
 
-    # Entropy-based uncertainty (normalized by log(num_classes) so it's in [0, 1])
-    raw_entropy = float(entropy(posterior))
-    max_entropy = float(np.log(num_classes))
-    uncertainty = raw_entropy / max_entropy if max_entropy > 0 else 0.0
-
-    # Build top_diseases list
-    top_diseases = []
-    for idx in range(num_classes):
-        label = disease_labels.get(idx, f"Disease_{idx}")
-        top_diseases.append(
-            {
-                "disease": label,
-                "probability": float(posterior[idx]),
-            }
-        )
-    top_diseases.sort(key=lambda x: x["probability"], reverse=True)
+    result = _posterior_summary(posterior, disease_labels)
 
     # Format probs strings for logging
-    probs_formatted = [
-        f"{d['disease']}: {(d['probability'] * 100):.2f}%" for d in top_diseases
+    result["probs_formatted"] = [
+        f"{d['disease']}: {(d['probability'] * 100):.2f}%"
+        for d in result["top_diseases"]
     ]
-
-    return {
-        "probs": posterior.tolist(),
-        "probs_formatted": probs_formatted,
-        "confidence": confidence,
-        "uncertainty": uncertainty,
-        "predicted_class": predicted_class,
-        "predicted_label": disease_labels.get(
-            predicted_class, f"Disease_{predicted_class}"
-        ),
-        "top_diseases": top_diseases,
-    }
+    return result
 
 
 def lookup_question_metadata(question_id: str, question_bank: dict) -> dict | None:
@@ -146,11 +298,16 @@ def lookup_question_metadata(question_id: str, question_bank: dict) -> dict | No
 
     Args:
         question_id: e.g., "typhoid_q1"
-        question_bank: The full question bank dict {disease: [questions]}
+        question_bank: The full question bank dict {disease: [questions]}, or a
+            compiled QuestionBank
 
     Returns:
         dict with "weight", "disease", "disease_idx", "is_negative" or None if not found.
     """
+    # Compiled banks (app.services.question_bank) answer from their id index
+    if hasattr(question_bank, "metadata"):
+        return question_bank.metadata(question_id)
+
     # Import here to avoid circular imports
     from app.services.ml_service import CORRECT_ID2LABEL
 
@@ -210,102 +367,37 @@ def apply_text_evidence_boosts(
             - "boosted_questions": List of question IDs that had evidence
             - "boost_count": Number of boosts applied
     """
-    probs = np.array(current_probs, dtype=np.float64).flatten()
-    probs = np.clip(probs, 1e-10, 1.0)
-    probs = probs / probs.sum()
+    probs = normalize_prior(current_probs)
 
     symptoms_lower = symptoms_text.lower()
-    boosted_questions = []
+    evidenced_qids = match_evidence_qids(symptoms_lower, evidence_keywords)
 
-    # Build reverse map: label -> idx
+    # Every evidenced question, in bank order, counts as a "yes" answer. For
+    # negative questions (e.g., "no cough?" and the user mentions cough) that
+    # PENALIZES the target disease; otherwise it BOOSTS it.
     label2idx = {v: k for k, v in disease_labels.items()}
-
+    boosted_questions = []
+    weights, targets, negatives = [], [], []
     for disease, questions in question_bank.items():
         disease_idx = label2idx.get(disease)
         if disease_idx is None:
             continue
-
         for q in questions:
             qid = q.get("id", "")
-            keywords = evidence_keywords.get(qid, [])
-
-            if not keywords:
-                continue
-
-            # Check if any keyword matches
-            has_match = any(kw.lower() in symptoms_lower for kw in keywords)
-
-            if has_match:
-                weight = q.get("weight", 0.85)
-                is_negative = q.get("is_negative", False)
-
-                # For negative questions (e.g., "do you have cough?"),
-                # if user mentions cough, we treat as "yes" to cough,
-                # which should PENALIZE diseases that expect "no cough"
-                if is_negative:
-                    # User mentioned the symptom -> answer is effectively "yes"
-                    # For negative questions, "yes" means PENALIZE target disease
-                    answer = "yes"
-                else:
-                    # Standard question: mentioning symptom = "yes" = BOOST target
-                    answer = "yes"
-
-                # Apply Bayesian update
-                num_classes = len(probs)
-                likelihood = np.ones(num_classes, dtype=np.float64)
-
-                if is_negative:
-                    # Negative question + "yes" answer = PENALIZE target disease
-                    # (e.g., "no cough?" user has cough -> penalize Dengue)
-                    penalty_factor = 1.0 - (weight * 0.35)
-                    boost_factor = 1.0 + (weight * 0.1)
-                    likelihood[disease_idx] = max(penalty_factor, 0.05)
-                    for i in range(num_classes):
-                        if i != disease_idx:
-                            likelihood[i] = boost_factor
-                else:
-                    # Standard question + "yes" answer = BOOST target disease
-                    boost_factor = 1.0 + weight
-                    penalty_factor = 1.0 - (weight * 0.35)
-                    likelihood[disease_idx] = boost_factor
-                    for i in range(num_classes):
-                        if i != disease_idx:
-                            likelihood[i] = max(penalty_factor, 0.1)
-
-                probs = likelihood * probs
-                probs = probs / probs.sum()
+            if qid in evidenced_qids:
                 boosted_questions.append(qid)
-
-    # Compute updated metrics
-    num_classes = len(probs)
-    predicted_class = int(np.argmax(probs))
-    confidence = float(np.max(probs))
-
-    raw_entropy = float(entropy(probs))
-    max_entropy = float(np.log(num_classes))
-    uncertainty = raw_entropy / max_entropy if max_entropy > 0 else 0.0
-
-    # Build top_diseases list
-    top_diseases = []
-    for idx in range(num_classes):
-        label = disease_labels.get(idx, f"Disease_{idx}")
-        top_diseases.append(
-            {
-                "disease": label,
-                "probability": float(probs[idx]),
-            }
+                weights.append(q.get("weight", 0.85))
+                targets.append(disease_idx)
+                negatives.append(q.get("is_negative", False))
+
+    if boosted_questions:
+        yes_rows, no_rows = likelihood_vectors(weights, targets, len(probs))
+        likelihoods = evidence_likelihoods(
+            yes_rows, no_rows, negatives, ["yes"] * len(boosted_questions)
         )
-    top_diseases.sort(key=lambda x: x["probability"], reverse=True)
+        probs = sequential_evidence_update(probs, likelihoods)
 
-    return {
-        "probs": probs.tolist(),
-        "confidence": confidence,
-        "uncertainty": uncertainty,
-        "predicted_class": predicted_class,
-        "predicted_label": disease_labels.get(
-            predicted_class, f"Disease_{predicted_class}"
-        ),
-        "top_diseases": top_diseases,
-        "boosted_questions": boosted_questions,
-        "boost_count": len(boosted_questions),
-    }
+    result = _posterior_summary(probs, disease_labels)
+    result["boosted_questions"] = boosted_questions
+    result["boost_count"] = len(boosted_questions)
+    return result
@@ -0,0 +1,17 @@
+"""
+ASGI entry point for the Flask application (SERVING_MODE=asgi).
+
+Request I/O runs on uvicorn's event loop, handlers on a bounded thread pool
+and CPU-heavy work on the compute pool (see app/asgi.py).
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 10000
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,14 @@
+-- Migration: Add compact (binary) state columns to diagnosis_sessions
+-- Written by the backend session store when SESSION_COMPACT_STATE is on
+-- (app/models/session_codec.py): packed float64/float32 probability arrays
+-- and question IDs / answers interned as question-bank indices. The matching
+-- JSON columns then hold an empty placeholder, and top_diseases is derived
+-- from current_probs on read. A NULL column means the JSON column is current,
+-- so rows written before this migration stay readable.
+
+-- Add the columns if they don't exist
+ALTER TABLE diagnosis_sessions
+ADD COLUMN IF NOT EXISTS base_probs_bin BYTEA,
+ADD COLUMN IF NOT EXISTS current_probs_bin BYTEA,
+ADD COLUMN IF NOT EXISTS asked_questions_bin BYTEA,
+ADD COLUMN IF NOT EXISTS question_answers_bin BYTEA;
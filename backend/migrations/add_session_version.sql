@@ -0,0 +1,12 @@
+-- Migration: Add version field to diagnosis_sessions
+-- Incremented by every write-back of the backend session store
+-- (app/models/diagnosis_session.py). A cached session is only reused while
+-- its version matches the row, and a write-back only applies on top of the
+-- version it was based on. When another gunicorn worker advanced the row
+-- first, the write-back is re-applied on top of the newer version: the fields
+-- it changed overwrite the newer values (last writer wins per field) and the
+-- other fields keep the newer worker's state.
+
+-- Add the column if it doesn't exist
+ALTER TABLE diagnosis_sessions
+ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Dropout Mask Generator Benchmark
+
+Compares the two deterministic MC dropout mask generators:
+1. pcg64  - NumPy PCG64 float32 draw, copied into a float torch mask
+2. philox - counter-based Philox keyed by seed/layer/iteration, 16-bit uniforms,
+            applied as a bool mask
+
+It reports the per-layer dropout cost (mask generation + application) for
+typical activation shapes and the end-to-end `predict_with_uncertainty`
+latency per request with each generator.
+
+Usage:
+    python scripts/benchmark_mask_rng.py [--repeats 5] [--seq-lens 32,128,512]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import app.config as config
+from app.services.ml_service import BatchedMaskRNG, eng_classifier, fil_classifier
+from app.services.philox import PhiloxMaskRNG
+
+SAMPLE_TEXTS = [
+    "I have had a high fever and headache for 3 days",
+    "watery diarrhea and vomiting since yesterday with stomach cramps",
+    "cough with phlegm, chest pain when breathing and fever for a week "
+    "and I feel very tired and short of breath even when resting",
+]
+
+
+def _time(fn, repeats: int) -> float:
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def benchmark_masks(n_iterations: int, seq_lens: list, hidden_sizes: list, repeats: int):
+    print(f"\n{'='*70}")
+    print(f"Dropout layer cost ({n_iterations} MC iterations, keep_prob=0.8)")
+    print(f"{'='*70}")
+    print(f"{'shape':>22} {'pcg64 (ms)':>12} {'philox (ms)':>12} {'speedup':>8}")
+
+    seed = 20260322
+    for seq_len in seq_lens:
+        for hidden in hidden_sizes:
+            shape = (n_iterations, seq_len, hidden)
+            x = torch.randn(shape)
+
+            def pcg64():
+                rng = BatchedMaskRNG(
+                    [np.random.Generator(np.random.PCG64(seed))],
+                    [seq_len],
+                    n_iterations,
+                    seq_len,
+                )
+                mask = torch.from_numpy(rng.random_mask(shape, 0.8)).to(x.dtype)
+                return x * mask / 0.8
+
+            def philox():
+                rng = PhiloxMaskRNG([seed], [seq_len], n_iterations, seq_len)
+                return (x * rng.mask(shape, 0.8, layer_index=0)).mul_(1.0 / 0.8)
+
+            t_pcg, t_philox = _time(pcg64, repeats), _time(philox, repeats)
+            print(
+                f"{str(shape):>22} {t_pcg * 1000:>12.2f} {t_philox * 1000:>12.2f} "
+                f"{t_pcg / t_philox:>7.2f}x"
+            )
+
+
+def benchmark_requests(classifier, name: str, repeats: int):
+    print(f"\n{'='*70}")
+    print(f"End-to-end predict_with_uncertainty: {name}")
+    print(f"{'='*70}")
+    original = config.MCD_MASK_GENERATOR
+    try:
+        results = {}
+        for generator in ("pcg64", "philox"):
+            config.MCD_MASK_GENERATOR = generator
+            results[generator] = [
+                _time(
+                    lambda text=text: classifier.predict_batch_with_uncertainty(
+                        [text], adaptive=False
+                    ),
+                    repeats,
+                )
+                for text in SAMPLE_TEXTS
+            ]
+    finally:
+        config.MCD_MASK_GENERATOR = original
+
+    for text, t_pcg, t_philox in zip(SAMPLE_TEXTS, results["pcg64"], results["philox"]):
+        n_tokens = len(classifier.tokenizer(text)["input_ids"])
+        print(
+            f"  {n_tokens:>4} tokens: pcg64 {t_pcg * 1000:8.1f} ms | "
+            f"philox {t_philox * 1000:8.1f} ms | saved {(t_pcg - t_philox) * 1000:7.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dropout mask generators")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per case")
+    parser.add_argument(
+        "--seq-lens",
+        type=str,
+        default="32,128,512",
+        help="Comma-separated sequence lengths for the mask benchmark",
+    )
+    parser.add_argument(
+        "--skip-models",
+        action="store_true",
+        help="Only benchmark mask generation, not full requests",
+    )
+    args = parser.parse_args()
+
+    seq_lens = [int(s) for s in args.seq_lens.split(",") if s.strip()]
+    hidden_sizes = sorted(
+        {eng_classifier.model.config.hidden_size, eng_classifier.model.config.intermediate_size}
+    )
+    benchmark_masks(eng_classifier.n_iterations, seq_lens, hidden_sizes, args.repeats)
+
+    if not args.skip_models:
+        benchmark_requests(eng_classifier, "BioClinical ModernBERT (English)", args.repeats)
+        benchmark_requests(fil_classifier, "RoBERTa Tagalog", args.repeats)
+
+
+if __name__ == "__main__":
+    main()
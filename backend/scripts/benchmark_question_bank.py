@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Question Bank Lookup Benchmark
+
+Measures the question-bank work done on every /diagnosis/follow-up request:
+1. metadata lookup for the answered question
+2. positive/negative symptom text for the evidence string
+3. already-evidenced question IDs (skip list)
+4. primary-question coverage of the leading disease
+
+"linear" replays the dict scans the follow-up path used before the compiled
+index; "compiled" uses app.services.question_bank. CPU time is process time
+per simulated follow-up.
+
+Usage:
+    python scripts/benchmark_question_bank.py [--follow-ups 20000] [--repeats 5]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.ml_service import CORRECT_ID2LABEL  # noqa: F401 — load before timing
+from app.services.question_bank import build_question_banks
+from app.utils.scoring import lookup_question_metadata
+
+SAMPLE_TEXTS = [
+    "I have had a high fever and headache for 3 days",
+    "watery diarrhea and vomiting since yesterday with stomach cramps",
+    "cough with phlegm, chest pain when breathing and fever for a week",
+    "may lagnat at rashes ako, masakit ang likod ng mata",
+]
+
+
+def _linear_follow_up(qid, answer, text, disease):
+    meta = lookup_question_metadata(qid, QUESTION_BANK_EN)
+    key = "positive_symptom" if answer == "yes" else "negative_symptom"
+    symptom = None
+    for disease_qs in list(QUESTION_BANK_EN.values()) + list(QUESTION_BANK_TL.values()):
+        for q in disease_qs:
+            if q.get("id") == qid:
+                symptom = q.get(key, "")
+                break
+        if symptom:
+            break
+    symptoms_lower = text.lower()
+    skip_ids = set()
+    for questions in QUESTION_BANK_EN.values():
+        for q in questions:
+            keywords = EVIDENCE_KEYWORDS.get(q.get("id", ""), [])
+            if keywords and any(kw in symptoms_lower for kw in keywords):
+                skip_ids.add(q["id"])
+    primary = [
+        q
+        for q in QUESTION_BANK_EN[disease]
+        if (q.get("category") or "").lower() == "primary"
+    ]
+    coverage = sum(
+        1
+        for q in primary
+        if any(kw in symptoms_lower for kw in EVIDENCE_KEYWORDS.get(q["id"], []))
+    )
+    return meta, symptom, skip_ids, coverage
+
+
+def _compiled_follow_up(banks, qid, answer, text, disease):
+    bank = banks.en
+    meta = bank.metadata(qid)
+    symptom = banks.symptom_text(qid, positive=answer == "yes")
+    skip_ids = bank.evidenced_ids(text.lower())
+    coverage = sum(
+        1 for q in bank.primary_questions(disease) if q.get("id", "") in skip_ids
+    )
+    return meta, symptom, skip_ids, coverage
+
+
+def _cpu_time(fn, cases, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.process_time()
+        for case in cases:
+            fn(*case)
+        timings.append(time.process_time() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark follow-up question bank lookups")
+    parser.add_argument("--follow-ups", type=int, default=20000, help="Simulated follow-ups")
+    parser.add_argument("--repeats", type=int, default=5, help="Timing repeats (median)")
+    args = parser.parse_args()
+
+    start = time.process_time()
+    banks = build_question_banks(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+    build_ms = (time.process_time() - start) * 1000
+
+    rng = random.Random(0)
+    ids = banks.en.ids
+    cases = [
+        (
+            rng.choice(ids),
+            rng.choice(["yes", "no"]),
+            rng.choice(SAMPLE_TEXTS),
+            rng.choice(banks.en.diseases),
+        )
+        for _ in range(args.follow_ups)
+    ]
+
+    for case in cases[:500]:
+        assert _linear_follow_up(*case) == _compiled_follow_up(banks, *case), case
+
+    linear = _cpu_time(_linear_follow_up, cases, args.repeats)
+    compiled = _cpu_time(lambda *c: _compiled_follow_up(banks, *c), cases, args.repeats)
+
+    n = len(cases)
+    print(f"\n{'='*70}")
+    print(f"Question bank work per follow-up ({n} follow-ups, {len(ids)} questions)")
+    print(f"{'='*70}")
+    print(f"One-time compile:  {build_ms:.2f} ms")
+    print(f"Linear scans:      {linear / n * 1e6:8.2f} us CPU / follow-up")
+    print(f"Compiled index:    {compiled / n * 1e6:8.2f} us CPU / follow-up")
+    print(f"Speedup:           {linear / max(compiled, 1e-12):8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Prebuild the Ontology Artifact
+
+Compiles the ontology profiles, keyword automaton and question-bank index into
+the artifact that create_app loads at boot (see app/services/ontology_artifact.py).
+Run it during the Docker build so workers never compile at startup; an artifact
+that is already current is left untouched unless --force is given.
+
+Usage:
+    python scripts/build_ontology_artifact.py [--output PATH] [--force]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Only the question banks are needed, not a running app
+os.environ.setdefault("APP_SKIP_AUTOCREATE", "1")
+
+import app.config as config
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.ontology_artifact import (
+    compile_artifact,
+    load_artifact,
+    ontology_content_hash,
+    save_artifact,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild the ontology artifact")
+    parser.add_argument(
+        "--output",
+        default=config.ONTOLOGY_ARTIFACT_PATH,
+        help="Artifact path (default: ONTOLOGY_ARTIFACT_PATH)",
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild even if current")
+    args = parser.parse_args()
+
+    if not args.output:
+        parser.error("no output path (ONTOLOGY_ARTIFACT_PATH is empty)")
+
+    content_hash = ontology_content_hash(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+    if not args.force and load_artifact(args.output, content_hash) is not None:
+        print(f"Artifact {content_hash[:12]} at {args.output} is current")
+        return
+
+    artifact = compile_artifact(
+        QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS, content_hash
+    )
+    save_artifact(artifact, args.output)
+    size_kb = os.path.getsize(args.output) / 1024
+    print(
+        f"Wrote artifact {content_hash[:12]} to {args.output} ({size_kb:.0f} KB, "
+        f"{len(artifact.profiles)} disease profiles)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Build the Questioning Policy Cache
+
+Pre-populates the next-question policy cache (app/services/policy_cache.py)
+by replaying the follow-up flow from real session start states: the text
+evidence boosts of the first turn, then every yes/no answer path up to
+--depth questions. Each visited state runs the live selection once, which
+stores its choice in the cache; the cache is then saved for create_app to load.
+
+Start states come from the diagnosis_sessions table (initial symptoms, base
+probabilities, language) or from a JSON file of
+[{"symptoms": str, "probs": [float, ...], "lang": "en"|"tl"}, ...].
+
+Usage:
+    python scripts/build_policy_cache.py --output /app/artifacts/policy.pkl [--from-json FILE]
+        [--limit 500] [--depth 6]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("APP_SKIP_AUTOCREATE", "1")
+
+import numpy as np
+
+import app.config as config
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.information_gain import select_best_question_across_diseases
+from app.services.ml_service import CORRECT_ID2LABEL
+from app.services.ontology_artifact import load_or_build_artifact
+from app.services.policy_cache import policy_cache, policy_fingerprint
+from app.services.text_analysis import analyze_text
+from app.utils.scoring import apply_text_evidence_boosts, bayesian_evidence_update
+
+
+def load_start_states_from_db(limit):
+    from sqlalchemy import text
+
+    from app.models.session_codec import decode_probs
+    from app.utils.database import get_db_engine
+
+    def base_probs(row):
+        # Compact rows keep the probabilities in base_probs_bin
+        if row["base_probs_bin"] is not None:
+            return decode_probs(row["base_probs_bin"])
+        return json.loads(row["base_probs"]) if row["base_probs"] else []
+
+    with get_db_engine().connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT initial_symptoms, base_probs, base_probs_bin, lang "
+                "FROM diagnosis_sessions "
+                "ORDER BY created_at DESC LIMIT :limit"
+            ),
+            {"limit": limit},
+        ).mappings()
+        return [
+            {
+                "symptoms": row["initial_symptoms"] or "",
+                "probs": base_probs(row),
+                "lang": row["lang"] or "en",
+            }
+            for row in rows
+        ]
+
+
+def walk_paths(state, banks, depth):
+    """Visit every answer path of the follow-up flow from one start state."""
+    symptoms = state["symptoms"]
+    probs = np.asarray(state["probs"], dtype=np.float64)
+    boost_bank = banks.for_lang(state["lang"])
+    if symptoms:
+        boosted = apply_text_evidence_boosts(
+            probs, symptoms, boost_bank, CORRECT_ID2LABEL, EVIDENCE_KEYWORDS
+        )
+        if boosted["boost_count"] > 0:
+            probs = np.array(boosted["probs"])
+
+    # The follow-up picks the question bank by the text's language
+    lang = analyze_text(symptoms).language if symptoms.strip() else state["lang"]
+    bank = banks.for_lang(lang)
+    skip_ids = bank.evidenced_ids(symptoms.lower())
+
+    visited = 0
+    frontier = [(probs, [], {})]
+    for _ in range(depth):
+        next_frontier = []
+        for current_probs, asked, answers in frontier:
+            question, _, _ = select_best_question_across_diseases(
+                current_probs=current_probs,
+                question_bank=bank,
+                asked_question_ids=set(asked),
+                skip_question_ids=skip_ids,
+                disease_labels=CORRECT_ID2LABEL,
+                symptoms_text=symptoms,
+                use_semantic_grouping=True,
+                answered_questions=answers,
+            )
+            visited += 1
+            if question is None:
+                continue
+            meta = bank.metadata(question["id"])
+            for answer in ("yes", "no"):
+                updated = bayesian_evidence_update(
+                    current_probs,
+                    answer,
+                    meta["weight"],
+                    meta["disease_idx"],
+                    CORRECT_ID2LABEL,
+                    is_negative=meta.get("is_negative", False),
+                )
+                next_frontier.append(
+                    (
+                        np.array(updated["probs"]),
+                        asked + [question["id"]],
+                        {**answers, question["id"]: answer},
+                    )
+                )
+        frontier = next_frontier
+    return visited
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-populate the questioning policy cache")
+    parser.add_argument(
+        "--output", default=config.POLICY_CACHE_PATH, help="Cache path (default: POLICY_CACHE_PATH)"
+    )
+    parser.add_argument("--from-json", help="Start states JSON instead of the database")
+    parser.add_argument("--limit", type=int, default=500, help="Most recent DB sessions to use")
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=min(config.MAX_QUESTIONS_THRESHOLD, 6),
+        help="Questions per path (2^depth paths per start state)",
+    )
+    args = parser.parse_args()
+    if not args.output:
+        parser.error("no output path (POLICY_CACHE_PATH is empty)")
+
+    if args.from_json:
+        with open(args.from_json, "r", encoding="utf-8") as f:
+            states = json.load(f)
+    else:
+        states = load_start_states_from_db(args.limit)
+    states = [s for s in states if len(s.get("probs", [])) == len(CORRECT_ID2LABEL)]
+    print(f"Replaying {len(states)} start states to depth {args.depth}")
+
+    artifact = load_or_build_artifact(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+    fingerprint = policy_fingerprint(artifact.content_hash, policy_cache.quantum)
+    policy_cache.load(args.output, fingerprint)  # extend an existing cache
+
+    start = time.perf_counter()
+    visited = sum(walk_paths(s, artifact.question_banks, args.depth) for s in states)
+    policy_cache.save(args.output, fingerprint)
+
+    stats = policy_cache.get_stats()
+    print(
+        f"Visited {visited} states in {time.perf_counter() - start:.1f}s; "
+        f"saved {stats['entries']} selections to {args.output} "
+        f"(hit rate while building: {stats['hit_rate']:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Explanation Method Fidelity Comparison
+
+Compares the token attribution methods of /diagnosis/explain against a
+high-sample GradientSHAP reference:
+1. Rank agreement    - Spearman correlation of word attributions with the reference
+2. Top-k agreement   - overlap of the k most important words with the reference
+3. Deletion fidelity - drop in target-class probability (dropout-free pass) when
+                       the method's top-k words are removed from the text
+4. Latency           - median time per explanation (explanation cache disabled)
+
+Usage:
+    python scripts/compare_explanation_methods.py [--dataset PATH] [--model english|tagalog|both]
+        [--reference-samples 200] [--top-k 3]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import spearmanr
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import app.config as config
+import app.services.ml_service as ml_service
+from app.services.ml_service import EXPLANATION_METHODS, eng_classifier, fil_classifier
+from app.utils import aggregate_subword_attributions
+
+
+def _word_attributions(classifier, text, target_class, method):
+    result = classifier.explain_with_gradient_shap(
+        text, target_class=target_class, mean_probs=[1.0], method=method
+    )
+    return aggregate_subword_attributions(
+        result["tokens"], result["attributions"], offsets=result["offsets"], text=text
+    )
+
+
+def _target_probability(classifier, text, target_class):
+    result = classifier.predict_batch_with_uncertainty([text], deterministic=True)[0]
+    return float(result["mean_probabilities"][0][target_class])
+
+
+def _deletion_drop(classifier, text, words, attributions, target_class, k):
+    """Probability drop after deleting the k highest-attributed words."""
+    top = set(np.argsort(attributions)[::-1][:k].tolist())
+    reduced = " ".join(w for i, w in enumerate(words) if i not in top) or "."
+    return _target_probability(classifier, text, target_class) - _target_probability(
+        classifier, reduced, target_class
+    )
+
+
+def compare_methods(classifier, texts, model_name, reference_samples, top_k):
+    print(f"\n{'='*70}")
+    print(f"Explanation fidelity: {model_name}")
+    print(f"{'='*70}")
+
+    original_samples = config.EXPLAIN_SHAP_SAMPLES
+    rows = {
+        method: {"spearman": [], "topk": [], "deletion": [], "seconds": []}
+        for method in EXPLANATION_METHODS
+    }
+    for i, text in enumerate(texts):
+        print(f"Processing {i+1}/{len(texts)}...", end="\r")
+        target = int(
+            classifier.predict_batch_with_uncertainty([text], deterministic=True)[0][
+                "predicted_class"
+            ][0]
+        )
+        config.EXPLAIN_SHAP_SAMPLES = reference_samples
+        try:
+            ref_words, ref_attrs = _word_attributions(
+                classifier, text, target, "gradient_shap"
+            )
+        finally:
+            config.EXPLAIN_SHAP_SAMPLES = original_samples
+        ref_top = set(np.argsort(ref_attrs)[::-1][:top_k].tolist())
+
+        for method in EXPLANATION_METHODS:
+            start = time.perf_counter()
+            words, attrs = _word_attributions(classifier, text, target, method)
+            rows[method]["seconds"].append(time.perf_counter() - start)
+            if len(words) > 1 and words == ref_words:
+                rho = spearmanr(ref_attrs, attrs).statistic
+                rows[method]["spearman"].append(0.0 if np.isnan(rho) else float(rho))
+            top = set(np.argsort(attrs)[::-1][:top_k].tolist())
+            rows[method]["topk"].append(len(top & ref_top) / max(len(ref_top), 1))
+            rows[method]["deletion"].append(
+                _deletion_drop(classifier, text, words, attrs, target, top_k)
+            )
+    print(f"Completed {len(texts)} texts")
+
+    print(
+        f"\n{'method':<22} {'spearman':>9} {f'top-{top_k}':>7} "
+        f"{'del. drop':>10} {'ms':>8}"
+    )
+    summary = {}
+    for method, r in rows.items():
+        summary[method] = {
+            "spearman": float(np.mean(r["spearman"])) if r["spearman"] else None,
+            "topk_overlap": float(np.mean(r["topk"])),
+            "deletion_drop": float(np.mean(r["deletion"])),
+            "median_ms": statistics.median(r["seconds"]) * 1000,
+        }
+        s = summary[method]
+        spearman = f"{s['spearman']:.3f}" if s["spearman"] is not None else "n/a"
+        print(
+            f"{method:<22} {spearman:>9} {s['topk_overlap']:>7.2f} "
+            f"{s['deletion_drop']:>10.4f} {s['median_ms']:>8.1f}"
+        )
+    print(
+        f"\nReference: GradientSHAP with {reference_samples} samples. Higher is better "
+        f"for every column except ms."
+    )
+    return {"model": model_name, "methods": summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare explanation methods against a GradientSHAP reference"
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="test_data.json",
+        help="Path to test dataset JSON file",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        choices=["english", "tagalog", "both"],
+        default="english",
+        help="Which model to evaluate",
+    )
+    parser.add_argument(
+        "--reference-samples",
+        type=int,
+        default=200,
+        help="GradientSHAP samples for the reference attributions",
+    )
+    parser.add_argument("--top-k", type=int, default=3, help="Words per top-k check")
+    parser.add_argument(
+        "--limit", type=int, default=0, help="Only use the first N texts (0 = all)"
+    )
+    args = parser.parse_args()
+
+    dataset_path = Path(args.dataset)
+    if not dataset_path.exists():
+        print(f"Error: Dataset not found at {dataset_path}")
+        print('Expected: [{"symptoms": "fever, headache", "disease": "Dengue"}, ...]')
+        sys.exit(1)
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        texts = [item["symptoms"] for item in json.load(f)]
+    if args.limit:
+        texts = texts[: args.limit]
+
+    # Time and compare the methods themselves, not cache lookups
+    ml_service.explanation_cache = None
+
+    results = []
+    if args.model in ["english", "both"]:
+        results.append(
+            compare_methods(
+                eng_classifier,
+                texts,
+                "BioClinical ModernBERT (English)",
+                args.reference_samples,
+                args.top_k,
+            )
+        )
+    if args.model in ["tagalog", "both"]:
+        results.append(
+            compare_methods(
+                fil_classifier, texts, "RoBERTa Tagalog", args.reference_samples, args.top_k
+            )
+        )
+
+    output_path = Path(__file__).parent / "explanation_method_comparison.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Partial MC Dropout Calibration Comparison
+
+Compares full MC dropout against "partial MC" (lower encoder layers run once,
+only the top layers sampled) for one or more split points. For every setting it
+reports:
+1. Accuracy
+2. Expected Calibration Error (ECE)
+3. Mean mutual information
+4. Mean inference time per input
+5. Agreement of the predicted class with full MC
+
+Usage:
+    python scripts/compare_partial_mc.py [--dataset PATH] [--model english|tagalog]
+                                         [--layers 0,6,11]
+
+Split 0 is full MC dropout and is always evaluated as the reference.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.ml_service import (
+    _encoder_layers,
+    compute_expected_calibration_error,
+    eng_classifier,
+    fil_classifier,
+)
+from evaluate_uncertainty import load_test_dataset
+
+
+def run_setting(classifier, symptoms_list: list, y_true: np.ndarray, split: int):
+    """Evaluate `classifier` with `split` lower layers excluded from MC sampling."""
+    original_split = classifier.partial_mc_layers
+    classifier.partial_mc_layers = split
+
+    predictions = []
+    confidences = []
+    mutual_information = []
+    start = time.perf_counter()
+    try:
+        for i, symptoms in enumerate(symptoms_list):
+            print(f"  [split={split}] {i+1}/{len(symptoms_list)}...", end="\r")
+            result = classifier.predict_with_uncertainty(symptoms)
+            predictions.append(int(result["predicted_class"][0]))
+            confidences.append(float(result["confidence"][0]))
+            mutual_information.append(float(result["mutual_information"][0]))
+    finally:
+        classifier.partial_mc_layers = original_split
+    elapsed = time.perf_counter() - start
+
+    predictions = np.array(predictions)
+    confidences = np.array(confidences)
+    return {
+        "split": split,
+        "accuracy": float(np.mean(predictions == y_true)),
+        "ece": compute_expected_calibration_error(predictions, confidences, y_true),
+        "mean_mutual_information": float(np.mean(mutual_information)),
+        "seconds_per_input": elapsed / max(len(symptoms_list), 1),
+        "predictions": predictions,
+    }
+
+
+def compare_model(classifier, symptoms_list: list, true_labels: list, model_name: str, splits: list):
+    print(f"\n{'='*70}")
+    print(f"Partial MC comparison: {model_name}")
+    print(f"{'='*70}")
+
+    _, layers = _encoder_layers(classifier.model)
+    label_to_idx = classifier.model.config.label2id
+    y_true = np.array([label_to_idx[label] for label in true_labels])
+
+    splits = sorted({0, *[min(max(s, 0), len(layers)) for s in splits]})
+    results = [run_setting(classifier, symptoms_list, y_true, s) for s in splits]
+    reference = results[0]
+
+    print(f"\n{'split':>6} {'MC layers':>10} {'accuracy':>9} {'ECE':>8} {'mean MI':>9} {'s/input':>8} {'agree':>7} {'speedup':>8}")
+    for r in results:
+        r["agreement_with_full_mc"] = float(
+            np.mean(r["predictions"] == reference["predictions"])
+        )
+        r["speedup"] = reference["seconds_per_input"] / max(r["seconds_per_input"], 1e-9)
+        print(
+            f"{r['split']:>6} {len(layers) - r['split']:>10} {r['accuracy']:>9.4f} "
+            f"{r['ece']:>8.4f} {r['mean_mutual_information']:>9.4f} "
+            f"{r['seconds_per_input']:>8.3f} {r['agreement_with_full_mc']:>7.3f} "
+            f"{r['speedup']:>7.2f}x"
+        )
+        r["predictions"] = r["predictions"].tolist()
+
+    return {"model": model_name, "n_layers": len(layers), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare calibration of partial vs full MC dropout"
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="test_data.json",
+        help="Path to test dataset JSON file",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        choices=["english", "tagalog", "both"],
+        default="both",
+        help="Which model to evaluate",
+    )
+    parser.add_argument(
+        "--layers",
+        type=str,
+        default="4,8,11",
+        help="Comma-separated numbers of lower layers to run once (0 = full MC)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="partial_mc_comparison.json",
+        help="Output file path for results",
+    )
+
+    args = parser.parse_args()
+
+    dataset_path = Path(args.dataset)
+    if not dataset_path.exists():
+        print(f"Error: Dataset not found at {dataset_path}")
+        print("\nPlease provide a test dataset in JSON format:")
+        print('[{"symptoms": "fever, headache", "disease": "Dengue"}, ...]')
+        sys.exit(1)
+
+    splits = [int(s) for s in args.layers.split(",") if s.strip()]
+
+    print(f"Loading dataset from {dataset_path}...")
+    symptoms_list, true_labels = load_test_dataset(str(dataset_path))
+    print(f"Loaded {len(symptoms_list)} test samples")
+
+    report = []
+    if args.model in ["english", "both"]:
+        report.append(
+            compare_model(
+                eng_classifier,
+                symptoms_list,
+                true_labels,
+                "BioClinical ModernBERT (English)",
+                splits,
+            )
+        )
+    if args.model in ["tagalog", "both"]:
+        report.append(
+            compare_model(
+                fil_classifier, symptoms_list, true_labels, "RoBERTa Tagalog", splits
+            )
+        )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,14 @@ It computes:
 4. Uncertainty separation (correct vs incorrect predictions)
 5. Optimal threshold recommendations
 
+With --tiered it instead evaluates tiered inference (deterministic pass first,
+MC dropout only when the margin/entropy thresholds escalate): accuracy and ECE
+of the tiered predictions against always-MC, the escalation rate and the
+compute saved, for the configured thresholds and a small threshold sweep.
+
 Usage:
     python scripts/evaluate_uncertainty.py [--dataset PATH] [--model english|tagalog]
+    python scripts/evaluate_uncertainty.py --tiered [--dataset PATH]
 
 Requirements:
     - A test dataset with symptoms and true disease labels
@@ -21,6 +27,7 @@ Requirements:
 import argparse
 import json
 import sys
+import time
 from pathlib import Path
 
 import numpy as np
@@ -37,6 +44,7 @@ from sklearn.metrics import (
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import app.config as config
 from app.services.ml_service import (
     compute_expected_calibration_error,
     compute_multi_metric_uncertainty,
@@ -45,6 +53,7 @@ from app.services.ml_service import (
     eng_classifier,
     fil_classifier,
     optimize_uncertainty_threshold,
+    tier_escalation_reason,
 )
 
 
@@ -383,6 +392,123 @@ def evaluate_model(classifier, symptoms_list: list, true_labels: list, model_nam
     return results
 
 
+def _tier_metrics(mask_escalated, det, mc, true_idx, n_iterations, first_pass=True):
+    """Accuracy/ECE of tiered predictions and the share of forward passes saved."""
+    probs = np.where(mask_escalated[:, None], mc, det)
+    preds = probs.argmax(axis=1)
+    confidences = probs.max(axis=1)
+    escalated = int(mask_escalated.sum())
+    # Every request pays the deterministic pass; escalated ones add the MC ensemble
+    passes = len(preds) * int(first_pass) + escalated * n_iterations
+    return {
+        "accuracy": float(accuracy_score(true_idx, preds)),
+        "ece": float(
+            compute_expected_calibration_error(preds, confidences, true_idx, n_bins=10)
+        ),
+        "escalation_rate": escalated / len(preds),
+        "compute_saved": 1.0 - passes / (len(preds) * n_iterations),
+    }
+
+
+def evaluate_tiered(classifier, symptoms_list: list, true_labels: list, model_name: str):
+    """
+    Quantify the accuracy/calibration cost of tiered inference vs always-MC.
+
+    Args:
+        classifier: MCDClassifierWithSHAP instance
+        symptoms_list: list of symptom texts
+        true_labels: list of true disease labels
+        model_name: name of the model for reporting
+    """
+    print(f"\n{'='*70}")
+    print(f"Tiered Inference Evaluation: {model_name}")
+    print(f"{'='*70}\n")
+
+    det_probs, mc_probs, mc_mi = [], [], []
+    det_time = mc_time = 0.0
+    for i, symptoms in enumerate(symptoms_list):
+        print(f"Processing {i+1}/{len(symptoms_list)}...", end="\r")
+        start = time.perf_counter()
+        det = classifier.predict_batch_with_uncertainty([symptoms], deterministic=True)[0]
+        det_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        mc = classifier.predict_with_uncertainty(symptoms)
+        mc_time += time.perf_counter() - start
+
+        det_probs.append(det["mean_probabilities"][0])
+        mc_probs.append(mc["mean_probabilities"][0])
+        mc_mi.append(float(mc["mutual_information"][0]))
+    print(f"Completed {len(symptoms_list)} predictions")
+
+    det_probs, mc_probs, mc_mi = np.array(det_probs), np.array(mc_probs), np.array(mc_mi)
+    label_to_idx = classifier.model.config.label2id
+    true_idx = np.array([label_to_idx[label] for label in true_labels])
+    n_iterations = classifier.n_iterations
+
+    always_mc = _tier_metrics(
+        np.ones(len(true_idx), dtype=bool),
+        det_probs,
+        mc_probs,
+        true_idx,
+        n_iterations,
+        first_pass=False,
+    )
+    never_mc = _tier_metrics(
+        np.zeros(len(true_idx), dtype=bool), det_probs, mc_probs, true_idx, n_iterations
+    )
+    print(f"\n{'policy':<34} {'acc':>7} {'ECE':>7} {'escal.':>7} {'saved':>7}")
+    for name, m in (("always MC", always_mc), ("deterministic only", never_mc)):
+        print(
+            f"{name:<34} {m['accuracy']:>7.4f} {m['ece']:>7.4f} "
+            f"{m['escalation_rate']:>7.1%} {m['compute_saved']:>7.1%}"
+        )
+
+    sweep = []
+    original = (config.MCD_TIERED_MIN_MARGIN, config.MCD_TIERED_MAX_ENTROPY)
+    grid = sorted(
+        {original}
+        | {(m, e) for m in (0.2, 0.35, 0.5, 0.65) for e in (0.25, 0.35, 0.5)}
+    )
+    try:
+        for margin, max_entropy in grid:
+            config.MCD_TIERED_MIN_MARGIN = margin
+            config.MCD_TIERED_MAX_ENTROPY = max_entropy
+            escalated = np.array(
+                [tier_escalation_reason(p) is not None for p in det_probs]
+            )
+            m = _tier_metrics(escalated, det_probs, mc_probs, true_idx, n_iterations)
+            # Deterministic-tier requests whose MC MI would have failed the
+            # /diagnosis/new contradiction check
+            m["missed_contradictions"] = int(
+                ((~escalated) & (mc_mi > config.CONTRADICTION_MAX_UNCERTAINTY)).sum()
+            )
+            m.update({"min_margin": margin, "max_entropy": max_entropy})
+            sweep.append(m)
+            marker = " *" if (margin, max_entropy) == original else ""
+            print(
+                f"{f'tiered margin<{margin} H>{max_entropy}{marker}':<34} "
+                f"{m['accuracy']:>7.4f} {m['ece']:>7.4f} {m['escalation_rate']:>7.1%} "
+                f"{m['compute_saved']:>7.1%}  missed contradictions: {m['missed_contradictions']}"
+            )
+    finally:
+        config.MCD_TIERED_MIN_MARGIN, config.MCD_TIERED_MAX_ENTROPY = original
+
+    n = len(symptoms_list)
+    print(
+        f"\nMeasured latency: deterministic {det_time / n * 1000:.1f} ms, "
+        f"MC {mc_time / n * 1000:.1f} ms per request (* = configured thresholds)"
+    )
+    return {
+        "model": model_name,
+        "n_samples": n,
+        "always_mc": always_mc,
+        "deterministic_only": never_mc,
+        "tiered_sweep": sweep,
+        "latency_ms": {"deterministic": det_time / n * 1000, "mc": mc_time / n * 1000},
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Evaluate uncertainty quantification quality"
@@ -406,6 +532,11 @@ def main():
         default="uncertainty_evaluation_results.json",
         help="Output file path for results",
     )
+    parser.add_argument(
+        "--tiered",
+        action="store_true",
+        help="Evaluate tiered inference (deterministic pass first) against always-MC",
+    )
 
     args = parser.parse_args()
 
@@ -422,6 +553,29 @@ def main():
     symptoms_list, true_labels = load_test_dataset(str(dataset_path))
     print(f"Loaded {len(symptoms_list)} test samples")
 
+    if args.tiered:
+        results = []
+        if args.model in ["english", "both"]:
+            results.append(
+                evaluate_tiered(
+                    eng_classifier,
+                    symptoms_list,
+                    true_labels,
+                    "BioClinical ModernBERT (English)",
+                )
+            )
+        if args.model in ["tagalog", "both"]:
+            results.append(
+                evaluate_tiered(
+                    fil_classifier, symptoms_list, true_labels, "RoBERTa Tagalog"
+                )
+            )
+        output_path = Path(__file__).parent / "tiered_inference_evaluation_results.json"
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {output_path}")
+        return
+
     # Evaluate models
     if args.model in ["english", "both"]:
         evaluate_model(
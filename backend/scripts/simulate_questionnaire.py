@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Simulate the Follow-Up Questionnaire
+
+Runs synthetic patients from the symptom2disease dataset through the EIG
+question policy and stop rules with the vectorized simulator
+(app/services/questionnaire_simulator.py) and reports accuracy,
+questions-to-diagnosis and per-step latency. With --sweep, every
+combination of the given settings is simulated on the same patients and
+answers, one result row per combination.
+
+Usage:
+    python scripts/simulate_questionnaire.py [--lang en|tl] [--per-disease 500]
+        [--sensitivity 0.85] [--false-positive 0.15] [--prior-strength 0]
+        [--seed 0] [--sweep MIN_EIG_THRESHOLD=0.01,0.02 --sweep NOVELTY_PENALTY_WEIGHT=0.08,0.12]
+        [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("APP_SKIP_AUTOCREATE", "1")
+
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.ml_service import CORRECT_ID2LABEL
+from app.services.question_bank import build_question_banks
+from app.services.questionnaire_simulator import (
+    PARAM_NAMES,
+    build_cohort,
+    default_params,
+    load_dataset,
+    simulate_questionnaire,
+    sweep,
+)
+
+
+def parse_sweep(specs):
+    """["NAME=v1,v2", ...] -> {NAME: [v1, v2]}, typed like the config value."""
+    defaults = default_params()
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in PARAM_NAMES or not values:
+            raise ValueError(f"bad --sweep {spec!r} (settings: {', '.join(PARAM_NAMES)})")
+        cast = type(defaults[name])
+        grid[name] = [cast(v) for v in values.split(",")]
+    return grid
+
+
+def print_row(params, summary):
+    settings = " ".join(f"{k}={v}" for k, v in params.items()) or "(config)"
+    print(
+        f"{settings:<60} acc={summary['accuracy']:.3f} "
+        f"valid={summary['valid_rate']:.3f} valid_acc={summary['valid_accuracy']:.3f} "
+        f"q_mean={summary['mean_questions']:.2f} q_p90={summary['p90_questions']:.0f} "
+        f"step={summary['per_patient_step_us']:.0f}us/patient"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the follow-up questionnaire")
+    parser.add_argument("--lang", choices=["en", "tl"], default="en")
+    parser.add_argument("--per-disease", type=int, default=None, help="Patients per disease")
+    parser.add_argument("--sensitivity", type=float, default=0.85)
+    parser.add_argument("--false-positive", type=float, default=0.15)
+    parser.add_argument(
+        "--prior-strength",
+        type=float,
+        default=0.0,
+        help="0 = uniform prior; > 0 = synthetic classifier prior toward the true disease",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--sweep", action="append", default=[], help="NAME=v1,v2,... (repeatable)"
+    )
+    parser.add_argument("--output", help="Write the result rows as JSON")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_sweep(args.sweep)
+    except ValueError as e:
+        parser.error(str(e))
+
+    banks = build_question_banks(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+    texts, labels = load_dataset(args.lang, args.per_disease)
+    start = time.perf_counter()
+    cohort = build_cohort(
+        banks.for_lang(args.lang),
+        texts,
+        labels,
+        CORRECT_ID2LABEL,
+        EVIDENCE_KEYWORDS,
+        sensitivity=args.sensitivity,
+        false_positive=args.false_positive,
+        prior_strength=args.prior_strength,
+        seed=args.seed,
+    )
+    print(f"Built {len(cohort)} {args.lang} patients in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    if grid:
+        rows = sweep(cohort, grid)
+    else:
+        summary = simulate_questionnaire(cohort)["summary"]
+        rows = [{"params": {}, **summary}]
+    for row in rows:
+        print_row(row["params"], row)
+    print(f"Simulated {len(rows)} configuration(s) in {time.perf_counter() - start:.1f}s")
+    if not grid:
+        print(f"Stop reasons: {rows[0]['stop_reasons']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+-- Backend session store columns on diagnosis_sessions (the same changes as
+-- backend/migrations/add_session_version.sql and add_compact_session_state.sql).
+-- IF NOT EXISTS keeps this a no-op where those scripts already ran.
+
+-- AlterTable: write-back version (optimistic concurrency between workers)
+ALTER TABLE "diagnosis_sessions"
+ADD COLUMN IF NOT EXISTS "version" INTEGER NOT NULL DEFAULT 0;
+
+-- AlterTable: compact binary state (NULL means the JSON column is current)
+ALTER TABLE "diagnosis_sessions"
+ADD COLUMN IF NOT EXISTS "base_probs_bin" BYTEA,
+ADD COLUMN IF NOT EXISTS "current_probs_bin" BYTEA,
+ADD COLUMN IF NOT EXISTS "asked_questions_bin" BYTEA,
+ADD COLUMN IF NOT EXISTS "question_answers_bin" BYTEA;
@@ -0,0 +1,209 @@
+"""
+Tests for inference admission control (per-model slots, priority queue,
+429 + Retry-After).
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import app as app_package
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+def _wait_for_queue(controller, model, n):
+    deadline = time.monotonic() + 5
+    while len(controller._gates[model].waiters) != n:
+        assert time.monotonic() < deadline, "waiters never queued"
+        time.sleep(0.001)
+
+
+def _hold_slot(controller, model):
+    """Occupy one slot of `model` until the returned event is set."""
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with controller.admit(model, "diagnose"):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    assert held.wait(5)
+    return release, thread
+
+
+def _queue(controller, model, priority_class, log, label):
+    def run():
+        try:
+            with controller.admit(model, priority_class):
+                log.append(label)
+        except AdmissionRejected as e:
+            log.append(f"{label}:{e.reason}")
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_diagnoses_are_admitted_before_explanations():
+    controller = AdmissionController({"eng": 1}, max_queue=4)
+    release, holder = _hold_slot(controller, "eng")
+    log = []
+    threads = [_queue(controller, "eng", "explain", log, "explain-1")]
+    _wait_for_queue(controller, "eng", 1)
+    threads.append(_queue(controller, "eng", "diagnose", log, "diagnose-1"))
+    _wait_for_queue(controller, "eng", 2)
+    threads.append(_queue(controller, "eng", "explain", log, "explain-2"))
+    _wait_for_queue(controller, "eng", 3)
+
+    release.set()
+    for thread in [holder, *threads]:
+        thread.join(5)
+    assert log == ["diagnose-1", "explain-1", "explain-2"]
+
+    stats = controller.get_stats()["models"]["eng"]
+    assert stats["admitted"] == {"diagnose": 2, "explain": 2}
+    assert stats["in_use"] == 0 and stats["queued"] == 0
+    assert stats["queue_ms"]["explain"]["max"] > 0
+
+
+def test_full_queue_rejects_and_explanations_yield():
+    controller = AdmissionController({"fil": 1}, max_queue=1, default_retry_after=3)
+    release, holder = _hold_slot(controller, "fil")
+    log = []
+    explain = _queue(controller, "fil", "explain", log, "explain")
+    _wait_for_queue(controller, "fil", 1)
+
+    # A new diagnosis takes the queued explanation's place
+    diagnose = _queue(controller, "fil", "diagnose", log, "diagnose")
+    explain.join(5)
+    assert log == ["explain:preempted"]
+
+    # ...but nothing displaces a queued diagnosis
+    with pytest.raises(AdmissionRejected) as rejected:
+        with controller.admit("fil", "diagnose"):
+            pass
+    assert rejected.value.reason == "queue_full" and rejected.value.retry_after == 3
+
+    release.set()
+    holder.join(5)
+    diagnose.join(5)
+    assert log == ["explain:preempted", "diagnose"]
+    assert controller.get_stats()["models"]["fil"]["rejected"] == {
+        "preempted": 1,
+        "queue_full": 1,
+    }
+
+
+def test_wait_timeout_and_reentrant_admission():
+    controller = AdmissionController(
+        {"eng": 1}, max_queue=2, max_wait_seconds=0.05, default_retry_after=4
+    )
+    errors = []
+
+    def other():
+        try:
+            with controller.admit("eng", "diagnose"):
+                pass
+        except AdmissionRejected as e:
+            errors.append(e)
+
+    with controller.admit("eng", "diagnose"):
+        # The ML entry points admit again inside the route's slot
+        with controller.admit("eng", "explain"):
+            pass
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join(5)
+
+    assert errors[0].reason == "timeout" and errors[0].retry_after == 4
+    stats = controller.get_stats()["models"]["eng"]
+    assert stats["admitted"] == {"diagnose": 1, "explain": 0}
+    assert stats["rejected"] == {"timeout": 1} and stats["in_use"] == 0
+    # Retry-After now follows the observed service time
+    assert stats["service_ms"] >= 50
+    assert 1 <= controller._retry_after(controller._gates["eng"]) <= 60
+
+
+@pytest.mark.skipif(app_package.app is None, reason="APP_SKIP_AUTOCREATE set")
+def test_overloaded_explain_answers_429(monkeypatch):
+    controller = AdmissionController({"eng": 1, "fil": 1}, max_queue=0, default_retry_after=9)
+    monkeypatch.setattr("app.api.diagnosis.admission_controller", controller)
+    client = app_package.app.test_client()
+    payload = {"symptoms": "fever and headache", "mean_probs": [0.2] * 6}
+
+    release, holder = _hold_slot(controller, "eng")
+    with patch("app.api.diagnosis.explainer") as explainer:
+        resp = client.post("/diagnosis/explain", json=payload)
+        assert resp.status_code == 429 and resp.headers["Retry-After"] == "9"
+        assert resp.get_json()["error"] == "TOO_MANY_REQUESTS"
+        explainer.assert_not_called()
+
+        release.set()
+        holder.join(5)
+        explainer.return_value = {"symptoms": payload["symptoms"], "tokens": []}
+        assert client.post("/diagnosis/explain", json=payload).status_code == 200
+
+    stats = client.get("/diagnosis/stats").get_json()
+    assert set(stats["admission"]["models"]) >= {"eng", "fil"}
+
+
+def test_explanations_are_capped_within_the_slots():
+    controller = AdmissionController({"eng": 3}, max_queue=4, class_slots={"explain": 1})
+    log = []
+    with controller.admit("eng", "explain"):
+        # A second explanation waits although slots are free...
+        waiting = _queue(controller, "eng", "explain", log, "explain-2")
+        _wait_for_queue(controller, "eng", 1)
+        # ...while diagnoses are admitted right away
+        _queue(controller, "eng", "diagnose", log, "diagnose").join(5)
+        assert log == ["diagnose"]
+        assert controller.get_stats()["models"]["eng"]["held"] == {"diagnose": 0, "explain": 1}
+    waiting.join(5)
+    assert log == ["diagnose", "explain-2"]
+
+
+@pytest.mark.skipif(app_package.app is None, reason="APP_SKIP_AUTOCREATE set")
+def test_concurrent_diagnoses_share_mc_batches(monkeypatch):
+    # Admission must let a full MC batch form (MCD_BATCH_MAX_SIZE requests)
+    import app.config as config
+    from app.services import ml_service
+    from app.services.admission import admission_controller
+
+    scheduler = ml_service.eng_scheduler
+    monkeypatch.setattr(scheduler, "window", 0.5)  # generous for slow CI threads
+    monkeypatch.setattr(scheduler, "cache", None)
+    monkeypatch.setattr(scheduler, "stats", {"requests": 0, "batches": 0, "max_batch_seen": 0})
+    monkeypatch.setattr("app.api.diagnosis.create_session", lambda **kwargs: "session-1")
+    monkeypatch.setattr("app.api.diagnosis.update_session", lambda *args, **kwargs: None)
+    eng_slots = admission_controller.get_stats()["models"]["eng"]["slots"]
+    assert eng_slots >= config.MCD_BATCH_MAX_SIZE
+    # Load the model first: a cold load inside the first slot outlasts
+    # ADMISSION_MAX_WAIT_SECONDS for the requests queued behind it
+    with ml_service.model_registry.use("eng"):
+        pass
+
+    texts = [
+        "I have a high fever, severe joint pain and a rash",
+        "Fever and chills with a bad headache since yesterday",
+        "Cough, sore throat and body aches for two days",
+        "Watery diarrhea and stomach cramps since this morning",
+    ]
+    statuses = []
+
+    def diagnose(text):
+        resp = app_package.app.test_client().post("/diagnosis/new", json={"symptoms": text})
+        statuses.append(resp.status_code)
+
+    threads = [threading.Thread(target=diagnose, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert 429 not in statuses and len(statuses) == len(texts)
+    assert scheduler.stats["requests"] == len(texts)
+    assert scheduler.stats["max_batch_seen"] > 2
@@ -0,0 +1,190 @@
+"""
+Tests for the ASGI serving mode and the bounded compute pool.
+
+Requests are sent both through Flask's test client and through the ASGI
+wrapper (driven directly, no server); status, headers and body must match.
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import app as app_package
+import app.services.compute_pool as compute_pool_module
+from app.asgi import create_asgi_app
+from app.services.compute_pool import ComputePool, ComputePoolFull
+
+flask_app = app_package.app
+pytestmark = pytest.mark.skipif(flask_app is None, reason="APP_SKIP_AUTOCREATE set")
+
+ORIGIN = "http://localhost:3000"
+
+
+def _asgi_request(asgi_app, method, path, query=b"", body=b"", headers=()):
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+    # The body arrives in two chunks
+    half = len(body) // 2
+    incoming = [
+        {"type": "http.request", "body": body[:half], "more_body": True},
+        {"type": "http.request", "body": body[half:], "more_body": False},
+    ]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start, body_message = sent
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], headers, body_message["body"]
+
+
+def _both(method, path, query="", payload=None, raw=None, content_type=None):
+    headers = [("Origin", ORIGIN)]
+    body = b""
+    if payload is not None:
+        body = json.dumps(payload).encode()
+        content_type = content_type or "application/json"
+    elif raw is not None:
+        body = raw
+    if content_type:
+        headers.append(("Content-Type", content_type))
+
+    flask_resp = flask_app.test_client().open(
+        path, method=method, query_string=query, data=body, headers=headers
+    )
+    flask_result = (
+        flask_resp.status_code,
+        {k.lower(): v for k, v in flask_resp.headers.items()},
+        flask_resp.get_data(),
+    )
+    asgi_result = _asgi_request(
+        create_asgi_app(flask_app), method, path, query.encode(), body, headers
+    )
+    return flask_result, asgi_result
+
+
+def _fake_explainer(text, mean_probs):
+    return {"symptoms": text, "tokens": [{"token": "fever", "attribution": 0.4}]}
+
+
+@pytest.mark.parametrize(
+    "method, path, query, payload, raw, content_type",
+    [
+        ("GET", "/diagnosis/", "", None, None, None),
+        ("GET", "/does-not-exist", "", None, None, None),
+        ("GET", "/diagnosis/new", "", None, None, None),
+        ("POST", "/diagnosis/new", "", {"symptoms": ""}, None, None),
+        ("POST", "/diagnosis/explain", "", {"symptoms": "fever"}, None, None),
+        ("POST", "/diagnosis/explain", "", None, b"not json", "text/plain"),
+        (
+            "POST",
+            "/diagnosis/explain",
+            "",
+            {"symptoms": "lagnat at ubo", "mean_probs": [[0.2] * 6]},
+            None,
+            None,
+        ),
+        ("GET", "/api/surveillance/outbreaks", "contamination=0.9", None, None, None),
+    ],
+)
+def test_endpoints_match_under_asgi(method, path, query, payload, raw, content_type):
+    with patch("app.api.diagnosis.explainer", side_effect=_fake_explainer):
+        flask_result, asgi_result = _both(method, path, query, payload, raw, content_type)
+    assert asgi_result == flask_result
+
+
+def test_offloaded_clustering_matches_inline(monkeypatch):
+    data = np.random.default_rng(0).normal(size=(24, 3))
+    monkeypatch.setattr("app.api.cluster.fetch_patient_data", lambda **kwargs: (data, []))
+    before = compute_pool_module.compute_pool.get_stats()["completed"]
+
+    flask_result, asgi_result = _both("GET", "/api/patient-clusters/silhouette", "range=2-4")
+    assert flask_result[0] == 200 and asgi_result == flask_result
+    assert compute_pool_module.compute_pool.get_stats()["completed"] == before + 2
+
+    monkeypatch.setattr(compute_pool_module.config, "COMPUTE_POOL_ENABLED", False)
+    inline = flask_app.test_client().get("/api/patient-clusters/silhouette?range=2-4")
+    assert inline.get_data() == flask_result[2]
+
+
+def test_saturated_pool_answers_503_with_retry_after(monkeypatch):
+    pool = ComputePool(max_workers=1, max_queue=0, retry_after=7)
+    monkeypatch.setattr(compute_pool_module, "compute_pool", pool)
+    # Both requests are explanations; let them reach the pool (see test_admission.py)
+    monkeypatch.setattr(compute_pool_module.config, "ADMISSION_ENABLED", False)
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_explainer(text, mean_probs):
+        entered.set()
+        release.wait(10)
+        return _fake_explainer(text, mean_probs)
+
+    payload = {"symptoms": "fever", "mean_probs": [0.2] * 6}
+    results = {}
+    with patch("app.api.diagnosis.explainer", side_effect=slow_explainer):
+        first = threading.Thread(
+            target=lambda: results.setdefault(
+                "first", flask_app.test_client().post("/diagnosis/explain", json=payload)
+            )
+        )
+        first.start()
+        assert entered.wait(10)
+        status, headers, body = _asgi_request(
+            create_asgi_app(flask_app),
+            "POST",
+            "/diagnosis/explain",
+            body=json.dumps(payload).encode(),
+            headers=[("Content-Type", "application/json")],
+        )
+        release.set()
+        first.join(10)
+
+    assert status == 503 and headers["retry-after"] == "7"
+    assert json.loads(body)["error"] == "SERVER_BUSY"
+    assert results["first"].status_code == 200
+    stats = pool.get_stats()
+    assert stats["rejected"] == 1 and stats["completed"] == 1 and stats["max_in_flight"] == 1
+
+
+def test_offloaded_calls_behave_like_inline_calls():
+    pool = ComputePool(max_workers=2, max_queue=1)
+    var = contextvars.ContextVar("var", default=None)
+
+    def work(x):
+        var.set(x * 2)
+        # Nested offloads run inline on the worker instead of deadlocking
+        return pool.run(lambda: threading.current_thread().name)
+
+    assert pool.run(work, 21).startswith("compute")
+    assert var.get() == 42  # context writes are visible to the caller
+
+    with pytest.raises(ZeroDivisionError):
+        pool.run(lambda: 1 / 0)
+    assert asyncio.run(pool.run_async(work, 5)).startswith("compute")
+    stats = pool.get_stats()
+    assert (stats["completed"], stats["failed"], stats["running"]) == (2, 1, 0)
+
+    with patch.object(pool._slots, "acquire", return_value=False):
+        with pytest.raises(ComputePoolFull):
+            pool.run(work, 1)
+    pool.shutdown()
@@ -0,0 +1,103 @@
+"""
+Tests that the vectorized EIG engine reproduces the per-question scalar scores.
+"""
+
+import numpy as np
+import pytest
+
+from app import QUESTION_BANK_EN
+from app.config import NOVELTY_PENALTY_WEIGHT, TOP_K_DISEASES
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.question_groups import get_novelty_penalty
+from app.services.information_gain import (
+    compute_burden_penalty,
+    compute_differential_eig,
+    compute_eig,
+    compute_mode_adjusted_score,
+    determine_diagnosis_mode,
+    score_questions,
+    select_best_question_across_diseases,
+)
+from app.services.ml_service import CORRECT_ID2LABEL
+from app.services.question_bank import build_question_banks
+
+LABEL2IDX = {name: idx for idx, name in CORRECT_ID2LABEL.items()}
+QUESTIONS = [
+    {**q, "_disease": disease}
+    for disease, questions in QUESTION_BANK_EN.items()
+    for q in questions
+]
+COMPILED_EN = build_question_banks(QUESTION_BANK_EN, QUESTION_BANK_EN, EVIDENCE_KEYWORDS).en
+
+PROBS = [
+    [0.9, 0.02, 0.02, 0.02, 0.02, 0.02],  # confirmation
+    [0.3, 0.25, 0.15, 0.1, 0.1, 0.1],  # exploration
+    [0.55, 0.35, 0.04, 0.03, 0.02, 0.01],  # rule-out
+    [1e-14, 0.5, 0.5, 0.0, 0.0, 0.0],  # degenerate entries
+]
+ASKED = [[], ["dengue_q1", "influenza_q2", "pneumonia_q3"]]
+
+
+def _scalar_scores(probs, asked):
+    """The original one-question-at-a-time scoring loop."""
+    probs = np.array(probs, dtype=np.float64)
+    probs = probs / probs.sum()
+    sorted_indices = list(np.argsort(probs)[::-1])
+    top_k = sorted_indices[: min(TOP_K_DISEASES, len(sorted_indices))]
+    top_disease = CORRECT_ID2LABEL[int(sorted_indices[0])]
+    mode = determine_diagnosis_mode(probs)
+    scores = []
+    for q in QUESTIONS:
+        target = LABEL2IDX[q["_disease"]]
+        weight, neg = q.get("weight", 0.85), q.get("is_negative", False)
+        eig = compute_eig(probs, weight, target, is_negative=neg)
+        diff = compute_differential_eig(probs, weight, target, top_k, is_negative=neg)
+        base = compute_mode_adjusted_score(
+            eig, diff, q["_disease"] == top_disease, target in top_k, mode
+        )
+        adjusted = base - compute_burden_penalty(q.get("burden", 3))
+        adjusted -= get_novelty_penalty(q["id"], asked, NOVELTY_PENALTY_WEIGHT)
+        scores.append((eig, diff, adjusted))
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("probs", PROBS)
+@pytest.mark.parametrize("asked", ASKED)
+def test_batch_scores_are_identical_to_scalar_scores(probs, asked):
+    scores = score_questions(
+        probs,
+        [LABEL2IDX[q["_disease"]] for q in QUESTIONS],
+        [q.get("weight", 0.85) for q in QUESTIONS],
+        [q.get("burden", 3) for q in QUESTIONS],
+        [q.get("is_negative", False) for q in QUESTIONS],
+        [q["id"] for q in QUESTIONS],
+        CORRECT_ID2LABEL,
+        asked,
+    )
+    expected = _scalar_scores(probs, asked)
+    np.testing.assert_array_equal(scores["eig"], expected[:, 0])
+    np.testing.assert_array_equal(scores["diff_eig"], expected[:, 1])
+    np.testing.assert_array_equal(scores["adjusted_score"], expected[:, 2])
+
+
+@pytest.mark.parametrize("probs", PROBS)
+def test_raw_and_compiled_banks_select_the_same_question(probs):
+    kwargs = dict(
+        current_probs=probs,
+        asked_question_ids={"dengue_q1"},
+        skip_question_ids={"measles_q2"},
+        disease_labels=CORRECT_ID2LABEL,
+        symptoms_text="fever",
+        answered_questions={"dengue_q1": "yes"},
+    )
+    raw, raw_stop, raw_eig = select_best_question_across_diseases(
+        question_bank=QUESTION_BANK_EN, **kwargs
+    )
+    compiled, stop, eig = select_best_question_across_diseases(
+        question_bank=COMPILED_EN, **kwargs
+    )
+    assert raw == compiled and (raw_stop, raw_eig) == (stop, eig)
+
+    expected = _scalar_scores(probs, ["dengue_q1"])[:, 2]
+    position = [q["id"] for q in QUESTIONS].index(raw["id"])
+    assert raw["_adjusted_score"] == expected[position]
@@ -0,0 +1,167 @@
+"""
+Parity tests for the batched Bayesian evidence kernel.
+
+The reference functions are the per-update implementations the kernel
+replaced; the request-path functions must reproduce them bit for bit.
+"""
+
+import numpy as np
+
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.ml_service import CORRECT_ID2LABEL
+from app.services.question_bank import build_question_banks
+from app.utils.scoring import (
+    apply_text_evidence_boosts,
+    batch_replay_answers,
+    bayesian_evidence_update,
+    normalize_prior,
+    replay_answers,
+    sequential_evidence_update,
+)
+
+BANKS = build_question_banks(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+NUM_CLASSES = len(CORRECT_ID2LABEL)
+
+
+def _reference_likelihood(num_classes, answer, weight, target, is_negative):
+    likelihood = np.ones(num_classes, dtype=np.float64)
+    effective_answer = answer
+    if is_negative:
+        effective_answer = "no" if answer == "yes" else "yes"
+    if effective_answer == "yes":
+        likelihood[target] = 1.0 + weight
+        for i in range(num_classes):
+            if i != target:
+                likelihood[i] = max(1.0 - (weight * 0.35), 0.1)
+    elif effective_answer == "no":
+        likelihood[target] = max(1.0 - (weight * 0.35), 0.05)
+        for i in range(num_classes):
+            if i != target:
+                likelihood[i] = 1.0 + (weight * 0.1)
+    return likelihood
+
+
+def _reference_update(probs, answer, weight, target, is_negative=False):
+    probs = np.clip(np.array(probs, dtype=np.float64).flatten(), 1e-10, 1.0)
+    probs = probs / probs.sum()
+    posterior = _reference_likelihood(len(probs), answer, weight, target, is_negative) * probs
+    return posterior / posterior.sum()
+
+
+def _reference_text_boosts(probs, text, question_bank):
+    """The per-question update loop of apply_text_evidence_boosts."""
+    probs = np.clip(np.array(probs, dtype=np.float64).flatten(), 1e-10, 1.0)
+    probs = probs / probs.sum()
+    label2idx = {v: k for k, v in CORRECT_ID2LABEL.items()}
+    text = text.lower()
+    for disease, questions in question_bank.items():
+        disease_idx = label2idx.get(disease)
+        if disease_idx is None:
+            continue
+        for q in questions:
+            keywords = EVIDENCE_KEYWORDS.get(q.get("id", ""), [])
+            if any(kw.lower() in text for kw in keywords):
+                likelihood = _reference_likelihood(
+                    len(probs), "yes", q.get("weight", 0.85), disease_idx,
+                    q.get("is_negative", False),
+                )
+                probs = likelihood * probs
+                probs = probs / probs.sum()
+    return probs
+
+
+def _random_prior(rng):
+    prior = rng.dirichlet(np.ones(NUM_CLASSES) * 0.7)
+    prior[rng.integers(NUM_CLASSES)] = 0.0  # exercise the clip
+    return prior
+
+
+def _random_answers(rng, bank, n):
+    ids = [qid for qid in bank.ids if bank.metadata(qid)]
+    return [
+        (ids[rng.integers(len(ids))], ["yes", "no", "unsure"][rng.integers(3)])
+        for _ in range(n)
+    ] + [("not_a_question", "yes")]
+
+
+def test_single_update_is_bit_identical():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        prior = _random_prior(rng)
+        answer = ["yes", "no", "unsure"][rng.integers(3)]
+        weight = float(rng.uniform(0.5, 1.0))
+        target = int(rng.integers(NUM_CLASSES))
+        negative = bool(rng.integers(2))
+        result = bayesian_evidence_update(
+            prior, answer, weight, target, CORRECT_ID2LABEL, is_negative=negative
+        )
+        expected = _reference_update(prior, answer, weight, target, negative)
+        assert result["probs"] == expected.tolist()
+        assert result["predicted_class"] == int(np.argmax(expected))
+
+
+def test_text_boosts_are_bit_identical():
+    texts = [
+        "mataas na lagnat, chills, masakit ang kasukasuan at may rashes",
+        "high fever, muscle pain, bleeding gums and headache behind the eyes",
+        "cough with phlegm, chest pain, shortness of breath",
+        "watery diarrhea, vomiting, abdominal pain",
+        "no matching evidence here",
+    ]
+    rng = np.random.default_rng(2)
+    for text in texts:
+        for bank in (BANKS.en, BANKS.tl, QUESTION_BANK_EN):
+            prior = _random_prior(rng)
+            result = apply_text_evidence_boosts(
+                prior, text, bank, CORRECT_ID2LABEL, EVIDENCE_KEYWORDS
+            )
+            assert result["probs"] == _reference_text_boosts(prior, text, bank).tolist()
+
+
+def test_replay_matches_chained_updates():
+    rng = np.random.default_rng(3)
+    for bank in (BANKS.en, BANKS.tl):
+        for _ in range(30):
+            prior = _random_prior(rng)
+            answers = _random_answers(rng, bank, int(rng.integers(0, 15)))
+            expected = np.array(prior)
+            for qid, answer in answers:
+                meta = bank.metadata(qid)
+                if meta:
+                    expected = np.array(
+                        bayesian_evidence_update(
+                            expected, answer, meta["weight"], meta["disease_idx"],
+                            CORRECT_ID2LABEL, is_negative=meta["is_negative"],
+                        )["probs"]
+                    )
+            if any(bank.metadata(qid) for qid, _ in answers):
+                assert replay_answers(prior, bank, answers).tolist() == expected.tolist()
+
+
+def test_batch_log_space_matches_sequential():
+    rng = np.random.default_rng(4)
+    bank = BANKS.en
+    priors = np.array([_random_prior(rng) for _ in range(64)])
+    answer_sets = [_random_answers(rng, bank, int(rng.integers(0, 20))) for _ in range(64)]
+
+    def sequential(prior, answers):
+        return sequential_evidence_update(
+            normalize_prior(prior), bank.answer_likelihoods(answers)
+        )
+
+    batched = batch_replay_answers(priors, bank, answer_sets)
+    sequential_posteriors = np.array(
+        [sequential(p, a) for p, a in zip(priors, answer_sets)]
+    )
+    np.testing.assert_allclose(batched, sequential_posteriors, rtol=1e-12, atol=1e-15)
+    assert (batched.argmax(axis=1) == sequential_posteriors.argmax(axis=1)).all()
+
+    # One shared prior scored under many what-if answer sets
+    shared = batch_replay_answers(priors[0], bank, answer_sets[:8])
+    np.testing.assert_allclose(
+        shared,
+        [sequential(priors[0], a) for a in answer_sets[:8]],
+        rtol=1e-12,
+        atol=1e-15,
+    )
@@ -0,0 +1,122 @@
+"""
+Tests for the token attribution engine behind /diagnosis/explain.
+"""
+
+import numpy as np
+import pytest
+
+import app.config as config
+import app.services.ml_service as ml_service
+from app.services.ml_service import EXPLANATION_METHODS, ExplanationCache, eng_classifier
+from app.utils import aggregate_subword_attributions
+
+TEXT = "I have had a high fever, and irritating headache for 3 days"
+MEAN_PROBS = [0.1, 0.5, 0.1, 0.1, 0.1, 0.1]
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(ml_service, "explanation_cache", None)
+
+
+@pytest.mark.parametrize("method", EXPLANATION_METHODS)
+def test_methods_return_normalized_token_attributions(method, no_cache):
+    result = eng_classifier.explain_with_gradient_shap(
+        TEXT, mean_probs=MEAN_PROBS, method=method
+    )
+    attrs = np.array(result["attributions"])
+    assert len(result["tokens"]) == len(attrs) == len(result["offsets"])
+    assert attrs.min() >= 0.0 and attrs.max() == pytest.approx(1.0)
+    assert result["method"] == method
+    assert result["predicted_label"] == eng_classifier.model.config.id2label[1]
+
+
+def test_sub_batching_does_not_change_attributions(monkeypatch, no_cache):
+    monkeypatch.setattr(config, "EXPLAIN_MAX_BATCH_SIZE", 25)
+    full = eng_classifier.explain_with_gradient_shap(TEXT, mean_probs=MEAN_PROBS)
+    monkeypatch.setattr(config, "EXPLAIN_MAX_BATCH_SIZE", 4)
+    batched = eng_classifier.explain_with_gradient_shap(TEXT, mean_probs=MEAN_PROBS)
+    np.testing.assert_allclose(full["attributions"], batched["attributions"], atol=1e-5)
+
+
+def test_explanations_are_cached_per_target_and_method(monkeypatch):
+    cache = ExplanationCache(max_entries=8)
+    monkeypatch.setattr(ml_service, "explanation_cache", cache)
+    calls = []
+    original = eng_classifier._compute_token_attributions
+
+    def counting(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(eng_classifier, "_compute_token_attributions", counting)
+    first = eng_classifier.explain_with_gradient_shap(TEXT, mean_probs=MEAN_PROBS)
+    second = eng_classifier.explain_with_gradient_shap(TEXT, mean_probs=MEAN_PROBS)
+    assert len(calls) == 1
+    assert first["attributions"] == second["attributions"]
+
+    eng_classifier.explain_with_gradient_shap(TEXT, mean_probs=MEAN_PROBS, target_class=2)
+    eng_classifier.explain_with_gradient_shap(
+        TEXT, mean_probs=MEAN_PROBS, method="input_x_gradient"
+    )
+    assert len(calls) == 3
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_offset_aggregation_matches_token_loop():
+    result = eng_classifier.explain_with_gradient_shap(
+        TEXT, mean_probs=MEAN_PROBS, method="input_x_gradient"
+    )
+    loop_words, loop_attrs = aggregate_subword_attributions(
+        result["tokens"], result["attributions"], tokenizer=eng_classifier.tokenizer
+    )
+    words, attrs = aggregate_subword_attributions(
+        result["tokens"], result["attributions"], offsets=result["offsets"], text=TEXT
+    )
+    assert words == TEXT.split() == loop_words
+    np.testing.assert_allclose(attrs, loop_attrs)
+
+
+def test_offset_aggregation_sums_subwords():
+    text = "irritating cough"
+    offsets = [(0, 0), (0, 5), (5, 10), (11, 16), (0, 0)]
+    words, attrs = aggregate_subword_attributions(
+        ["<s>", "irrit", "ating", "Ġcough", "</s>"],
+        [0.9, 0.2, 0.3, 0.5, 0.9],
+        offsets=offsets,
+        text=text,
+    )
+    assert words == ["irritating", "cough"]
+    np.testing.assert_allclose(attrs, [0.5, 0.5])
+
+
+def test_cache_keeps_case_and_spacing_variants_apart(monkeypatch):
+    variants = ["Fever and Headache since Monday", "fever  and headache   since monday"]
+    fresh = {}
+    monkeypatch.setattr(ml_service, "explanation_cache", None)
+    for text in variants:
+        fresh[text] = eng_classifier.explain_with_gradient_shap(
+            text, mean_probs=MEAN_PROBS, method="input_x_gradient"
+        )
+    assert fresh[variants[0]]["tokens"] != fresh[variants[1]]["tokens"]
+
+    cache = ExplanationCache(max_entries=8)
+    monkeypatch.setattr(ml_service, "explanation_cache", cache)
+    for text in variants:
+        result = eng_classifier.explain_with_gradient_shap(
+            text, mean_probs=MEAN_PROBS, method="input_x_gradient"
+        )
+        assert result["tokens"] == fresh[text]["tokens"]
+        assert result["offsets"] == fresh[text]["offsets"]
+        words, attrs = aggregate_subword_attributions(
+            result["tokens"], result["attributions"], offsets=result["offsets"], text=text
+        )
+        fresh_words, fresh_attrs = aggregate_subword_attributions(
+            fresh[text]["tokens"],
+            fresh[text]["attributions"],
+            offsets=fresh[text]["offsets"],
+            text=text,
+        )
+        assert words == fresh_words == text.split()
+        np.testing.assert_allclose(attrs, fresh_attrs, atol=1e-6)
+    assert cache.get_stats()["hits"] == 0
@@ -0,0 +1,98 @@
+"""
+Parity tests for the indexed fuzzy concept matcher.
+"""
+
+import random
+import string
+
+from rapidfuzz import fuzz
+
+import app.config as config
+from app.services.fuzzy_matcher import CRITICAL_CONFLICTS, get_fuzzy_matcher
+from app.services.verification import _fuzzy_match_term, extract_clinical_concepts
+
+TEXTS = [
+    "kahapon umubo ng dugo ako.",
+    "namamanid na yung kamay ko.",
+    "may puting pantal sa braso ko at wala akong lagnat",
+    "naninilaw ang mata ko, nag-baba ako sa baha kahapon",
+    "i keep getting chils and sweats at night, and my skin is yelow",
+    "walang ganang kumain, mataas na lagnat, masakit ang tiyan",
+    "hindi ako makahinga, pulang pantal, mabilis ang tibok ng puso",
+    "",
+]
+
+
+def _reference_fuzzy_match(term, text):
+    """_fuzzy_match_term as it was before the indexed matcher."""
+    if len(term) < config.FUZZY_MIN_TERM_LENGTH:
+        return False
+    length = len(term)
+    if length <= 5:
+        threshold = config.FUZZY_THRESHOLD_SHORT
+    elif length <= 9:
+        threshold = config.FUZZY_THRESHOLD_MEDIUM
+    else:
+        threshold = config.FUZZY_THRESHOLD_LONG
+    n = len(term.split())
+    words = text.split()
+    for i in range(len(words) - n + 1):
+        window = " ".join(words[i : i + n])
+        window = window.translate(str.maketrans("", "", string.punctuation))
+        score = fuzz.ratio(term, window)
+        if score >= threshold:
+            for t_word, w_word in CRITICAL_CONFLICTS:
+                if t_word in set(term.split()) and w_word in set(window.split()):
+                    score -= 20
+            if score >= threshold:
+                return True
+    return False
+
+
+def _mutated_texts(n, seed=0):
+    """Dictionary terms with one-letter typos and opposite-meaning swaps."""
+    rng = random.Random(seed)
+    terms = list(config.CLINICAL_CONCEPTS) + list(config.UNRELATED_CATEGORY_CONCEPTS)
+    texts = []
+    for _ in range(n):
+        term = rng.choice(terms)
+        if len(term) > 3:
+            i = rng.randrange(len(term))
+            term = term[:i] + term[i + 1 :]
+        for t_word, w_word in CRITICAL_CONFLICTS:
+            if rng.random() < 0.1:
+                term = term.replace(t_word, w_word)
+        texts.append(f"{rng.choice(['ako ay', 'i have', ''])} {term}, {rng.choice(terms)}.")
+    return texts
+
+
+def test_matcher_matches_reference_for_every_term():
+    for dictionary in (config.CLINICAL_CONCEPTS, config.UNRELATED_CATEGORY_CONCEPTS):
+        matcher = get_fuzzy_matcher(dictionary)
+        for text in TEXTS + _mutated_texts(60):
+            expected = {t for t in dictionary if _reference_fuzzy_match(t, text)}
+            assert matcher.match(text) == expected, text
+            assert {t for t in dictionary if _fuzzy_match_term(t, text)} == expected
+
+
+def test_conflict_penalty_blocks_opposite_meaning():
+    term = "may matinding pananakit ng kasukasuan"
+    opposite = "wala matinding pananakit ng kasukasuan"
+    # Above the long-term threshold before the "may"/"wala" penalty
+    assert fuzz.ratio(term, opposite) >= config.FUZZY_THRESHOLD_LONG
+    matcher = get_fuzzy_matcher({term: "X"})
+    assert matcher.match(f"{opposite} po") == set()
+    assert matcher.match("may matinding pananakit ng kasukasuan.") == {term}
+    assert not _fuzzy_match_term(term, opposite)
+
+
+def test_candidates_restrict_scoring():
+    matcher = get_fuzzy_matcher(config.CLINICAL_CONCEPTS)
+    text = "kahapon umubo ng dugo ako."
+    assert matcher.match(text, candidates=[]) == set()
+    assert matcher.match(text) >= matcher.match(text, candidates=list(matcher.match(text)))
+
+
+def test_extract_clinical_concepts_unchanged_for_fuzzy_cases():
+    assert "SX_HEMOPTYSIS" in extract_clinical_concepts("Kahapon umubo ng dugo ako.")
+    assert "SX_NEUROPATHY" in extract_clinical_concepts("Namamanid na yung kamay ko.")
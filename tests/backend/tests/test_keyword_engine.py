@@ -0,0 +1,105 @@
+"""
+Parity tests for the shared Aho–Corasick keyword engine.
+
+Every dictionary lookup must return exactly what the per-pattern scans it
+replaced returned: substring checks for the keyword dictionaries and
+`\\b`-anchored regexes for the concept ontologies. The corpus is the symptom
+text used by the fuzzy-matching, verification and symptom-gate suites, plus
+randomly assembled keyword soups that stress overlaps and word boundaries.
+"""
+
+import ast
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+import app.config as config
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.question_groups import SYMPTOM_KEYWORDS
+from app.services.keyword_engine import (
+    AhoCorasick,
+    match_clinical_terms,
+    match_evidence_qids,
+    match_medical_keywords,
+    match_symptom_groups,
+    match_unrelated_terms,
+)
+
+TESTS_DIR = Path(__file__).parent
+SUITES = ["test_fuzzy_matching.py", "test_verification.py", "test_symptom_gate.py"]
+
+
+def _suite_texts():
+    texts = []
+    for name in SUITES:
+        tree = ast.parse((TESTS_DIR / name).read_text(encoding="utf-8"))
+        texts += [
+            node.value
+            for node in ast.walk(tree)
+            if isinstance(node, ast.Constant) and isinstance(node.value, str)
+        ]
+    return texts
+
+
+def _keyword_soup(n, seed=0):
+    rng = random.Random(seed)
+    vocab = (
+        list(config.MEDICAL_KEYWORDS_EN)
+        + list(config.CLINICAL_CONCEPTS)
+        + list(config.UNRELATED_CATEGORY_CONCEPTS)
+        + [kw for kws in SYMPTOM_KEYWORDS.values() for kw in kws]
+    )
+    glue = [" ", "", ", ", "-", "_", ". ", "x", "ng ", "'"]
+    return [
+        "".join(rng.choice(vocab) + rng.choice(glue) for _ in range(rng.randint(1, 6)))
+        for _ in range(n)
+    ]
+
+
+CORPUS = [t.lower() for t in _suite_texts()] + _keyword_soup(200)
+
+
+def _bounded(terms, text):
+    return {t for t in terms if re.search(rf"\b{re.escape(t)}\b", text)}
+
+
+@pytest.mark.parametrize("lang", ["en", "tl"])
+def test_medical_keywords_match_substring_scan(lang):
+    keywords = config.MEDICAL_KEYWORDS_TL if lang == "tl" else config.MEDICAL_KEYWORDS_EN
+    for text in CORPUS:
+        assert match_medical_keywords(text, lang) == {k for k in keywords if k in text}
+
+
+def test_evidence_and_symptom_groups_match_substring_scan():
+    for text in CORPUS:
+        assert match_evidence_qids(text, EVIDENCE_KEYWORDS) == {
+            qid
+            for qid, kws in EVIDENCE_KEYWORDS.items()
+            if any(kw.lower() in text for kw in kws)
+        }
+        assert match_symptom_groups(text) == {
+            group for group, kws in SYMPTOM_KEYWORDS.items() if any(kw in text for kw in kws)
+        }
+
+
+def test_concept_terms_match_word_boundary_regex():
+    for text in CORPUS:
+        assert match_clinical_terms(text) == _bounded(config.CLINICAL_CONCEPTS, text)
+        assert match_unrelated_terms(text) == _bounded(
+            config.UNRELATED_CATEGORY_CONCEPTS, text
+        )
+
+
+def test_other_dictionaries_are_compiled_on_demand():
+    custom = {"q1": ["Chills"], "q2": ["ill"]}
+    assert match_evidence_qids("i have chills", custom) == {"q1", "q2"}
+
+
+def test_automaton_reports_overlapping_matches():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    matches = sorted(
+        (start, automaton.patterns[pid]) for start, pid in automaton.iter_matches("ushers")
+    )
+    assert matches == [(1, "she"), (2, "he"), (2, "hers")]
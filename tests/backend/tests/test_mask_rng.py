@@ -0,0 +1,78 @@
+"""
+Tests for the counter-based (Philox) deterministic dropout mask generator.
+"""
+
+import numpy as np
+import pytest
+
+import app.config as config
+from app.services.ml_service import eng_classifier
+from app.services.philox import PhiloxMaskRNG, philox_keep_mask
+
+SEED = 20260322
+
+
+def test_masks_are_pinned_bit_exact():
+    """Guards the mask bit stream against accidental changes."""
+    mask = philox_keep_mask(SEED, 3, 0, 0, 2, (3, 8), 0.8)
+    assert np.packbits(mask).tobytes().hex() == "fb3f53ffb6f3"
+
+
+def test_iterations_are_independent_of_chunking():
+    full = philox_keep_mask(SEED, 1, 0, 0, 10, (7, 5), 0.8)
+    chunks = [philox_keep_mask(SEED, 1, 0, start, 5, (7, 5), 0.8) for start in (0, 5)]
+    np.testing.assert_array_equal(full, np.concatenate(chunks))
+
+
+def test_layers_and_calls_get_distinct_masks():
+    base = philox_keep_mask(SEED, 0, 0, 0, 4, (16, 32), 0.5)
+    assert not np.array_equal(base, philox_keep_mask(SEED, 1, 0, 0, 4, (16, 32), 0.5))
+    assert not np.array_equal(base, philox_keep_mask(SEED, 0, 1, 0, 4, (16, 32), 0.5))
+    assert not np.array_equal(base, philox_keep_mask(SEED + 1, 0, 0, 0, 4, (16, 32), 0.5))
+
+
+def test_keep_rate_matches_keep_prob():
+    mask = philox_keep_mask(SEED, 0, 0, 0, 50, (64, 64), 0.8)
+    assert mask.mean() == pytest.approx(0.8, abs=0.005)
+
+
+def test_batched_masks_match_solo_requests():
+    n_iter, hidden, padded = 3, 8, 9
+    batched = PhiloxMaskRNG([11, 22], [5, 9], n_iter, padded)
+    mask = batched.mask((2 * n_iter, padded, hidden), 0.8, layer_index=2).numpy()
+
+    solo_a = PhiloxMaskRNG([11], [5], n_iter, 5).mask((n_iter, 5, hidden), 0.8, 2)
+    solo_b = PhiloxMaskRNG([22], [9], n_iter, 9).mask((n_iter, 9, hidden), 0.8, 2)
+
+    np.testing.assert_array_equal(mask[:n_iter, :5], solo_a.numpy())
+    np.testing.assert_array_equal(mask[n_iter:], solo_b.numpy())
+    assert mask[:n_iter, 5:].all()
+
+
+def test_repeated_layer_calls_advance_the_call_index():
+    rng = PhiloxMaskRNG([SEED], [4], 2, 4)
+    first = rng.mask((2, 4, 8), 0.5, layer_index=0).numpy()
+    second = rng.mask((2, 4, 8), 0.5, layer_index=0).numpy()
+    np.testing.assert_array_equal(first, philox_keep_mask(SEED, 0, 0, 0, 2, (4, 8), 0.5))
+    np.testing.assert_array_equal(second, philox_keep_mask(SEED, 0, 1, 0, 2, (4, 8), 0.5))
+
+
+def test_classifier_predictions_are_reproducible_with_philox(monkeypatch):
+    monkeypatch.setattr(config, "MCD_DETERMINISTIC", True)
+    monkeypatch.setattr(config, "MCD_MASK_GENERATOR", "philox")
+    monkeypatch.setattr(config, "MCD_ADAPTIVE_PROB_TOL", 0.0)
+    monkeypatch.setattr(config, "MCD_ADAPTIVE_MI_TOL", 0.0)
+    # fp32 path: int8 activation ranges would differ between chunk sizes
+    monkeypatch.setattr(eng_classifier, "model", eng_classifier.explanation_model)
+    texts = ["I have had a high fever and headache for 3 days", "watery diarrhea"]
+
+    fixed = eng_classifier.predict_batch_with_uncertainty(texts, adaptive=False)
+    again = eng_classifier.predict_batch_with_uncertainty(texts, adaptive=False)
+    chunked = eng_classifier.predict_batch_with_uncertainty(texts, adaptive=True)
+
+    for a, b, c in zip(fixed, again, chunked):
+        np.testing.assert_array_equal(a["mean_probabilities"], b["mean_probabilities"])
+        # Full-budget adaptive sampling sees exactly the same masks
+        np.testing.assert_allclose(
+            a["mean_probabilities"], c["mean_probabilities"], atol=1e-6
+        )
@@ -0,0 +1,54 @@
+"""
+Tests for adaptive (sequential, early-exit) MC dropout sampling.
+"""
+
+import numpy as np
+import pytest
+
+import app.config as config
+from app.services.ml_service import eng_classifier
+
+TEXTS = [
+    "I have had a high fever and headache for 3 days",
+    "watery diarrhea and vomiting since yesterday",
+]
+
+
+@pytest.fixture
+def adaptive_config(monkeypatch):
+    monkeypatch.setattr(config, "MCD_DETERMINISTIC", True)
+    monkeypatch.setattr(config, "MCD_ADAPTIVE_MIN_SAMPLES", 20)
+    monkeypatch.setattr(config, "MCD_ADAPTIVE_CHUNK_SIZE", 10)
+    return monkeypatch
+
+
+def test_loose_tolerance_stops_at_min_budget(adaptive_config):
+    adaptive_config.setattr(config, "MCD_ADAPTIVE_PROB_TOL", 1.0)
+    adaptive_config.setattr(config, "MCD_ADAPTIVE_MI_TOL", 1.0)
+
+    results = eng_classifier.predict_batch_with_uncertainty(TEXTS, adaptive=True)
+    assert [r["n_samples"] for r in results] == [20, 20]
+
+
+def test_zero_tolerance_uses_full_budget(adaptive_config):
+    adaptive_config.setattr(config, "MCD_ADAPTIVE_PROB_TOL", 0.0)
+    adaptive_config.setattr(config, "MCD_ADAPTIVE_MI_TOL", 0.0)
+
+    results = eng_classifier.predict_batch_with_uncertainty(TEXTS, adaptive=True)
+    assert [r["n_samples"] for r in results] == [eng_classifier.n_iterations] * 2
+
+
+def test_adaptive_results_are_reproducible(adaptive_config):
+    first = eng_classifier.predict_batch_with_uncertainty(TEXTS, adaptive=True)
+    second = eng_classifier.predict_batch_with_uncertainty(TEXTS, adaptive=True)
+
+    for a, b in zip(first, second):
+        assert a["n_samples"] == b["n_samples"]
+        assert a["n_samples"] <= eng_classifier.n_iterations
+        np.testing.assert_array_equal(a["mean_probabilities"], b["mean_probabilities"])
+        np.testing.assert_array_equal(a["mutual_information"], b["mutual_information"])
+
+
+def test_fixed_mode_reports_full_sample_count():
+    result = eng_classifier.predict_batch_with_uncertainty(TEXTS[:1], adaptive=False)[0]
+    assert result["n_samples"] == eng_classifier.n_iterations
@@ -0,0 +1,117 @@
+"""
+Tests for cross-request MC dropout micro-batching.
+
+Covers the per-request mask generator used in batched forward passes and the
+scheduler that coalesces concurrent predict_with_uncertainty calls.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.ml_service import (
+    BatchedMaskRNG,
+    MCInferenceScheduler,
+    eng_classifier,
+)
+
+
+def _rng(seed):
+    return np.random.Generator(np.random.PCG64(seed))
+
+
+class TestBatchedMaskRNG:
+    def test_real_token_masks_match_solo_generation(self):
+        """Each request's block equals the mask it would draw when run alone."""
+        n_iter, hidden, keep = 4, 8, 0.8
+        seq_lens = [5, 9]
+        padded = max(seq_lens)
+        batched = BatchedMaskRNG(
+            [_rng(11), _rng(22)], seq_lens, n_iterations=n_iter, padded_len=padded
+        )
+        mask = batched.random_mask((2 * n_iter, padded, hidden), keep)
+
+        solo_a = _rng(11).random((n_iter, 5, hidden), dtype=np.float32) < keep
+        solo_b = _rng(22).random((n_iter, 9, hidden), dtype=np.float32) < keep
+
+        np.testing.assert_array_equal(mask[:n_iter, :5], solo_a)
+        np.testing.assert_array_equal(mask[n_iter:, :9], solo_b)
+        # Padding positions are always kept
+        assert mask[:n_iter, 5:].all()
+
+    def test_non_sequence_shapes_are_untouched(self):
+        """Pooled [rows, hidden] activations use the solo shape directly."""
+        batched = BatchedMaskRNG(
+            [_rng(1), _rng(2)], [3, 6], n_iterations=2, padded_len=6
+        )
+        mask = batched.random_mask((4, 16), 0.5)
+        np.testing.assert_array_equal(
+            mask[2:], _rng(2).random((2, 16), dtype=np.float32) < 0.5
+        )
+
+
+class _RecordingClassifier:
+    def __init__(self):
+        self.batches = []
+
+    def predict_with_uncertainty(self, text):
+        return self.predict_batch_with_uncertainty([text])[0]
+
+    def predict_batch_with_uncertainty(self, texts):
+        self.batches.append(list(texts))
+        return [{"text": t} for t in texts]
+
+
+class TestMCInferenceScheduler:
+    def test_concurrent_requests_share_one_batch(self):
+        clf = _RecordingClassifier()
+        scheduler = MCInferenceScheduler(clf, window_ms=200, max_batch_size=3)
+        results = {}
+
+        def call(i):
+            results[i] = scheduler.submit(f"text {i}")
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert len(clf.batches) == 1
+        assert sorted(clf.batches[0]) == ["text 0", "text 1", "text 2"]
+        # Each caller receives its own result back
+        assert all(results[i] == {"text": f"text {i}"} for i in range(3))
+
+    def test_batch_size_one_runs_inline(self):
+        clf = _RecordingClassifier()
+        scheduler = MCInferenceScheduler(clf, max_batch_size=1)
+        assert scheduler.submit("fever") == {"text": "fever"}
+        assert scheduler._worker is None
+
+    def test_errors_propagate_to_every_caller(self):
+        class _Failing(_RecordingClassifier):
+            def predict_batch_with_uncertainty(self, texts):
+                raise RuntimeError("boom")
+
+        scheduler = MCInferenceScheduler(_Failing(), window_ms=0, max_batch_size=2)
+        with pytest.raises(RuntimeError, match="boom"):
+            scheduler.submit("fever")
+
+
+def test_batched_prediction_keeps_per_request_seeds():
+    texts = [
+        "I have had a high fever and headache for 3 days",
+        "watery diarrhea and vomiting since yesterday",
+    ]
+    solo = [eng_classifier.predict_with_uncertainty(t) for t in texts]
+    batched = eng_classifier.predict_batch_with_uncertainty(texts)
+
+    for s, b in zip(solo, batched):
+        assert s["deterministic_seed"] == b["deterministic_seed"]
+        assert s["mean_probabilities"].shape == b["mean_probabilities"].shape
+        # int8 CPU inference shares activation ranges across the batch, so
+        # allow small numeric drift; masks themselves are seed-identical.
+        np.testing.assert_allclose(
+            s["mean_probabilities"], b["mean_probabilities"], atol=2e-2
+        )
@@ -0,0 +1,47 @@
+"""
+Tests for partial (top-layers-only) MC dropout.
+"""
+
+import numpy as np
+import pytest
+
+from app.services.ml_service import _encoder_layers, eng_classifier, fil_classifier
+
+TEXTS = [
+    "I have had a high fever and headache for 3 days",
+    "watery diarrhea and vomiting",
+]
+
+
+@pytest.fixture(params=[eng_classifier, fil_classifier], ids=["modernbert", "roberta"])
+def clf(request):
+    return request.param
+
+
+def test_partial_equals_full_forward_without_dropout(clf, monkeypatch):
+    """Skipping and replaying the lower layers must not change the network output."""
+    monkeypatch.setattr(clf, "inference_dropout_rate", 0.0)
+    full = clf.predict_batch_with_uncertainty(TEXTS, adaptive=False)
+
+    monkeypatch.setattr(clf, "partial_mc_layers", 1)
+    partial = clf.predict_batch_with_uncertainty(TEXTS, adaptive=False)
+
+    for a, b in zip(full, partial):
+        np.testing.assert_allclose(
+            a["mean_probabilities"], b["mean_probabilities"], atol=1e-6
+        )
+
+
+def test_partial_mc_is_reproducible_and_stochastic(clf, monkeypatch):
+    _, layers = _encoder_layers(clf.model)
+    monkeypatch.setattr(clf, "partial_mc_layers", len(layers) - 1)
+
+    first = clf.predict_batch_with_uncertainty(TEXTS, adaptive=False)
+    second = clf.predict_batch_with_uncertainty(TEXTS, adaptive=False)
+
+    for a, b in zip(first, second):
+        assert a["n_samples"] == clf.n_iterations
+        np.testing.assert_array_equal(a["mean_probabilities"], b["mean_probabilities"])
+        # Top layer and head dropout still produce spread between samples
+        assert a["std_probabilities"].max() > 0
+
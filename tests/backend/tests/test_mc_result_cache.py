@@ -0,0 +1,98 @@
+"""
+Tests for the MC dropout result cache (memory LRU + SQLite disk tier).
+"""
+
+import numpy as np
+
+from app.services.mc_result_cache import MCResultCache, build_cache_key
+from app.services.ml_service import MCInferenceScheduler
+
+
+def _result(value=0.7):
+    return {
+        "predicted_class": np.array([0]),
+        "predicted_label": ["Dengue"],
+        "mean_probabilities": np.array([[value, 1 - value]], dtype=np.float32),
+        "std_probabilities": np.array([[0.01, 0.01]], dtype=np.float32),
+        "confidence": np.array([value], dtype=np.float32),
+        "predictive_entropy": np.array([0.6], dtype=np.float32),
+        "mutual_information": np.array([0.002], dtype=np.float32),
+        "deterministic_seed": 12345,
+    }
+
+
+def test_key_uses_normalized_text_and_signature():
+    sig = ("model", None, 50)
+    assert build_cache_key("Fever and  Headache ", sig) == build_cache_key(
+        "fever and headache", sig
+    )
+    assert build_cache_key("fever", sig) != build_cache_key("fever", ("other", None, 50))
+
+
+def test_memory_lru_evicts_oldest_and_counts_hits():
+    cache = MCResultCache(max_entries=2)
+    cache.set("a", _result())
+    cache.set("b", _result())
+    assert cache.get("a") is not None  # "a" becomes most recent
+    cache.set("c", _result())
+
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["memory_entries"] == 2
+
+
+def test_ttl_expiry():
+    cache = MCResultCache(ttl_seconds=0)
+    cache.set("a", _result())
+    assert cache.get("a") is None
+
+
+def test_cached_arrays_cannot_be_mutated_by_callers():
+    cache = MCResultCache()
+    cache.set("a", _result())
+    cache.get("a")["mean_probabilities"][0, 0] = 99.0
+    assert cache.get("a")["mean_probabilities"][0, 0] == np.float32(0.7)
+
+
+def test_disk_tier_survives_a_new_process_cache(tmp_path):
+    db_path = str(tmp_path / "mc.sqlite3")
+    MCResultCache(db_path=db_path).set("a", _result(0.9))
+
+    fresh = MCResultCache(db_path=db_path)
+    restored = fresh.get("a")
+    original = _result(0.9)
+
+    assert fresh.get_stats()["disk_hits"] == 1
+    assert restored["predicted_label"] == ["Dengue"]
+    assert restored["deterministic_seed"] == 12345
+    for name in ("mean_probabilities", "mutual_information", "predicted_class"):
+        assert restored[name].dtype == original[name].dtype
+        np.testing.assert_array_equal(restored[name], original[name])
+    # Promoted to the memory tier after the first disk hit
+    fresh.get("a")
+    assert fresh.get_stats()["memory_hits"] == 1
+
+
+def test_scheduler_skips_inference_on_cache_hit():
+    class _CountingClassifier:
+        calls = 0
+
+        def cache_signature(self):
+            return ("counting",)
+
+        def predict_with_uncertainty(self, text):
+            self.calls += 1
+            return _result()
+
+    clf = _CountingClassifier()
+    scheduler = MCInferenceScheduler(clf, max_batch_size=1, cache=MCResultCache())
+    first = scheduler.submit("Fever and headache for 3 days")
+    second = scheduler.submit("fever and headache for 3 days")
+
+    assert clf.calls == 1
+    np.testing.assert_array_equal(
+        first["mean_probabilities"], second["mean_probabilities"]
+    )
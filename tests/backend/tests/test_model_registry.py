@@ -0,0 +1,88 @@
+"""
+Tests for lazy model loading, memory-mapped weights and idle unloading.
+"""
+
+import time
+
+import numpy as np
+import torch
+from safetensors.torch import save_file
+
+import app.config as config
+from app.services.ml_service import MCDClassifierWithSHAP
+from app.services.model_registry import (
+    ModelRegistry,
+    assign_mmap_weights,
+    load_mmap_state_dict,
+)
+
+TEXT = "I have had a high fever and headache for 3 days"
+
+
+class _FakeModel:
+    def __init__(self):
+        self.is_loaded = True
+        self.unloads = 0
+
+    def unload(self):
+        self.is_loaded = False
+        self.unloads += 1
+
+
+def test_mmap_state_dict_matches_checkpoint(tmp_path):
+    tensors = {
+        "weight": torch.randn(4, 3),
+        "bias": torch.arange(5, dtype=torch.int64),
+        "half": torch.randn(2, 2).to(torch.float16),
+    }
+    save_file(tensors, str(tmp_path / "model.safetensors"))
+    mapped = load_mmap_state_dict(tmp_path)
+    for name, tensor in tensors.items():
+        assert mapped[name].dtype == tensor.dtype
+        torch.testing.assert_close(mapped[name], tensor)
+
+
+def test_assign_mmap_weights_replaces_matching_parameters(tmp_path):
+    model = torch.nn.Linear(3, 2)
+    save_file(
+        {"weight": torch.ones(2, 3), "bias": torch.zeros(2)},
+        str(tmp_path / "model.safetensors"),
+    )
+    assert assign_mmap_weights(model, tmp_path) == (6 + 2) * 4
+    torch.testing.assert_close(model.weight.data, torch.ones(2, 3))
+    # Copy-on-write: in-place updates do not touch the file
+    model.weight.data.add_(1)
+    torch.testing.assert_close(load_mmap_state_dict(tmp_path)["weight"], torch.ones(2, 3))
+
+
+def test_registry_unloads_only_idle_unused_models():
+    registry = ModelRegistry()
+    primary = registry.register("eng", _FakeModel(), idle_unload_seconds=0)
+    secondary = registry.register("fil", _FakeModel(), idle_unload_seconds=10)
+
+    later = time.monotonic() + 60
+    with registry.use("fil"):
+        assert registry.unload_idle(now=later) == []
+    assert registry.unload_idle(now=later) == ["fil"]
+    assert primary.is_loaded and not secondary.is_loaded
+    assert registry.get_stats()["models"]["fil"]["unload_count"] == 1
+
+
+def test_lazy_classifier_loads_on_first_use_and_reloads_after_unload(monkeypatch):
+    monkeypatch.setattr(config, "MCD_DETERMINISTIC", True)
+    clf = MCDClassifierWithSHAP(
+        config.ENG_MODEL_PATH,
+        n_iterations=5,
+        inference_dropout_rate=0.2,
+        model_revision=config.ENG_MODEL_REVISION,
+        lazy=True,
+    )
+    assert not clf.is_loaded
+    first = clf.predict_with_uncertainty(TEXT)
+    assert clf.is_loaded and clf.load_stats()["load_count"] == 1
+
+    clf.unload()
+    assert not clf.is_loaded
+    second = clf.predict_with_uncertainty(TEXT)
+    assert clf.load_stats()["load_count"] == 2
+    np.testing.assert_array_equal(first["mean_probabilities"], second["mean_probabilities"])
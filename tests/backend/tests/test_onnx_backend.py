@@ -0,0 +1,76 @@
+"""
+Parity tests for the ONNX Runtime inference backend against the PyTorch path.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+
+from app.services.ml_service import eng_classifier, fil_classifier
+from app.services.onnx_backend import OnnxMCEngine, export_onnx_model
+
+TEXTS = [
+    "fever and headache",
+    # Longer than the ModernBERT local attention window
+    "I have had a high fever and headache for 3 days " * 12,
+    "watery diarrhea and vomiting since yesterday",
+]
+
+
+@pytest.fixture(
+    scope="module", params=[eng_classifier, fil_classifier], ids=["modernbert", "roberta"]
+)
+def exported(request, tmp_path_factory):
+    clf = request.param
+    fp32_dir = tmp_path_factory.mktemp("onnx_fp32")
+    int8_dir = tmp_path_factory.mktemp("onnx_int8")
+    export_onnx_model(clf.explanation_model, fp32_dir, quantize=False)
+    export_onnx_model(clf.explanation_model, int8_dir, quantize=True)
+    return clf, fp32_dir, int8_dir
+
+
+def _predict(clf):
+    return clf.predict_batch_with_uncertainty(TEXTS, adaptive=False)
+
+
+def test_fp32_graph_matches_pytorch_fp32(exported, monkeypatch):
+    clf, fp32_dir, _ = exported
+    monkeypatch.setattr(clf, "model", clf.explanation_model)
+    expected = _predict(clf)
+
+    monkeypatch.setattr(clf, "onnx_engine", OnnxMCEngine(fp32_dir))
+    actual = _predict(clf)
+
+    for e, a in zip(expected, actual):
+        assert e["deterministic_seed"] == a["deterministic_seed"]
+        assert e["predicted_label"] == a["predicted_label"]
+        np.testing.assert_allclose(
+            e["mean_probabilities"], a["mean_probabilities"], atol=1e-5
+        )
+        np.testing.assert_allclose(
+            e["mutual_information"], a["mutual_information"], atol=1e-5
+        )
+
+
+def test_int8_graph_is_close_to_pytorch_int8(exported, monkeypatch):
+    clf, _, int8_dir = exported
+    expected = _predict(clf)
+
+    monkeypatch.setattr(clf, "onnx_engine", OnnxMCEngine(int8_dir))
+    actual = _predict(clf)
+
+    for e, a in zip(expected, actual):
+        assert e["mean_probabilities"].shape == a["mean_probabilities"].shape
+        np.testing.assert_allclose(
+            e["mean_probabilities"], a["mean_probabilities"], atol=2e-2
+        )
+
+
+def test_onnx_results_are_deterministic(exported, monkeypatch):
+    clf, _, int8_dir = exported
+    monkeypatch.setattr(clf, "onnx_engine", OnnxMCEngine(int8_dir))
+
+    first, second = _predict(clf), _predict(clf)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a["mean_probabilities"], b["mean_probabilities"])
@@ -0,0 +1,96 @@
+"""
+Tests for the persisted ontology artifact.
+"""
+
+import os
+import pickle
+
+import pytest
+
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services import keyword_engine, ontology_artifact
+from app.services.ontology_artifact import (
+    compile_artifact,
+    load_artifact,
+    load_or_build_artifact,
+    ontology_content_hash,
+)
+from app.services.verification import OntologyBuilder
+
+SYMPTOMS = "mataas na lagnat, chills at masakit ang likod ng mata"
+
+
+def test_artifact_round_trip_matches_fresh_build(tmp_path):
+    path = tmp_path / "ontology.pkl"
+    built = load_or_build_artifact(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS, path)
+    assert path.exists()
+
+    loaded = load_or_build_artifact(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS, path)
+    assert loaded is not built
+    assert loaded.profiles == OntologyBuilder(QUESTION_BANK_EN, QUESTION_BANK_TL).profiles
+    assert keyword_engine.get_keyword_engine() is loaded.keyword_engine
+
+    for lang in ("en", "tl"):
+        fresh, cached = built.question_banks.for_lang(lang), loaded.question_banks.for_lang(lang)
+        assert cached.ids == fresh.ids
+        assert (cached.weights == fresh.weights).all()
+        assert cached.evidence_keywords is EVIDENCE_KEYWORDS
+        assert cached.evidenced_ids(SYMPTOMS) == fresh.evidenced_ids(SYMPTOMS)
+
+    # The unpickled automaton answers lookups exactly like a freshly compiled one
+    fresh_engine = keyword_engine.build_keyword_engine()
+    for name in fresh_engine.dictionaries:
+        assert loaded.keyword_engine.keys(name, SYMPTOMS) == fresh_engine.keys(name, SYMPTOMS)
+
+
+def test_content_hash_tracks_question_bank_changes():
+    base = ontology_content_hash(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+    assert base == ontology_content_hash(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+
+    disease = next(iter(QUESTION_BANK_EN))
+    edited = {**QUESTION_BANK_EN, disease: QUESTION_BANK_EN[disease][:-1]}
+    assert ontology_content_hash(edited, QUESTION_BANK_TL, EVIDENCE_KEYWORDS) != base
+
+
+def test_content_hash_tracks_compiler_code(monkeypatch):
+    base = ontology_content_hash(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+    digest = ontology_artifact.compiler_source_digest()
+    assert digest != ontology_artifact.compiler_source_digest(
+        ontology_artifact.COMPILER_MODULES[:-1]
+    )
+
+    # An edit to e.g. extract_clinical_concepts changes the digest, and the hash
+    monkeypatch.setattr(ontology_artifact, "compiler_source_digest", lambda: "0" * 64)
+    assert ontology_content_hash(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS) != base
+
+
+def test_stale_or_corrupt_artifact_is_rebuilt(tmp_path):
+    path = tmp_path / "ontology.pkl"
+    artifact = compile_artifact(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+    artifact.content_hash = "0" * 64
+    path.write_bytes(pickle.dumps(artifact))
+    assert load_artifact(path, ontology_content_hash(
+        QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS
+    )) is None
+
+    rebuilt = load_or_build_artifact(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS, path)
+    assert rebuilt.content_hash != "0" * 64
+    assert pickle.loads(path.read_bytes()).content_hash == rebuilt.content_hash
+
+    path.write_bytes(b"not a pickle")
+    assert load_artifact(path, rebuilt.content_hash) is None
+
+
+def test_untrusted_artifact_is_not_unpickled(tmp_path, monkeypatch):
+    path = tmp_path / "ontology.pkl"
+    built = load_or_build_artifact(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS, path)
+    assert load_artifact(path, built.content_hash) is not None
+
+    path.chmod(0o666)
+    assert load_artifact(path, built.content_hash) is None
+
+    path.chmod(0o644)
+    monkeypatch.setattr(os, "geteuid", lambda: path.stat().st_uid + 1)
+    monkeypatch.setattr(pickle, "load", lambda f: pytest.fail("unpickled a foreign file"))
+    assert load_artifact(path, built.content_hash) is None
@@ -0,0 +1,117 @@
+"""
+Tests for the questioning policy cache.
+"""
+
+import numpy as np
+
+import app.services.information_gain as information_gain
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.ml_service import CORRECT_ID2LABEL
+from app.services.policy_cache import PolicyCache, policy_fingerprint
+from app.services.question_bank import build_question_banks
+from app.services.information_gain import select_best_question_across_diseases
+
+BANKS = build_question_banks(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+SYMPTOMS = "high fever, severe headache and pain behind the eyes"
+
+
+def _select(probs, asked, answers, bank=BANKS.en):
+    return select_best_question_across_diseases(
+        current_probs=probs,
+        question_bank=bank,
+        asked_question_ids=set(asked),
+        skip_question_ids=set(),
+        disease_labels=CORRECT_ID2LABEL,
+        symptoms_text=SYMPTOMS,
+        answered_questions=answers,
+    )
+
+
+def _states(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [qid for qid in BANKS.en.ids if BANKS.en.metadata(qid)]
+    for _ in range(n):
+        asked = list(rng.choice(ids, size=int(rng.integers(0, 6)), replace=False))
+        answers = {qid: ["yes", "no"][int(rng.integers(2))] for qid in asked}
+        yield rng.dirichlet(np.ones(len(CORRECT_ID2LABEL)) * 0.8), asked, answers
+
+
+def test_cached_selection_equals_live(monkeypatch):
+    monkeypatch.setattr(information_gain, "get_policy_cache", lambda: None)
+    live = [_select(*state) for state in _states()]
+
+    cache = PolicyCache(max_entries=1000, quantum=0.0)
+    monkeypatch.setattr(information_gain, "get_policy_cache", lambda: cache)
+    first = [_select(*state) for state in _states()]
+    assert cache.get_stats()["misses"] == len(live)
+    second = [_select(*state) for state in _states()]
+    assert cache.get_stats()["hits"] == len(live)
+    assert first == live
+    assert second == live
+
+    # Callers get their own copy of a cached question
+    second[0][0]["_eig"] = -1.0
+    assert _select(*next(_states()))[0] == live[0][0]
+
+
+def test_quantized_posteriors_share_an_entry():
+    cache = PolicyCache(quantum=0.01)
+    mask = np.ones(len(BANKS.en.ids), dtype=bool)
+    probs = np.array([0.4, 0.25, 0.15, 0.1, 0.05, 0.05])
+    key = cache.key(BANKS.en, probs, mask, set())
+    assert cache.key(BANKS.en, probs + [0.001, -0.001, 0, 0, 0, 0], mask, set()) == key
+    assert cache.key(BANKS.en, probs + [0.02, -0.02, 0, 0, 0, 0], mask, set()) != key
+    assert cache.key(BANKS.tl, probs, mask, set()) != key
+    assert cache.key(BANKS.en, probs, mask, {BANKS.en.ids[0]}) != key
+    mask[3] = False
+    assert cache.key(BANKS.en, probs, mask, set()) != key
+
+
+def test_mode_and_top_k_split_a_bucket():
+    cache = PolicyCache(quantum=0.01)
+    mask = np.ones(len(BANKS.en.ids), dtype=bool)
+    # Same 0.01 bucket, but only the second posterior is in CONFIRMATION mode
+    below = np.array([0.6496, 0.1504, 0.05, 0.05, 0.05, 0.05])
+    above = np.array([0.6504, 0.1496, 0.05, 0.05, 0.05, 0.05])
+    assert information_gain.determine_diagnosis_mode(below) != (
+        information_gain.determine_diagnosis_mode(above)
+    )
+    assert cache.key(BANKS.en, below, mask, set()) != cache.key(BANKS.en, above, mask, set())
+
+    # Same bucket and mode, but the runner-up swaps places
+    first = np.array([0.3, 0.201, 0.199, 0.1, 0.1, 0.1])
+    second = np.array([0.3, 0.199, 0.201, 0.1, 0.1, 0.1])
+    assert cache.key(BANKS.en, first, mask, set()) != cache.key(BANKS.en, second, mask, set())
+
+
+def test_save_and_load_check_fingerprint(tmp_path, monkeypatch):
+    cache = PolicyCache(quantum=0.0)
+    monkeypatch.setattr(information_gain, "get_policy_cache", lambda: cache)
+    for state in _states(10):
+        _select(*state)
+    path = tmp_path / "policy.pkl"
+    fingerprint = policy_fingerprint("abc", 0.0)
+    cache.save(path, fingerprint)
+
+    restored = PolicyCache(quantum=0.0)
+    assert restored.load(path, policy_fingerprint("other", 0.0)) == 0
+    assert restored.load(path, fingerprint) == len(cache)
+    monkeypatch.setattr(information_gain, "get_policy_cache", lambda: restored)
+    for state in _states(10):
+        _select(*state)
+    assert restored.get_stats()["misses"] == 0
+
+
+def test_load_refuses_an_untrusted_cache(tmp_path, monkeypatch):
+    cache = PolicyCache()
+    mask = np.ones(len(BANKS.en.ids), dtype=bool)
+    cache.put(cache.key(BANKS.en, np.full(6, 1 / 6), mask, set()), None)
+    path = tmp_path / "policy.pkl"
+    fingerprint = policy_fingerprint("abc", 0.0)
+    cache.save(path, fingerprint)
+
+    path.chmod(0o666)
+    assert PolicyCache().load(path, fingerprint) == 0
+    path.chmod(0o644)
+    assert PolicyCache().load(path, fingerprint) == 1
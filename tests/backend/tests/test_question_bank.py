@@ -0,0 +1,61 @@
+"""
+Tests for the compiled question bank index used by the follow-up path.
+"""
+
+import numpy as np
+
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.question_bank import build_question_banks
+from app.utils.scoring import lookup_question_metadata
+
+BANKS = build_question_banks(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+
+
+def _all_questions(bank):
+    return [q for questions in bank.values() for q in questions]
+
+
+def test_metadata_matches_linear_lookup():
+    for raw, compiled in ((QUESTION_BANK_EN, BANKS.en), (QUESTION_BANK_TL, BANKS.tl)):
+        for q in _all_questions(raw):
+            expected = lookup_question_metadata(q["id"], raw)
+            assert compiled.metadata(q["id"]) == expected
+            assert lookup_question_metadata(q["id"], compiled) == expected
+        assert compiled.metadata("not_a_question") is None
+
+
+def test_vectors_align_with_question_ids():
+    bank = BANKS.en
+    questions = _all_questions(QUESTION_BANK_EN)
+    assert bank.ids == [q["id"] for q in questions]
+    np.testing.assert_array_equal(bank.weights, [q.get("weight", 0.85) for q in questions])
+    np.testing.assert_array_equal(bank.burden, [q.get("burden", 3) for q in questions])
+    np.testing.assert_array_equal(
+        bank.is_negative, [q.get("is_negative", False) for q in questions]
+    )
+    for disease, positions in bank.disease_positions.items():
+        assert [bank.ids[p] for p in positions] == [q["id"] for q in QUESTION_BANK_EN[disease]]
+
+
+def test_evidenced_ids_and_symptom_texts_match_scans():
+    text = "i have high fever, rashes and a bad cough since yesterday"
+    expected = {
+        q["id"]
+        for q in _all_questions(QUESTION_BANK_EN)
+        if any(kw in text for kw in EVIDENCE_KEYWORDS.get(q["id"], []))
+    }
+    assert expected and BANKS.en.evidenced_ids(text) == expected
+
+    for q in _all_questions(QUESTION_BANK_EN):
+        assert BANKS.symptom_text(q["id"], positive=True) == q["positive_symptom"]
+        assert BANKS.symptom_text(q["id"], positive=False) == q["negative_symptom"]
+
+
+def test_compiled_bank_is_a_drop_in_mapping():
+    assert dict(BANKS.tl.items()) == QUESTION_BANK_TL
+    assert BANKS.for_lang("fil") is BANKS.tl and BANKS.for_lang("en") is BANKS.en
+    primary = BANKS.en.primary_questions("Dengue")
+    assert primary == [
+        q for q in QUESTION_BANK_EN["Dengue"] if (q.get("category") or "").lower() == "primary"
+    ]
@@ -0,0 +1,73 @@
+"""
+Tests that the precomputed question-group index matches the group scans.
+"""
+
+import itertools
+
+import numpy as np
+
+from app import QUESTION_BANK_EN
+from app.question_group_index import QuestionGroupIndex
+from app.question_groups import (
+    POSITIVE_TO_NEGATIVE_QUESTIONS,
+    QUESTION_GROUPS,
+    compute_question_similarity,
+    expand_asked_questions,
+    get_all_groups_for_question,
+    get_novelty_penalties,
+    get_novelty_penalty,
+    get_questions_to_skip_from_text,
+)
+
+QUESTION_IDS = [q["id"] for qs in QUESTION_BANK_EN.values() for q in qs] + ["unknown_q1"]
+
+
+def _scan_groups(qid):
+    return [name for name, ids in QUESTION_GROUPS.items() if qid in ids]
+
+
+def _scan_similarity(qid1, qid2):
+    if qid1 == qid2:
+        return 1.0
+    groups1, groups2 = set(_scan_groups(qid1)), set(_scan_groups(qid2))
+    if not groups1 or not groups2:
+        return 0.0
+    return len(groups1 & groups2) / len(groups1 | groups2)
+
+
+def test_groups_and_similarity_match_scans():
+    for qid in QUESTION_IDS:
+        assert get_all_groups_for_question(qid) == _scan_groups(qid)
+    for qid1, qid2 in itertools.product(QUESTION_IDS, repeat=2):
+        assert compute_question_similarity(qid1, qid2) == _scan_similarity(qid1, qid2)
+
+
+def test_novelty_penalties_match_pairwise_maximum():
+    asked = ["dengue_q1", "influenza_q4", "unknown_q1"]
+    expected = [
+        max(_scan_similarity(qid, a) for a in asked) * 0.12 for qid in QUESTION_IDS
+    ]
+    np.testing.assert_array_equal(get_novelty_penalties(QUESTION_IDS, asked), expected)
+    assert [get_novelty_penalty(qid, asked) for qid in QUESTION_IDS] == expected
+    assert not get_novelty_penalties(QUESTION_IDS, []).any()
+
+
+def test_skip_expansion_matches_group_unions():
+    asked = {"dengue_q7", "measles_q2", "unknown_q1"}
+    expected = set(asked)
+    for qid in asked:
+        for name in _scan_groups(qid):
+            expected.update(QUESTION_GROUPS[name])
+    assert expand_asked_questions(asked) == expected
+
+    skipped = get_questions_to_skip_from_text("I have a rash and a cough")
+    assert set(POSITIVE_TO_NEGATIVE_QUESTIONS["skin_rash_spots"]) <= skipped
+    assert set(QUESTION_GROUPS["cough_general"]) <= skipped
+
+
+def test_index_on_custom_groups():
+    index = QuestionGroupIndex({"a": ["q1", "q2"], "b": ["q2", "q3"]}, {"a": ["q9"]})
+    assert index.question_similarity("q1", "q2") == 0.5
+    assert index.question_similarity("q1", "q3") == 0.0
+    assert index.related_questions("q2") == {"q1", "q2", "q3"}
+    assert index.skip_for_groups(["a"]) == {"q1", "q2", "q9"}
@@ -0,0 +1,136 @@
+"""
+Tests for the vectorized questionnaire simulator.
+
+Every simulated patient is replayed one turn at a time through the live
+selection (select_best_question_across_diseases) and the follow-up stop
+rules; the questions asked and the stop reason must be the same.
+"""
+
+import numpy as np
+import pytest
+from scipy.stats import entropy
+
+import app.config as config
+import app.services.information_gain as information_gain
+from app import QUESTION_BANK_EN, QUESTION_BANK_TL
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.services.information_gain import select_best_question_across_diseases
+from app.services.ml_service import CORRECT_ID2LABEL
+from app.services.question_bank import build_question_banks
+from app.services.questionnaire_simulator import (
+    STOP_REASONS,
+    build_cohort,
+    load_dataset,
+    simulate_questionnaire,
+    sweep,
+)
+from app.utils.scoring import bayesian_evidence_update
+
+BANKS = build_question_banks(QUESTION_BANK_EN, QUESTION_BANK_TL, EVIDENCE_KEYWORDS)
+
+
+def _cohort(lang, per_disease=6, **kwargs):
+    texts, labels = load_dataset(lang, limit_per_disease=per_disease)
+    cohort = build_cohort(
+        BANKS.for_lang(lang), texts, labels, CORRECT_ID2LABEL, EVIDENCE_KEYWORDS, **kwargs
+    )
+    return cohort, texts
+
+
+def _live_run(cohort, p, text):
+    """One patient through the follow-up loop, one turn at a time."""
+    bank = cohort.tables.bank
+    probs = cohort.priors[p]
+    skip_ids = bank.evidenced_ids(text.lower())
+    asked, answers, initial_eig = [], {}, None
+    while True:
+        confidence = float(np.max(probs))
+        uncertainty = float(entropy(probs)) / np.log(len(probs))
+        valid = confidence >= config.VALID_MIN_CONF and uncertainty <= config.VALID_MAX_UNCERTAINTY
+        if (
+            confidence >= config.HIGH_CONFIDENCE_THRESHOLD
+            and uncertainty <= config.LOW_UNCERTAINTY_THRESHOLD
+        ):
+            return asked, "HIGH_CONFIDENCE_FINAL"
+        if len(asked) >= config.MAX_QUESTIONS_THRESHOLD and not valid:
+            return asked, "OUT_OF_SCOPE"
+        if len(asked) >= config.EXHAUSTED_QUESTIONS_THRESHOLD:
+            return asked, "HIGH_CONFIDENCE_FINAL" if valid else "OUT_OF_SCOPE"
+
+        question, should_stop, best_eig = select_best_question_across_diseases(
+            current_probs=probs,
+            question_bank=bank,
+            asked_question_ids=set(asked),
+            skip_question_ids=skip_ids,
+            disease_labels=CORRECT_ID2LABEL,
+            symptoms_text=text,
+            answered_questions=answers,
+            initial_eig=initial_eig,
+        )
+        if best_eig is not None and initial_eig is None:
+            initial_eig = best_eig
+        if should_stop and question is not None:
+            return asked, "EIG_DIMINISHING_RETURNS" if valid else "EIG_LOW_CONFIDENCE"
+        if not question:
+            return asked, "HIGH_CONFIDENCE_FINAL" if valid else "LOW_CONFIDENCE_FINAL"
+        pred = CORRECT_ID2LABEL[int(np.argmax(probs))]
+        coverage = sum(1 for q in bank.primary_questions(pred) if q["id"] in skip_ids)
+        if (
+            coverage >= config.EVIDENCE_STOP_PRIMARY_COVERAGE
+            and confidence >= config.EVIDENCE_STOP_CONF_THRESHOLD
+            and uncertainty <= config.EVIDENCE_STOP_MAX_UNCERTAINTY
+        ):
+            return asked, "High confidence reached"
+
+        qid = question["id"]
+        answer = "yes" if cohort.answers_yes[p, bank.position[qid]] else "no"
+        meta = bank.metadata(qid)
+        probs = np.array(
+            bayesian_evidence_update(
+                probs, answer, meta["weight"], meta["disease_idx"], CORRECT_ID2LABEL,
+                is_negative=meta["is_negative"],
+            )["probs"]
+        )
+        asked.append(qid)
+        answers[qid] = answer
+
+
+@pytest.mark.parametrize(
+    "lang, kwargs",
+    [
+        ("en", {}),
+        ("tl", {"prior_strength": 4.0, "seed": 1}),
+        ("en", {"prior_strength": 30.0, "sensitivity": 0.98, "false_positive": 0.02}),
+    ],
+)
+def test_simulation_matches_live_follow_up(monkeypatch, lang, kwargs):
+    monkeypatch.setattr(information_gain, "get_policy_cache", lambda: None)
+    cohort, texts = _cohort(lang, **kwargs)
+    result = simulate_questionnaire(cohort)
+
+    ids = cohort.tables.ids
+    for p, text in enumerate(texts):
+        asked, reason = _live_run(cohort, p, text)
+        simulated = [ids[pos] for pos in result["asked_positions"][p] if pos >= 0]
+        assert simulated == asked
+        assert STOP_REASONS[result["stop_reason"][p]] == reason
+
+
+def test_summary_and_sweep():
+    cohort, _ = _cohort("en", per_disease=10, prior_strength=3.0)
+    result = simulate_questionnaire(cohort)
+    summary = result["summary"]
+    assert summary["patients"] == len(cohort) == 60
+    assert summary["accuracy"] == pytest.approx(result["correct"].mean())
+    assert summary["mean_questions"] == pytest.approx(result["questions_asked"].mean())
+    assert sum(summary["stop_reasons"].values()) == 60
+    assert summary["steps"] == len(result["step_seconds"]) > 0
+
+    rows = sweep(cohort, {"MIN_EIG_THRESHOLD": [0.0, 1.0], "MAX_QUESTIONS_THRESHOLD": [4]})
+    assert [row["params"]["MIN_EIG_THRESHOLD"] for row in rows] == [0.0, 1.0]
+    # Every selection falls below an EIG floor of 1 nat: no questions are asked
+    assert rows[1]["mean_questions"] == 0
+    assert rows[0]["mean_questions"] > 0
+
+    with pytest.raises(ValueError):
+        simulate_questionnaire(cohort, {"NOT_A_SETTING": 1})
@@ -0,0 +1,83 @@
+"""
+Tests for the compact session-state encoding.
+"""
+
+import json
+import timeit
+
+import pytest
+
+from app.models import session_codec
+from app.models.session_codec import (
+    decode_answers,
+    decode_probs,
+    decode_question_ids,
+    derive_top_diseases,
+    encode_answers,
+    encode_probs,
+    encode_question_ids,
+    question_id_table,
+)
+
+PROBS = [0.01234567891234, 0.0456, 0.712345678901, 0.0311, 0.15, 0.04986]
+
+
+def _history(n=10):
+    ids = question_id_table()[0]
+    asked = ids[:n]
+    return asked, {qid: "yes" if i % 2 else "no" for i, qid in enumerate(asked)}
+
+
+def test_round_trips():
+    assert decode_probs(encode_probs(PROBS)) == PROBS
+    assert decode_probs(memoryview(encode_probs(PROBS))) == PROBS  # psycopg2 bytea
+    assert decode_probs(encode_probs(PROBS, "float32")) == pytest.approx(PROBS, rel=1e-6)
+
+    asked, answers = _history()
+    asked += ["custom_q", "ñ_tagalog_q"]
+    answers.update({"custom_q": "hindi", asked[0]: "yes"})
+    assert decode_question_ids(encode_question_ids(asked)) == asked
+    decoded = decode_answers(encode_answers(answers))
+    assert decoded == answers and list(decoded) == list(answers)  # order kept
+    assert decode_question_ids(encode_question_ids([])) == []
+    assert decode_answers(encode_answers({})) == {}
+
+
+def test_changed_question_bank_is_rejected(monkeypatch):
+    blob = encode_question_ids(_history()[0])
+    ids, codes, _ = question_id_table()
+    monkeypatch.setattr(session_codec, "_question_table", (ids[1:], codes, b"\0\0\0\0"))
+    with pytest.raises(ValueError):
+        decode_question_ids(blob)
+    with pytest.raises(ValueError):
+        decode_probs(b"\x09\x01" + bytes(8))
+
+
+def test_derived_top_diseases_match_the_diagnosis_flow():
+    top = derive_top_diseases(PROBS)
+    assert [d["disease"] for d in top[:2]] == ["Influenza", "Pneumonia"]
+    assert [d["probability"] for d in top] == sorted(PROBS, reverse=True)
+
+
+def test_smaller_and_cheaper_than_json():
+    asked, answers = _history()
+    top = derive_top_diseases(PROBS)
+
+    def as_json():
+        return [json.dumps(v) for v in (PROBS, PROBS, top, asked, answers)]
+
+    def as_compact():
+        return [
+            encode_probs(PROBS),
+            encode_probs(PROBS),
+            encode_question_ids(asked),
+            encode_answers(answers),
+        ]
+
+    json_bytes = sum(len(v) for v in as_json())
+    compact_bytes = sum(len(v) for v in as_compact())
+    assert compact_bytes * 3 < json_bytes
+
+    json_time = min(timeit.repeat(as_json, number=200, repeat=5))
+    compact_time = min(timeit.repeat(as_compact, number=200, repeat=5))
+    assert compact_time < json_time
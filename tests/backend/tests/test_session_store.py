@@ -0,0 +1,297 @@
+"""
+Tests for the write-behind diagnosis session store and the expiry sweep
+(against SQLite).
+"""
+
+import json
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+
+import app as app_package
+import app.models.diagnosis_session as diagnosis_session
+from app.models.diagnosis_session import SessionStore
+from app.models.session_codec import derive_top_diseases
+from app.utils import database
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE diagnosis_sessions (
+                session_id TEXT PRIMARY KEY, chat_id TEXT NOT NULL,
+                initial_symptoms TEXT NOT NULL, base_probs TEXT NOT NULL,
+                current_probs TEXT NOT NULL, disease TEXT NOT NULL,
+                confidence DOUBLE PRECISION NOT NULL, uncertainty DOUBLE PRECISION NOT NULL,
+                top_diseases TEXT NOT NULL, model_used TEXT NOT NULL,
+                lang TEXT NOT NULL DEFAULT 'en', asked_questions TEXT NOT NULL DEFAULT '[]',
+                evidence_texts TEXT NOT NULL DEFAULT '[]',
+                created_at DOUBLE PRECISION NOT NULL, updated_at DOUBLE PRECISION NOT NULL,
+                question_answers TEXT NOT NULL DEFAULT '{}', initial_eig DOUBLE PRECISION,
+                version INTEGER NOT NULL DEFAULT 0,
+                base_probs_bin BLOB, current_probs_bin BLOB,
+                asked_questions_bin BLOB, question_answers_bin BLOB
+            )
+        """))
+        conn.commit()
+    seen = []
+    event.listen(engine, "before_cursor_execute", lambda *args: seen.append(args[2].split()[0]))
+    monkeypatch.setattr(database, "_engine", engine)
+    yield seen
+    monkeypatch.setattr(database, "_engine", None)
+
+
+def _row(session_id="s1", created_at=None):
+    now = diagnosis_session._now()
+    return {
+        "session_id": session_id,
+        "chat_id": "chat",
+        "initial_symptoms": "fever and headache",
+        "base_probs": [0.5, 0.5],
+        "current_probs": [0.5, 0.5],
+        "disease": "Dengue",
+        "confidence": 0.5,
+        "uncertainty": 0.9,
+        "top_diseases": [{"disease": "Dengue", "probability": 0.5}],
+        "model_used": "test",
+        "lang": "en",
+        "asked_questions": [],
+        "evidence_texts": [],
+        "question_answers": {},
+        "created_at": now if created_at is None else created_at,
+        "updated_at": now,
+        "version": 0,
+    }
+
+
+def test_updates_are_coalesced_and_written_back(statements):
+    store = SessionStore(mode="sticky", write_interval=60)
+    store.create(_row())
+    statements.clear()
+
+    sess = store.get("s1")
+    sess["asked_questions"].append("mutated by caller")
+    assert store.update("s1", {"asked_questions": ["dengue_q1"], "confidence": 0.7})
+    assert store.update("s1", {"initial_eig": 0.4})
+    assert store.get("s1")["asked_questions"] == ["dengue_q1"]
+    assert statements == []  # sticky: reads and writes stay in memory
+
+    assert store.flush() == 1
+    assert statements.count("UPDATE") == 1
+    stats = store.get_stats()
+    assert stats["updates_coalesced"] == 1 and stats["pending"] == 0
+
+    fresh = SessionStore().get("s1")
+    assert fresh["asked_questions"] == ["dengue_q1"]
+    assert fresh["confidence"] == 0.7 and fresh["initial_eig"] == 0.4
+    assert fresh["version"] == 1
+
+
+def test_versioned_workers_see_each_others_writes(statements):
+    worker_a, worker_b = SessionStore(write_interval=60), SessionStore(write_interval=60)
+    worker_a.create(_row())
+    assert worker_a.get("s1")["disease"] == "Dengue"
+
+    # Turn handled by worker B, flushed before its response
+    worker_b.update("s1", {"disease": "Influenza", "asked_questions": ["influenza_q1"]})
+    worker_b.flush()
+
+    statements.clear()
+    sess = worker_a.get("s1")
+    assert sess["disease"] == "Influenza"
+    assert worker_a.get_stats()["stale_reloads"] == 1
+    assert statements == ["SELECT", "SELECT"]  # version probe, then reload
+
+    # A cached, current session costs only the version probe
+    statements.clear()
+    assert worker_a.get("s1")["disease"] == "Influenza"
+    assert statements == ["SELECT"]
+
+    # A write based on an outdated version is re-applied on top of the newer
+    # row: the other worker's fields survive and no update is lost
+    worker_b.update("s1", {"disease": "Measles", "confidence": 0.9})
+    worker_b.flush()
+    worker_a.update("s1", {"disease": "Typhoid"})
+    assert worker_a.flush() == 1
+    stats = worker_a.get_stats()
+    assert stats["conflicts"] == 1 and stats["rebased"] == 1
+    statements.clear()
+    sess = worker_a.get("s1")
+    assert (sess["disease"], sess["confidence"], sess["version"]) == ("Typhoid", 0.9, 3)
+    assert statements == ["SELECT"]  # the reloaded copy is current
+    assert SessionStore().get("s1")["disease"] == "Typhoid"
+
+    # An update to a session deleted meanwhile is dropped, not retried forever
+    worker_a.update("s1", {"disease": "Dengue"})
+    diagnosis_session.delete_session("s1")
+    assert worker_a.flush() == 0 and worker_a.get_stats()["pending"] == 0
+
+
+def test_expiry_sync_writes_and_lru(statements, monkeypatch):
+    store = SessionStore(max_entries=2, mode="sticky", write_interval=60)
+    store.create(_row("old", created_at=diagnosis_session._now() - 7200))
+    assert store.get("old") is None
+    assert store.get("missing") is None
+
+    store.create(_row("s1"))
+    store.update("s1", {"disease": "Pneumonia"}, sync=True)
+    assert SessionStore().get("s1")["disease"] == "Pneumonia"
+
+    # Sessions with unwritten changes are never evicted
+    store.update("s1", {"disease": "Measles"})
+    store.create(_row("s2"))
+    store.create(_row("s3"))
+    assert "s1" in store._entries and len(store) == 2
+    store.flush()
+    assert SessionStore().get("s1")["disease"] == "Measles"
+
+    # Updates that load an uncached session also respect max_entries
+    for sid in ("u1", "u2", "u3"):
+        store.create(_row(sid))
+    small = SessionStore(max_entries=2, mode="sticky", write_interval=60)
+    for sid in ("u1", "u2", "u3"):
+        assert small.update(sid, {"disease": "Dengue"}, sync=True)
+    assert len(small) == 2 and "u1" not in small._entries
+
+    # Module API with the store disabled: straight to the database
+    monkeypatch.setattr(diagnosis_session.config, "SESSION_CACHE_ENABLED", False)
+    assert diagnosis_session.update_session("s2", disease="Diarrhea")
+    assert diagnosis_session.get_session("s2")["disease"] == "Diarrhea"
+    assert diagnosis_session.get_session("s2")["version"] == 1
+
+
+def test_teardown_flushes_only_the_request_sessions(statements, monkeypatch):
+    store = SessionStore(write_interval=60)
+    monkeypatch.setattr(diagnosis_session, "session_store", store)
+    store.create(_row("s1"))
+    store.create(_row("s2"))
+    store.update("s2", {"disease": "Measles"})  # pending from another request
+
+    flask_app = Flask(__name__)
+    flask_app.teardown_request(diagnosis_session.flush_request_sessions)
+    flask_app.add_url_rule("/health", "health", lambda: "ok")
+    flask_app.add_url_rule(
+        "/answer",
+        "answer",
+        lambda: str(diagnosis_session.update_session("s1", disease="Typhoid")),
+    )
+    client = flask_app.test_client()
+
+    statements.clear()
+    client.get("/health")
+    assert statements == []  # nothing touched, nothing written
+
+    client.get("/answer")
+    assert statements.count("UPDATE") == 1
+    assert SessionStore().get("s1")["disease"] == "Typhoid"
+    assert SessionStore().get("s2")["disease"] == "Dengue"
+    assert store.get_stats()["pending"] == 1
+
+
+def test_compact_state_and_legacy_json_rows(statements, monkeypatch):
+    probs = [0.05, 0.1, 0.6, 0.05, 0.15, 0.05]
+    legacy = dict(
+        _row("legacy"),
+        base_probs=json.dumps(probs),
+        current_probs=json.dumps(probs),
+        top_diseases=json.dumps(derive_top_diseases(probs)),
+        asked_questions=json.dumps(["influenza_q1"]),
+        evidence_texts="[]",
+        question_answers=json.dumps({"influenza_q1": "yes"}),
+    )
+    with database._engine.connect() as conn:
+        conn.execute(
+            text(
+                f"INSERT INTO diagnosis_sessions ({', '.join(legacy)}) "
+                f"VALUES ({', '.join(':' + k for k in legacy)})"
+            ),
+            legacy,
+        )
+        conn.commit()
+
+    store = SessionStore(write_interval=60)
+    sess = store.get("legacy")
+    assert sess["current_probs"] == probs and sess["question_answers"] == {"influenza_q1": "yes"}
+    assert sess["top_diseases"][0] == {"disease": "Influenza", "probability": 0.6}
+
+    # Written back compactly; top_diseases is derived again on read
+    new_probs = [0.02, 0.03, 0.8, 0.05, 0.05, 0.05]
+    store.update(
+        "legacy",
+        {
+            "current_probs": new_probs,
+            "top_diseases": derive_top_diseases(new_probs),
+            "asked_questions": ["influenza_q1", "not_in_bank"],
+            "question_answers": {"influenza_q1": "yes", "not_in_bank": "unsure"},
+        },
+        sync=True,
+    )
+    with database._engine.connect() as conn:
+        raw = conn.execute(text("SELECT * FROM diagnosis_sessions")).mappings().first()
+    assert raw["current_probs"] == "[]" and raw["top_diseases"] == "[]"
+    assert raw["base_probs_bin"] is None and len(raw["current_probs_bin"]) == 2 + 6 * 8
+
+    fresh = SessionStore().get("legacy")
+    assert fresh["base_probs"] == probs and fresh["current_probs"] == new_probs
+    assert fresh["top_diseases"] == derive_top_diseases(new_probs)
+    assert fresh["asked_questions"] == ["influenza_q1", "not_in_bank"]
+    assert fresh["question_answers"] == {"influenza_q1": "yes", "not_in_bank": "unsure"}
+
+    # Turning the setting off writes JSON and clears the blob it replaces
+    monkeypatch.setattr(diagnosis_session.config, "SESSION_COMPACT_STATE", False)
+    store.update("legacy", {"current_probs": probs}, sync=True)
+    fresh = SessionStore().get("legacy")
+    assert fresh["current_probs"] == probs
+    assert fresh["asked_questions"] == ["influenza_q1", "not_in_bank"]
+
+
+def test_expired_sessions_are_swept_in_batches(statements, monkeypatch):
+    store = SessionStore(mode="sticky", write_interval=60)
+    for i in range(5):
+        store.create(_row(f"old{i}", created_at=diagnosis_session._now() - 7200 - i))
+    store.create(_row("live"))
+
+    run = diagnosis_session.sweep_expired_sessions(batch_size=2, max_batches=2)
+    assert (run["rows_swept"], run["batches"], run["complete"]) == (4, 2, False)
+    assert run["table_rows"] == 2
+
+    statements.clear()
+    run = diagnosis_session.sweep_expired_sessions(batch_size=2, max_batches=2)
+    assert (run["rows_swept"], run["batches"], run["complete"]) == (1, 1, True)
+    assert statements.count("DELETE") == 1
+    assert SessionStore().get("live") is not None and SessionStore().get("old0") is None
+
+    stats = diagnosis_session.get_session_store_stats()["sweep"]
+    assert stats["last_rows_swept"] == 1 and stats["table_rows"] == 1
+
+    if app_package.app is None:
+        pytest.skip("app not created (APP_SKIP_AUTOCREATE)")
+    client = app_package.app.test_client()
+    store.create(_row("old5", created_at=diagnosis_session._now() - 7200))
+    store.create(_row("old6", created_at=diagnosis_session._now() - 7200))
+
+    # Disabled without a configured secret; forbidden with a wrong one
+    assert client.post("/diagnosis/sessions/sweep", json={}).status_code == 403
+    monkeypatch.setattr(diagnosis_session.config, "SESSION_SWEEP_CRON_SECRET", "s3cret")
+    wrong = client.post("/diagnosis/sessions/sweep", headers={"X-Cron-Secret": "guess"})
+    assert wrong.status_code == 403
+
+    # Requested sizes are capped at the configured ones (both rows were left)
+    monkeypatch.setattr(diagnosis_session.config, "SESSION_SWEEP_BATCH_SIZE", 1)
+    monkeypatch.setattr(diagnosis_session.config, "SESSION_SWEEP_MAX_BATCHES", 1)
+    headers = {"X-Cron-Secret": "s3cret"}
+    resp = client.post(
+        "/diagnosis/sessions/sweep",
+        json={"batch_size": 10_000_000, "max_batches": 1_000_000},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert (resp.get_json()["rows_swept"], resp.get_json()["complete"]) == (1, False)
+    resp = client.post("/diagnosis/sessions/sweep", json={"batch_size": -1}, headers=headers)
+    assert resp.status_code == 400
@@ -0,0 +1,74 @@
+"""
+Tests for the request-scoped TextAnalysis object.
+
+Every view must equal what the function it replaces returns, and each is
+computed at most once per text.
+"""
+
+from unittest.mock import patch
+
+import app.config as config
+from app.evidence_keywords import EVIDENCE_KEYWORDS
+from app.question_groups import detect_symptom_groups_in_text
+from app.services.keyword_engine import match_evidence_qids
+from app.services.text_analysis import TextAnalysis, TextAnalysisCache, analyze_text
+from app.services.verification import extract_clinical_concepts, pre_screen_unrelated
+from app.utils import _count_words, _has_medical_keywords, detect_language_heuristic
+
+TEXTS = [
+    "I have had fever and cough for two days",
+    "Mataas na lagnat, masakit ang ulo at may pantal sa braso",
+    "Kahapon umubo ng dugo ako.",
+    "I have chest pain and my left arm is numb",
+    "hello",
+    "",
+]
+
+
+def test_views_match_direct_functions():
+    for text in TEXTS:
+        analysis = TextAnalysis(text)
+        assert analysis.word_count == _count_words(text)
+        assert analysis.is_too_short == (
+            _count_words(text) < config.SYMPTOM_MIN_WORDS
+            and len(text) < config.SYMPTOM_MIN_CHARS
+        )
+        assert analysis.language == detect_language_heuristic(text)
+        assert analysis.has_medical_keywords == _has_medical_keywords(text)
+        assert analysis.clinical_concepts == extract_clinical_concepts(text)
+        assert analysis.symptom_groups == detect_symptom_groups_in_text(text)
+        assert analysis.evidence_qids() == match_evidence_qids(
+            text.lower(), EVIDENCE_KEYWORDS
+        )
+        for lang in ("en", "tl"):
+            assert analysis.unrelated_screen(lang) == pre_screen_unrelated(text, lang=lang)
+
+
+def test_each_view_is_computed_once():
+    analysis = TextAnalysis("Mataas na lagnat at umubo ng dugo")
+    with patch(
+        "app.services.verification.extract_clinical_concepts",
+        wraps=extract_clinical_concepts,
+    ) as extract:
+        for _ in range(3):
+            analysis.clinical_concepts
+        assert extract.call_count == 1
+
+    # Callers may mutate the screen result without touching the cached one
+    screen = analysis.unrelated_screen("tl")
+    screen["detected_concepts"].append("X")
+    assert "X" not in analysis.unrelated_screen("tl")["detected_concepts"]
+
+
+def test_cache_shares_instances_and_evicts_lru():
+    cache = TextAnalysisCache(max_entries=2)
+    a = cache.get("fever and cough")
+    assert cache.get("fever and cough") is a
+    cache.get("headache")
+    cache.get("fever and cough")
+    cache.get("rash")  # evicts "headache"
+    assert cache.get("fever and cough") is a
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 3
+    assert analyze_text("fever") is analyze_text("fever")
@@ -0,0 +1,86 @@
+"""
+Tests for tiered inference (deterministic pass first, MC dropout on escalation).
+"""
+
+import numpy as np
+import pytest
+
+import app as app_package
+import app.config as config
+import app.services.ml_service as ml_service
+from app.services.ml_service import eng_classifier, tier_escalation_reason
+
+TEXT = "I have had a high fever and headache for 3 days"
+
+
+def test_escalation_reasons(monkeypatch):
+    monkeypatch.setattr(config, "MCD_TIERED_MIN_MARGIN", 0.3)
+    monkeypatch.setattr(config, "MCD_TIERED_MAX_ENTROPY", 0.5)
+    assert tier_escalation_reason([0.95, 0.03, 0.02]) is None
+    assert tier_escalation_reason([0.95, 0.03, 0.02], require_mi=True) == "mi_required"
+    assert tier_escalation_reason([0.5, 0.4, 0.1]) == "margin"
+
+    monkeypatch.setattr(config, "MCD_TIERED_MAX_ENTROPY", 0.1)
+    assert tier_escalation_reason([0.7, 0.1, 0.1, 0.1]) == "entropy"
+
+
+def test_deterministic_pass_is_dropout_free():
+    first = eng_classifier.predict_batch_with_uncertainty([TEXT], deterministic=True)[0]
+    second = eng_classifier.predict_batch_with_uncertainty([TEXT], deterministic=True)[0]
+    np.testing.assert_array_equal(first["mean_probabilities"], second["mean_probabilities"])
+    assert first["n_samples"] == 1
+    assert float(first["mutual_information"][0]) == 0.0
+
+
+def test_decisive_prediction_skips_mc(monkeypatch):
+    monkeypatch.setattr(config, "MCD_TIERED_ENABLED", True)
+    monkeypatch.setattr(config, "MCD_TIERED_MIN_MARGIN", 0.0)
+    monkeypatch.setattr(config, "MCD_TIERED_MAX_ENTROPY", 1.0)
+    submitted = []
+    monkeypatch.setattr(ml_service.eng_scheduler, "submit", submitted.append)
+
+    result = ml_service._predict_tiered(eng_classifier, ml_service.eng_scheduler, TEXT)
+    assert result["inference_tier"] == "deterministic"
+    assert result["escalation_reason"] is None
+    assert submitted == []
+
+
+def test_escalates_to_mc_and_records_tier(monkeypatch):
+    monkeypatch.setattr(config, "MCD_TIERED_ENABLED", True)
+    monkeypatch.setattr(config, "MCD_TIERED_MIN_MARGIN", 1.01)
+    before = ml_service.get_inference_stats()["tiers"]["mc"]
+
+    result = ml_service._predict_tiered(eng_classifier, ml_service.eng_scheduler, TEXT)
+    assert result["inference_tier"] == "mc"
+    assert result["escalation_reason"] == "margin"
+    assert result["n_samples"] > 1
+
+    forced = ml_service._predict_tiered(
+        eng_classifier, ml_service.eng_scheduler, TEXT, require_mi=True
+    )
+    assert forced["escalation_reason"] == "mi_required"
+    assert ml_service.get_inference_stats()["tiers"]["mc"] == before + 2
+
+
+@pytest.mark.skipif(app_package.app is None, reason="APP_SKIP_AUTOCREATE set")
+def test_new_case_gets_mc_mutual_information(monkeypatch):
+    monkeypatch.setattr(config, "MCD_TIERED_ENABLED", True)
+    monkeypatch.setattr("app.api.diagnosis.create_session", lambda **kwargs: "session-1")
+    monkeypatch.setattr("app.api.diagnosis.update_session", lambda *args, **kwargs: None)
+    client = app_package.app.test_client()
+    payload = {
+        "symptoms": "I have a high fever, severe joint pain, rash and pain behind my eyes"
+    }
+
+    # The contradiction gate needs real MI, so even a decisive input escalates
+    assert config.MCD_TIERED_REQUIRE_MI
+    before = ml_service.get_inference_stats()["tiers"]["escalations"].get("mi_required", 0)
+    client.post("/diagnosis/new", json=payload)
+    escalations = ml_service.get_inference_stats()["tiers"]["escalations"]
+    assert escalations["mi_required"] == before + 1
+
+    # Opting out keeps the same input on the cheap tier
+    monkeypatch.setattr(config, "MCD_TIERED_REQUIRE_MI", False)
+    resp = client.post("/diagnosis/new", json=payload)
+    assert resp.status_code == 201
+    assert resp.get_json()["data"]["inference"]["inference_tier"] == "deterministic"
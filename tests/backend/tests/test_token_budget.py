@@ -0,0 +1,67 @@
+"""
+Tests for the classifier token budget, length bucketing and long-text chunking.
+"""
+
+import numpy as np
+
+import app.config as config
+from app.services.ml_service import MCDClassifierWithSHAP, eng_classifier
+
+SHORT = "I have had a high fever and headache for 3 days"
+LONG = "I have had a high fever, chills and a pounding headache since Monday. " * 20
+
+
+def test_in_budget_text_encodes_like_the_tokenizer():
+    units, info = eng_classifier._encode_texts([SHORT])
+    assert len(units) == 1
+    assert units[0][2] == eng_classifier.tokenizer(SHORT)["input_ids"]
+    assert info[0]["n_chunks"] == 1
+    assert info[0]["truncated"] is False
+    assert info[0]["token_count"] == len(units[0][2])
+
+
+def test_long_text_is_chunked_within_budget(monkeypatch):
+    monkeypatch.setattr(config, "MCD_MAX_TOKENS", 64)
+    monkeypatch.setattr(config, "MCD_CHUNK_OVERLAP", 16)
+    monkeypatch.setattr(config, "MCD_MAX_CHUNKS", 100)
+    units, info = eng_classifier._encode_texts([LONG])
+
+    assert info[0]["n_chunks"] == len(units) > 1
+    assert info[0]["truncated"] is False
+    assert all(len(ids) <= 64 for _, _, ids in units)
+    assert info[0]["token_count"] > 64
+
+
+def test_chunk_cap_and_truncate_mode_flag_truncation(monkeypatch):
+    monkeypatch.setattr(config, "MCD_MAX_TOKENS", 64)
+    monkeypatch.setattr(config, "MCD_MAX_CHUNKS", 2)
+    units, info = eng_classifier._encode_texts([LONG])
+    assert len(units) == 2 and info[0]["truncated"] is True
+
+    monkeypatch.setattr(config, "MCD_LONG_TEXT_MODE", "truncate")
+    units, info = eng_classifier._encode_texts([LONG])
+    assert len(units) == 1 and info[0]["truncated"] is True
+
+
+def test_length_buckets_group_similar_lengths(monkeypatch):
+    monkeypatch.setattr(config, "MCD_LENGTH_BUCKET_SIZE", 32)
+    units = [(i, 0, [0] * n) for i, n in enumerate([10, 200, 12, 31, 33])]
+    buckets = MCDClassifierWithSHAP._length_buckets(units)
+    assert buckets == [[0, 2, 3], [4], [1]]
+
+
+def test_bucketed_batch_matches_solo_requests(monkeypatch):
+    monkeypatch.setattr(config, "MCD_DETERMINISTIC", True)
+    monkeypatch.setattr(config, "MCD_MAX_TOKENS", 64)
+    monkeypatch.setattr(eng_classifier, "model", eng_classifier.explanation_model)
+    texts = [SHORT, LONG, "watery diarrhea"]
+
+    batched = eng_classifier.predict_batch_with_uncertainty(texts, adaptive=False)
+    for text, result in zip(texts, batched):
+        solo = eng_classifier.predict_batch_with_uncertainty([text], adaptive=False)[0]
+        assert solo["n_chunks"] == result["n_chunks"]
+        np.testing.assert_allclose(
+            solo["mean_probabilities"], result["mean_probabilities"], atol=1e-5
+        )
+    assert batched[1]["n_chunks"] > 1
+    assert batched[0]["token_count"] < batched[1]["token_count"]